@@ -0,0 +1,138 @@
+"""
+单次调用开销微基准：对比每次调用都创建 ctypes 参数（旧实现）与通道预分配参数（当前实现）
+
+使用只返回固定结果的 Python 后端，不依赖硬件和 itican.dll::
+
+    python benchmarks/bench_call_overhead.py
+"""
+import ctypes
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from iticanwrapper import CANMessage, ITICANChannel, MessageType  # noqa: E402
+from iticanwrapper.backend import PythonBackend  # noqa: E402
+
+
+class NullBackend(PythonBackend):
+    """
+    所有调用立即成功；getMessage 总是返回同一条 8 字节的 CAN 消息
+    """
+
+    def _getChannel(self, channel, device, index):
+        channel[0] = 1
+        return 0
+
+    def _setMessage(self, channel, can_id, message_type, extended, data, data_length, timeout):
+        return 0
+
+    def _getMessage(self, channel, can_id, message_type, extended, transmitted, timestamp, data, data_length,
+                    timeout):
+        can_id[0] = 0x123
+        data_length[0] = 8
+        return 0
+
+    def _getBaudRate(self, channel, baud_rate):
+        baud_rate[0] = 500000
+        return 0
+
+    def _isTerminationSupported(self, channel, supported):
+        supported[0] = 1
+        return 0
+
+
+# ---------------------------------------------------------------------- 旧实现（每次调用都分配 ctypes 对象）
+
+def legacy_set_message(chn, one_message, timeout=0):
+    can_id_ = ctypes.c_uint32(one_message.id_)
+    message_type_ = ctypes.c_uint8(one_message.type_.value)
+    is_extended_ = ctypes.c_uint8(one_message.extended_)
+    data_array_ = (ctypes.c_uint8 * len(one_message.data_))(*(one_message.data_))
+    date_length_ = ctypes.c_uint8(len(one_message.data_))
+    timeout_ = ctypes.c_int32(timeout)
+    return chn._dll.setMessage(chn._chn_pointer, can_id_, message_type_, is_extended_, data_array_, date_length_,
+                               timeout_)
+
+
+def legacy_get_message(chn, one_message_output, timeout=0):
+    id_temp = ctypes.c_uint32(0)
+    message_type_temp = ctypes.c_uint8(0)
+    can_extended_temp = ctypes.c_uint8(0)
+    transmitted_temp = ctypes.c_uint8(0)
+    timestamp_temp = ctypes.c_uint64(0)
+    data_temp = (ctypes.c_uint8 * 64)()
+    data_l_temp = ctypes.c_uint8(0)
+    timeout_temp = ctypes.c_int32(timeout)
+    result = chn._dll.getMessage(chn._chn_pointer, ctypes.byref(id_temp), ctypes.byref(message_type_temp),
+                                 ctypes.byref(can_extended_temp), ctypes.byref(transmitted_temp),
+                                 ctypes.byref(timestamp_temp), data_temp, ctypes.byref(data_l_temp), timeout_temp)
+    if result == 0:
+        data_list = list(data_temp)[:data_l_temp.value]
+        one_message_output.clear()
+        one_message_output.append(CANMessage(id_temp.value, MessageType(message_type_temp.value),
+                                             can_extended_temp.value, data_list[:], timestamp_temp.value))
+    return result
+
+
+def legacy_get_baud_rate(chn, baud_rate_output):
+    baud_rate_ = ctypes.c_uint64(0)
+    result = chn._dll.getBaudRate(chn._chn_pointer, ctypes.byref(baud_rate_))
+    if result == 0:
+        baud_rate_output.clear()
+        baud_rate_output.append(baud_rate_.value)
+    return result
+
+
+def legacy_check_if_termination_supported(chn, check_result):
+    supported_temp = ctypes.c_uint8(0)
+    result = chn._dll.isTerminationSupported(chn._chn_pointer, ctypes.byref(supported_temp))
+    if result == 0:
+        check_result.clear()
+        check_result.append(supported_temp.value != 0)
+    return result
+
+
+def measure(function, number):
+    return min(timeit.repeat(function, number=number, repeat=7)) / number * 1e6
+
+
+def main(number=100000):
+    backend = NullBackend()
+    container = []
+    ITICANChannel.get_channel(container, 'null', backend)
+    chn = container[0]
+    message = CANMessage(0x123, MessageType.Classic_CAN, 0, [1, 2, 3, 4, 5, 6, 7, 8])
+    output = []
+
+    # 后端自身开销：直接调用，参数全部预分配
+    raw_args = chn._rx_args
+    pointer = chn._chn_pointer
+    out_u8_ptr = ctypes.byref(ctypes.c_uint8(0))
+    out_u64_ptr = ctypes.byref(ctypes.c_uint64(0))
+    baselines = {
+        'get_message': lambda: backend.getMessage(pointer, *raw_args, 0),
+        'set_message': lambda: backend.setMessage(pointer, 1, 0, 0, chn._tx_data, 8, 0),
+        'get_baud_rate': lambda: backend.getBaudRate(pointer, out_u64_ptr),
+        'check_if_termination_supported': lambda: backend.isTerminationSupported(pointer, out_u8_ptr),
+    }
+    cases = {
+        'get_message': (lambda: legacy_get_message(chn, output), lambda: chn.get_message(output)),
+        'set_message': (lambda: legacy_set_message(chn, message), lambda: chn.set_message(message)),
+        'get_baud_rate': (lambda: legacy_get_baud_rate(chn, output), lambda: chn.get_baud_rate(output)),
+        'check_if_termination_supported': (lambda: legacy_check_if_termination_supported(chn, output),
+                                           lambda: chn.check_if_termination_supported(output)),
+    }
+    print('%-32s %10s %10s %10s %14s %14s' % ('call (us/call)', 'backend', 'before', 'after', 'overhead before',
+                                              'overhead after'))
+    for name, (before, after) in cases.items():
+        base = measure(baselines[name], number)
+        t_before = measure(before, number)
+        t_after = measure(after, number)
+        print('%-32s %10.3f %10.3f %10.3f %14.3f %14.3f' % (name, base, t_before, t_after, t_before - base,
+                                                            t_after - base))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,344 @@
+"""
+热路径基准：针对本地编译的桩动态库（benchmarks/stub/itican_stub.c，按 canwrapper.h 实现的内存队列）
+测量单帧与批量收发、get_last_error 以及各设置函数的单次调用耗时、帧率和内存分配，
+结果写入 JSON 文件，可与之前的结果比较以发现封装层的性能回退。
+
+需要 Linux 与 C 编译器（默认 gcc，可通过环境变量 CC 修改）::
+
+    python benchmarks/bench_hot_paths.py --output results.json
+    python benchmarks/bench_hot_paths.py --compare results.json --threshold 0.1
+
+--compare 时耗时增加超过 threshold 的用例视为回退，退出码为 1。
+"""
+import argparse
+import ctypes
+import datetime
+import fnmatch
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from iticanwrapper import (CANFrame, CANMessage, CANMessageBatch, ITICANChannel, MessageType, OpenMode,  # noqa: E402
+                           OpenType, TxMode)
+from iticanwrapper.backend import DLLBackend  # noqa: E402
+from iticanwrapper.bin import importDLL  # noqa: E402
+from iticanwrapper.errors import clear_error_cache, describe_error  # noqa: E402
+
+STUB_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stub')
+STUB_SOURCE = os.path.join(STUB_DIRECTORY, 'itican_stub.c')
+STUB_LIBRARY = os.path.join(STUB_DIRECTORY, 'build', 'libitican_stub.so')
+
+SCHEMA_VERSION = 1
+
+
+def build_stub(output: str = STUB_LIBRARY, compiler: str = None, force: bool = False) -> str:
+    """
+    编译桩动态库；已存在且比源文件新时不重新编译
+
+    :param output: 动态库路径
+    :param compiler: C 编译器，默认为环境变量 CC 或 gcc
+    :param force: 是否强制重新编译
+    :return: 动态库路径
+    """
+    if not force and os.path.exists(output) and os.path.getmtime(output) >= os.path.getmtime(STUB_SOURCE):
+        return output
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    command = [compiler or os.environ.get('CC', 'gcc'), '-O2', '-shared', '-fPIC', '-I', importDLL.bin_directory,
+               '-o', output, STUB_SOURCE]
+    subprocess.check_call(command)
+    return output
+
+
+def open_channel(backend, name: str) -> ITICANChannel:
+    container = []
+    result = ITICANChannel.get_channel(container, name, backend)
+    if result != 0:
+        raise RuntimeError("getChannel(%s) failed with %d" % (name, result))
+    chn = container[0]
+    result = chn.open_channel(OpenType.FD_CAN_BRS, OpenMode.Normal)
+    if result != 0:
+        raise RuntimeError("openChannel(%s) failed with %d" % (name, result))
+    return chn
+
+
+def check_loopback(backend):
+    """
+    用回环通道确认桩库与封装层的收发结果一致，避免对错误的调用路径计时
+    """
+    chn = open_channel(backend, 'STUB-0')
+    try:
+        sent = [CANFrame(0x100 + i, MessageType.FD_BRS_CAN if i % 2 else MessageType.Classic_CAN, i % 3 == 0,
+                         bytes(range(i % 9))) for i in range(32)]
+        for frame in sent[:16]:
+            assert chn.set_message(frame) == 0
+        batch = CANMessageBatch(16)
+        for frame in sent[16:]:
+            batch.append(frame.id_, frame.type_, frame.extended_, frame.data_)
+        output = []
+        assert chn.set_messages_batch(batch, output) == 0 and output == [16]
+        received = []
+        for _ in range(8):
+            assert chn.get_frame(output) == 0
+            received.append(output[0])
+        receive_batch = CANMessageBatch(32)
+        assert chn.get_messages_batch(receive_batch, 24) == 0
+        received.extend(receive_batch.to_frames())
+        assert [(f.id_, f.type_, f.extended_, bytes(f.data_)) for f in received] == \
+            [(f.id_, f.type_, f.extended_, bytes(f.data_)) for f in sent]
+    finally:
+        chn.close_channel()
+
+
+def build_cases(backend, batch_size: int) -> list:
+    """
+    :return: [(用例名, 分组, 每次调用的帧数, 被测函数, 直接调用动态库的基线函数或 None)]
+    """
+    chn = open_channel(backend, 'STUB-1')
+    pointer = chn._chn_pointer
+    library = backend.library
+    output = []
+
+    message = CANMessage(0x123, MessageType.Classic_CAN, 0, [1, 2, 3, 4, 5, 6, 7, 8])
+    frame = CANFrame(0x123, MessageType.Classic_CAN, 0, bytes(range(8)))
+    fd_frame = CANFrame(0x123, MessageType.FD_BRS_CAN, 0, bytes(range(64)))
+    messages = [CANMessage(0x100 + i % 64, MessageType.Classic_CAN, 0, [i & 0xFF] * 8) for i in range(batch_size)]
+    tx_batch = CANMessageBatch(batch_size)
+    for item in messages:
+        tx_batch.append(item.id_, item.type_, item.extended_, item.data_)
+    rx_batch = CANMessageBatch(batch_size)
+
+    # 基线：参数全部预分配，直接调用 ctypes 函数
+    tx_data = (ctypes.c_uint8 * 64)(*range(64))
+    raw_rx = chn._rx_args
+    raw_items = ctypes.c_uint32(batch_size)
+    raw_items_ptr = ctypes.byref(raw_items)
+    error_buffer = ctypes.create_string_buffer(500)
+    error_code = ctypes.c_int32(-8)
+    error_code_ptr = ctypes.byref(error_code)
+    out_u8_ptr = ctypes.byref(ctypes.c_uint8(0))
+    out_u64_ptr = ctypes.byref(ctypes.c_uint64(0))
+    out_i32_ptr = ctypes.byref(ctypes.c_int32(0))
+
+    def raw_set_messages():
+        raw_items.value = batch_size
+        return library.setMessages(pointer, tx_batch.id_array, tx_batch.type_array, tx_batch.extended_array,
+                                   tx_batch.data_array, tx_batch.data_length_array, raw_items_ptr, 0)
+
+    def raw_get_messages():
+        raw_items.value = batch_size
+        return library.getMessages(pointer, rx_batch.id_array, rx_batch.type_array, rx_batch.extended_array,
+                                   rx_batch.transmitted_array, rx_batch.timestamp_array, rx_batch.data_array,
+                                   rx_batch.data_length_array, raw_items_ptr, 0)
+
+    cases = [
+        ('set_message', 'single', 1, lambda: chn.set_message(message),
+         lambda: library.setMessage(pointer, 0x123, 0, 0, tx_data, 8, 0)),
+        ('set_message_frame', 'single', 1, lambda: chn.set_message(frame),
+         lambda: library.setMessage(pointer, 0x123, 0, 0, tx_data, 8, 0)),
+        ('set_message_fd64', 'single', 1, lambda: chn.set_message(fd_frame),
+         lambda: library.setMessage(pointer, 0x123, 24, 0, tx_data, 64, 0)),
+        ('get_message', 'single', 1, lambda: chn.get_message(output),
+         lambda: library.getMessage(pointer, *raw_rx, 0)),
+        ('get_frame', 'single', 1, lambda: chn.get_frame(output),
+         lambda: library.getMessage(pointer, *raw_rx, 0)),
+        ('get_message_count', 'single', 0, lambda: chn.get_message_count(output),
+         lambda: library.getMessageCount(pointer, out_i32_ptr)),
+        ('set_messages', 'batch', batch_size, lambda: chn.set_messages(messages, output), raw_set_messages),
+        ('set_messages_batch', 'batch', batch_size, lambda: chn.set_messages_batch(tx_batch, output),
+         raw_set_messages),
+        ('get_messages', 'batch', batch_size, lambda: chn.get_messages(output, batch_size), raw_get_messages),
+        ('get_messages_batch', 'batch', batch_size, lambda: chn.get_messages_batch(rx_batch, batch_size),
+         raw_get_messages),
+        ('get_last_error', 'error', 0, lambda: ITICANChannel.get_last_error(-8, output, backend),
+         lambda: library.getLastError(error_buffer, error_code_ptr)),
+        ('describe_error', 'error', 0, lambda: describe_error(-8, backend), None),
+        ('set_baud_rate', 'settings', 0, lambda: chn.set_baud_rate(500000),
+         lambda: library.setBaudRate(pointer, 500000)),
+        ('get_baud_rate', 'settings', 0, lambda: chn.get_baud_rate(output),
+         lambda: library.getBaudRate(pointer, out_u64_ptr)),
+        ('set_fd_baud_rate', 'settings', 0, lambda: chn.set_fd_baud_rate(2000000),
+         lambda: library.setFdBaudRate(pointer, 2000000)),
+        ('get_fd_baud_rate', 'settings', 0, lambda: chn.get_fd_baud_rate(output),
+         lambda: library.getFdBaudRate(pointer, out_u64_ptr)),
+        ('get_custom_baud_rate', 'settings', 0, lambda: chn.get_custom_baud_rate(output), None),
+        ('set_termination', 'settings', 0, lambda: chn.set_termination(True),
+         lambda: library.setTermination(pointer, 1)),
+        ('check_if_termination_supported', 'settings', 0, lambda: chn.check_if_termination_supported(output),
+         lambda: library.isTerminationSupported(pointer, out_u8_ptr)),
+        ('check_if_termination_enabled', 'settings', 0, lambda: chn.check_if_termination_enabled(output),
+         lambda: library.isTerminationEnabled(pointer, out_u8_ptr)),
+        ('set_echo_message', 'settings', 0, lambda: chn.set_echo_message(True), None),
+        ('bus_error_report', 'settings', 0, lambda: chn.bus_error_report(True),
+         lambda: library.setBusErrorReport(pointer, 1)),
+        ('apply_settings', 'settings', 0, lambda: chn.apply_settings(True),
+         lambda: library.applySettings(pointer, 1)),
+        ('check_if_tx_mode_supported', 'settings', 0,
+         lambda: chn.check_if_tx_mode_supported(TxMode.QUEUE_SEND, output),
+         lambda: library.isTxModeSupported(pointer, 2, out_u8_ptr)),
+        ('set_tx_mode', 'settings', 0, lambda: chn.set_tx_mode(TxMode.Normal), lambda: library.setTxMode(pointer, 0)),
+        ('set_tx_timing', 'settings', 0, lambda: chn.set_tx_timing(0x123, 10),
+         lambda: library.setTxTiming(pointer, 0x123, 10)),
+        ('set_channel_blink', 'settings', 0, lambda: chn.set_channel_blink(False),
+         lambda: library.blinkChannel(pointer, 0)),
+        ('check_if_channel_blinking', 'settings', 0, lambda: chn.check_if_channel_blinking(output),
+         lambda: library.isChannelBlinking(pointer, out_u8_ptr)),
+    ]
+    return cases
+
+
+def measure_time(function, number: int, repeat: int) -> float:
+    """
+    :return: 单次调用耗时 (us)，取 repeat 次中最小值
+    """
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number * 1e6
+
+
+def measure_allocations(function, number: int) -> tuple:
+    """
+    统计内存分配：CPython 不提供按调用计数的分配次数，这里给出两项可比较的指标
+
+    :return: (每次调用后仍未释放的内存块数, 单次调用的临时分配峰值字节数)
+    """
+    for _ in range(number):
+        function()
+    gc.collect()
+    gc.disable()
+    try:
+        blocks = sys.getallocatedblocks()
+        for _ in range(number):
+            function()
+        retained = (sys.getallocatedblocks() - blocks) / number
+        tracemalloc.start()
+        try:
+            peaks = []
+            for _ in range(min(number, 100)):
+                current = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                function()
+                peaks.append(tracemalloc.get_traced_memory()[1] - current)
+        finally:
+            tracemalloc.stop()
+    finally:
+        gc.enable()
+    return retained, min(peaks)
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(__file__),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def run(library_path: str, number: int, repeat: int, batch_size: int, pattern: str = '*') -> dict:
+    backend = DLLBackend(importDLL.Library(library_path))
+    clear_error_cache(backend)
+    check_loopback(backend)
+    results = {}
+    for name, group, frames, function, baseline in build_cases(backend, batch_size):
+        if not fnmatch.fnmatch(name, pattern):
+            continue
+        calls = max(number // max(frames, 1), 100) if group == 'batch' else number
+        result = function()
+        if isinstance(result, int) and result != 0:
+            raise RuntimeError("%s returned %r" % (name, result))
+        per_call = measure_time(function, calls, repeat)
+        entry = {
+            'group': group,
+            'us_per_call': per_call,
+            'frames_per_call': frames,
+        }
+        if frames:
+            entry['frames_per_second'] = frames / per_call * 1e6
+        if baseline is not None:
+            library_time = measure_time(baseline, calls, repeat)
+            entry['library_us_per_call'] = library_time
+            entry['overhead_us_per_call'] = per_call - library_time
+        entry['retained_blocks_per_call'], entry['peak_alloc_bytes'] = \
+            measure_allocations(function, min(calls, 1000))
+        results[name] = entry
+    return {
+        'schema': SCHEMA_VERSION,
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'git_revision': git_revision(),
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'config': {'number': number, 'repeat': repeat, 'batch_size': batch_size},
+        'results': results,
+    }
+
+
+def print_results(report: dict):
+    print('%-32s %10s %10s %10s %12s %8s %8s' % ('case', 'us/call', 'library', 'overhead', 'frames/s',
+                                                 'blocks', 'peak B'))
+    for name, entry in report['results'].items():
+        print('%-32s %10.3f %10s %10s %12s %8.2f %8d' % (
+            name, entry['us_per_call'],
+            '%.3f' % entry['library_us_per_call'] if 'library_us_per_call' in entry else '-',
+            '%.3f' % entry['overhead_us_per_call'] if 'overhead_us_per_call' in entry else '-',
+            '%.0f' % entry['frames_per_second'] if 'frames_per_second' in entry else '-',
+            entry['retained_blocks_per_call'], entry['peak_alloc_bytes']))
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list:
+    """
+    与之前的结果比较单次调用耗时
+
+    :param threshold: 允许的耗时增加比例，0.1 即 10%
+    :return: 回退的用例名列表
+    """
+    regressions = []
+    print()
+    print('%-32s %10s %10s %8s' % ('case', 'baseline', 'current', 'ratio'))
+    for name, entry in report['results'].items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+        ratio = entry['us_per_call'] / previous['us_per_call']
+        regressed = ratio > 1 + threshold
+        if regressed:
+            regressions.append(name)
+        print('%-32s %10.3f %10.3f %8.2f%s' % (name, previous['us_per_call'], entry['us_per_call'], ratio,
+                                               '  REGRESSION' if regressed else ''))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', help='结果 JSON 文件')
+    parser.add_argument('--compare', help='用于比较的之前结果 JSON 文件')
+    parser.add_argument('--threshold', type=float, default=0.1, help='视为回退的耗时增加比例')
+    parser.add_argument('--number', type=int, default=20000, help='每轮调用次数（批量用例按帧数折算）')
+    parser.add_argument('--repeat', type=int, default=5, help='计时轮数，取最小值')
+    parser.add_argument('--batch-size', type=int, default=256, help='批量用例每次调用的帧数')
+    parser.add_argument('--filter', default='*', help='只运行名称匹配该通配符的用例')
+    parser.add_argument('--library', help='使用已编译的桩动态库，不重新编译')
+    parser.add_argument('--rebuild', action='store_true', help='强制重新编译桩动态库')
+    args = parser.parse_args(argv)
+
+    library_path = args.library or build_stub(force=args.rebuild)
+    report = run(library_path, args.number, args.repeat, args.batch_size, args.filter)
+    print_results(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            baseline = json.load(file)
+        if compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
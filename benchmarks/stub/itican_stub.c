@@ -0,0 +1,495 @@
+/**
+ * @file itican_stub.c
+ * @brief In-memory implementation of canwrapper.h used by the benchmark suite.
+ *
+ * Two channels are provided:
+ *   STUB-0  loopback: transmitted frames are queued for reception on the same channel.
+ *   STUB-1  source:   every receive call returns freshly generated frames, transmit calls are discarded.
+ *
+ * No call blocks: timeouts are ignored and an empty queue returns STUB_ERROR_TIMEOUT at once.
+ * The stub is not thread safe; the benchmarks call it from a single thread.
+ * Error codes match iticanwrapper.virtual_bus.
+ *
+ * Build (see build_stub in benchmarks/bench_hot_paths.py):
+ *   gcc -O2 -shared -fPIC -I iticanwrapper/bin -o libitican_stub.so benchmarks/stub/itican_stub.c
+ */
+
+#include <stdio.h>
+#include <string.h>
+
+#include "canwrapper.h"
+
+#define STUB_ERROR_NONE 0
+#define STUB_ERROR_CHANNEL_NOT_FOUND (-2)
+#define STUB_ERROR_INVALID_HANDLE (-3)
+#define STUB_ERROR_NOT_OPEN (-4)
+#define STUB_ERROR_ALREADY_OPEN (-5)
+#define STUB_ERROR_INVALID_PARAMETER (-6)
+#define STUB_ERROR_TIMEOUT (-8)
+#define STUB_ERROR_TX_QUEUE_FULL (-9)
+
+#define STUB_CHANNEL_COUNT 2
+#define STUB_QUEUE_SIZE 65536
+#define STUB_SOURCE_BURST 64
+#define STUB_FD_TYPE_FLAG 16
+
+typedef struct
+{
+    uint32_t id;
+    uint8_t type;
+    uint8_t extended;
+    uint8_t length;
+    uint64_t timestamp;
+    uint8_t data[64];
+} StubFrame;
+
+typedef struct
+{
+    const char *name;
+    int source;
+    int open;
+    uint64_t baudRate;
+    uint64_t fdBaudRate;
+    char customBaudRate[WRAPPER_MAX_BITRATE_LEN];
+    uint8_t termination;
+    uint8_t echo;
+    uint8_t busErrorReport;
+    uint8_t txMode;
+    uint8_t blinking;
+    uint64_t clock;
+    uint32_t sequence;
+    uint32_t head;
+    uint32_t count;
+    StubFrame *queue;
+} StubChannel;
+
+/* Zero-initialized so the queues go to .bss instead of bloating the library image. */
+static StubFrame queues[STUB_CHANNEL_COUNT][STUB_QUEUE_SIZE];
+
+static StubChannel channels[STUB_CHANNEL_COUNT] = {
+    {.name = "STUB-0", .source = 0, .queue = queues[0]},
+    {.name = "STUB-1", .source = 1, .queue = queues[1]},
+};
+
+static const char *describe(int32_t code)
+{
+    switch (code)
+    {
+    case STUB_ERROR_NONE:
+        return "no error";
+    case STUB_ERROR_CHANNEL_NOT_FOUND:
+        return "channel not found";
+    case STUB_ERROR_INVALID_HANDLE:
+        return "invalid channel handle";
+    case STUB_ERROR_NOT_OPEN:
+        return "channel is not open";
+    case STUB_ERROR_ALREADY_OPEN:
+        return "channel is already open";
+    case STUB_ERROR_INVALID_PARAMETER:
+        return "invalid parameter";
+    case STUB_ERROR_TIMEOUT:
+        return "timeout";
+    case STUB_ERROR_TX_QUEUE_FULL:
+        return "transmit queue is full";
+    default:
+        return "unknown error code";
+    }
+}
+
+static StubChannel *lookup(void *channel)
+{
+    int i;
+    for (i = 0; i < STUB_CHANNEL_COUNT; i++)
+    {
+        if (channel == &channels[i])
+        {
+            return &channels[i];
+        }
+    }
+    return NULL;
+}
+
+#define STUB_CHANNEL(variable, channel)           \
+    StubChannel *variable = lookup(channel);      \
+    if (variable == NULL)                         \
+    {                                             \
+        return STUB_ERROR_INVALID_HANDLE;         \
+    }
+
+#define STUB_OPEN_CHANNEL(variable, channel)      \
+    STUB_CHANNEL(variable, channel)               \
+    if (!variable->open)                          \
+    {                                             \
+        return STUB_ERROR_NOT_OPEN;               \
+    }
+
+static int32_t push(StubChannel *chn, uint32_t id, uint8_t type, uint8_t extended, const uint8_t *data,
+                    uint8_t length)
+{
+    StubFrame *frame;
+    if (length > ((type & STUB_FD_TYPE_FLAG) ? 64 : 8))
+    {
+        return STUB_ERROR_INVALID_PARAMETER;
+    }
+    if (chn->source)
+    {
+        return STUB_ERROR_NONE;
+    }
+    if (chn->count == STUB_QUEUE_SIZE)
+    {
+        return STUB_ERROR_TX_QUEUE_FULL;
+    }
+    frame = &chn->queue[(chn->head + chn->count) % STUB_QUEUE_SIZE];
+    frame->id = id;
+    frame->type = type;
+    frame->extended = extended;
+    frame->length = length;
+    chn->clock += 100;
+    frame->timestamp = chn->clock;
+    memcpy(frame->data, data, length);
+    chn->count++;
+    return STUB_ERROR_NONE;
+}
+
+static const StubFrame *pop(StubChannel *chn)
+{
+    static StubFrame generated;
+    const StubFrame *frame;
+    int i;
+    if (chn->source)
+    {
+        chn->sequence++;
+        chn->clock += 100;
+        generated.id = 0x100 + (chn->sequence & 0xFF);
+        generated.type = 0;
+        generated.extended = 0;
+        generated.length = 8;
+        generated.timestamp = chn->clock;
+        for (i = 0; i < 8; i++)
+        {
+            generated.data[i] = (uint8_t)(chn->sequence >> (i % 4 * 8));
+        }
+        return &generated;
+    }
+    if (chn->count == 0)
+    {
+        return NULL;
+    }
+    frame = &chn->queue[chn->head];
+    chn->head = (chn->head + 1) % STUB_QUEUE_SIZE;
+    chn->count--;
+    return frame;
+}
+
+DLLExport int32_t findAllChannels(char *str, int32_t *chnCount)
+{
+    int i;
+    str[0] = '\0';
+    for (i = 0; i < STUB_CHANNEL_COUNT; i++)
+    {
+        if (i)
+        {
+            strcat(str, "\t");
+        }
+        strcat(str, channels[i].name);
+    }
+    *chnCount = STUB_CHANNEL_COUNT;
+    return STUB_ERROR_NONE;
+}
+
+DLLExport int32_t getLastError(char *error, int32_t *eventNum)
+{
+    snprintf(error, WRAPPER_MAX_ERROR_LEN, "%s", describe(*eventNum));
+    return STUB_ERROR_NONE;
+}
+
+DLLExport int32_t getChannel(void **channel, char *device, int32_t chnIndex)
+{
+    int i;
+    for (i = 0; i < STUB_CHANNEL_COUNT; i++)
+    {
+        if (strcmp(device, channels[i].name) == 0)
+        {
+            *channel = &channels[i];
+            return STUB_ERROR_NONE;
+        }
+    }
+    if (strcmp(device, "STUB") == 0 && chnIndex >= 0 && chnIndex < STUB_CHANNEL_COUNT)
+    {
+        *channel = &channels[chnIndex];
+        return STUB_ERROR_NONE;
+    }
+    *channel = NULL;
+    return STUB_ERROR_CHANNEL_NOT_FOUND;
+}
+
+DLLExport int32_t openChannel(void *channel, int32_t type, int32_t mode)
+{
+    STUB_CHANNEL(chn, channel)
+    if (type < 0 || type > 3 || mode < 0 || mode > 2)
+    {
+        return STUB_ERROR_INVALID_PARAMETER;
+    }
+    if (chn->open)
+    {
+        return STUB_ERROR_ALREADY_OPEN;
+    }
+    chn->open = 1;
+    chn->head = 0;
+    chn->count = 0;
+    return STUB_ERROR_NONE;
+}
+
+DLLExport int32_t closeChannel(void *channel)
+{
+    STUB_OPEN_CHANNEL(chn, channel)
+    chn->open = 0;
+    return STUB_ERROR_NONE;
+}
+
+DLLExport int32_t getChannelName(void *channel, char *name)
+{
+    STUB_CHANNEL(chn, channel)
+    snprintf(name, WRAPPER_MAX_NAME_LEN, "%s", chn->name);
+    return STUB_ERROR_NONE;
+}
+
+DLLExport int32_t setBaudRate(void *channel, uint64_t baudRate)
+{
+    STUB_CHANNEL(chn, channel)
+    chn->baudRate = baudRate;
+    return STUB_ERROR_NONE;
+}
+
+DLLExport int32_t getBaudRate(void *channel, uint64_t *baudRate)
+{
+    STUB_CHANNEL(chn, channel)
+    *baudRate = chn->baudRate;
+    return STUB_ERROR_NONE;
+}
+
+DLLExport int32_t setFdBaudRate(void *channel, uint64_t baudRate)
+{
+    STUB_CHANNEL(chn, channel)
+    chn->fdBaudRate = baudRate;
+    return STUB_ERROR_NONE;
+}
+
+DLLExport int32_t getFdBaudRate(void *channel, uint64_t *baudRate)
+{
+    STUB_CHANNEL(chn, channel)
+    *baudRate = chn->fdBaudRate;
+    return STUB_ERROR_NONE;
+}
+
+DLLExport int32_t setCustomBaudRate(void *channel, char *baudRate)
+{
+    STUB_CHANNEL(chn, channel)
+    snprintf(chn->customBaudRate, WRAPPER_MAX_BITRATE_LEN, "%s", baudRate);
+    return STUB_ERROR_NONE;
+}
+
+DLLExport int32_t getCustomBaudRate(void *channel, char *baudRate)
+{
+    STUB_CHANNEL(chn, channel)
+    snprintf(baudRate, WRAPPER_MAX_BITRATE_LEN, "%s", chn->customBaudRate);
+    return STUB_ERROR_NONE;
+}
+
+DLLExport int32_t setMessage(void *channel, uint32_t id, uint8_t type, uint8_t extended, uint8_t *data,
+                             uint8_t dataLength, int32_t timeout)
+{
+    STUB_OPEN_CHANNEL(chn, channel)
+    (void)timeout;
+    return push(chn, id, type, extended, data, dataLength);
+}
+
+DLLExport int32_t setMessages(void *channel, uint32_t *id, uint8_t *type, uint8_t *extended, uint8_t *data,
+                              uint8_t *dataLength, uint32_t *items, int32_t timeout)
+{
+    uint32_t i;
+    uint32_t offset = 0;
+    int32_t result = STUB_ERROR_NONE;
+    STUB_OPEN_CHANNEL(chn, channel)
+    (void)timeout;
+    for (i = 0; i < *items; i++)
+    {
+        result = push(chn, id[i], type[i], extended[i], data + offset, dataLength[i]);
+        if (result != STUB_ERROR_NONE)
+        {
+            break;
+        }
+        offset += dataLength[i];
+    }
+    *items = i;
+    return result;
+}
+
+DLLExport int32_t getMessageCount(void *channel, int32_t *count)
+{
+    STUB_OPEN_CHANNEL(chn, channel)
+    *count = chn->source ? STUB_SOURCE_BURST : (int32_t)chn->count;
+    return STUB_ERROR_NONE;
+}
+
+DLLExport int32_t getMessage(void *channel, uint32_t *id, uint8_t *type, uint8_t *extended, uint8_t *transmitted,
+                             uint64_t *timestamp, uint8_t *data, uint8_t *dataLength, int32_t timeout)
+{
+    const StubFrame *frame;
+    STUB_OPEN_CHANNEL(chn, channel)
+    (void)timeout;
+    frame = pop(chn);
+    if (frame == NULL)
+    {
+        return STUB_ERROR_TIMEOUT;
+    }
+    *id = frame->id;
+    *type = frame->type;
+    *extended = frame->extended;
+    *transmitted = chn->source ? 0 : 1;
+    *timestamp = frame->timestamp;
+    memcpy(data, frame->data, frame->length);
+    *dataLength = frame->length;
+    return STUB_ERROR_NONE;
+}
+
+DLLExport int32_t getMessages(void *channel, uint32_t *id, uint8_t *type, uint8_t *extended, uint8_t *transmitted,
+                              uint64_t *timestamp, uint8_t *data, uint8_t *dataLength, uint32_t *items,
+                              int32_t timeout)
+{
+    const StubFrame *frame;
+    uint32_t i;
+    uint32_t wanted = *items;
+    uint32_t offset = 0;
+    STUB_OPEN_CHANNEL(chn, channel)
+    if ((int32_t)wanted < 0)
+    {
+        wanted = chn->source ? STUB_SOURCE_BURST : chn->count;
+    }
+    for (i = 0; i < wanted; i++)
+    {
+        frame = pop(chn);
+        if (frame == NULL)
+        {
+            break;
+        }
+        id[i] = frame->id;
+        type[i] = frame->type;
+        extended[i] = frame->extended;
+        transmitted[i] = chn->source ? 0 : 1;
+        timestamp[i] = frame->timestamp;
+        memcpy(data + offset, frame->data, frame->length);
+        dataLength[i] = frame->length;
+        offset += frame->length;
+    }
+    *items = i;
+    return (i < wanted && timeout != 0) ? STUB_ERROR_TIMEOUT : STUB_ERROR_NONE;
+}
+
+DLLExport int32_t isTerminationSupported(void *channel, uint8_t *supported)
+{
+    STUB_CHANNEL(chn, channel)
+    (void)chn;
+    *supported = 1;
+    return STUB_ERROR_NONE;
+}
+
+DLLExport int32_t setTermination(void *channel, uint8_t enabled)
+{
+    STUB_CHANNEL(chn, channel)
+    chn->termination = enabled;
+    return STUB_ERROR_NONE;
+}
+
+DLLExport int32_t isTerminationEnabled(void *channel, uint8_t *enabled)
+{
+    STUB_CHANNEL(chn, channel)
+    *enabled = chn->termination;
+    return STUB_ERROR_NONE;
+}
+
+DLLExport int32_t isEchoMessageSupported(void *channel, uint8_t *supported)
+{
+    STUB_CHANNEL(chn, channel)
+    (void)chn;
+    *supported = 1;
+    return STUB_ERROR_NONE;
+}
+
+DLLExport int32_t setEchoMessage(void *channel, uint8_t echo)
+{
+    STUB_CHANNEL(chn, channel)
+    chn->echo = echo;
+    return STUB_ERROR_NONE;
+}
+
+DLLExport int32_t isEchoMessageEnabled(void *channel, uint8_t *echo)
+{
+    STUB_CHANNEL(chn, channel)
+    *echo = chn->echo;
+    return STUB_ERROR_NONE;
+}
+
+DLLExport int32_t setBusErrorReport(void *channel, uint8_t enabled)
+{
+    STUB_CHANNEL(chn, channel)
+    chn->busErrorReport = enabled;
+    return STUB_ERROR_NONE;
+}
+
+DLLExport int32_t applySettings(void *channel, uint8_t temporary)
+{
+    STUB_CHANNEL(chn, channel)
+    (void)chn;
+    (void)temporary;
+    return STUB_ERROR_NONE;
+}
+
+DLLExport int32_t isTxModeSupported(void *channel, uint8_t mode, uint8_t *supported)
+{
+    STUB_CHANNEL(chn, channel)
+    (void)chn;
+    *supported = mode <= 2;
+    return STUB_ERROR_NONE;
+}
+
+DLLExport int32_t setTxMode(void *channel, uint8_t mode)
+{
+    STUB_CHANNEL(chn, channel)
+    if (mode > 2)
+    {
+        return STUB_ERROR_INVALID_PARAMETER;
+    }
+    chn->txMode = mode;
+    return STUB_ERROR_NONE;
+}
+
+DLLExport int32_t setTxTiming(void *channel, uint32_t id, int32_t time)
+{
+    STUB_CHANNEL(chn, channel)
+    (void)chn;
+    (void)id;
+    return time < 0 ? STUB_ERROR_INVALID_PARAMETER : STUB_ERROR_NONE;
+}
+
+DLLExport int32_t isBlinkSupported(void *channel, uint8_t *supported)
+{
+    STUB_CHANNEL(chn, channel)
+    (void)chn;
+    *supported = 1;
+    return STUB_ERROR_NONE;
+}
+
+DLLExport int32_t blinkChannel(void *channel, uint8_t blink)
+{
+    STUB_CHANNEL(chn, channel)
+    chn->blinking = blink;
+    return STUB_ERROR_NONE;
+}
+
+DLLExport int32_t isChannelBlinking(void *channel, uint8_t *blinking)
+{
+    STUB_CHANNEL(chn, channel)
+    *blinking = chn->blinking;
+    return STUB_ERROR_NONE;
+}
@@ -0,0 +1,317 @@
+import asyncio
+import threading
+from collections import deque
+
+from iticanwrapper.itican_py_wrapper import CANMessage, CANMessageBatch, ITICANChannel
+
+__all__ = ['AsyncITICANChannel']
+
+
+def _resolve(future: asyncio.Future, result, exception):
+    if future.cancelled():
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
+
+
+def _post(loop: asyncio.AbstractEventLoop, future: asyncio.Future, result, exception):
+    try:
+        loop.call_soon_threadsafe(_resolve, future, result, exception)
+    except RuntimeError:
+        # 事件循环已关闭
+        pass
+
+
+class _IOWorker:
+    """
+    所有异步通道共享的 I/O 线程
+
+    轮流以批量方式读取已注册的通道，并执行各协程提交的发送请求；
+    没有消息和请求时等待 poll_interval，提交新请求会立即唤醒。
+    某个通道读取时抛出异常，只停止该通道：异常交给该通道的协程，其他通道继续运行。
+    """
+
+    def __init__(self, poll_interval: float = 0.001):
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._channels = []
+        self._requests = deque()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def _ensure_running(self):
+        # 调用方需持有 self._lock
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='ITICANAsyncIO', daemon=True)
+            self._thread.start()
+
+    def register(self, async_channel):
+        with self._lock:
+            if async_channel not in self._channels:
+                self._channels.append(async_channel)
+            self._ensure_running()
+
+    def unregister(self, async_channel):
+        with self._lock:
+            if async_channel in self._channels:
+                self._channels.remove(async_channel)
+        self._wakeup.set()
+
+    def submit(self, function, loop: asyncio.AbstractEventLoop, owner=None) -> asyncio.Future:
+        """
+        在 I/O 线程中执行 function，返回对应的 asyncio.Future
+
+        :param owner: 提交请求的 AsyncITICANChannel；该通道读取失败时，尚未执行的请求以同一异常结束
+        """
+        future = loop.create_future()
+        with self._lock:
+            self._requests.append((function, future, loop, owner))
+            self._ensure_running()
+        self._wakeup.set()
+        return future
+
+    def _run(self):
+        try:
+            self._serve()
+        finally:
+            # 意外退出时允许下一次 register / submit 重新启动线程
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+
+    def _serve(self):
+        requests = self._requests
+        while True:
+            with self._lock:
+                channels = list(self._channels)
+                if not channels and not requests:
+                    self._thread = None
+                    return
+            busy = False
+            while requests:
+                function, future, loop, _ = requests.popleft()
+                result = exception = None
+                try:
+                    result = function()
+                except Exception as e:
+                    exception = e
+                _post(loop, future, result, exception)
+                busy = True
+            for async_channel in channels:
+                try:
+                    if async_channel._poll():
+                        busy = True
+                except Exception as e:
+                    self._fail(async_channel, e)
+                    busy = True
+            if not busy:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def _fail(self, async_channel, exception: Exception):
+        """
+        停止读取出错的通道，并以该异常结束它尚未执行的请求
+        """
+        with self._lock:
+            if async_channel in self._channels:
+                self._channels.remove(async_channel)
+            failed = [request for request in self._requests if request[3] is async_channel]
+            if failed:
+                remaining = [request for request in self._requests if request[3] is not async_channel]
+                self._requests.clear()
+                self._requests.extend(remaining)
+        for _, future, loop, _ in failed:
+            _post(loop, future, None, exception)
+        async_channel._on_poll_error(exception)
+
+
+_worker = _IOWorker()
+
+
+class AsyncITICANChannel:
+    """
+    ITICANChannel 的 asyncio 接口
+
+    所有异步通道共享一个 I/O 线程，接收到的 CAN 消息在事件循环中缓存，协程无需各自占用线程。
+    需在事件循环中使用；通道的开启、波特率设置等仍通过 ITICANChannel 完成。
+
+    :param channel: ITICANChannel，已开启的通道
+    :param max_pending: 事件循环侧最多缓存的 CAN 消息个数，超出时丢弃最早的消息
+    :param batch_size: I/O 线程单次批量读取的最大个数
+    """
+
+    def __init__(self, channel: ITICANChannel, max_pending: int = 65536, batch_size: int = 256):
+        self.channel = channel
+        self.max_pending = max_pending
+        self.dropped = 0
+        """因缓存已满被丢弃的 CAN 消息个数"""
+        self.last_error = 0
+        """I/O 线程批量读取时最近一次非零返回值，或读取时抛出的异常（之后该通道停止接收）"""
+        self._batch = CANMessageBatch(batch_size)
+        self._pending = deque()
+        self._loop = None
+        self._data_event = None
+        self._closed = False
+        self._error = None
+
+    def _ensure_started(self):
+        if self._closed:
+            raise RuntimeError("channel is closed")
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._data_event = asyncio.Event()
+            _worker.register(self)
+        return self._loop
+
+    async def __aenter__(self):
+        self._ensure_started()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """
+        停止从 I/O 线程接收消息；不关闭底层通道
+        """
+        if not self._closed:
+            self._closed = True
+            _worker.unregister(self)
+            if self._data_event is not None:
+                self._data_event.set()
+
+    # ------------------------------------------------------------------ I/O 线程侧
+
+    def _poll(self) -> bool:
+        batch = self._batch
+        result = self.channel.get_messages_batch(batch, -1, 0)
+        if result != 0:
+            self.last_error = result
+        if not batch.count:
+            return False
+        messages = batch.to_messages()
+        try:
+            self._loop.call_soon_threadsafe(self._on_frames, messages)
+        except RuntimeError:
+            # 事件循环已关闭
+            self._closed = True
+            _worker.unregister(self)
+        return True
+
+    def _on_poll_error(self, exception: Exception):
+        self.last_error = exception
+        try:
+            self._loop.call_soon_threadsafe(self._set_error, exception)
+        except RuntimeError:
+            # 事件循环已关闭
+            self._closed = True
+
+    # ------------------------------------------------------------------ 事件循环侧
+
+    def _set_error(self, exception: Exception):
+        self._error = exception
+        self._data_event.set()
+
+    def _on_frames(self, messages):
+        pending = self._pending
+        pending.extend(messages)
+        overflow = len(pending) - self.max_pending
+        if overflow > 0:
+            for _ in range(overflow):
+                pending.popleft()
+            self.dropped += overflow
+        self._data_event.set()
+
+    async def _wait_data(self, timeout):
+        self._data_event.clear()
+        if timeout is None:
+            await self._data_event.wait()
+            return True
+        try:
+            await asyncio.wait_for(self._data_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def recv(self, timeout: int = -1):
+        """
+        接收一条 CAN 消息
+
+        :param timeout: 等待时长 (ms)；负数，一直等待
+        :return: CANMessage；超时返回 None
+        :raises Exception: I/O 线程读取该通道时抛出的异常
+        """
+        messages = await self.recv_batch(1, timeout)
+        return messages[0] if messages else None
+
+    async def recv_batch(self, items: int, timeout: int = -1) -> list:
+        """
+        接收多条 CAN 消息，等待直到收到 items 条或超时
+
+        :param items: 预期接收个数
+        :param timeout: 等待时长 (ms)；0，只返回已缓存的消息；负数，一直等待
+        :return: CANMessage 列表，超时时可能少于 items 条
+        :raises Exception: I/O 线程读取该通道时抛出的异常（已缓存的消息先返回）
+        """
+        loop = self._ensure_started()
+        pending = self._pending
+        deadline = None if timeout < 0 else loop.time() + timeout / 1000.0
+        while len(pending) < items and not self._closed and self._error is None:
+            if deadline is None:
+                remaining = None
+            else:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+            if not await self._wait_data(remaining):
+                break
+        count = min(items, len(pending))
+        if count == 0 and self._error is not None:
+            raise self._error
+        return [pending.popleft() for _ in range(count)]
+
+    async def frames(self):
+        """
+        异步迭代接收到的 CAN 消息::
+
+            async for frame in async_channel.frames():
+                ...
+        """
+        self._ensure_started()
+        pending = self._pending
+        while not self._closed:
+            while pending:
+                yield pending.popleft()
+            if self._error is not None:
+                raise self._error
+            await self._wait_data(None)
+
+    async def send(self, message: CANMessage, timeout: int = 0) -> int:
+        """
+        发送一条 CAN 消息
+
+        :param message: CANMessage
+        :param timeout: 设置 CAN 消息操作的超时时间
+        :return: getLastError 错误码
+        """
+        loop = self._ensure_started()
+        return await _worker.submit(lambda: self.channel.set_message(message, timeout), loop, self)
+
+    async def send_batch(self, messages: list, timeout: int = 0) -> tuple:
+        """
+        批量发送多条 CAN 消息（一次 setMessages 调用）
+
+        :param messages: CANMessage 列表
+        :param timeout: 设置 CAN 消息操作的超时时间
+        :return: (getLastError 错误码, 发送成功的个数)
+        """
+        loop = self._ensure_started()
+
+        def send():
+            items_output = []
+            result = self.channel.set_messages(messages, items_output, timeout)
+            return result, items_output[0]
+
+        return await _worker.submit(send, loop, self)
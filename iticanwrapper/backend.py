@@ -0,0 +1,175 @@
+import ctypes
+
+from iticanwrapper.bin import importDLL
+
+__all__ = ['ITICANBackend', 'DLLBackend', 'PythonBackend', 'get_default_backend', 'set_default_backend',
+           'DLL_ERROR_UNKNOWN', 'DLL_ERROR_NOT_SUPPORTED', 'DLL_ERROR_INVALID_PARAMETER', 'DLL_ERROR_TIMEOUT',
+           'DLL_ERROR_INVALID_HANDLE', 'DLL_ERROR_CHANNEL_NOT_FOUND', 'DLL_ERROR_NO_MESSAGE',
+           'DLL_ERROR_HARDWARE_TIMEOUT', 'DLL_ERROR_TX_QUEUE_FULL', 'DLL_ERROR_HARDWARE_LOST', 'DLL_ERROR_LINK_LOST']
+
+# itican.dll 的错误码，与 getLastError 给出的描述对应
+DLL_ERROR_UNKNOWN = -1
+"""Unknown or undefined error."""
+DLL_ERROR_NOT_SUPPORTED = -2
+"""Operation not supported."""
+DLL_ERROR_INVALID_PARAMETER = -3
+"""Error in parameter."""
+DLL_ERROR_TIMEOUT = -4
+"""Timeout occurred."""
+DLL_ERROR_INVALID_HANDLE = -5
+"""Handle is invalid."""
+DLL_ERROR_CHANNEL_NOT_FOUND = -6
+"""Specified device or channel not found or the channel is already occupied."""
+DLL_ERROR_NO_MESSAGE = -239
+"""there are no message in message queue buffer."""
+DLL_ERROR_HARDWARE_TIMEOUT = -241
+"""hardware response for device setting is timeout, hardware may already offline."""
+DLL_ERROR_TX_QUEUE_FULL = -243
+"""message sending queue may already full, try wait for a while."""
+DLL_ERROR_HARDWARE_LOST = -245
+"""hardware already scraped, try to re-establish the hardware link."""
+DLL_ERROR_LINK_LOST = -246
+"""can't send commands to hardware, try to re-establish the hardware link."""
+
+
+class ITICANBackend:
+    """
+    通道后端接口
+
+    后端以同名属性提供 canwrapper.h 中声明的全部函数（见 importDLL.prototypes），
+    参数与返回值的调用约定与 ctypes 加载的 itican.dll 完全一致，ITICANChannel 不区分具体后端。
+    """
+
+    function_names = tuple(importDLL.prototypes)
+    """canwrapper.h 中声明的全部函数名"""
+
+    name = ''
+    """后端名称"""
+
+    error_classes = {}
+    """错误码到 errors 中异常（警告）类的映射，供 errors.check 使用；未列出的错误码使用 ITICANError / ITICANWarning"""
+
+    def check_functions(self):
+        """
+        检查后端是否提供了全部函数
+
+        :return: 缺失的函数名列表
+        """
+        return [name for name in self.function_names if not callable(getattr(self, name, None))]
+
+
+class DLLBackend(ITICANBackend):
+    """
+    基于 itican.dll 的后端
+
+    动态库在首次调用函数时才加载，函数在首次访问时解析并缓存为实例属性。
+
+    :param library: 已设置参数类型的动态库，默认使用 importDLL.load_library()
+    """
+
+    name = 'dll'
+
+    _error_classes = None
+
+    def __init__(self, library=None):
+        self._library = library
+
+    @property
+    def error_classes(self) -> dict:
+        """itican.dll 错误码到 errors 中异常类的映射"""
+        if DLLBackend._error_classes is None:
+            # errors 依赖本模块，使用时才导入
+            from iticanwrapper import errors
+            DLLBackend._error_classes = {
+                DLL_ERROR_NOT_SUPPORTED: errors.NotSupportedError,
+                DLL_ERROR_INVALID_PARAMETER: errors.InvalidParameterError,
+                DLL_ERROR_TIMEOUT: errors.ITICANTimeoutError,
+                DLL_ERROR_INVALID_HANDLE: errors.ChannelStateError,
+                DLL_ERROR_CHANNEL_NOT_FOUND: errors.ChannelNotFoundError,
+                DLL_ERROR_NO_MESSAGE: errors.ITICANTimeoutError,
+                DLL_ERROR_HARDWARE_TIMEOUT: errors.ITICANTimeoutError,
+                DLL_ERROR_TX_QUEUE_FULL: errors.TxQueueFullError,
+                DLL_ERROR_HARDWARE_LOST: errors.ChannelStateError,
+                DLL_ERROR_LINK_LOST: errors.ChannelStateError,
+            }
+        return DLLBackend._error_classes
+
+    @property
+    def library(self):
+        if self._library is None:
+            self._library = importDLL.load_library()
+        return self._library
+
+    def __getattr__(self, name):
+        if name not in importDLL.prototypes:
+            raise AttributeError(name)
+        function = getattr(self.library, name)
+        self.__dict__[name] = function
+        return function
+
+
+class PythonBackend(ITICANBackend):
+    """
+    纯 Python 实现的后端基类
+
+    子类以 ``_<函数名>`` 的方法实现 canwrapper.h 中的函数，构造时将其包装为与 DLL 参数类型一致的
+    ctypes 回调函数，因此通道调用仍经过完整的 ctypes 参数转换，可用于测量封装层自身的开销。
+    字符串缓冲区参数（char *）以地址形式（int）传入实现方法；未实现的函数返回 not_implemented_error。
+    """
+
+    name = 'python'
+
+    internal_error = -1
+    """实现方法抛出异常时返回的错误码"""
+
+    not_implemented_error = -1
+    """子类未实现的函数返回的错误码"""
+
+    def __init__(self):
+        self._callbacks = {}
+        for function_name in self.function_names:
+            implementation = getattr(self, '_' + function_name, None)
+            if implementation is None:
+                implementation = self._not_implemented
+            restype, argtypes = importDLL.prototypes[function_name]
+            argtypes = [ctypes.c_void_p if argtype is ctypes.c_char_p else argtype for argtype in argtypes]
+            callback = ctypes.CFUNCTYPE(restype, *argtypes)(self._guard(implementation))
+            # 保留回调对象的引用，避免被回收
+            self._callbacks[function_name] = callback
+            setattr(self, function_name, callback)
+
+    def _not_implemented(self, *args):
+        return self.not_implemented_error
+
+    def _guard(self, implementation):
+        def call(*args):
+            try:
+                return implementation(*args)
+            except Exception:
+                return self.internal_error
+        return call
+
+
+_default_backend = None
+
+
+def get_default_backend() -> ITICANBackend:
+    """
+    获取默认后端，未设置时使用 DLLBackend
+
+    :return: ITICANBackend
+    """
+    global _default_backend
+    if _default_backend is None:
+        _default_backend = DLLBackend()
+    return _default_backend
+
+
+def set_default_backend(backend: ITICANBackend):
+    """
+    设置默认后端，之后通过 ITICANChannel 静态方法获取的通道均使用该后端
+
+    :param backend: ITICANBackend；None，恢复为 DLLBackend
+    """
+    global _default_backend
+    _default_backend = backend
@@ -0,0 +1,580 @@
+import ctypes
+import threading
+import time
+
+__all__ = ['decode_baud_rate', 'decode_fd_baud_rate', 'fd_data_length', 'frame_bits', 'frame_duration',
+           'frame_bits_array', 'BusLoadPacer']
+
+_CUSTOM_BAUD_RATE_BASE = 0xA0000000
+
+_FD_TYPE_FLAG = 16
+_BRS_TYPE_FLAG = 8
+_REMOTE_TYPE = 1
+
+_FD_LENGTHS = (0, 1, 2, 3, 4, 5, 6, 7, 8, 12, 16, 20, 24, 32, 48, 64)
+
+# 数据段长度 -> (DLC, CAN FD 帧实际传输的数据段长度)
+_FD_DLC = []
+for _length in range(65):
+    _code = next(code for code, value in enumerate(_FD_LENGTHS) if value >= _length)
+    _FD_DLC.append((_code, _FD_LENGTHS[_code]))
+del _length, _code
+
+# CRC 分隔符、ACK 槽、ACK 分隔符、帧结束 7 位、帧间隔 3 位
+_TRAILER_BITS = 13
+
+_CRC15_POLY = 0x4599
+
+
+def decode_baud_rate(value: int) -> float:
+    """
+    将 set_baud_rate / set_custom_baud_rate 的参数换算为仲裁段波特率 (bit/s)
+
+    :param value: 波特率参数
+    :return: 波特率 (bit/s)
+    """
+    if value < _CUSTOM_BAUD_RATE_BASE:
+        return float(value)
+    tq = value >> 32
+    rest = (value & 0xFFFFFFFF) - _CUSTOM_BAUD_RATE_BASE
+    ts1 = ((rest >> 8) & 0xFF) + 1
+    ts2 = (rest & 0xFF) + 1
+    return 1e9 / (tq * (1 + ts1 + ts2))
+
+
+def decode_fd_baud_rate(value: int) -> float:
+    """
+    将 set_fd_baud_rate / set_custom_fd_baud_rate 的参数换算为数据段波特率 (bit/s)
+
+    :param value: 波特率参数
+    :return: 波特率 (bit/s)
+    """
+    if value < _CUSTOM_BAUD_RATE_BASE:
+        return float(value)
+    low = (value - _CUSTOM_BAUD_RATE_BASE) % (1 << 40)
+    tq = low >> 13
+    ts1 = ((low >> 8) & 0x1F) + 1
+    ts2 = ((low >> 4) & 0xF) + 1
+    return 1e9 / (tq * (1 + ts1 + ts2))
+
+
+def fd_data_length(data_length: int) -> int:
+    """
+    CAN FD 帧实际传输的数据段长度（向上取整到 DLC 可表示的长度，其余字节为填充）
+
+    :param data_length: 数据段字节数，0~64
+    :return: 传输的字节数
+    """
+    return _FD_DLC[data_length][1]
+
+
+# ------------------------------------------------------------------ 位填充
+
+# 填充状态：0~9 为 (上一位 * 5 + 连续相同位数 - 1)；10 + 位值 表示刚插入了值为该位的填充位。
+# 刚插入填充位的状态在后续处理上与 (该位, 1) 相同，仅用于判断最后一位之后是否插入了填充位。
+_STUFF_STATES = 12
+_INITIAL_STATE = 1 * 5 + 0  # SOF 之前为总线空闲（隐性位 1）
+
+
+def _stuff_step(state: int, bit: int):
+    """
+    处理一位，返回 (插入的填充位个数, 新状态)
+    """
+    if state >= 10:
+        previous, run = state - 10, 1
+    else:
+        previous, run = divmod(state, 5)
+        run += 1
+    run = run + 1 if bit == previous else 1
+    if run == 5:
+        return 1, 10 + (bit ^ 1)
+    return 0, bit * 5 + run - 1
+
+
+def _build_stuff_table():
+    # table[state * 256 + byte] = (填充位个数 << 4) | 新状态
+    table = []
+    for state in range(_STUFF_STATES):
+        for byte in range(256):
+            count, current = 0, state
+            for shift in range(7, -1, -1):
+                stuffed, current = _stuff_step(current, (byte >> shift) & 1)
+                count += stuffed
+            table.append((count << 4) | current)
+    return table
+
+
+_STUFF_TABLE = _build_stuff_table()
+
+
+def _stuff_bits(value: int, bit_count: int, state: int):
+    """
+    对 bit_count 位（value 的低位，高位先发）计数动态填充位
+
+    :return: (填充位个数, 结束时的填充状态)
+    """
+    count = 0
+    head = bit_count & 7
+    for shift in range(bit_count - 1, bit_count - 1 - head, -1):
+        stuffed, state = _stuff_step(state, (value >> shift) & 1)
+        count += stuffed
+    table = _STUFF_TABLE
+    for shift in range(bit_count - head - 8, -8, -8):
+        entry = table[state * 256 + ((value >> shift) & 0xFF)]
+        count += entry >> 4
+        state = entry & 0xF
+    return count, state
+
+
+def _stuff_bytes(data, state: int):
+    """
+    对字节序列计数动态填充位，返回 (填充位个数, 结束时的填充状态)
+    """
+    count = 0
+    table = _STUFF_TABLE
+    for byte in data:
+        entry = table[state * 256 + byte]
+        count += entry >> 4
+        state = entry & 0xF
+    return count, state
+
+
+# ------------------------------------------------------------------ CRC15
+
+def _build_crc15_table():
+    table = []
+    for byte in range(256):
+        crc = byte << 7
+        for _ in range(8):
+            crc = ((crc << 1) ^ _CRC15_POLY) if crc & 0x4000 else crc << 1
+        table.append(crc & 0x7FFF)
+    return table
+
+
+_CRC15_TABLE = _build_crc15_table()
+
+
+def _crc15(value: int, bit_count: int, data, crc: int = 0) -> int:
+    """
+    经典 CAN 的 CRC15：先处理 value 的 bit_count 位（高位先发），再处理 data 的各字节
+    """
+    for shift in range(bit_count - 1, -1, -1):
+        feedback = ((value >> shift) & 1) ^ ((crc >> 14) & 1)
+        crc = (crc << 1) & 0x7FFF
+        if feedback:
+            crc ^= _CRC15_POLY
+    table = _CRC15_TABLE
+    for byte in data:
+        crc = ((crc << 8) & 0x7FFF) ^ table[((crc >> 7) ^ byte) & 0xFF]
+    return crc
+
+
+# ------------------------------------------------------------------ 帧长度
+
+def _header(message_type: int, can_extended: int, can_id: int, dlc: int):
+    """
+    SOF 至 DLC 的位序列
+
+    :return: (位序列, 位数, CAN FD 帧中 BRS 及之前的位数)
+    """
+    if message_type & _FD_TYPE_FLAG:
+        brs = 1 if message_type & _BRS_TYPE_FLAG else 0
+        if can_extended:
+            # SOF, 基本 id, SRR, IDE, 扩展 id, RRS, FDF, res, BRS | ESI, DLC
+            arbitration = (((can_id >> 18) & 0x7FF) << 20) | (0b11 << 18) | (can_id & 0x3FFFF)
+            value = (arbitration << 4) | (0b010 << 1) | brs
+            nominal = 1 + 11 + 2 + 18 + 4
+        else:
+            # SOF, id, RRS, IDE, FDF, res, BRS | ESI, DLC
+            value = ((can_id & 0x7FF) << 5) | (0b0010 << 1) | brs
+            nominal = 1 + 11 + 5
+        return (value << 5) | dlc, nominal + 5, nominal
+    rtr = 1 if message_type == _REMOTE_TYPE else 0
+    if can_extended:
+        # SOF, 基本 id, SRR, IDE, 扩展 id, RTR, r1, r0, DLC
+        arbitration = (((can_id >> 18) & 0x7FF) << 20) | (0b11 << 18) | (can_id & 0x3FFFF)
+        value = (((arbitration << 1) | rtr) << 6) | dlc
+        return value, 1 + 11 + 2 + 18 + 1 + 2 + 4, 0
+    # SOF, id, RTR, IDE, r0, DLC
+    value = (((((can_id & 0x7FF) << 1) | rtr) << 2) << 4) | dlc
+    return value, 1 + 11 + 1 + 2 + 4, 0
+
+
+def frame_bits(message_type, can_extended: int, can_id: int, can_data) -> tuple:
+    """
+    计算一帧在总线上的精确位数，包括动态填充位、CRC（15/17/21 位）、CAN FD 的填充计数和固定填充位，
+    以及 ACK、帧结束和 3 位帧间隔
+
+    CAN FD 数据段不足 DLC 可表示的长度时按 0 填充计算；错误主动状态（ESI=0）。
+
+    :param message_type: MessageType 或其数值
+    :param can_extended: 是否为扩展帧
+    :param can_id: CAN 通信id
+    :param can_data: 数据段（bytes / bytearray / list / memoryview）；远程帧为请求的数据长度对应的任意序列
+    :return: (仲裁段速率的位数, 数据段速率的位数)；不切换波特率时数据段速率的位数为 0
+    """
+    message_type = getattr(message_type, 'value', message_type)
+    length = len(can_data)
+    if message_type & _FD_TYPE_FLAG:
+        dlc, padded = _FD_DLC[length]
+        header, header_bits, nominal_bits = _header(message_type, can_extended, can_id, dlc)
+        # BRS 之前的位（仲裁段速率）与之后的位分别计数填充位
+        nominal_stuff, state = _stuff_bits(header >> (header_bits - nominal_bits), nominal_bits, _INITIAL_STATE)
+        data_stuff, state = _stuff_bits(header, header_bits - nominal_bits, state)
+        if length:
+            stuffed, state = _stuff_bytes(can_data, state)
+            data_stuff += stuffed
+        if padded > length:
+            stuffed, state = _stuff_bytes(bytes(padded - length), state)
+            data_stuff += stuffed
+        if state >= 10:
+            # 数据段最后一位之后的填充位由填充计数前的固定填充位代替
+            data_stuff -= 1
+        # 固定填充位 + 填充计数 4 位 + CRC，CRC 中每 4 位插入一个固定填充位
+        crc_field = 1 + 4 + 17 + 5 if padded <= 16 else 1 + 4 + 21 + 6
+        data_bits = (header_bits - nominal_bits) + 8 * padded + data_stuff + crc_field + 1
+        nominal = nominal_bits + nominal_stuff + _TRAILER_BITS - 1
+        if message_type & _BRS_TYPE_FLAG:
+            return nominal, data_bits
+        return nominal + data_bits, 0
+    if message_type == _REMOTE_TYPE:
+        dlc = min(length, 8)
+        data = b''
+    else:
+        if length > 8:
+            raise ValueError("classic CAN data length exceeds 8 bytes")
+        dlc = length
+        data = can_data
+    header, header_bits, _ = _header(message_type, can_extended, can_id, dlc)
+    crc = _crc15(header, header_bits, data)
+    stuff, state = _stuff_bits(header, header_bits, _INITIAL_STATE)
+    if data:
+        stuffed, state = _stuff_bytes(data, state)
+        stuff += stuffed
+    stuffed, state = _stuff_bits(crc, 15, state)
+    stuff += stuffed
+    return header_bits + 8 * len(data) + 15 + stuff + _TRAILER_BITS, 0
+
+
+def frame_duration(message_type, can_extended: int, can_id: int, can_data, baud_rate: float,
+                   fd_baud_rate: float) -> float:
+    """
+    一帧在总线上的传输时长，见 frame_bits
+
+    :param message_type: MessageType 或其数值
+    :param can_extended: 是否为扩展帧
+    :param can_id: CAN 通信id
+    :param can_data: 数据段
+    :param baud_rate: 仲裁段波特率 (bit/s)
+    :param fd_baud_rate: 数据段波特率 (bit/s)
+    :return: 时长 (s)
+    """
+    nominal, data = frame_bits(message_type, can_extended, can_id, can_data)
+    if data:
+        return nominal / baud_rate + data / fd_baud_rate
+    return nominal / baud_rate
+
+
+# ------------------------------------------------------------------ 批量计算（numpy）
+
+def _np_tables():
+    import numpy as _np
+    global _np_table_cache
+    if _np_table_cache is None:
+        step = []
+        for state in range(_STUFF_STATES):
+            for bit in (0, 1):
+                stuffed, current = _stuff_step(state, bit)
+                step.append((stuffed << 4) | current)
+        fd_dlc = [dlc for dlc, _ in _FD_DLC]
+        fd_padded = [padded for _, padded in _FD_DLC]
+        _np_table_cache = (_np.array(step, dtype=_np.int64), _np.array(_STUFF_TABLE, dtype=_np.int64),
+                           _np.array(_CRC15_TABLE, dtype=_np.int64), _np.array(fd_dlc, dtype=_np.int64),
+                           _np.array(fd_padded, dtype=_np.int64))
+    return _np_table_cache
+
+
+_np_table_cache = None
+
+
+def _np_stuff_bits(values, bit_count: int, state):
+    """
+    _stuff_bits 的向量化版本：values、state 为等长数组，所有帧处理相同的位数
+    """
+    step, table = _np_tables()[:2]
+    count = 0
+    head = bit_count & 7
+    for shift in range(bit_count - 1, bit_count - 1 - head, -1):
+        entry = step[state * 2 + ((values >> shift) & 1)]
+        count = count + (entry >> 4)
+        state = entry & 0xF
+    for shift in range(bit_count - head - 8, -8, -8):
+        entry = table[state * 256 + ((values >> shift) & 0xFF)]
+        count = count + (entry >> 4)
+        state = entry & 0xF
+    return count, state
+
+
+def _np_crc15_bits(values, bit_count: int, crc):
+    """
+    _crc15 中逐位部分的向量化版本
+    """
+    for shift in range(bit_count - 1, -1, -1):
+        feedback = ((values >> shift) & 1) ^ ((crc >> 14) & 1)
+        crc = ((crc << 1) & 0x7FFF) ^ (feedback * _CRC15_POLY)
+    return crc
+
+
+def frame_bits_array(columns: dict) -> tuple:
+    """
+    frame_bits 的向量化版本（需要安装 numpy），结果与逐帧计算完全一致
+
+    帧头按帧格式分组计算，数据段按列（第 j 字节）对所有帧同时查表，计算量与批次中最长的数据段成正比。
+
+    :param columns: CANMessageBatch.as_numpy() 返回的字典
+    :return: (仲裁段速率的位数, 数据段速率的位数)，均为 numpy int64 数组
+    """
+    # numpy 为可选依赖，使用时才导入
+    import numpy as _np
+    _, table, crc_table, fd_dlc, fd_padded = _np_tables()
+    types = columns['type'].astype(_np.int64)
+    extended = columns['extended'] != 0
+    ids = columns['id'].astype(_np.int64)
+    lengths = columns['data_length'].astype(_np.int64)
+    count = len(types)
+    fd = (types & _FD_TYPE_FLAG) != 0
+    brs = fd & ((types & _BRS_TYPE_FLAG) != 0)
+    remote = ~fd & (types == _REMOTE_TYPE)
+    if _np.any(~fd & ~remote & (lengths > 8)):
+        raise ValueError("classic CAN data length exceeds 8 bytes")
+    dlc = _np.where(fd, fd_dlc[_np.minimum(lengths, 64)], _np.minimum(lengths, 8))
+    padded = _np.where(fd, fd_padded[_np.minimum(lengths, 64)], _np.where(remote, 0, lengths))
+
+    # 数据段展开为每行 64 字节，不足部分（含 CAN FD 填充字节）为 0
+    matrix = _np.zeros((count, 64), dtype=_np.uint8)
+    offsets = columns['offset']
+    total = int(offsets[-1])
+    if total:
+        rows = _np.repeat(_np.arange(count), lengths)
+        positions = _np.arange(total) - _np.repeat(offsets[:-1], lengths)
+        matrix[rows, positions] = columns['data']
+
+    nominal_stuff = _np.zeros(count, dtype=_np.int64)
+    later_stuff = _np.zeros(count, dtype=_np.int64)
+    header_bits = _np.zeros(count, dtype=_np.int64)
+    nominal_bits = _np.zeros(count, dtype=_np.int64)
+    state = _np.zeros(count, dtype=_np.int64)
+    crc = _np.zeros(count, dtype=_np.int64)
+    base = (ids >> 18) & 0x7FF
+    for is_fd in (False, True):
+        for is_extended in (False, True):
+            index = _np.nonzero((fd == is_fd) & (extended == is_extended))[0]
+            if not len(index):
+                continue
+            group_ids = ids[index]
+            group_dlc = dlc[index]
+            if is_fd:
+                flag = brs[index].astype(_np.int64)
+                if is_extended:
+                    arbitration = (base[index] << 20) | (0b11 << 18) | (group_ids & 0x3FFFF)
+                    value = (arbitration << 4) | (0b010 << 1) | flag
+                    bits = 1 + 11 + 2 + 18 + 4
+                else:
+                    value = ((group_ids & 0x7FF) << 5) | (0b0010 << 1) | flag
+                    bits = 1 + 11 + 5
+                stuffed, group_state = _np_stuff_bits(value, bits, _np.full(len(index), _INITIAL_STATE))
+                nominal_stuff[index] = stuffed
+                stuffed, group_state = _np_stuff_bits(group_dlc, 5, group_state)
+                later_stuff[index] = stuffed
+                header_bits[index] = bits + 5
+                nominal_bits[index] = bits
+            else:
+                rtr = remote[index].astype(_np.int64)
+                if is_extended:
+                    arbitration = (base[index] << 20) | (0b11 << 18) | (group_ids & 0x3FFFF)
+                    value = (((arbitration << 1) | rtr) << 6) | group_dlc
+                    bits = 1 + 11 + 2 + 18 + 1 + 2 + 4
+                else:
+                    value = (((((group_ids & 0x7FF) << 1) | rtr) << 2) << 4) | group_dlc
+                    bits = 1 + 11 + 1 + 2 + 4
+                stuffed, group_state = _np_stuff_bits(value, bits, _np.full(len(index), _INITIAL_STATE))
+                nominal_stuff[index] = stuffed
+                crc[index] = _np_crc15_bits(value, bits, _np.zeros(len(index), dtype=_np.int64))
+                header_bits[index] = bits
+            state[index] = group_state
+
+    # 按数据段长度降序排列，第 j 列只需处理前 active 行
+    order = _np.argsort(-padded, kind='stable')
+    sorted_padded = padded[order]
+    sorted_state = state[order]
+    sorted_crc = crc[order]
+    sorted_stuff = _np.zeros(count, dtype=_np.int64)
+    sorted_matrix = matrix[order]
+    for column in range(int(sorted_padded[0]) if count else 0):
+        active = int(_np.count_nonzero(sorted_padded > column))
+        byte = sorted_matrix[:active, column].astype(_np.int64)
+        entry = table[sorted_state[:active] * 256 + byte]
+        sorted_stuff[:active] += entry >> 4
+        sorted_state[:active] = entry & 0xF
+        # CAN FD 帧的 CRC 不参与填充计数，一并计算后丢弃
+        head = sorted_crc[:active]
+        sorted_crc[:active] = ((head << 8) & 0x7FFF) ^ crc_table[((head >> 7) ^ byte) & 0xFF]
+    state[order] = sorted_state
+    crc[order] = sorted_crc
+    later_stuff[order] += sorted_stuff
+
+    # 经典帧：CRC 15 位也参与填充
+    stuffed, crc_state = _np_stuff_bits(crc, 15, state)
+    classic_bits = header_bits + 8 * padded + 15 + nominal_stuff + later_stuff + stuffed + _TRAILER_BITS
+    # CAN FD：数据段结束处的填充位由固定填充位代替
+    later_stuff = later_stuff - (state >= 10)
+    crc_field = _np.where(padded <= 16, 1 + 4 + 17 + 5, 1 + 4 + 21 + 6)
+    fd_data = (header_bits - nominal_bits) + 8 * padded + later_stuff + crc_field + 1
+    fd_nominal = nominal_bits + nominal_stuff + _TRAILER_BITS - 1
+    nominal = _np.where(fd, _np.where(brs, fd_nominal, fd_nominal + fd_data), classic_bits)
+    data = _np.where(brs, fd_data, 0)
+    return nominal, data
+
+
+# ------------------------------------------------------------------ 发送限速
+
+def _offset(array, index: int, element_type):
+    """
+    指向 ctypes 数组第 index 个元素的指针
+    """
+    return ctypes.cast(ctypes.addressof(array) + index * ctypes.sizeof(element_type), ctypes.POINTER(element_type))
+
+
+class BusLoadPacer:
+    """
+    按目标总线负载限制发送速率的令牌桶
+
+    令牌以总线时间计：每经过 1 s 增加 target_load 秒，发送一帧消耗其传输时长，桶容量为 burst。
+    令牌不足时等待到足够为止，因此长期平均负载不超过 target_load，短时最多突发 burst 的总线时间。
+    通常通过 ITICANChannel.set_pacing 启用，之后 set_message / set_messages / set_messages_batch 自动限速。
+
+    :param channel: ITICANChannel；波特率取通道最近一次设置的值（ITICANChannel.bit_rates）
+    :param target_load: 目标总线负载，0~1
+    :param burst: 令牌桶容量 (ms 总线时间)
+    :param spin_time: 等待的最后一段改为忙等的时长 (ms)，提高定时精度
+    """
+
+    _CACHE_SIZE = 4096
+
+    def __init__(self, channel, target_load: float = 0.8, burst: float = 2.0, spin_time: float = 0.2):
+        if not 0 < target_load <= 1:
+            raise ValueError("target_load must be in (0, 1]")
+        self.channel = channel
+        self.target_load = target_load
+        self.burst = burst / 1000.0
+        self.spin_time = spin_time / 1000.0
+        self.frames_paced = 0
+        """经过限速的帧数"""
+        self.bus_time = 0.0
+        """累计的总线时间 (s)"""
+        self.wait_time = 0.0
+        """累计的等待时长 (s)"""
+        self._tokens = self.burst
+        self._updated = time.perf_counter()
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    def _rates(self):
+        baud_rate, fd_baud_rate = self.channel.bit_rates
+        if baud_rate is None:
+            raise ValueError("arbitration bit rate of the channel is unknown, call set_baud_rate first")
+        return baud_rate, fd_baud_rate if fd_baud_rate is not None else baud_rate
+
+    def duration(self, message_type, can_extended: int, can_id: int, can_data) -> float:
+        """
+        一帧在通道当前波特率下的传输时长 (s)，按帧内容缓存
+        """
+        baud_rate, fd_baud_rate = self._rates()
+        key = (message_type, can_extended, can_id, bytes(can_data))
+        bits = self._cache.get(key)
+        if bits is None:
+            if len(self._cache) >= self._CACHE_SIZE:
+                self._cache.clear()
+            bits = self._cache[key] = frame_bits(message_type, can_extended, can_id, can_data)
+        nominal, data = bits
+        return nominal / baud_rate + data / fd_baud_rate
+
+    def acquire(self, bus_time: float):
+        """
+        消耗 bus_time 的令牌，令牌不足时等待
+
+        :param bus_time: 总线时间 (s)
+        """
+        perf_counter = time.perf_counter
+        with self._lock:
+            now = perf_counter()
+            tokens = min(self.burst, self._tokens + (now - self._updated) * self.target_load) - bus_time
+            self._tokens = tokens
+            self._updated = now
+            self.bus_time += bus_time
+            if tokens >= 0:
+                return
+            # 欠下的令牌在 -tokens / target_load 秒后补足；持锁等待，保证各线程按顺序发送
+            deadline = now - tokens / self.target_load
+            remaining = deadline - perf_counter()
+            if remaining > self.spin_time:
+                time.sleep(remaining - self.spin_time)
+            while perf_counter() < deadline:
+                pass
+            self.wait_time += deadline - now
+
+    def pace_message(self, message):
+        """
+        按一帧的传输时长等待
+
+        :param message: CANMessage 或 CANFrame
+        """
+        self.frames_paced += 1
+        self.acquire(self.duration(message.type_, message.extended_, message.id_, message.data_))
+
+    def send_batch(self, batch, items_output: list, timeout=0) -> int:
+        """
+        按总线时间将批次分段发送：每段的总线时间不超过 burst，发送前等待令牌
+
+        :param batch: CANMessageBatch
+        :param items_output: 传出设置成功的 CAN 消息的个数，清空 list 后，保存到 index=0 处
+        :param timeout: 设置 CAN 消息操作的超时时间
+        :return: getLastError 错误码
+        """
+        channel = self.channel
+        ids = batch.ids
+        types = batch.types
+        extended = batch.extended
+        offsets = batch.offsets
+        data = batch.data
+        count = batch.count
+        items_output.clear()
+        sent = 0
+        result = 0
+        start = 0
+        while start < count:
+            end = start
+            bus_time = 0.0
+            while end < count:
+                duration = self.duration(types[end], extended[end], ids[end], data[offsets[end]:offsets[end + 1]])
+                if end > start and bus_time + duration > self.burst:
+                    break
+                bus_time += duration
+                end += 1
+            self.frames_paced += end - start
+            self.acquire(bus_time)
+            # 通过指针偏移直接发送批次中的一段，不拷贝
+            items_temp = ctypes.c_uint32(end - start)
+            result = channel._fn_set_messages(channel._chn_pointer, _offset(batch.id_array, start, ctypes.c_uint32),
+                                              _offset(batch.type_array, start, ctypes.c_uint8),
+                                              _offset(batch.extended_array, start, ctypes.c_uint8),
+                                              _offset(batch.data_array, offsets[start], ctypes.c_uint8),
+                                              _offset(batch.data_length_array, start, ctypes.c_uint8),
+                                              ctypes.byref(items_temp), timeout)
+            done = min(items_temp.value, end - start)
+            sent += done
+            if result < 0 or done < end - start:
+                break
+            start = end
+        items_output.append(sent)
+        return result
@@ -0,0 +1,358 @@
+import threading
+import time
+from collections import deque
+
+from iticanwrapper.bittiming import frame_bits, frame_bits_array
+from iticanwrapper.itican_py_wrapper import CANMessageBatch, ITICANChannel, _numpy_available
+from iticanwrapper.receiver import _EXTENDED_KEY, _ReceiveListener
+
+__all__ = ['BusLoadAnalyzer']
+
+
+class _Slice:
+    __slots__ = ('index', 'bus_time', 'frames', 'bytes', 'ids')
+
+    def __init__(self, index):
+        self.index = index
+        self.bus_time = 0.0
+        self.frames = 0
+        self.bytes = 0
+        self.ids = {}
+        """{统计键: [帧数, 总线时间]}"""
+
+
+class BusLoadAnalyzer(_ReceiveListener):
+    """
+    总线负载分析
+
+    对接收到的每帧按通道的仲裁段和数据段波特率计算精确的传输时长（bittiming.frame_bits），
+    以硬件时间戳划分为 resolution 长的时间片，统计最近 window 内的总线负载、帧率以及各 id 的占用。
+    批量输入在安装了 numpy 时按批次向量化计算帧长，否则逐帧计算（按帧内容缓存）。
+
+    可通过 attach 挂接到通道的接收路径（见 ITICANChannel.add_receive_listener），
+    也可直接调用 add_frame / add_batch 输入。线程安全。
+
+    窗口只随帧的时间戳滑动，总线空闲时需调用 advance 推进；挂接到通道时，读取结果前会按
+    最近一帧的时间戳加上之后经过的主机时间自动推进，空闲总线上的负载随之回落到 0。
+
+    :param baud_rate: 仲裁段波特率 (bit/s)；None，使用 channel 的 bit_rates
+    :param fd_baud_rate: 数据段波特率 (bit/s)；None，使用 channel 的 bit_rates，仍未知时与仲裁段相同
+    :param window: 统计窗口 (ms)
+    :param resolution: 时间片长度 (ms)，窗口按时间片滑动
+    :param channel: 用于获取波特率的 ITICANChannel
+    :param use_numpy: 是否使用 numpy 计算批次；None，已安装时使用
+    """
+
+    _CACHE_SIZE = 4096
+
+    def __init__(self, baud_rate: float = None, fd_baud_rate: float = None, window: float = 1000,
+                 resolution: float = 100, channel: ITICANChannel = None, use_numpy: bool = None):
+        if channel is not None and (baud_rate is None or fd_baud_rate is None):
+            channel_baud_rate, channel_fd_baud_rate = channel.bit_rates
+            baud_rate = baud_rate if baud_rate is not None else channel_baud_rate
+            fd_baud_rate = fd_baud_rate if fd_baud_rate is not None else channel_fd_baud_rate
+        if baud_rate is None:
+            raise ValueError("arbitration bit rate is unknown")
+        if resolution <= 0 or window < resolution:
+            raise ValueError("window must be at least one resolution")
+        self.baud_rate = float(baud_rate)
+        self.fd_baud_rate = float(fd_baud_rate) if fd_baud_rate is not None else self.baud_rate
+        self.resolution = int(resolution * 1000)
+        """时间片长度 (us)"""
+        self.slice_count = max(int(round(window / resolution)), 1)
+        """窗口包含的时间片个数"""
+        self.use_numpy = _numpy_available() if use_numpy is None else use_numpy
+        self.late_frames = 0
+        """时间戳早于窗口、未计入统计的帧数"""
+        self.total_frames = 0
+        """累计统计的帧数"""
+        self._slices = deque()
+        self._bus_time = 0.0
+        self._frames = 0
+        self._bytes = 0
+        self._ids = {}
+        self._first_index = None
+        self._latest = None
+        """窗口最新的时间片序号"""
+        self._last_timestamp = None
+        self._last_clock = 0.0
+        self._channel = None
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------ 输入
+
+    def _bits(self, message_type, can_extended, can_id, data):
+        key = (message_type, can_extended, can_id, bytes(data))
+        bits = self._cache.get(key)
+        if bits is None:
+            if len(self._cache) >= self._CACHE_SIZE:
+                self._cache.clear()
+            bits = self._cache[key] = frame_bits(message_type, can_extended, can_id, data)
+        return bits
+
+    def add_frame(self, frame):
+        """
+        统计一帧
+
+        :param frame: CANMessage 或 CANFrame（使用 timestamp_，单位 us）
+        """
+        message_type = getattr(frame.type_, 'value', frame.type_)
+        nominal, data = self._bits(message_type, frame.extended_, frame.id_, frame.data_)
+        bus_time = nominal / self.baud_rate + data / self.fd_baud_rate
+        key = frame.id_ | (_EXTENDED_KEY if frame.extended_ else 0)
+        with self._lock:
+            self._add(frame.timestamp_ // self.resolution, ((key, 1, bus_time),), 1, bus_time, len(frame.data_))
+            self._touch(frame.timestamp_)
+
+    def add_batch(self, batch: CANMessageBatch):
+        """
+        统计批次中的全部帧
+
+        :param batch: CANMessageBatch（使用 timestamps 列，单位 us）
+        """
+        if not batch.count:
+            return
+        if self.use_numpy:
+            self._add_batch_numpy(batch)
+            return
+        ids = batch.ids
+        types = batch.types
+        extended = batch.extended
+        timestamps = batch.timestamps
+        offsets = batch.offsets
+        data = batch.data
+        resolution = self.resolution
+        baud_rate = self.baud_rate
+        fd_baud_rate = self.fd_baud_rate
+        # 按时间片分组后写入
+        groups = {}
+        for i in range(batch.count):
+            nominal, data_bits = self._bits(types[i], extended[i], ids[i], data[offsets[i]:offsets[i + 1]])
+            bus_time = nominal / baud_rate + data_bits / fd_baud_rate
+            group = groups.get(timestamps[i] // resolution)
+            if group is None:
+                group = groups[timestamps[i] // resolution] = [{}, 0, 0.0, 0]
+            key = ids[i] | (_EXTENDED_KEY if extended[i] else 0)
+            entry = group[0].get(key)
+            if entry is None:
+                group[0][key] = [1, bus_time]
+            else:
+                entry[0] += 1
+                entry[1] += bus_time
+            group[1] += 1
+            group[2] += bus_time
+            group[3] += offsets[i + 1] - offsets[i]
+        with self._lock:
+            for index in sorted(groups):
+                id_stats, frames, bus_time, size = groups[index]
+                self._add(index, [(key, value[0], value[1]) for key, value in id_stats.items()], frames, bus_time,
+                          size)
+            self._touch(max(timestamps))
+
+    def _add_batch_numpy(self, batch):
+        # numpy 为可选依赖，使用时才导入
+        import numpy as _np
+        columns = batch.as_numpy()
+        nominal, data = frame_bits_array(columns)
+        bus_time = nominal / self.baud_rate + data / self.fd_baud_rate
+        slices = (columns['timestamp'] // _np.uint64(self.resolution)).astype(_np.int64)
+        keys = columns['id'].astype(_np.int64) | (columns['extended'].astype(_np.int64) << 32)
+        lengths = columns['data_length'].astype(_np.int64)
+        first = int(slices.min())
+        # (时间片, 统计键) 组合后一次分组求和
+        combined = ((slices - first) << 33) | keys
+        unique, inverse, counts = _np.unique(combined, return_inverse=True, return_counts=True)
+        times = _np.bincount(inverse, weights=bus_time, minlength=len(unique))
+        slice_of = (unique >> 33) + first
+        key_of = unique & ((1 << 33) - 1)
+        slice_unique, slice_inverse = _np.unique(slices, return_inverse=True)
+        slice_frames = _np.bincount(slice_inverse, minlength=len(slice_unique))
+        slice_times = _np.bincount(slice_inverse, weights=bus_time, minlength=len(slice_unique))
+        slice_bytes = _np.bincount(slice_inverse, weights=lengths, minlength=len(slice_unique))
+        # unique 按时间片升序排列，按时间片边界切分
+        bounds = _np.searchsorted(slice_of, slice_unique, side='left').tolist() + [len(unique)]
+        key_list = key_of.tolist()
+        count_list = counts.tolist()
+        time_list = times.tolist()
+        with self._lock:
+            for position, index in enumerate(slice_unique.tolist()):
+                start, end = bounds[position], bounds[position + 1]
+                self._add(index, zip(key_list[start:end], count_list[start:end], time_list[start:end]),
+                          int(slice_frames[position]), float(slice_times[position]), int(slice_bytes[position]))
+            self._touch(int(columns['timestamp'].max()))
+
+    def _add(self, index, id_stats, frames, bus_time, size):
+        # 调用方需持有 self._lock
+        self.total_frames += frames
+        slices = self._slices
+        latest = self._latest
+        if latest is not None and index < latest:
+            if index <= latest - self.slice_count:
+                self.late_frames += frames
+                return
+            # 乱序到达、仍在窗口内的帧
+            target = next((item for item in slices if item.index == index), None)
+            if target is None:
+                target = _Slice(index)
+                position = next((i for i, item in enumerate(slices) if item.index > index), len(slices))
+                slices.insert(position, target)
+        elif slices and index == slices[-1].index:
+            target = slices[-1]
+        else:
+            target = _Slice(index)
+            slices.append(target)
+            if self._first_index is None:
+                self._first_index = index
+            self._latest = index
+            self._evict(index)
+        target.bus_time += bus_time
+        target.frames += frames
+        target.bytes += size
+        self._bus_time += bus_time
+        self._frames += frames
+        self._bytes += size
+        totals = self._ids
+        for key, count, key_time in id_stats:
+            entry = target.ids.get(key)
+            if entry is None:
+                target.ids[key] = [count, key_time]
+            else:
+                entry[0] += count
+                entry[1] += key_time
+            entry = totals.get(key)
+            if entry is None:
+                totals[key] = [count, key_time]
+            else:
+                entry[0] += count
+                entry[1] += key_time
+
+    def _touch(self, timestamp):
+        # 调用方需持有 self._lock；记录最新的帧时间戳及对应的主机时间，用于估算当前时间戳
+        if self._last_timestamp is None or timestamp >= self._last_timestamp:
+            self._last_timestamp = timestamp
+            self._last_clock = time.monotonic()
+
+    def _advance(self, timestamp):
+        # 调用方需持有 self._lock
+        if timestamp is None:
+            if self._last_timestamp is None:
+                return
+            timestamp = self._last_timestamp + int((time.monotonic() - self._last_clock) * 1e6)
+        index = timestamp // self.resolution
+        if self._latest is not None and index > self._latest:
+            self._latest = index
+            self._evict(index)
+
+    def _evict(self, latest):
+        slices = self._slices
+        totals = self._ids
+        while slices and slices[0].index <= latest - self.slice_count:
+            expired = slices.popleft()
+            self._bus_time -= expired.bus_time
+            self._frames -= expired.frames
+            self._bytes -= expired.bytes
+            for key, (count, key_time) in expired.ids.items():
+                entry = totals[key]
+                entry[0] -= count
+                entry[1] -= key_time
+                if entry[0] <= 0:
+                    del totals[key]
+        if not slices:
+            # 窗口已空，清除浮点累减的残差
+            self._bus_time = 0.0
+
+    # ------------------------------------------------------------------ 结果
+
+    def _span(self) -> float:
+        # 调用方需持有 self._lock；窗口长度 (s)，统计开始不足一个窗口时为已统计的时长；挂接到通道时先按主机时间推进窗口
+        if self._channel is not None:
+            self._advance(None)
+        latest = self._latest
+        if latest is None:
+            return 0.0
+        covered = latest - max(self._first_index, latest - self.slice_count + 1) + 1
+        return covered * self.resolution / 1e6
+
+    def advance(self, timestamp: int = None):
+        """
+        推进统计窗口，移出过期的时间片；总线空闲、没有新帧到达时由此让负载回落
+
+        :param timestamp: 当前时间戳 (us)；None，由最近一帧的时间戳加上之后经过的主机时间估算
+        """
+        with self._lock:
+            self._advance(timestamp)
+
+    def reset(self):
+        """
+        清空全部统计
+        """
+        with self._lock:
+            self._slices.clear()
+            self._bus_time = 0.0
+            self._frames = 0
+            self._bytes = 0
+            self._ids.clear()
+            self._first_index = None
+            self._latest = None
+            self._last_timestamp = None
+            self.late_frames = 0
+            self.total_frames = 0
+
+    @property
+    def load(self) -> float:
+        """
+        窗口内的总线负载，0~1
+        """
+        with self._lock:
+            span = self._span()
+            return min(self._bus_time / span, 1.0) if span else 0.0
+
+    @property
+    def frames_per_second(self) -> float:
+        """
+        窗口内的平均帧率 (帧/s)
+        """
+        with self._lock:
+            span = self._span()
+            return self._frames / span if span else 0.0
+
+    def top_talkers(self, count: int = 10) -> list:
+        """
+        窗口内占用总线时间最多的 id
+
+        :param count: 个数；负数，全部
+        :return: [(id, 扩展帧, 帧数, 帧率 (帧/s), 负载占比 0~1)]，按负载降序
+        """
+        with self._lock:
+            span = self._span()
+            items = sorted(self._ids.items(), key=lambda item: item[1][1], reverse=True)
+        if count >= 0:
+            items = items[:count]
+        if not span:
+            return []
+        return [(key & (_EXTENDED_KEY - 1), 1 if key & _EXTENDED_KEY else 0, frames, frames / span, bus_time / span)
+                for key, (frames, bus_time) in items]
+
+    def snapshot(self, top: int = 10) -> dict:
+        """
+        当前统计的快照
+
+        :param top: 包含的 top_talkers 个数
+        :return: 包含 window（统计时长 s）、load、frames、frames_per_second、bytes_per_second、late_frames、
+                 top_talkers 的字典
+        """
+        with self._lock:
+            span = self._span()
+            bus_time = self._bus_time
+            frames = self._frames
+            size = self._bytes
+        return {
+            'window': span,
+            'load': min(bus_time / span, 1.0) if span else 0.0,
+            'frames': frames,
+            'frames_per_second': frames / span if span else 0.0,
+            'bytes_per_second': size / span if span else 0.0,
+            'late_frames': self.late_frames,
+            'top_talkers': self.top_talkers(top),
+        }
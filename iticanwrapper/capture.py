@@ -0,0 +1,526 @@
+import bisect
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+from array import array
+
+from iticanwrapper.itican_py_wrapper import CANFrame, CANMessage, CANMessageBatch, ITICANChannel, \
+    _MAX_DATA_LENGTH, _message_types
+
+__all__ = ['CaptureRecorder', 'CaptureReader', 'CAPTURE_MAGIC', 'CAPTURE_VERSION', 'HEADER_SIZE', 'RECORD_SIZE']
+
+CAPTURE_MAGIC = b'ITICAP\x00\x00'
+CAPTURE_VERSION = 1
+
+# 文件头：magic, version, record_size, reserved
+_HEADER = struct.Struct('<8sHHI')
+# 定长记录：timestamp, id, type, extended, transmitted, data_length, data
+_RECORD = struct.Struct('<QIBBBB%ds' % _MAX_DATA_LENGTH)
+
+HEADER_SIZE = _HEADER.size
+"""文件头长度（字节）"""
+RECORD_SIZE = _RECORD.size
+"""单条 CAN 消息记录长度（字节）"""
+# 时间戳位于记录起始处
+_TIMESTAMP = struct.Struct('<Q')
+_ID_OFFSET = 8
+_ID = struct.Struct('<I')
+
+
+class CaptureRecorder:
+    """
+    CAN 消息二进制录制器
+
+    以定长记录（时间戳、id、类型、扩展帧标志、发送标志、数据长度、64 字节数据段）将接收到的 CAN 消息写入文件。
+    接收线程只拷贝批次的各列并放入有界队列，编码和写文件由独立的写入线程完成；队列已满（磁盘过慢）时
+    丢弃该批次并计数，不阻塞接收线程。
+
+    max_bytes 或 max_seconds 非 0 时按大小或时长轮转文件，文件名为 ``<path 主名>_<序号><path 扩展名>``，
+    stop 后再次 start 时序号接续；不轮转时再次 start 追加到 path 已有的记录之后，不截断文件。
+    写文件失败（磁盘已满、无权限等）时计入 write_errors，下一批次到达时重新打开文件。
+
+    :param path: 录制文件路径
+    :param max_bytes: 单个文件的最大字节数；0，不按大小轮转
+    :param max_seconds: 单个文件的最长录制时长 (s)；0，不按时长轮转
+    :param queue_size: 待写入批次队列的最大长度
+    :param buffer_size: 文件写缓冲区大小（字节）
+    """
+
+    def __init__(self, path: str, max_bytes: int = 0, max_seconds: float = 0, queue_size: int = 1024,
+                 buffer_size: int = 1 << 20):
+        if max_bytes and max_bytes < HEADER_SIZE + RECORD_SIZE:
+            raise ValueError("max_bytes is smaller than one record")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.buffer_size = buffer_size
+        self.files = []
+        """已创建的录制文件路径"""
+        self.frames_written = 0
+        """已写入文件的 CAN 消息个数"""
+        self.frames_dropped = 0
+        """因队列已满被丢弃的 CAN 消息个数"""
+        self.write_errors = 0
+        """写文件失败的次数"""
+        self._queue = queue.Queue(queue_size)
+        self._channel = None
+        self._file = None
+        self._file_bytes = 0
+        self._file_started = 0.0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def start(self):
+        """
+        启动写入线程
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='ITICANCapture', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """
+        从通道分离，写完队列中剩余的批次后关闭文件
+
+        :param timeout: 等待写入线程退出的时长 (s)
+        """
+        self.detach()
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def attach(self, channel: ITICANChannel):
+        """
+        将录制器挂接到通道的接收路径上，通道的后台接收线程未启动时自动启动
+
+        :param channel: ITICANChannel，已开启的通道
+        """
+        self.detach()
+        self.start()
+        self._channel = channel
+        channel.add_receive_listener(self.write_batch)
+        if channel.receiver is None or not channel.receiver.running:
+            channel.start_receiver()
+
+    def detach(self):
+        """
+        从通道的接收路径上移除录制器；不停止通道的后台接收线程
+        """
+        if self._channel is not None:
+            self._channel.remove_receive_listener(self.write_batch)
+            self._channel = None
+
+    def write_batch(self, batch: CANMessageBatch) -> bool:
+        """
+        将批次放入写入队列（拷贝批次内容，调用返回后批次可被复用）
+
+        :param batch: CANMessageBatch
+        :return: True，已放入队列；False，队列已满，批次被丢弃
+        """
+        count = batch.count
+        if count == 0:
+            return True
+        item = (count, bytes(batch.ids), bytes(batch.types), bytes(batch.extended), bytes(batch.transmitted),
+                bytes(batch.timestamps), bytes(batch.data_lengths), bytes(batch.data))
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.frames_dropped += count
+            return False
+        return True
+
+    def _next_path(self):
+        if not self.max_bytes and not self.max_seconds:
+            return self.path
+        root, extension = os.path.splitext(self.path)
+        return '%s_%04d%s' % (root, len(self.files), extension)
+
+    def _open(self):
+        path = self._next_path()
+        if path in self.files:
+            # 重新启动后继续写同一文件：丢弃末尾不完整的记录后追加
+            size = os.path.getsize(path)
+            if size < HEADER_SIZE:
+                raise OSError("capture file %s lost its header" % path)
+            size -= (size - HEADER_SIZE) % RECORD_SIZE
+            os.truncate(path, size)
+            self._file = open(path, 'ab', buffering=self.buffer_size)
+            self._file_bytes = size
+        else:
+            self._file = open(path, 'wb', buffering=self.buffer_size)
+            self._file.write(_HEADER.pack(CAPTURE_MAGIC, CAPTURE_VERSION, RECORD_SIZE, 0))
+            self._file_bytes = HEADER_SIZE
+            self.files.append(path)
+        self._file_started = time.monotonic()
+
+    def _close(self):
+        file, self._file = self._file, None
+        if file is not None:
+            file.close()
+
+    def _should_rotate(self):
+        if self.max_bytes and self._file_bytes + RECORD_SIZE > self.max_bytes:
+            return True
+        if self.max_seconds and time.monotonic() - self._file_started >= self.max_seconds:
+            return True
+        return False
+
+    def _encode(self, item):
+        count, ids, types, extended, transmitted, timestamps, data_lengths, data = item
+        ids = memoryview(ids).cast('I')
+        timestamps = memoryview(timestamps).cast('Q')
+        records = bytearray(count * RECORD_SIZE)
+        pack_into = _RECORD.pack_into
+        offset = 0
+        for i in range(count):
+            length = data_lengths[i]
+            pack_into(records, i * RECORD_SIZE, timestamps[i], ids[i], types[i], extended[i], transmitted[i],
+                      length, data[offset:offset + length])
+            offset += length
+        return records
+
+    def _write(self, records):
+        view = memoryview(records)
+        while view:
+            if self._file is None or self._should_rotate():
+                self._close()
+                self._open()
+            count = len(view) // RECORD_SIZE
+            if self.max_bytes:
+                count = min(count, max((self.max_bytes - self._file_bytes) // RECORD_SIZE, 1))
+            size = count * RECORD_SIZE
+            self._file.write(view[:size])
+            self._file_bytes += size
+            self.frames_written += count
+            view = view[size:]
+
+    def _idle(self):
+        # 空闲时将缓冲区写入磁盘，并检查按时长轮转；打开失败后等下一批次到达时再重试
+        if self._file is None:
+            return
+        self._file.flush()
+        if self.max_seconds and self._should_rotate():
+            self._close()
+            self._open()
+
+    def _run(self):
+        try:
+            try:
+                self._open()
+            except OSError:
+                self.write_errors += 1
+            while not (self._stop_event.is_set() and self._queue.empty()):
+                try:
+                    item = self._queue.get(timeout=0.1)
+                except queue.Empty:
+                    item = None
+                try:
+                    if item is None:
+                        self._idle()
+                    else:
+                        self._write(self._encode(item))
+                except OSError:
+                    self.write_errors += 1
+        finally:
+            try:
+                self._close()
+            except OSError:
+                self.write_errors += 1
+
+
+class CaptureReader:
+    """
+    CaptureRecorder 录制文件的读取器
+
+    以只读方式内存映射文件，记录按需从映射中解码，不将整个文件读入内存。
+    时间戳查找使用稀疏索引（每 index_stride 条记录取样一次）加块内二分，复杂度 O(log n)；
+    按 id 查找时使用每块的 id 集合跳过不包含该 id 的块。索引在首次使用时建立。
+    要求文件中的时间戳非递减（录制文件满足该条件）。
+
+    :param path: 录制文件路径
+    :param index_stride: 稀疏索引的取样间隔（记录个数）
+    """
+
+    def __init__(self, path: str, index_stride: int = 1024):
+        if index_stride <= 0:
+            raise ValueError("index_stride must be positive")
+        self.path = path
+        self.index_stride = index_stride
+        with open(path, 'rb') as file:
+            header = file.read(HEADER_SIZE)
+            if len(header) < HEADER_SIZE:
+                raise ValueError("%s is not a capture file" % path)
+            magic, self.version, record_size, _ = _HEADER.unpack(header)
+            if magic != CAPTURE_MAGIC:
+                raise ValueError("%s is not a capture file" % path)
+            if record_size != RECORD_SIZE:
+                raise ValueError("unsupported record size %d" % record_size)
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        # 写入中的文件末尾可能有不完整的记录，忽略
+        self.count = (len(self._mmap) - HEADER_SIZE) // RECORD_SIZE
+        """文件中完整记录的个数"""
+        self._time_index = None
+        self._id_index = None
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """
+        关闭内存映射；as_numpy 返回的数组需先释放
+        """
+        self._mmap.close()
+
+    @property
+    def record_view(self) -> memoryview:
+        """全部记录的零拷贝字节视图，第 i 条记录位于 [i * RECORD_SIZE, (i + 1) * RECORD_SIZE)"""
+        return memoryview(self._mmap)[HEADER_SIZE:HEADER_SIZE + self.count * RECORD_SIZE]
+
+    def as_numpy(self):
+        """
+        以 NumPy 结构化数组视图形式返回全部记录（零拷贝，需要安装 numpy）
+
+        :return: 字段为 timestamp, id, type, extended, transmitted, data_length, data 的结构化数组
+        """
+        # numpy 为可选依赖，使用时才导入
+        import numpy as _np
+        dtype = _np.dtype([('timestamp', '<u8'), ('id', '<u4'), ('type', 'u1'), ('extended', 'u1'),
+                           ('transmitted', 'u1'), ('data_length', 'u1'), ('data', 'u1', (_MAX_DATA_LENGTH,))])
+        return _np.frombuffer(self._mmap, dtype=dtype, count=self.count, offset=HEADER_SIZE)
+
+    def _check_index(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("record index out of range")
+        return index
+
+    def record(self, index: int) -> tuple:
+        """
+        读取一条记录
+
+        :param index: 记录序号
+        :return: (timestamp, id, type, extended, transmitted, data_length, data)，data 为 64 字节
+        """
+        return _RECORD.unpack_from(self._mmap, HEADER_SIZE + self._check_index(index) * RECORD_SIZE)
+
+    def timestamp(self, index: int) -> int:
+        """
+        读取一条记录的时间戳
+
+        :param index: 记录序号
+        :return: 时间戳 (us)
+        """
+        return _TIMESTAMP.unpack_from(self._mmap, HEADER_SIZE + self._check_index(index) * RECORD_SIZE)[0]
+
+    def frame(self, index: int) -> CANFrame:
+        """
+        读取一条记录为 CANFrame
+
+        :param index: 记录序号
+        :return: CANFrame
+        """
+        timestamp, can_id, can_type, extended, _, length, data = self.record(index)
+        return CANFrame(can_id, _message_types[can_type], extended, data[:length], timestamp)
+
+    def message(self, index: int) -> CANMessage:
+        """
+        读取一条记录为 CANMessage
+
+        :param index: 记录序号
+        :return: CANMessage
+        """
+        timestamp, can_id, can_type, extended, _, length, data = self.record(index)
+        return CANMessage(can_id, _message_types[can_type], extended, list(data[:length]), timestamp)
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self.frame(index)
+
+    def read_batch(self, batch: CANMessageBatch, start: int, max_items: int = -1) -> int:
+        """
+        读取从 start 开始的多条记录到批次中（覆盖批次原有内容）
+
+        :param batch: CANMessageBatch，接收结果
+        :param start: 起始记录序号
+        :param max_items: 最多读取个数；负数，最多 batch.capacity 条
+        :return: 读取的记录个数
+        """
+        if max_items < 0 or max_items > batch.capacity:
+            max_items = batch.capacity
+        count = max(min(max_items, self.count - start), 0)
+        unpack_from = _RECORD.unpack_from
+        data_view = batch._data_view
+        position = HEADER_SIZE + start * RECORD_SIZE
+        offset = 0
+        for i in range(count):
+            timestamp, can_id, can_type, extended, transmitted, length, data = unpack_from(self._mmap, position)
+            batch.id_array[i] = can_id
+            batch.type_array[i] = can_type
+            batch.extended_array[i] = extended
+            batch.transmitted_array[i] = transmitted
+            batch.timestamp_array[i] = timestamp
+            batch.data_length_array[i] = length
+            data_view[offset:offset + length] = data[:length]
+            offset += length
+            position += RECORD_SIZE
+        batch._set_count(count)
+        return count
+
+    # ------------------------------------------------------------------ 索引
+
+    def _build_time_index(self):
+        unpack_from = _TIMESTAMP.unpack_from
+        buffer = self._mmap
+        step = self.index_stride * RECORD_SIZE
+        end = HEADER_SIZE + self.count * RECORD_SIZE
+        self._time_index = array('Q', (unpack_from(buffer, position)[0]
+                                       for position in range(HEADER_SIZE, end, step)))
+
+    def _build_id_index(self):
+        stride = self.index_stride
+        try:
+            import numpy as _np
+        except ImportError:
+            _np = None
+        if _np is not None:
+            ids = _np.ndarray((self.count,), dtype='<u4', buffer=self._mmap, offset=HEADER_SIZE + _ID_OFFSET,
+                              strides=(RECORD_SIZE,))
+            self._id_index = [frozenset(_np.unique(ids[start:start + stride]).tolist())
+                              for start in range(0, self.count, stride)]
+            return
+        unpack_from = _ID.unpack_from
+        buffer = self._mmap
+        index = []
+        for start in range(0, self.count, stride):
+            position = HEADER_SIZE + start * RECORD_SIZE + _ID_OFFSET
+            stop = min(start + stride, self.count)
+            index.append(frozenset(unpack_from(buffer, position + i * RECORD_SIZE)[0] for i in range(stop - start)))
+        self._id_index = index
+
+    def seek(self, timestamp: int) -> int:
+        """
+        查找第一条时间戳不小于 timestamp 的记录
+
+        :param timestamp: 时间戳 (us)
+        :return: 记录序号；所有记录都早于 timestamp 时返回 len(reader)
+        """
+        if self._time_index is None:
+            self._build_time_index()
+        block = bisect.bisect_left(self._time_index, timestamp)
+        if block == 0:
+            return 0
+        # 目标位于第 block - 1 块内（或恰为第 block 块的起点）
+        low = (block - 1) * self.index_stride
+        high = min(block * self.index_stride, self.count)
+        while low < high:
+            middle = (low + high) // 2
+            if self.timestamp(middle) < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def find(self, can_id: int, start: int = 0) -> int:
+        """
+        查找从 start 开始第一条 id 为 can_id 的记录
+
+        :param can_id: CAN 通信id
+        :param start: 起始记录序号
+        :return: 记录序号；不存在时返回 -1
+        """
+        if self._id_index is None:
+            self._build_id_index()
+        stride = self.index_stride
+        unpack_from = _ID.unpack_from
+        for block in range(max(start, 0) // stride, len(self._id_index)):
+            if can_id not in self._id_index[block]:
+                continue
+            for index in range(max(block * stride, start), min((block + 1) * stride, self.count)):
+                if unpack_from(self._mmap, HEADER_SIZE + index * RECORD_SIZE + _ID_OFFSET)[0] == can_id:
+                    return index
+        return -1
+
+    # ------------------------------------------------------------------ 回放
+
+    def replay(self, channel: ITICANChannel, start: int = 0, stop: int = -1, speed: float = 1.0,
+               batch_size: int = 256, timeout: int = 0, stop_event: threading.Event = None,
+               retry_interval: float = 1) -> int:
+        """
+        将记录按原有的帧间隔回放到通道上；时间相近的记录合并为一次 setMessages 批量发送
+
+        只发送了部分记录时（例如设备发送队列已满），间隔 retry_interval 后从第一条未发送的记录继续；
+        setMessages 返回错误码且一条也未发送时结束回放。
+
+        :param channel: ITICANChannel，已开启的通道
+        :param start: 起始记录序号
+        :param stop: 结束记录序号（不含）；负数，到文件末尾
+        :param speed: 回放速度倍数；0，不等待，尽快发送
+        :param batch_size: 单次批量发送的最大个数
+        :param timeout: 发送 CAN 消息操作的超时时间
+        :param stop_event: 置位时提前结束回放
+        :param retry_interval: 未全部发送时重试的间隔 (ms)
+        :return: 发送成功的 CAN 消息个数
+        """
+        if stop < 0 or stop > self.count:
+            stop = self.count
+        if start >= stop:
+            return 0
+        batch = CANMessageBatch(batch_size)
+        items_output = []
+        sent = 0
+        first_timestamp = self.timestamp(start)
+        started = time.perf_counter()
+        # 合并窗口：在此时间内到期的记录与当前记录一起发送
+        window = 0.001 * speed
+        index = start
+        while index < stop:
+            if stop_event is not None and stop_event.is_set():
+                break
+            count = self.read_batch(batch, index, stop - index)
+            if speed > 0:
+                timestamps = batch.timestamps
+                due = (timestamps[0] - first_timestamp) / 1e6
+                # 只发送合并窗口内的记录，其余留到下一次
+                limit = (due + window) * 1e6 + first_timestamp
+                count = bisect.bisect_right(timestamps, limit)
+                batch._set_count(count)
+                delay = due / speed - (time.perf_counter() - started)
+                if delay > 0:
+                    if stop_event is not None:
+                        if stop_event.wait(delay):
+                            break
+                    else:
+                        time.sleep(delay)
+            result = channel.set_messages_batch(batch, items_output, timeout)
+            done = items_output[0]
+            if result < 0 and done == 0:
+                break
+            sent += done
+            index += done
+            if done < count:
+                # 剩余的记录稍后重试
+                if stop_event is not None:
+                    if stop_event.wait(retry_interval / 1000.0):
+                        break
+                else:
+                    time.sleep(retry_interval / 1000.0)
+        return sent
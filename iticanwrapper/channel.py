@@ -0,0 +1,409 @@
+import ctypes
+
+from iticanwrapper.backend import ITICANBackend, get_default_backend
+from iticanwrapper.errors import ITICANTimeoutError, check
+from iticanwrapper.itican_py_wrapper import CANFrame, CANMessage, CANMessageBatch, ITICANChannel, \
+    OpenMode, OpenType, TxMode, _message_types
+
+__all__ = ['CANChannel', 'find_all_channels', 'get_channel']
+
+
+def find_all_channels(backend: ITICANBackend = None) -> list:
+    """
+    查找所有通道引用名
+
+    :param backend: 使用的后端，默认为 get_default_backend()
+    :return: 通道索引名列表
+    :raises errors.ITICANError: 调用失败
+    """
+    if backend is None:
+        backend = get_default_backend()
+    str_temp = ctypes.create_string_buffer(2000)
+    chn_count = ctypes.c_int32()
+    result = backend.findAllChannels(str_temp, ctypes.byref(chn_count))
+    if result:
+        check(result, 'findAllChannels', backend)
+    names = str_temp.value.decode('utf-8')
+    return names.split('\t') if names else []
+
+
+def get_channel(chn_index: str, backend: ITICANBackend = None):
+    """
+    获取通道
+
+    :param chn_index: 目标通道对应索引名
+    :param backend: 使用的后端，默认为 get_default_backend()
+    :return: CANChannel
+    :raises errors.ITICANError: 调用失败，例如 ChannelNotFoundError
+    """
+    if backend is None:
+        backend = get_default_backend()
+    container = []
+    result = ITICANChannel.get_channel(container, chn_index, backend)
+    if result:
+        check(result, 'getChannel', backend)
+    return CANChannel(container[0])
+
+
+class CANChannel:
+    """
+    ITICANChannel 的返回值接口
+
+    方法直接返回结果，调用失败（负数返回值）时抛出 errors 中对应的异常，返回警告（正数）时发出
+    errors.ITICANWarning；错误描述按错误码缓存，只在第一次出现时调用 getLastError。
+    查询和收发方法直接使用通道预先绑定的 DLL 函数和 ctypes 参数，不创建传出用的 list。
+
+    与 ITICANChannel 共用同一通道句柄，两种接口可以混用::
+
+        with get_channel('VCAN-0') as channel:
+            channel.open(OpenType.FD_CAN)
+            channel.send(CANFrame(0x123, MessageType.FD_CAN, 0, b'\\x01\\x02'))
+            frame = channel.recv(timeout=100)
+
+    :param channel: 通过 ITICANChannel.get_channel 获取的通道
+    """
+
+    def __init__(self, channel: ITICANChannel):
+        if not channel._inner_flag:
+            raise TypeError("this instance is not acquired from ITICANChannel's static method")
+        self.channel = channel
+        """底层 ITICANChannel"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _check(self, result: int, function: str) -> int:
+        return check(result, function, self.channel._dll)
+
+    def _query_u8(self, function, function_name: str, *args) -> int:
+        channel = self.channel
+        output = ctypes.c_uint8(0)
+        result = function(channel._chn_pointer, *args, ctypes.byref(output))
+        value = output.value
+        if result:
+            self._check(result, function_name)
+        return value
+
+    def _query_u64(self, function, function_name: str) -> int:
+        channel = self.channel
+        output = ctypes.c_uint64(0)
+        result = function(channel._chn_pointer, ctypes.byref(output))
+        value = output.value
+        if result:
+            self._check(result, function_name)
+        return value
+
+    # ------------------------------------------------------------------ 通道
+
+    def open(self, open_type: OpenType = OpenType.FD_CAN, open_mode: OpenMode = OpenMode.Normal):
+        """
+        开启通道
+
+        :param open_type: OpenType
+        :param open_mode: OpenMode
+        """
+        result = self.channel.open_channel(open_type, open_mode)
+        if result:
+            self._check(result, 'openChannel')
+
+    def close(self):
+        """
+        关闭通道
+        """
+        result = self.channel.close_channel()
+        if result:
+            self._check(result, 'closeChannel')
+
+    @property
+    def name(self) -> str:
+        """
+        通道索引名
+        """
+        channel = self.channel
+        str_temp = ctypes.create_string_buffer(500)
+        result = channel._dll.getChannelName(channel._chn_pointer, str_temp)
+        if result:
+            self._check(result, 'getChannelName')
+        return str_temp.value.decode('utf-8')
+
+    def apply_settings(self, temporary: bool):
+        """
+        应用通道设置
+
+        :param temporary: 是否临时应用
+        """
+        result = self.channel.apply_settings(temporary)
+        if result:
+            self._check(result, 'applySettings')
+
+    # ------------------------------------------------------------------ 波特率
+
+    def set_baud_rate(self, baud_rate: int):
+        """
+        设置通道仲裁段波特率
+
+        :param baud_rate: 仲裁段波特率参数
+        """
+        result = self.channel.set_baud_rate(baud_rate)
+        if result:
+            self._check(result, 'setBaudRate')
+
+    def set_custom_baud_rate(self, brp: int, ts1: int, ts2: int, sjw: int):
+        """
+        设置仲裁段自定义波特率参数，参数含义同 ITICANChannel.set_custom_baud_rate
+        """
+        result = self.channel.set_custom_baud_rate(brp, ts1, ts2, sjw)
+        if result:
+            self._check(result, 'setBaudRate')
+
+    def get_baud_rate(self) -> int:
+        """
+        :return: 仲裁段波特率参数
+        """
+        return self._query_u64(self.channel._fn_get_baud_rate, 'getBaudRate')
+
+    def set_fd_baud_rate(self, baud_rate: int):
+        """
+        设置数据段波特率
+
+        :param baud_rate: 数据段波特率参数
+        """
+        result = self.channel.set_fd_baud_rate(baud_rate)
+        if result:
+            self._check(result, 'setFdBaudRate')
+
+    def set_custom_fd_baud_rate(self, brp: int, ts1: int, ts2: int, sjw: int, tdc_o: int):
+        """
+        设置数据段自定义波特率参数，参数含义同 ITICANChannel.set_custom_fd_baud_rate
+        """
+        result = self.channel.set_custom_fd_baud_rate(brp, ts1, ts2, sjw, tdc_o)
+        if result:
+            self._check(result, 'setFdBaudRate')
+
+    def get_fd_baud_rate(self) -> int:
+        """
+        :return: 数据段波特率参数
+        """
+        return self._query_u64(self.channel._dll.getFdBaudRate, 'getFdBaudRate')
+
+    def get_custom_baud_rate(self) -> str:
+        """
+        :return: 字符串形式的波特率参数（hex,hex）
+        """
+        channel = self.channel
+        str_temp = ctypes.create_string_buffer(500)
+        result = channel._dll.getCustomBaudRate(channel._chn_pointer, str_temp)
+        if result:
+            self._check(result, 'getCustomBaudRate')
+        return str_temp.value.decode('utf-8')
+
+    # ------------------------------------------------------------------ 发送
+
+    def send(self, message, timeout: int = 0):
+        """
+        发送一条 CAN 消息
+
+        :param message: CANMessage 或 CANFrame
+        :param timeout: 发送操作超时时长
+        """
+        result = self.channel.set_message(message, timeout)
+        if result:
+            self._check(result, 'setMessage')
+
+    def send_batch(self, batch: CANMessageBatch, timeout: int = 0) -> int:
+        """
+        发送列式批次中的全部 CAN 消息
+
+        :param batch: CANMessageBatch
+        :param timeout: 发送操作超时时长
+        :return: 发送成功的个数
+        """
+        count = batch.count
+        if count == 0:
+            return 0
+        channel = self.channel
+        pacer = channel._pacer
+        if pacer is not None:
+            # 设置了发送限速时按令牌桶分段发送
+            items_output = []
+            result = pacer.send_batch(batch, items_output, timeout)
+            if result:
+                self._check(result, 'setMessages')
+            return items_output[0] if items_output else 0
+        items_temp = ctypes.c_uint32(count)
+        result = channel._fn_set_messages(channel._chn_pointer, batch.id_array, batch.type_array,
+                                          batch.extended_array, batch.data_array, batch.data_length_array,
+                                          ctypes.byref(items_temp), timeout)
+        if result:
+            self._check(result, 'setMessages')
+        return min(items_temp.value, count)
+
+    def send_messages(self, messages: list, timeout: int = 0) -> int:
+        """
+        发送多条 CAN 消息，打包到连续缓冲区后通过一次 setMessages 调用发送
+
+        :param messages: CANMessage 或 CANFrame 列表
+        :param timeout: 发送操作超时时长
+        :return: 发送成功的个数
+        """
+        channel = self.channel
+        capacity = max(len(messages), 1)
+        with channel._tx_batch_lock:
+            if channel._tx_batch is None or channel._tx_batch.capacity < capacity:
+                channel._tx_batch = CANMessageBatch(capacity)
+            batch = channel._tx_batch
+            batch.clear()
+            batch.extend_messages(messages)
+            return self.send_batch(batch, timeout)
+
+    # ------------------------------------------------------------------ 接收
+
+    def message_count(self) -> int:
+        """
+        :return: 已接收 CAN 消息个数
+        """
+        channel = self.channel
+        output = ctypes.c_int32(0)
+        result = channel._fn_get_message_count(channel._chn_pointer, ctypes.byref(output))
+        value = output.value
+        if result:
+            self._check(result, 'getMessageCount')
+        return value
+
+    def recv(self, timeout: int = 0) -> CANFrame:
+        """
+        读取一条 CAN 消息
+
+        :param timeout: 读取操作超时时长 (ms)
+        :return: CANFrame
+        :raises errors.ITICANError: 读取失败，例如超时时长内没有 CAN 消息
+        """
+        return self._recv(timeout, True)
+
+    def recv_message(self, timeout: int = 0) -> CANMessage:
+        """
+        读取一条 CAN 消息，数据段为 list
+
+        :param timeout: 读取操作超时时长 (ms)
+        :return: CANMessage
+        """
+        return self._recv(timeout, False)
+
+    def _recv(self, timeout, as_frame: bool):
+        channel = self.channel
+        with channel._rx_lock:
+            acceptance_filter = channel._filter
+            if acceptance_filter is None:
+                result = channel._fn_get_message(channel._chn_pointer, *channel._rx_args, timeout)
+            else:
+                result = channel._get_filtered_message(acceptance_filter, timeout)
+            if result < 0:
+                data = None
+            else:
+                length = channel._rx_data_length.value
+                data = bytes(channel._rx_data_view[:length]) if as_frame else channel._rx_data[:length]
+                can_id = channel._rx_id.value
+                message_type = _message_types[channel._rx_type.value]
+                can_extended = channel._rx_extended.value
+                timestamp = channel._rx_timestamp.value
+        if result:
+            self._check(result, 'getMessage')
+        if as_frame:
+            return CANFrame(can_id, message_type, can_extended, data, timestamp)
+        return CANMessage(can_id, message_type, can_extended, data, timestamp)
+
+    def recv_batch(self, batch: CANMessageBatch, items: int = -1, timeout: int = 0) -> int:
+        """
+        批量读取 CAN 消息到列式批次中
+
+        超时不视为错误：返回超时前已接收的个数（可能为 0），其他错误抛出异常。
+        只有后端映射为 errors.ITICANTimeoutError 的错误码视为超时，未映射的错误码（如 DLL_ERROR_UNKNOWN）抛出异常。
+
+        :param batch: CANMessageBatch，调用后 batch.count 为读取到的消息个数
+        :param items: 预期读取 CAN 消息个数；为负数（-1）时读取当前所有可用的 CAN 消息，最多 batch.capacity 条
+        :param timeout: 接收操作超时时长；0，立即返回已接收的消息；负数，一直等待 items 条消息
+        :return: 读取到的消息个数
+        """
+        result = self.channel.get_messages_batch(batch, items, timeout)
+        if result:
+            if result < 0 and self._is_receive_timeout(result):
+                return batch.count
+            self._check(result, 'getMessages')
+        return batch.count
+
+    def _is_receive_timeout(self, result: int) -> bool:
+        error_class = self.channel._dll.error_classes.get(result)
+        return error_class is not None and issubclass(error_class, ITICANTimeoutError)
+
+    def recv_frames(self, items: int = -1, timeout: int = 0) -> list:
+        """
+        批量读取 CAN 消息，超时规则同 recv_batch
+
+        :param items: 预期读取 CAN 消息个数；为负数（-1）时读取当前所有可用的 CAN 消息
+        :param timeout: 接收操作超时时长
+        :return: CANFrame 列表
+        """
+        channel = self.channel
+        capacity = items if items > 0 else 1024
+        with channel._rx_batch_lock:
+            if channel._rx_batch is None or channel._rx_batch.capacity < capacity:
+                channel._rx_batch = CANMessageBatch(capacity)
+            self.recv_batch(channel._rx_batch, items, timeout)
+            return channel._rx_batch.to_frames()
+
+    # ------------------------------------------------------------------ 功能设置
+
+    def is_termination_supported(self) -> bool:
+        return self._query_u8(self.channel._fn_is_termination_supported, 'isTerminationSupported') != 0
+
+    def is_termination_enabled(self) -> bool:
+        return self._query_u8(self.channel._fn_is_termination_enabled, 'isTerminationEnabled') != 0
+
+    def set_termination(self, enable: bool):
+        result = self.channel.set_termination(enable)
+        if result:
+            self._check(result, 'setTermination')
+
+    def is_echo_message_supported(self) -> bool:
+        return self._query_u8(self.channel._fn_is_echo_message_supported, 'isEchoMessageSupported') != 0
+
+    def is_echo_message_enabled(self) -> bool:
+        return self._query_u8(self.channel._fn_is_echo_message_enabled, 'isEchoMessageEnabled') != 0
+
+    def set_echo_message(self, enable: bool):
+        channel = self.channel
+        result = channel._dll.setEchoMessage(channel._chn_pointer, 1 if enable else 0)
+        if result:
+            self._check(result, 'setEchoMessage')
+
+    def set_bus_error_report(self, enable: bool):
+        result = self.channel.bus_error_report(enable)
+        if result:
+            self._check(result, 'setBusErrorReport')
+
+    def is_tx_mode_supported(self, mode: TxMode) -> bool:
+        return self._query_u8(self.channel._fn_is_tx_mode_supported, 'isTxModeSupported', mode.value) != 0
+
+    def set_tx_mode(self, mode: TxMode):
+        result = self.channel.set_tx_mode(mode)
+        if result:
+            self._check(result, 'setTxMode')
+
+    def set_tx_timing(self, can_id: int, period: int):
+        result = self.channel.set_tx_timing(can_id, period)
+        if result:
+            self._check(result, 'setTxTiming')
+
+    def is_blink_supported(self) -> bool:
+        return self._query_u8(self.channel._fn_is_blink_supported, 'isBlinkSupported') != 0
+
+    def is_channel_blinking(self) -> bool:
+        return self._query_u8(self.channel._fn_is_channel_blinking, 'isChannelBlinking') != 0
+
+    def set_channel_blink(self, enable: bool):
+        result = self.channel.set_channel_blink(enable)
+        if result:
+            self._check(result, 'blinkChannel')
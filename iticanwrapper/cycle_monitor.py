@@ -0,0 +1,589 @@
+import threading
+import time
+from enum import Enum
+
+from iticanwrapper.itican_py_wrapper import CANMessageBatch, _numpy_available
+from iticanwrapper.receiver import _EXTENDED_KEY, _ReceiveListener
+
+__all__ = ['CycleEventType', 'CycleEvent', 'CycleStatistics', 'CycleMonitor']
+
+
+class CycleEventType(Enum):
+    TIMEOUT = 0
+    """
+    周期消息超过超时时长未到达；value 为超时时长 (ms)
+    """
+    RESUMED = 1
+    """
+    超时后重新收到该消息；value 为两帧之间的间隔 (ms)
+    """
+    DRIFT = 2
+    """
+    平滑周期偏离设定周期超过容差；value 为当前平滑周期 (ms)
+    """
+
+
+class CycleEvent:
+    """
+    周期监控事件
+
+    :param kind: CycleEventType
+    :param can_id: CAN 通信id
+    :param extended: CAN 消息拓展帧属性
+    :param timestamp: 事件发生的时间戳 (us，与 CAN 消息时间戳同一时钟)
+    :param value: 见 CycleEventType
+    """
+
+    __slots__ = ('kind', 'can_id', 'extended', 'timestamp', 'value')
+
+    def __init__(self, kind: CycleEventType, can_id: int, extended: int, timestamp: int, value: float):
+        self.kind = kind
+        self.can_id = can_id
+        self.extended = extended
+        self.timestamp = timestamp
+        self.value = value
+
+    def __repr__(self):
+        return 'CycleEvent(%s, 0x%X, %d, %d, %.3f)' % (self.kind.name, self.can_id, self.extended, self.timestamp,
+                                                       self.value)
+
+
+class CycleStatistics:
+    """
+    单个 id 的周期统计，时间均以 us 保存，period 等属性以 ms 给出
+
+    :param can_id: CAN 通信id
+    :param extended: CAN 消息拓展帧属性
+    :param expected_period: 设定周期 (us)；None，未设定
+    :param timeout: 超时时长 (us)；None，按平滑周期学习
+    """
+
+    __slots__ = ('can_id', 'extended', 'expected_period', 'timeout', 'count', 'intervals', 'last_timestamp',
+                 'ewma', 'ewma_sq', 'min_interval', 'max_interval', 'missed', 'timeouts', 'timed_out', 'drifting',
+                 'deadline', 'scheduled')
+
+    def __init__(self, can_id: int, extended: int, expected_period: float = None, timeout: float = None):
+        self.can_id = can_id
+        self.extended = extended
+        self.expected_period = expected_period
+        self.timeout = timeout
+        self.count = 0
+        """收到的帧数"""
+        self.intervals = 0
+        """参与统计的间隔个数"""
+        self.last_timestamp = None
+        """最近一帧的时间戳 (us)"""
+        self.ewma = None
+        self.ewma_sq = None
+        self.min_interval = None
+        self.max_interval = None
+        self.missed = 0
+        """按参考周期估算的丢帧数：每个间隔计 round(间隔 / 周期) - 1"""
+        self.timeouts = 0
+        """超时次数"""
+        self.timed_out = False
+        """当前是否处于超时状态"""
+        self.drifting = False
+        """当前是否处于周期偏离状态"""
+        self.deadline = None
+        self.scheduled = False
+
+    @property
+    def period(self) -> float:
+        """平滑周期 (ms)，指数加权移动平均"""
+        return self.ewma / 1000.0 if self.ewma is not None else None
+
+    @property
+    def jitter(self) -> float:
+        """周期抖动 (ms)，间隔的指数加权标准差"""
+        if self.ewma is None:
+            return None
+        return max(self.ewma_sq - self.ewma * self.ewma, 0.0) ** 0.5 / 1000.0
+
+    @property
+    def min_period(self) -> float:
+        """最小间隔 (ms)"""
+        return self.min_interval / 1000.0 if self.min_interval is not None else None
+
+    @property
+    def max_period(self) -> float:
+        """最大间隔 (ms)"""
+        return self.max_interval / 1000.0 if self.max_interval is not None else None
+
+    def as_dict(self) -> dict:
+        return {
+            'can_id': self.can_id,
+            'extended': self.extended,
+            'expected_period': self.expected_period / 1000.0 if self.expected_period is not None else None,
+            'count': self.count,
+            'period': self.period,
+            'jitter': self.jitter,
+            'min_period': self.min_period,
+            'max_period': self.max_period,
+            'missed': self.missed,
+            'timeouts': self.timeouts,
+            'timed_out': self.timed_out,
+            'drifting': self.drifting,
+        }
+
+
+class CycleMonitor(_ReceiveListener):
+    """
+    周期消息时序监控
+
+    每个 id 保存最近时间戳、平滑周期（指数加权移动平均）、最小/最大间隔、抖动和丢帧数，逐帧更新为常数时间；
+    批量输入在安装了 numpy 时按批次向量化计算（平滑周期以闭式求和，丢帧按批次开始时的参考周期估算）。
+    时间以 CAN 消息的硬件时间戳 (us) 为准，可直接用于回放的记录。
+
+    超时检测使用一个时间轮：每个 id 在轮中最多一个条目，收到新帧只更新截止时间，条目到期时截止时间已推后则重新放入，
+    因此每帧不做时间轮操作。两帧间隔超过超时时长（帧到达时检测）或时间轮到期（通道静默时检测）均产生 TIMEOUT 事件，
+    之后首帧产生 RESUMED 事件。通道完全没有消息时，需要 start 启动的定时线程按主机时钟推进时间轮。
+
+    :param alpha: 指数加权系数，0~1，越大越跟随最近的间隔
+    :param timeout_factor: 超时时长为周期（设定周期或平滑周期）的倍数
+    :param drift_tolerance: 平滑周期与设定周期的相对偏差超过该值时产生 DRIFT 事件；None，不检测
+    :param learn: True，自动统计所有出现的 id，超时时长按平滑周期学习；False，只统计 expect 设定的 id
+    :param learn_intervals: 学习超时时长前至少需要的间隔个数
+    :param tick: 时间轮刻度 (ms)
+    :param slots: 时间轮槽数
+    :param use_numpy: 是否使用 numpy 计算批次；None，已安装时使用
+    """
+
+    def __init__(self, alpha: float = 0.125, timeout_factor: float = 3.0, drift_tolerance: float = None,
+                 learn: bool = True, learn_intervals: int = 8, tick: float = 1.0, slots: int = 1024,
+                 use_numpy: bool = None):
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        if slots & (slots - 1):
+            raise ValueError("slots must be a power of two")
+        self.alpha = alpha
+        self.timeout_factor = timeout_factor
+        self.drift_tolerance = drift_tolerance
+        self.learn = learn
+        self.learn_intervals = learn_intervals
+        self._tick = max(int(tick * 1000), 1)
+        self._slot_mask = slots - 1
+        self._slots = [[] for _ in range(slots)]
+        self._wheel_time = None
+        self.use_numpy = _numpy_available() if use_numpy is None else use_numpy
+        self.frames = 0
+        """统计的帧数"""
+        self.listener_errors = 0
+        """事件监听器抛出异常的次数"""
+        self._states = {}
+        self._listeners = ()
+        self._last_timestamp = None
+        self._last_clock = None
+        self._lock = threading.Lock()
+        self._channel = None
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    # ------------------------------------------------------------------ 配置
+
+    def expect(self, can_id: int, period: float, extended: int = 0, timeout: float = None):
+        """
+        设定周期消息
+
+        :param can_id: CAN 通信id
+        :param period: 设定周期 (ms)
+        :param extended: CAN 消息拓展帧属性
+        :param timeout: 超时时长 (ms)；None，为 period * timeout_factor
+        :return: CycleStatistics
+        """
+        if period <= 0:
+            raise ValueError("period must be positive")
+        key = can_id | (_EXTENDED_KEY if extended else 0)
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                state = self._states[key] = CycleStatistics(can_id, 1 if extended else 0)
+            state.expected_period = period * 1000.0
+            state.timeout = (timeout if timeout is not None else period * self.timeout_factor) * 1000.0
+            if state.last_timestamp is not None:
+                self._arm(state, state.last_timestamp + state.timeout)
+        return state
+
+    def forget(self, can_id: int, extended: int = 0):
+        """
+        停止统计某个 id
+
+        :param can_id: CAN 通信id
+        :param extended: CAN 消息拓展帧属性
+        """
+        with self._lock:
+            state = self._states.pop(can_id | (_EXTENDED_KEY if extended else 0), None)
+            if state is not None:
+                state.deadline = None
+
+    def add_listener(self, listener):
+        """
+        添加事件监听器，以 CycleEvent 调用；在处理消息的线程（接收线程或定时线程）中调用，不应阻塞
+
+        :param listener: 参数为 CycleEvent 的可调用对象
+        """
+        self._listeners = self._listeners + (listener,)
+
+    def remove_listener(self, listener):
+        self._listeners = tuple(item for item in self._listeners if item != listener)
+
+    def statistics(self, can_id: int, extended: int = 0) -> CycleStatistics:
+        """
+        :return: 该 id 的 CycleStatistics；未统计时为 None
+        """
+        return self._states.get(can_id | (_EXTENDED_KEY if extended else 0))
+
+    def snapshot(self) -> list:
+        """
+        :return: 全部 id 的统计（CycleStatistics.as_dict），按 (扩展帧, id) 排序
+        """
+        with self._lock:
+            states = list(self._states.values())
+        return [state.as_dict() for state in sorted(states, key=lambda item: (item.extended, item.can_id))]
+
+    # ------------------------------------------------------------------ 输入
+
+    def start(self, interval: float = 10.0):
+        """
+        启动定时线程：按主机时钟估算当前的硬件时间戳并推进时间轮，使静默的 id 也能及时产生 TIMEOUT 事件
+
+        :param interval: 推进间隔 (ms)
+        """
+        if self._thread is not None and self._thread.is_alive():
+            raise RuntimeError("monitor is already running")
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval / 1000.0,), name='ITICANCycleMonitor',
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        """
+        从通道移除并停止定时线程
+
+        :param timeout: 等待线程退出的时长 (s)
+        """
+        self.detach()
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _run(self, interval):
+        while not self._stop_event.wait(interval):
+            self.poll()
+
+    def poll(self, timestamp: int = None):
+        """
+        推进时间轮，产生到期的 TIMEOUT 事件
+
+        :param timestamp: 当前时间戳 (us)；None，由最近一帧的时间戳加上之后经过的主机时间估算
+        """
+        with self._lock:
+            if timestamp is None:
+                if self._last_timestamp is None:
+                    return
+                timestamp = self._last_timestamp + int((time.monotonic() - self._last_clock) * 1e6)
+            events = []
+            self._advance(timestamp, events)
+        self._emit(events)
+
+    def add_frame(self, frame):
+        """
+        统计一帧
+
+        :param frame: CANMessage 或 CANFrame（使用 timestamp_，单位 us）
+        """
+        events = []
+        with self._lock:
+            self._update(frame.id_, frame.extended_, frame.timestamp_, events)
+            self._advance(frame.timestamp_, events)
+            self._last_timestamp = frame.timestamp_
+            self._last_clock = time.monotonic()
+        self._emit(events)
+
+    def add_batch(self, batch: CANMessageBatch):
+        """
+        统计批次中的全部帧
+
+        :param batch: CANMessageBatch（使用 timestamps 列，单位 us）
+        """
+        count = batch.count
+        if count == 0:
+            return
+        events = []
+        with self._lock:
+            latest = self._update_numpy(batch, events) if self.use_numpy else None
+            if latest is None:
+                ids = batch._id_view
+                extended = batch._extended_view
+                timestamps = batch._timestamp_view
+                update = self._update
+                latest = 0
+                for i in range(count):
+                    timestamp = timestamps[i]
+                    update(ids[i], extended[i], timestamp, events)
+                    if timestamp > latest:
+                        latest = timestamp
+            self._advance(latest, events)
+            self._last_timestamp = latest
+            self._last_clock = time.monotonic()
+        self._emit(events)
+
+    # ------------------------------------------------------------------ 计算
+
+    def _state(self, key, can_id, can_extended):
+        # 调用方需持有 self._lock；未设定且不学习时返回 None
+        state = self._states.get(key)
+        if state is None and self.learn:
+            state = self._states[key] = CycleStatistics(can_id, 1 if can_extended else 0)
+        return state
+
+    def _reference(self, state):
+        # 丢帧和超时使用的参考周期 (us)
+        if state.expected_period is not None:
+            return state.expected_period
+        if state.intervals >= self.learn_intervals:
+            return state.ewma
+        return None
+
+    def _timeout(self, state):
+        if state.timeout is not None:
+            return state.timeout
+        if state.intervals >= self.learn_intervals:
+            return state.ewma * self.timeout_factor
+        return None
+
+    def _update(self, can_id, can_extended, timestamp, events):
+        # 调用方需持有 self._lock
+        key = can_id | (_EXTENDED_KEY if can_extended else 0)
+        state = self._states.get(key)
+        if state is None:
+            state = self._state(key, can_id, can_extended)
+            if state is None:
+                return
+        self.frames += 1
+        state.count += 1
+        last = state.last_timestamp
+        if last is not None and timestamp > last:
+            interval = timestamp - last
+            timeout = self._timeout(state)
+            reference = self._reference(state)
+            if reference:
+                missed = int(interval / reference + 0.5) - 1
+                if missed > 0:
+                    state.missed += missed
+            if state.timed_out:
+                state.timed_out = False
+                events.append(CycleEvent(CycleEventType.RESUMED, state.can_id, state.extended, timestamp,
+                                         interval / 1000.0))
+            elif timeout is not None and interval > timeout:
+                state.timeouts += 1
+                events.append(CycleEvent(CycleEventType.TIMEOUT, state.can_id, state.extended, int(last + timeout),
+                                         timeout / 1000.0))
+                events.append(CycleEvent(CycleEventType.RESUMED, state.can_id, state.extended, timestamp,
+                                         interval / 1000.0))
+            ewma = state.ewma
+            if ewma is None:
+                state.ewma = float(interval)
+                state.ewma_sq = float(interval) * interval
+                state.min_interval = state.max_interval = interval
+            else:
+                alpha = self.alpha
+                state.ewma = ewma + alpha * (interval - ewma)
+                state.ewma_sq += alpha * (interval * interval - state.ewma_sq)
+                if interval < state.min_interval:
+                    state.min_interval = interval
+                if interval > state.max_interval:
+                    state.max_interval = interval
+            state.intervals += 1
+            if self.drift_tolerance is not None and state.expected_period is not None:
+                self._check_drift(state, timestamp, events)
+        elif state.timed_out:
+            state.timed_out = False
+            events.append(CycleEvent(CycleEventType.RESUMED, state.can_id, state.extended, timestamp, 0.0))
+        if last is None or timestamp > last:
+            state.last_timestamp = timestamp
+            timeout = self._timeout(state)
+            if timeout is not None:
+                self._arm(state, timestamp + timeout)
+
+    def _check_drift(self, state, timestamp, events):
+        drifting = abs(state.ewma - state.expected_period) > self.drift_tolerance * state.expected_period
+        if drifting and not state.drifting:
+            events.append(CycleEvent(CycleEventType.DRIFT, state.can_id, state.extended, timestamp,
+                                     state.ewma / 1000.0))
+        state.drifting = drifting
+
+    def _update_numpy(self, batch, events):
+        # numpy 为可选依赖，使用时才导入
+        import numpy as _np
+        columns = batch.as_numpy()
+        timestamps = columns['timestamp'].astype(_np.int64)
+        keys = columns['id'].astype(_np.int64) | (columns['extended'].astype(_np.int64) << 32)
+        # 同一 id 的帧保持到达顺序排在一起
+        order = _np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        sorted_times = timestamps[order]
+        unique, starts, counts = _np.unique(sorted_keys, return_index=True, return_counts=True)
+        group_count = len(unique)
+        if group_count * 2 > len(keys):
+            # 大多数 id 在批次中只出现一次，逐组处理不比逐帧快
+            return None
+
+        # 各组的已有状态：上一帧时间戳、参考周期和超时时长（无则为 0）
+        states = []
+        previous_last = _np.empty(group_count, dtype=_np.int64)
+        references = _np.zeros(group_count)
+        timeouts = _np.zeros(group_count)
+        for position, key in enumerate(unique.tolist()):
+            state = self._states.get(key)
+            if state is None:
+                state = self._state(key, key & (_EXTENDED_KEY - 1), key >> 32)
+            states.append(state)
+            if state is None:
+                previous_last[position] = -1
+                continue
+            previous_last[position] = state.last_timestamp if state.last_timestamp is not None else -1
+            references[position] = self._reference(state) or 0.0
+            timeouts[position] = self._timeout(state) or 0.0
+
+        previous = _np.empty_like(sorted_times)
+        previous[1:] = sorted_times[:-1]
+        previous[starts] = previous_last
+        intervals = sorted_times - previous
+        valid = (previous >= 0) & (intervals > 0)
+        floats = intervals.astype(_np.float64)
+        # 组内其后的有效间隔个数（有效标志的反向累计和），用于指数加权的闭式求和；无效间隔不参与衰减
+        valid_cumulative = _np.cumsum(valid.astype(_np.int64))
+        remaining = _np.repeat(valid_cumulative[starts + counts - 1], counts) - valid_cumulative
+        indices = _np.arange(len(sorted_times))
+        decay = 1.0 - self.alpha
+        weights = _np.where(valid, self.alpha * decay ** remaining, 0.0)
+        valid_counts = _np.add.reduceat(valid.astype(_np.int64), starts).tolist()
+        weighted = _np.add.reduceat(weights * floats, starts).tolist()
+        weighted_sq = _np.add.reduceat(weights * floats * floats, starts).tolist()
+        minimum = _np.minimum.reduceat(_np.where(valid, intervals, _np.iinfo(_np.int64).max), starts).tolist()
+        maximum = _np.maximum.reduceat(_np.where(valid, intervals, -1), starts).tolist()
+        last_times = _np.maximum.reduceat(sorted_times, starts).tolist()
+        first_index = _np.minimum.reduceat(_np.where(valid, indices, len(indices) - 1), starts)
+        first_intervals = floats[first_index].tolist()
+        first_times = sorted_times[first_index].tolist()
+        # 丢帧按批次开始时的参考周期估算
+        reference_each = _np.repeat(references, counts)
+        missed = _np.where(valid & (reference_each > 0),
+                           _np.floor(floats / _np.where(reference_each > 0, reference_each, 1.0) + 0.5) - 1, 0)
+        missed = _np.add.reduceat(_np.maximum(missed, 0).astype(_np.int64), starts).tolist()
+        exceeded = valid & (floats > _np.repeat(_np.where(timeouts > 0, timeouts, _np.inf), counts))
+        exceeded_groups = set(_np.flatnonzero(_np.logical_or.reduceat(exceeded, starts)).tolist())
+        counts = counts.tolist()
+        starts = starts.tolist()
+
+        for position, state in enumerate(states):
+            if state is None:
+                continue
+            count = counts[position]
+            state.count += count
+            self.frames += count
+            valid_count = valid_counts[position]
+            last = state.last_timestamp
+            latest = last_times[position]
+            if valid_count:
+                state.missed += missed[position]
+                if state.timed_out:
+                    state.timed_out = False
+                    events.append(CycleEvent(CycleEventType.RESUMED, state.can_id, state.extended,
+                                             first_times[position], first_intervals[position] / 1000.0))
+                elif position in exceeded_groups:
+                    timeout = timeouts[position]
+                    start = starts[position]
+                    for index in _np.flatnonzero(exceeded[start:start + count]).tolist():
+                        state.timeouts += 1
+                        interval = int(intervals[start + index])
+                        resumed_at = int(sorted_times[start + index])
+                        events.append(CycleEvent(CycleEventType.TIMEOUT, state.can_id, state.extended,
+                                                 int(resumed_at - interval + timeout), timeout / 1000.0))
+                        events.append(CycleEvent(CycleEventType.RESUMED, state.can_id, state.extended, resumed_at,
+                                                 interval / 1000.0))
+                factor = decay ** valid_count
+                if state.ewma is None:
+                    # 首个间隔作为初值，与逐帧计算一致
+                    initial = first_intervals[position]
+                    state.ewma = initial
+                    state.ewma_sq = initial * initial
+                    state.min_interval = minimum[position]
+                    state.max_interval = maximum[position]
+                else:
+                    if minimum[position] < state.min_interval:
+                        state.min_interval = minimum[position]
+                    if maximum[position] > state.max_interval:
+                        state.max_interval = maximum[position]
+                state.ewma = factor * state.ewma + weighted[position]
+                state.ewma_sq = factor * state.ewma_sq + weighted_sq[position]
+                state.intervals += valid_count
+                if self.drift_tolerance is not None and state.expected_period is not None:
+                    self._check_drift(state, latest, events)
+            elif state.timed_out and last is not None and latest >= last:
+                state.timed_out = False
+                events.append(CycleEvent(CycleEventType.RESUMED, state.can_id, state.extended, latest, 0.0))
+            if last is None or latest > last:
+                state.last_timestamp = latest
+                timeout = self._timeout(state)
+                if timeout is not None:
+                    self._arm(state, latest + timeout)
+        return int(timestamps.max())
+
+    # ------------------------------------------------------------------ 时间轮
+
+    def _arm(self, state, deadline):
+        # 调用方需持有 self._lock；已在轮中时只更新截止时间，到期时再按新截止时间放回
+        state.deadline = deadline
+        if state.scheduled:
+            return
+        state.scheduled = True
+        tick = int(deadline) // self._tick
+        if self._wheel_time is not None and tick <= self._wheel_time:
+            tick = self._wheel_time + 1
+        self._slots[tick & self._slot_mask].append(state)
+
+    def _advance(self, timestamp, events):
+        # 调用方需持有 self._lock
+        target = int(timestamp) // self._tick
+        current = self._wheel_time
+        if current is not None and target <= current:
+            return
+        if current is None or target - current > self._slot_mask + 1:
+            # 首次推进或时间跳变超过一圈：每个槽检查一次
+            start = target - self._slot_mask
+        else:
+            start = current + 1
+        self._wheel_time = target
+        slots = self._slots
+        mask = self._slot_mask
+        for tick in range(start, target + 1):
+            index = tick & mask
+            slot = slots[index]
+            if not slot:
+                continue
+            slots[index] = []
+            for state in slot:
+                deadline = state.deadline
+                if deadline is None or state.timed_out:
+                    state.scheduled = False
+                elif deadline <= timestamp:
+                    state.scheduled = False
+                    state.timed_out = True
+                    state.timeouts += 1
+                    events.append(CycleEvent(CycleEventType.TIMEOUT, state.can_id, state.extended, int(deadline),
+                                             (deadline - state.last_timestamp) / 1000.0))
+                else:
+                    deadline_tick = int(deadline) // self._tick
+                    slots[(deadline_tick if deadline_tick > target else target + 1) & mask].append(state)
+
+    def _emit(self, events):
+        if not events:
+            return
+        for listener in self._listeners:
+            for event in events:
+                try:
+                    listener(event)
+                except Exception:
+                    self.listener_errors += 1
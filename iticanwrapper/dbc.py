@@ -0,0 +1,691 @@
+import re
+import struct
+
+from iticanwrapper.itican_py_wrapper import CANFrame, CANMessageBatch, ITICANChannel, MessageType, _MAX_DATA_LENGTH
+
+__all__ = ['Signal', 'Message', 'DecodedFrames', 'Database', 'FrameEncoder', 'Encoder', 'load_dbc']
+
+_MESSAGE_PATTERN = re.compile(r'^BO_\s+(\d+)\s+(\w+)\s*:\s*(\d+)\s+(\w+)')
+_SIGNAL_PATTERN = re.compile(
+    r'^SG_\s+(\w+)\s*(M|m\d+)?\s*:\s*(\d+)\|(\d+)@([01])([+-])\s*'
+    r'\(\s*([^,\s]+)\s*,\s*([^)\s]+)\s*\)\s*\[\s*([^|\s]*)\s*\|\s*([^\]\s]*)\s*\]\s*"([^"]*)"\s*(.*)$')
+_VALUE_TABLE_PATTERN = re.compile(r'^VAL_\s+(\d+)\s+(\w+)\s+(.*?)\s*;')
+_VALUE_PATTERN = re.compile(r'(-?\d+)\s+"([^"]*)"')
+_VALUE_TYPE_PATTERN = re.compile(r'^SIG_VALTYPE_\s+(\d+)\s+(\w+)\s*:?\s*([12])\s*;')
+
+_EXTENDED_FLAG = 0x80000000
+_FLOAT_STRUCTS = {32: struct.Struct('<f'), 64: struct.Struct('<d')}
+
+
+def _frame_id(can_id, extended):
+    # DBC 中的报文 id，扩展帧带 _EXTENDED_FLAG
+    return can_id | _EXTENDED_FLAG if extended else can_id
+
+
+class Signal:
+    """
+    DBC 信号定义
+
+    构造时将起始位、长度和字节序编译为逐字节的移位表：原始值 = Σ (data[字节序号] 移位 shift) & mask，
+    shift 为正时左移、为负时右移。Intel 与 Motorola 字节序使用同一张表，单帧和批量解码均按表计算；
+    编码时按同一张表反向移位，并用逐字节掩码只改写信号所占的位。
+
+    :param name: 信号名
+    :param start_bit: DBC 起始位（Motorola 字节序时为最高位的位置）
+    :param length: 位长度（1~64）
+    :param little_endian: True，Intel 字节序；False，Motorola 字节序
+    :param signed: 是否为有符号数
+    :param factor: 比例系数
+    :param offset: 偏移量
+    :param minimum: 物理值最小值
+    :param maximum: 物理值最大值
+    :param unit: 单位
+    :param receivers: 接收节点列表
+    :param is_multiplexer: 是否为多路复用选择信号
+    :param multiplexer_value: 多路复用信号对应的选择值；None，非多路复用信号
+    :param is_float: 是否为 IEEE 浮点数（长度为 32 或 64）
+    """
+
+    def __init__(self, name: str, start_bit: int, length: int, little_endian: bool = True, signed: bool = False,
+                 factor: float = 1, offset: float = 0, minimum: float = 0, maximum: float = 0, unit: str = '',
+                 receivers: list = None, is_multiplexer: bool = False, multiplexer_value: int = None,
+                 is_float: bool = False):
+        if not 1 <= length <= 64:
+            raise ValueError("signal %s: length must be 1~64" % name)
+        self.name = name
+        self.start_bit = start_bit
+        self.length = length
+        self.little_endian = little_endian
+        self.signed = signed
+        self.factor = factor
+        self.offset = offset
+        self.minimum = minimum
+        self.maximum = maximum
+        self.unit = unit
+        self.receivers = receivers if receivers is not None else []
+        self.is_multiplexer = is_multiplexer
+        self.multiplexer_value = multiplexer_value
+        self.is_float = is_float
+        self.choices = {}
+        """值描述表（VAL_）：{原始值: 描述}"""
+        self.mask = (1 << length) - 1
+        self.byte_shifts = ()
+        """逐字节移位表：((字节序号, 移位), ...)"""
+        self.byte_masks = ()
+        """逐字节编码表：((字节序号, 移位, 字节内掩码), ...)"""
+        self._compile()
+
+    def _compile(self):
+        length = self.length
+        if self.little_endian:
+            # Intel：start_bit 为最低位，字节内位序与字节序一致
+            first = self.start_bit // 8
+            shift = self.start_bit % 8
+            last = (self.start_bit + length - 1) // 8
+            shifts = tuple((index, 8 * (index - first) - shift) for index in range(first, last + 1))
+        else:
+            # Motorola：start_bit 为最高位；换算为从字节 0 最高位起的线性位序号
+            msb = (self.start_bit // 8) * 8 + 7 - self.start_bit % 8
+            lsb = msb + length - 1
+            first = msb // 8
+            last = lsb // 8
+            shift = 7 - lsb % 8
+            shifts = tuple((index, 8 * (last - index) - shift) for index in range(first, last + 1))
+        if last >= _MAX_DATA_LENGTH:
+            raise ValueError("signal %s exceeds %d bytes" % (self.name, _MAX_DATA_LENGTH))
+        self.byte_shifts = shifts
+        self.byte_masks = tuple((index, shift, ((self.mask >> shift) if shift >= 0 else (self.mask << -shift)) & 0xFF)
+                                for index, shift in shifts)
+        self.byte_count = last + 1
+        """信号所需的最小数据段长度（字节）"""
+
+    def decode_raw(self, data) -> int:
+        """
+        从数据段中取出原始值（已处理符号位）
+
+        :param data: CAN 消息数据段（list / bytes / bytearray / memoryview），长度不足的部分视为 0
+        :return: 原始值
+        """
+        raw = 0
+        size = len(data)
+        for index, shift in self.byte_shifts:
+            if index < size:
+                raw |= (data[index] << shift) if shift >= 0 else (data[index] >> -shift)
+        raw &= self.mask
+        if self.is_float:
+            return _FLOAT_STRUCTS[self.length].unpack(raw.to_bytes(self.length // 8, 'little'))[0]
+        if self.signed and raw >> (self.length - 1):
+            raw -= 1 << self.length
+        return raw
+
+    def decode(self, data) -> float:
+        """
+        从数据段中解码物理值
+
+        :param data: CAN 消息数据段
+        :return: 物理值 = 原始值 * factor + offset
+        """
+        return self.decode_raw(data) * self.factor + self.offset
+
+    def decode_matrix(self, matrix, scale: bool = True):
+        """
+        批量解码（需要安装 numpy）
+
+        :param matrix: numpy uint8 二维数组，每行为一帧的数据段（至少 byte_count 列）
+        :param scale: True，返回 float64 物理值；False，返回原始值
+        :return: numpy 一维数组
+        """
+        # numpy 为可选依赖，使用时才导入
+        import numpy as _np
+        raw = _np.zeros(matrix.shape[0], dtype=_np.uint64)
+        for index, shift in self.byte_shifts:
+            column = matrix[:, index].astype(_np.uint64)
+            if shift >= 0:
+                raw |= column << _np.uint64(shift)
+            else:
+                raw |= column >> _np.uint64(-shift)
+        if self.length < 64:
+            raw &= _np.uint64(self.mask)
+        if self.is_float:
+            values = raw.astype(_np.uint32).view(_np.float32) if self.length == 32 else raw.view(_np.float64)
+            # 数据段中的 signaling NaN 转换时会触发无效值警告
+            with _np.errstate(invalid='ignore'):
+                values = values.astype(_np.float64)
+        elif self.signed:
+            # 移位完成符号扩展，不对 63/64 位信号做会溢出 int64 的减法
+            shift = _np.int64(64 - self.length)
+            values = (raw.view(_np.int64) << shift) >> shift
+        else:
+            values = raw
+        if not scale:
+            return values
+        return values * float(self.factor) + float(self.offset)
+
+    def encode_raw(self, value, scale: bool = True) -> int:
+        """
+        将物理值（或原始值）转换为按信号长度截断的无符号原始值
+
+        :param value: 物理值；scale 为 False 时为原始值
+        :param scale: True，value 为物理值，按 (value - offset) / factor 换算并取整
+        :return: 原始值（负数为补码形式）
+        """
+        if self.is_float:
+            if scale:
+                value = (value - self.offset) / self.factor
+            return int.from_bytes(_FLOAT_STRUCTS[self.length].pack(value), 'little')
+        if scale and (self.factor != 1 or self.offset != 0 or not isinstance(value, int)):
+            # 整数且无需缩放时不经过浮点运算，保证 64 位信号不丢失精度
+            value = round((value - self.offset) / self.factor)
+        return int(value) & self.mask
+
+    def insert(self, data: bytearray, raw: int):
+        """
+        将原始值写入数据段，只改写信号所占的位
+
+        :param data: 可写的数据段（bytearray / memoryview），长度至少为 byte_count
+        :param raw: encode_raw 返回的原始值
+        """
+        for index, shift, byte_mask in self.byte_masks:
+            byte = ((raw >> shift) if shift >= 0 else (raw << -shift)) & byte_mask
+            data[index] = (data[index] & ~byte_mask) | byte
+
+    def encode(self, data: bytearray, value, scale: bool = True):
+        """
+        将物理值编码到数据段中
+
+        :param data: 可写的数据段
+        :param value: 物理值；scale 为 False 时为原始值
+        :param scale: True，value 为物理值
+        """
+        self.insert(data, self.encode_raw(value, scale))
+
+    def encode_matrix(self, matrix, values, scale: bool = True):
+        """
+        批量编码（需要安装 numpy），只改写各行中信号所占的位
+
+        :param matrix: numpy uint8 二维数组，每行为一帧的数据段（至少 byte_count 列），原地修改
+        :param values: 物理值（或原始值）序列，长度与 matrix 行数一致，也可为标量
+        :param scale: True，values 为物理值
+        """
+        # numpy 为可选依赖，使用时才导入
+        import numpy as _np
+        values = _np.broadcast_to(_np.asarray(values), (matrix.shape[0],))
+        if scale and (self.factor != 1 or self.offset != 0 or values.dtype.kind not in 'iu'):
+            values = (values - float(self.offset)) / float(self.factor)
+        if self.is_float:
+            if self.length == 32:
+                raw = values.astype(_np.float32).view(_np.uint32).astype(_np.uint64)
+            else:
+                raw = values.astype(_np.float64).view(_np.uint64)
+        else:
+            if values.dtype.kind == 'f':
+                values = _np.round(values)
+            raw = values.astype(_np.int64).view(_np.uint64) if values.dtype.kind != 'u' else values.astype(_np.uint64)
+            if self.length < 64:
+                raw = raw & _np.uint64(self.mask)
+        for index, shift, byte_mask in self.byte_masks:
+            if shift >= 0:
+                column = raw >> _np.uint64(shift)
+            else:
+                column = raw << _np.uint64(-shift)
+            column = (column & _np.uint64(byte_mask)).astype(_np.uint8)
+            matrix[:, index] = (matrix[:, index] & _np.uint8(~byte_mask & 0xFF)) | column
+
+
+class Message:
+    """
+    DBC 报文定义
+
+    :param can_id: CAN 通信id（不含扩展帧标志位）
+    :param name: 报文名
+    :param length: 数据段长度（字节）
+    :param extended: 是否为扩展帧
+    :param sender: 发送节点
+    :param signals: Signal 列表
+    """
+
+    def __init__(self, can_id: int, name: str, length: int, extended: bool = False, sender: str = '',
+                 signals: list = None):
+        self.id_ = can_id
+        self.name = name
+        self.length = length
+        self.extended = extended
+        self.sender = sender
+        self.signals = signals if signals is not None else []
+        self.multiplexer = None
+        """多路复用选择信号；None，报文不含多路复用信号"""
+        self._signal_map = {}
+        self.refresh()
+
+    def refresh(self):
+        """
+        修改 signals 后重建按名称的索引和多路复用信息
+        """
+        self._signal_map = {signal.name: signal for signal in self.signals}
+        self.multiplexer = next((signal for signal in self.signals if signal.is_multiplexer), None)
+
+    def get_signal(self, name: str) -> Signal:
+        return self._signal_map[name]
+
+    def active_signals(self, data) -> list:
+        """
+        数据段中有效的信号（按多路复用选择值过滤）
+
+        :param data: CAN 消息数据段
+        :return: Signal 列表
+        """
+        if self.multiplexer is None:
+            return self.signals
+        selector = self.multiplexer.decode_raw(data)
+        return [signal for signal in self.signals
+                if signal.multiplexer_value is None or signal.multiplexer_value == selector]
+
+    def decode(self, data, scale: bool = True) -> dict:
+        """
+        解码单帧数据段
+
+        :param data: CAN 消息数据段
+        :param scale: True，物理值；False，原始值
+        :return: {信号名: 值}
+        """
+        if scale:
+            return {signal.name: signal.decode(data) for signal in self.active_signals(data)}
+        return {signal.name: signal.decode_raw(data) for signal in self.active_signals(data)}
+
+    def encode(self, values: dict, data: bytearray = None, scale: bool = True) -> bytearray:
+        """
+        编码单帧数据段
+
+        :param values: {信号名: 值}，未给出的信号保持 data 中原有的位
+        :param data: 作为基础的数据段，原地修改；None，新建长度为 length 的全 0 数据段
+        :param scale: True，值为物理值；False，原始值
+        :return: 数据段
+        """
+        if data is None:
+            data = bytearray(self.length)
+        signal_map = self._signal_map
+        for name, value in values.items():
+            signal_map[name].encode(data, value, scale)
+        return data
+
+    def decode_matrix(self, matrix, scale: bool = True) -> dict:
+        """
+        批量解码多帧（需要安装 numpy）；多路复用信号在选择值不匹配的行上为 NaN
+
+        :param matrix: numpy uint8 二维数组，每行为一帧的数据段
+        :param scale: True，物理值；False，原始值（多路复用信号仍以 float64 表示以容纳 NaN）
+        :return: {信号名: numpy 一维数组}
+        """
+        import numpy as _np
+        result = {}
+        selector = None
+        if self.multiplexer is not None:
+            selector = self.multiplexer.decode_matrix(matrix, scale=False)
+        for signal in self.signals:
+            if signal.multiplexer_value is None or selector is None:
+                result[signal.name] = signal.decode_matrix(matrix, scale)
+                continue
+            active = selector == signal.multiplexer_value
+            values = _np.full(matrix.shape[0], _np.nan)
+            if active.any():
+                values[active] = signal.decode_matrix(matrix[active], scale)
+            result[signal.name] = values
+        return result
+
+
+class DecodedFrames:
+    """
+    批量解码结果中同一 CAN id 的全部帧
+
+    :param message: Message
+    :param index: 各帧在批次中的序号（numpy 数组）
+    :param timestamps: 各帧的时间戳（numpy 数组）
+    :param signals: {信号名: numpy 数组}
+    """
+
+    __slots__ = ('message', 'index', 'timestamps', 'signals')
+
+    def __init__(self, message: Message, index, timestamps, signals: dict):
+        self.message = message
+        self.index = index
+        self.timestamps = timestamps
+        self.signals = signals
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, name):
+        return self.signals[name]
+
+
+class Database:
+    """
+    DBC 报文数据库，按 CAN id 和帧格式索引（扩展帧与 DBC 相同，键为 id | 0x80000000）
+
+    :param messages: Message 列表
+    """
+
+    def __init__(self, messages: list = None):
+        self.messages = []
+        self._messages_by_id = {}
+        self._messages_by_name = {}
+        for message in messages or []:
+            self.add_message(message)
+
+    def add_message(self, message: Message):
+        self.messages.append(message)
+        self._messages_by_id[_frame_id(message.id_, message.extended)] = message
+        self._messages_by_name[message.name] = message
+
+    def get_message(self, can_id: int, extended: bool = None) -> Message:
+        """
+        按 CAN id 获取报文定义；不存在时返回 None
+
+        :param can_id: CAN 通信id
+        :param extended: 是否为扩展帧；None，优先查找标准帧，不存在时查找扩展帧
+        """
+        if extended is None:
+            message = self._messages_by_id.get(can_id)
+            return message if message is not None else self._messages_by_id.get(can_id | _EXTENDED_FLAG)
+        return self._messages_by_id.get(_frame_id(can_id, extended))
+
+    def get_message_by_name(self, name: str) -> Message:
+        return self._messages_by_name[name]
+
+    @staticmethod
+    def from_string(text: str):
+        """
+        解析 DBC 文本；支持 BO_、SG_（含简单多路复用）、VAL_ 与 SIG_VALTYPE_，其余语句忽略
+
+        :param text: DBC 文本
+        :return: Database
+        """
+        database = Database()
+        message = None
+        value_tables = []
+        value_types = []
+        for line in text.splitlines():
+            line = line.strip()
+            if line.startswith('BO_ '):
+                match = _MESSAGE_PATTERN.match(line)
+                if match is None:
+                    message = None
+                    continue
+                frame_id = int(match.group(1))
+                message = Message(frame_id & ~_EXTENDED_FLAG, match.group(2), int(match.group(3)),
+                                  bool(frame_id & _EXTENDED_FLAG), match.group(4))
+                database.add_message(message)
+            elif line.startswith('SG_ '):
+                match = _SIGNAL_PATTERN.match(line)
+                if match is None or message is None:
+                    continue
+                (name, multiplex, start_bit, length, byte_order, sign, factor, offset, minimum, maximum, unit,
+                 receivers) = match.groups()
+                message.signals.append(Signal(
+                    name, int(start_bit), int(length), byte_order == '1', sign == '-',
+                    _number(factor), _number(offset), _number(minimum or '0'), _number(maximum or '0'), unit,
+                    [receiver for receiver in re.split(r'[\s,]+', receivers) if receiver],
+                    multiplex == 'M', int(multiplex[1:]) if multiplex and multiplex != 'M' else None))
+            elif line.startswith('VAL_ '):
+                match = _VALUE_TABLE_PATTERN.match(line)
+                if match is not None:
+                    value_tables.append(match.groups())
+            elif line.startswith('SIG_VALTYPE_ '):
+                match = _VALUE_TYPE_PATTERN.match(line)
+                if match is not None:
+                    value_types.append(match.groups())
+            elif line and not line.startswith('SG_'):
+                message = None
+        for item in database.messages:
+            item.refresh()
+        for frame_id, name, values in value_tables:
+            signal = database._find_signal(int(frame_id), name)
+            if signal is not None:
+                signal.choices = {int(value): text for value, text in _VALUE_PATTERN.findall(values)}
+        for frame_id, name, value_type in value_types:
+            signal = database._find_signal(int(frame_id), name)
+            if signal is not None and signal.length == (32 if value_type == '1' else 64):
+                signal.is_float = True
+        return database
+
+    def _find_signal(self, frame_id, name):
+        message = self._messages_by_id.get(frame_id)
+        if message is None:
+            return None
+        return message._signal_map.get(name)
+
+    def decode(self, can_id: int, data, scale: bool = True, extended: bool = None) -> dict:
+        """
+        解码单帧
+
+        :param can_id: CAN 通信id
+        :param data: CAN 消息数据段
+        :param scale: True，物理值；False，原始值
+        :param extended: 是否为扩展帧；None，见 get_message
+        :return: {信号名: 值}；CAN id 不在数据库中时返回 None
+        """
+        message = self.get_message(can_id, extended)
+        if message is None:
+            return None
+        return message.decode(data, scale)
+
+    def decode_batch(self, batch: CANMessageBatch, scale: bool = True) -> dict:
+        """
+        批量解码一个批次中的全部帧（需要安装 numpy）
+
+        按 CAN id 分组后每个信号只做一次向量化的移位、掩码和缩放；不在数据库中的帧被忽略。
+
+        :param batch: CANMessageBatch，例如 get_messages_batch 的接收结果
+        :param scale: True，物理值；False，原始值
+        :return: {CAN id: DecodedFrames}；扩展帧的键与 DBC 相同，为 id | 0x80000000
+        """
+        # numpy 为可选依赖，使用时才导入
+        import numpy as _np
+        columns = batch.as_numpy()
+        ids = columns['id']
+        count = len(ids)
+        if count == 0:
+            return {}
+        # 同一数值的标准帧与扩展帧视为不同报文
+        keys = ids | ((columns['extended'] != 0).astype(_np.uint32) << _np.uint32(31))
+        order = _np.argsort(keys, kind='stable')
+        unique_keys, starts = _np.unique(keys[order], return_index=True)
+        ends = _np.append(starts[1:], count)
+        known = [(int(key), start, end) for key, start, end in zip(unique_keys, starts, ends)
+                 if int(key) in self._messages_by_id]
+        if not known:
+            return {}
+        matrix = _payload_matrix(columns)
+        timestamps = columns['timestamp']
+        result = {}
+        for key, start, end in known:
+            message = self._messages_by_id[key]
+            rows = order[start:end]
+            result[key] = DecodedFrames(message, rows, timestamps[rows], message.decode_matrix(matrix[rows], scale))
+        return result
+
+
+class FrameEncoder:
+    """
+    单个报文的编码器
+
+    持有该报文持久的数据段缓冲区（bytearray）和以其为数据段的 CANFrame；更新信号时只改写该信号所占的位，
+    其余信号不重新编码。frame 可直接传给 ITICANChannel.set_message，发送时不创建新的数据段。
+
+    :param message: Message
+    :param message_type: CAN 消息类型；None，数据段超过 8 字节时为 FD_CAN，否则为 Classic_CAN
+    :param initial: 数据段初始内容；None，全 0
+    """
+
+    def __init__(self, message: Message, message_type: MessageType = None, initial=None):
+        if message_type is None:
+            message_type = MessageType.FD_CAN if message.length > 8 else MessageType.Classic_CAN
+        self.message = message
+        self.payload = bytearray(message.length)
+        """持久的数据段缓冲区"""
+        if initial is not None:
+            self.payload[:] = bytes(initial)
+        self.frame = CANFrame(message.id_, message_type, int(message.extended), self.payload)
+        """以 payload 为数据段的 CANFrame"""
+        self._signal_map = message._signal_map
+
+    def set(self, name: str, value, scale: bool = True):
+        """
+        更新一个信号
+
+        :param name: 信号名
+        :param value: 物理值；scale 为 False 时为原始值
+        :param scale: True，value 为物理值
+        """
+        signal = self._signal_map[name]
+        signal.insert(self.payload, signal.encode_raw(value, scale))
+
+    def update(self, values: dict, scale: bool = True):
+        """
+        更新多个信号
+
+        :param values: {信号名: 值}
+        :param scale: True，值为物理值
+        """
+        self.message.encode(values, self.payload, scale)
+
+    def get(self, name: str, scale: bool = True):
+        """
+        读取数据段中一个信号的当前值
+
+        :param name: 信号名
+        :param scale: True，物理值；False，原始值
+        """
+        signal = self._signal_map[name]
+        return signal.decode(self.payload) if scale else signal.decode_raw(self.payload)
+
+    def send(self, channel: ITICANChannel, timeout: int = 0) -> int:
+        """
+        发送当前数据段
+
+        :param channel: ITICANChannel，已开启的通道
+        :param timeout: 设置 CAN 消息操作的超时时间
+        :return: getLastError 错误码
+        """
+        return channel.set_message(self.frame, timeout)
+
+    def encode_many(self, values: dict, count: int = None, scale: bool = True):
+        """
+        以当前数据段为基础批量编码多帧（需要安装 numpy）
+
+        :param values: {信号名: 值序列或标量}，未给出的信号保持当前数据段中的值
+        :param count: 帧数；None，取值序列的长度
+        :param scale: True，值为物理值
+        :return: numpy uint8 二维数组，形状为 (count, length)
+        """
+        # numpy 为可选依赖，使用时才导入
+        import numpy as _np
+        if count is None:
+            count = max((len(value) for value in values.values() if _np.ndim(value)), default=1)
+        base = _np.frombuffer(bytes(self.payload), dtype=_np.uint8)
+        matrix = _np.tile(base, (count, 1))
+        for name, value in values.items():
+            self._signal_map[name].encode_matrix(matrix, value, scale)
+        return matrix
+
+    def encode_batch(self, batch: CANMessageBatch, values: dict, count: int = None, scale: bool = True) -> int:
+        """
+        批量编码多帧并写入批次（覆盖批次原有内容），可直接用于 set_messages_batch（需要安装 numpy）
+
+        :param batch: CANMessageBatch
+        :param values: {信号名: 值序列或标量}
+        :param count: 帧数；None，取值序列的长度
+        :param scale: True，值为物理值
+        :return: 写入批次的帧数
+        """
+        import numpy as _np
+        matrix = self.encode_many(values, count, scale)
+        count, length = matrix.shape
+        if count > batch.capacity:
+            raise ValueError("batch capacity %d is smaller than %d frames" % (batch.capacity, count))
+        frame = self.frame
+        _np.frombuffer(batch.id_array, dtype=_np.uint32, count=count)[:] = frame.id_
+        _np.frombuffer(batch.type_array, dtype=_np.uint8, count=count)[:] = frame.type_.value
+        _np.frombuffer(batch.extended_array, dtype=_np.uint8, count=count)[:] = frame.extended_
+        _np.frombuffer(batch.transmitted_array, dtype=_np.uint8, count=count)[:] = 0
+        _np.frombuffer(batch.timestamp_array, dtype=_np.uint64, count=count)[:] = 0
+        _np.frombuffer(batch.data_length_array, dtype=_np.uint8, count=count)[:] = length
+        # 各帧长度相同，紧密排列即为按行展开
+        _np.frombuffer(batch.data_array, dtype=_np.uint8, count=count * length)[:] = matrix.reshape(-1)
+        batch._set_count(count)
+        return count
+
+
+class Encoder:
+    """
+    按 CAN id 管理 FrameEncoder，每个报文一个持久的数据段缓冲区
+
+    :param database: Database
+    """
+
+    def __init__(self, database: Database):
+        self.database = database
+        self._encoders = {}
+
+    def __getitem__(self, can_id: int) -> FrameEncoder:
+        encoder = self._encoders.get(can_id)
+        if encoder is None:
+            message = self.database.get_message(can_id)
+            if message is None:
+                raise KeyError(can_id)
+            encoder = self._encoders[can_id] = FrameEncoder(message)
+        return encoder
+
+    def set(self, can_id: int, name: str, value, scale: bool = True) -> CANFrame:
+        """
+        更新一个信号
+
+        :param can_id: CAN 通信id
+        :param name: 信号名
+        :param value: 物理值；scale 为 False 时为原始值
+        :param scale: True，value 为物理值
+        :return: 该报文的 CANFrame（数据段已更新）
+        """
+        encoder = self[can_id]
+        encoder.set(name, value, scale)
+        return encoder.frame
+
+    def frame(self, can_id: int) -> CANFrame:
+        """
+        获取报文的 CANFrame，数据段为持久缓冲区
+        """
+        return self[can_id].frame
+
+
+def _number(text: str):
+    value = float(text)
+    return int(value) if value.is_integer() and 'e' not in text.lower() and '.' not in text else value
+
+
+def _payload_matrix(columns):
+    """
+    将批次中紧密排列的数据段展开为每行 64 字节的二维数组，不足部分补 0
+    """
+    import numpy as _np
+    lengths = columns['data_length'].astype(_np.int64)
+    offsets = columns['offset']
+    count = len(lengths)
+    matrix = _np.zeros((count, _MAX_DATA_LENGTH), dtype=_np.uint8)
+    total = int(offsets[-1])
+    if total:
+        rows = _np.repeat(_np.arange(count), lengths)
+        positions = _np.arange(total) - _np.repeat(offsets[:-1], lengths)
+        matrix[rows, positions] = columns['data']
+    return matrix
+
+
+def load_dbc(path: str, encoding: str = 'utf-8') -> Database:
+    """
+    读取并解析 DBC 文件
+
+    :param path: DBC 文件路径
+    :param encoding: 文件编码
+    :return: Database
+    """
+    with open(path, 'r', encoding=encoding, errors='replace') as file:
+        return Database.from_string(file.read())
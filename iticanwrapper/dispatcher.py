@@ -0,0 +1,348 @@
+import queue
+import threading
+import time
+
+from iticanwrapper.itican_py_wrapper import CANFrame, CANMessageBatch, _message_types
+from iticanwrapper.receiver import _EXTENDED_KEY, _ReceiveListener
+
+__all__ = ['Subscription', 'FrameDispatcher']
+
+_STANDARD_ID_MASK = (1 << 11) - 1
+_EXTENDED_ID_MASK = (1 << 29) - 1
+
+_STOP = object()
+
+
+class Subscription:
+    """
+    FrameDispatcher 的一个订阅，由 FrameDispatcher.subscribe 创建
+
+    有 callback 时以 CANFrame 调用 callback；否则 CAN 消息放入有界队列，由订阅者通过 get 读取，
+    队列已满时丢弃最早的消息。
+
+    :param dispatcher: 所属的 FrameDispatcher
+    :param can_id: CAN 通信id
+    :param mask: 屏蔽码，为 1 的位需要与 can_id 一致；None，精确匹配
+    :param extended: 0，标准帧；非 0，扩展帧
+    :param callback: 参数为 CANFrame 的可调用对象
+    :param queue_size: 无 callback 时队列容量
+    """
+
+    def __init__(self, dispatcher, can_id: int, mask, extended: int, callback, queue_size: int):
+        self.dispatcher = dispatcher
+        self.can_id = can_id
+        self.mask = mask
+        self.extended = 1 if extended else 0
+        self.callback = callback
+        self.queue = None if callback is not None else queue.Queue(queue_size)
+        self.delivered = 0
+        """已交给 callback 或放入队列的 CAN 消息个数"""
+        self.dropped = 0
+        """因队列（含工作线程队列）已满被丢弃的 CAN 消息个数"""
+        self.errors = 0
+        """callback 抛出异常的次数"""
+        self.worker = 0
+        """处理该订阅的工作线程序号"""
+
+    def matches(self, can_id: int, can_extended: int) -> bool:
+        """
+        判断一条 CAN 消息是否属于该订阅
+
+        :param can_id: CAN 通信id
+        :param can_extended: CAN 消息拓展帧属性
+        :return: 是否匹配
+        """
+        if (1 if can_extended else 0) != self.extended:
+            return False
+        if self.mask is None:
+            return can_id == self.can_id
+        return can_id & self.mask == self.can_id & self.mask
+
+    def get(self, timeout: float = None) -> CANFrame:
+        """
+        从订阅队列读取一条 CAN 消息（仅无 callback 的订阅）
+
+        :param timeout: 等待时长 (s)；None，一直等待
+        :return: CANFrame
+        :raises queue.Empty: 超时
+        """
+        if self.queue is None:
+            raise TypeError("subscription delivers to a callback")
+        return self.queue.get(timeout=timeout)
+
+    def get_nowait(self) -> CANFrame:
+        """
+        不等待地读取一条 CAN 消息
+
+        :return: CANFrame
+        :raises queue.Empty: 队列为空
+        """
+        if self.queue is None:
+            raise TypeError("subscription delivers to a callback")
+        return self.queue.get_nowait()
+
+    def cancel(self):
+        """
+        取消订阅
+        """
+        self.dispatcher.unsubscribe(self)
+
+    def _deliver(self, frame):
+        if self.queue is None:
+            try:
+                self.callback(frame)
+            except Exception:
+                self.errors += 1
+                self.dispatcher.handler_errors += 1
+            self.delivered += 1
+            return
+        target = self.queue
+        while True:
+            try:
+                target.put_nowait(frame)
+                break
+            except queue.Full:
+                # 丢弃最早的消息
+                try:
+                    target.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+        self.delivered += 1
+
+
+class FrameDispatcher(_ReceiveListener):
+    """
+    按 CAN id 分发接收到的 CAN 消息
+
+    精确 id 订阅保存在以 (id, 拓展帧属性) 为键的字典中；屏蔽码订阅在某个 id 首次出现时逐一比较，
+    结果与精确订阅合并后缓存为该 id 的路由，之后每帧只做一次字典查找。订阅变化时清空路由缓存。
+    没有订阅的 CAN 消息不创建对象；匹配的消息创建一个 CANFrame，由该 id 的所有订阅共享。
+
+    workers 为 0 时在调用 dispatch / dispatch_batch 的线程（attach 后为后台接收线程）中执行 callback；
+    大于 0 时交给工作线程执行，同一订阅固定由一个工作线程处理，保持消息顺序。
+    工作线程队列已满时丢弃该批次中交给它的消息并计入各订阅的 dropped，不阻塞接收线程。
+
+    :param workers: 工作线程数；0，不使用工作线程
+    :param worker_queue_size: 每个工作线程的队列容量（批次个数）
+    :param queue_size: 队列订阅的默认容量（CAN 消息个数）
+    :param max_routes: 路由缓存的最大条目数，超过时清空重建
+    """
+
+    _listener = 'dispatch_batch'
+
+    def __init__(self, workers: int = 0, worker_queue_size: int = 1024, queue_size: int = 1024,
+                 max_routes: int = 65536):
+        if workers < 0:
+            raise ValueError("workers must not be negative")
+        self.queue_size = queue_size
+        self.max_routes = max_routes
+        self.frames_dispatched = 0
+        """匹配到至少一个订阅的 CAN 消息个数"""
+        self.frames_unrouted = 0
+        """没有订阅的 CAN 消息个数"""
+        self.handler_errors = 0
+        """callback 抛出异常的次数"""
+        self._exact = {}
+        self._masked = []
+        self._routes = {}
+        self._subscription_count = 0
+        self._lock = threading.Lock()
+        self._channel = None
+        self._stopping = False
+        self._worker_queues = [queue.Queue(worker_queue_size) for _ in range(workers)]
+        self._workers = [threading.Thread(target=self._run, args=(worker_queue,), name='ITICANDispatcher-%d' % i,
+                                          daemon=True)
+                         for i, worker_queue in enumerate(self._worker_queues)]
+        for worker in self._workers:
+            worker.start()
+
+    # ------------------------------------------------------------------ 订阅
+
+    def subscribe(self, can_id: int, callback=None, extended: int = 0, mask: int = None,
+                  queue_size: int = None) -> Subscription:
+        """
+        订阅 CAN 消息
+
+        :param can_id: CAN 通信id
+        :param callback: 参数为 CANFrame 的可调用对象；None，消息放入订阅队列，通过 Subscription.get 读取
+        :param extended: 0，标准帧；非 0，扩展帧
+        :param mask: 屏蔽码，为 1 的位需要与 can_id 一致；None，精确匹配 can_id
+        :param queue_size: 订阅队列容量，默认为构造时的 queue_size
+        :return: Subscription
+        """
+        id_mask = _EXTENDED_ID_MASK if extended else _STANDARD_ID_MASK
+        if mask is not None:
+            mask &= id_mask
+            if mask == id_mask:
+                mask = None
+        subscription = Subscription(self, can_id & id_mask, mask, extended, callback,
+                                    queue_size if queue_size is not None else self.queue_size)
+        with self._lock:
+            if self._workers:
+                subscription.worker = self._subscription_count % len(self._workers)
+            self._subscription_count += 1
+            if mask is None:
+                key = subscription.can_id | (_EXTENDED_KEY if extended else 0)
+                self._exact[key] = self._exact.get(key, ()) + (subscription,)
+            else:
+                self._masked = self._masked + [subscription]
+            self._routes = {}
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """
+        取消订阅
+
+        :param subscription: subscribe 返回的 Subscription
+        """
+        with self._lock:
+            if subscription.mask is None:
+                key = subscription.can_id | (_EXTENDED_KEY if subscription.extended else 0)
+                remaining = tuple(item for item in self._exact.get(key, ()) if item is not subscription)
+                if remaining:
+                    self._exact[key] = remaining
+                else:
+                    self._exact.pop(key, None)
+            else:
+                self._masked = [item for item in self._masked if item is not subscription]
+            self._routes = {}
+
+    def _route(self, key: int) -> tuple:
+        """
+        计算并缓存路由键对应的订阅
+        """
+        routes = self._routes
+        can_id = key & _EXTENDED_ID_MASK
+        can_extended = 1 if key & _EXTENDED_KEY else 0
+        route = self._exact.get(key, ()) + tuple(item for item in self._masked if item.matches(can_id, can_extended))
+        if len(routes) >= self.max_routes:
+            routes.clear()
+        routes[key] = route
+        return route
+
+    # ------------------------------------------------------------------ 分发
+
+    def dispatch(self, frame):
+        """
+        分发一条 CAN 消息，例如 get_frame 读取的结果
+
+        :param frame: CANFrame 或 CANMessage
+        """
+        key = frame.id_ | (_EXTENDED_KEY if frame.extended_ else 0)
+        route = self._routes.get(key)
+        if route is None:
+            route = self._route(key)
+        if not route:
+            self.frames_unrouted += 1
+            return
+        self.frames_dispatched += 1
+        if not self._workers:
+            for subscription in route:
+                subscription._deliver(frame)
+            return
+        pending = {}
+        for subscription in route:
+            pending.setdefault(subscription.worker, []).append((subscription, frame))
+        self._submit(pending)
+
+    def dispatch_batch(self, batch: CANMessageBatch):
+        """
+        分发批次中的全部 CAN 消息；直接读取批次的原始列，只为有订阅的消息创建 CANFrame
+
+        :param batch: CANMessageBatch
+        """
+        count = batch.count
+        if count == 0:
+            return
+        ids = batch._id_view
+        extended = batch._extended_view
+        types = batch._type_view
+        timestamps = batch._timestamp_view
+        data = batch._data_view
+        offsets = batch.offsets
+        routes = self._routes
+        workers = self._workers
+        pending = {} if workers else None
+        dispatched = 0
+        for i in range(count):
+            key = ids[i] | (_EXTENDED_KEY if extended[i] else 0)
+            route = routes.get(key)
+            if route is None:
+                route = self._route(key)
+                routes = self._routes
+            if not route:
+                continue
+            dispatched += 1
+            frame = CANFrame(ids[i], _message_types[types[i]], extended[i], bytes(data[offsets[i]:offsets[i + 1]]),
+                             timestamps[i])
+            if pending is None:
+                for subscription in route:
+                    subscription._deliver(frame)
+            else:
+                for subscription in route:
+                    items = pending.get(subscription.worker)
+                    if items is None:
+                        pending[subscription.worker] = [(subscription, frame)]
+                    else:
+                        items.append((subscription, frame))
+        self.frames_dispatched += dispatched
+        self.frames_unrouted += count - dispatched
+        if pending:
+            self._submit(pending)
+
+    def _submit(self, pending: dict):
+        worker_queues = self._worker_queues
+        for worker, items in pending.items():
+            try:
+                worker_queues[worker].put_nowait(items)
+            except queue.Full:
+                for subscription, _ in items:
+                    subscription.dropped += 1
+
+    def _run(self, worker_queue):
+        while True:
+            items = worker_queue.get()
+            if items is _STOP:
+                worker_queue.task_done()
+                return
+            for subscription, frame in items:
+                subscription._deliver(frame)
+            worker_queue.task_done()
+            if self._stopping:
+                return
+
+    def join(self, timeout: float = None) -> bool:
+        """
+        等待工作线程处理完已提交的消息
+
+        :param timeout: 等待时长 (s)；None，一直等待
+        :return: 是否已全部处理
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for worker_queue in self._worker_queues:
+            while worker_queue.unfinished_tasks:
+                if deadline is not None and time.monotonic() >= deadline:
+                    return False
+                time.sleep(0.001)
+        return True
+
+    def stop(self, timeout: float = 1.0):
+        """
+        从通道移除并停止工作线程，已提交的消息处理完后退出
+
+        工作线程队列在 timeout 内一直是满的（例如 callback 阻塞）时不再等待，
+        该线程处理完当前批次后退出，队列中剩余的消息不再处理。
+
+        :param timeout: 等待工作线程退出的总时长 (s)
+        """
+        self.detach()
+        deadline = time.monotonic() + timeout
+        for worker_queue in self._worker_queues:
+            try:
+                worker_queue.put(_STOP, timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                self._stopping = True
+        for worker in self._workers:
+            if worker is not threading.current_thread():
+                worker.join(max(0.0, deadline - time.monotonic()))
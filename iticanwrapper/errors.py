@@ -0,0 +1,155 @@
+import ctypes
+import warnings
+import weakref
+
+from iticanwrapper.backend import ITICANBackend, get_default_backend
+
+__all__ = ['ITICANError', 'ChannelNotFoundError', 'ChannelStateError', 'InvalidParameterError', 'NotSupportedError',
+           'ITICANTimeoutError', 'TxQueueFullError', 'ITICANWarning', 'RxOverflowWarning',
+           'describe_error', 'clear_error_cache', 'error_for', 'check']
+
+
+class ITICANError(Exception):
+    """
+    canwrapper.h 函数返回负数错误码时抛出的异常
+
+    :param code: 错误码
+    :param function: 返回该错误码的函数名
+    :param description: getLastError 给出的错误描述
+    """
+
+    def __init__(self, code: int, function: str = '', description: str = ''):
+        super().__init__(code, function, description)
+        self.code = code
+        self.function = function
+        self.description = description
+
+    def __str__(self):
+        if self.function:
+            return '%s failed with error code %d: %s' % (self.function, self.code, self.description)
+        return 'error code %d: %s' % (self.code, self.description)
+
+
+class ChannelNotFoundError(ITICANError, LookupError):
+    """找不到指定的设备或通道"""
+
+
+class ChannelStateError(ITICANError):
+    """通道句柄无效，或通道未开启、已开启等状态不允许该操作"""
+
+
+class InvalidParameterError(ITICANError, ValueError):
+    """参数无效"""
+
+
+class NotSupportedError(ITICANError):
+    """硬件或后端不支持该功能"""
+
+
+class ITICANTimeoutError(ITICANError, TimeoutError):
+    """操作超时，例如超时时长内没有接收到 CAN 消息"""
+
+
+class TxQueueFullError(ITICANError):
+    """发送队列已满"""
+
+
+class ITICANWarning(UserWarning):
+    """
+    canwrapper.h 函数返回正数（警告）时发出的警告，本次调用仍然成功
+
+    :param code: 警告码
+    :param function: 返回该警告码的函数名
+    :param description: getLastError 给出的描述
+    """
+
+    def __init__(self, code: int, function: str = '', description: str = ''):
+        super().__init__(code, function, description)
+        self.code = code
+        self.function = function
+        self.description = description
+
+    def __str__(self):
+        return '%s returned warning code %d: %s' % (self.function, self.code, self.description)
+
+
+class RxOverflowWarning(ITICANWarning):
+    """接收队列已溢出，部分 CAN 消息被丢弃"""
+
+
+# {后端: {错误码: 错误描述}}，后端被回收时自动移除
+_description_cache = weakref.WeakKeyDictionary()
+
+
+def describe_error(error_code: int, backend: ITICANBackend = None) -> str:
+    """
+    获取错误码的描述；每个后端的同一错误码只调用一次 getLastError，之后使用缓存
+
+    :param error_code: 错误码
+    :param backend: 使用的后端，默认为 get_default_backend()
+    :return: 错误描述；getLastError 调用失败时为空字符串（不缓存）
+    """
+    if backend is None:
+        backend = get_default_backend()
+    cache = _description_cache.get(backend)
+    if cache is None:
+        cache = _description_cache.setdefault(backend, {})
+    description = cache.get(error_code)
+    if description is None:
+        str_temp = ctypes.create_string_buffer(500)
+        error_code_temp = ctypes.c_int32(error_code)
+        if backend.getLastError(str_temp, ctypes.byref(error_code_temp)) != 0:
+            return ''
+        description = str_temp.value.decode('utf-8', 'replace')
+        cache[error_code] = description
+    return description
+
+
+def clear_error_cache(backend: ITICANBackend = None):
+    """
+    清除错误描述缓存
+
+    :param backend: 只清除该后端的缓存；None，清除全部
+    """
+    if backend is None:
+        _description_cache.clear()
+    else:
+        _description_cache.pop(backend, None)
+
+
+def error_for(code: int, function: str = '', backend: ITICANBackend = None):
+    """
+    创建错误码对应的异常（负数）或警告（正数）对象，不抛出
+
+    :param code: 非 0 返回值
+    :param function: 函数名，用于异常信息
+    :param backend: 使用的后端，默认为 get_default_backend()
+    :return: ITICANError 或 ITICANWarning
+    """
+    if backend is None:
+        backend = get_default_backend()
+    error_class = backend.error_classes.get(code)
+    if error_class is None:
+        error_class = ITICANError if code < 0 else ITICANWarning
+    return error_class(code, function, describe_error(code, backend))
+
+
+def check(result: int, function: str = '', backend: ITICANBackend = None) -> int:
+    """
+    检查 canwrapper.h 函数的返回值：负数抛出异常，正数发出警告
+
+    异常与警告的类型由后端的 error_classes 决定，未列出的错误码使用 ITICANError / ITICANWarning。
+    返回 0 时不查找描述，调用方可写作 ``if result: check(result, ...)`` 以省去函数调用。
+
+    :param result: 返回值
+    :param function: 函数名，用于异常信息
+    :param backend: 使用的后端，默认为 get_default_backend()
+    :return: result（0 或正数警告码）
+    """
+    if result == 0:
+        return result
+    error = error_for(result, function, backend)
+    if result < 0:
+        raise error
+    warnings.warn(error, stacklevel=3)
+    return result
@@ -0,0 +1,233 @@
+from bisect import bisect_right
+
+from iticanwrapper.itican_py_wrapper import CANMessageBatch
+
+__all__ = ['AcceptanceFilter']
+
+_STANDARD_ID_COUNT = 1 << 11
+_EXTENDED_ID_MASK = (1 << 29) - 1
+
+# 扩展帧 code/mask 的无关位不超过该位数时展开为 id 集合，否则逐条比较
+_EXPAND_MASK_BITS = 12
+
+
+class AcceptanceFilter:
+    """
+    软件接收过滤器
+
+    以 code/mask、id 范围和 id 集合描述接收的 CAN 消息，规则之间为“或”关系；没有任何规则时不接收任何消息。
+    规则编译为查找表：标准帧为 2048 项的表，按 id 直接索引；扩展帧为 id 集合（含无关位较少的 code/mask 展开结果）、
+    合并后的有序范围（二分查找）以及剩余的 code/mask 列表。
+
+    通过 ITICANChannel.set_filter 设置后，在 getMessage / getMessages 的原始缓冲区上判断，
+    被拒绝的消息不会创建 CANMessage / CANFrame。添加规则的方法返回 self，可链式调用；规则在调用时立即编译，
+    编译结果整体替换，接收线程读取时无需加锁。
+    """
+
+    def __init__(self):
+        self.frames_accepted = 0
+        """通过过滤的 CAN 消息个数"""
+        self.frames_rejected = 0
+        """被过滤掉的 CAN 消息个数"""
+        self._standard_rules = []
+        self._extended_ids = set()
+        self._extended_ranges = []
+        self._extended_masks = []
+        self._compile()
+
+    def add_mask(self, code: int, mask: int, extended: int = 0):
+        """
+        接收满足 (id & mask) == (code & mask) 的 CAN 消息
+
+        :param code: 验收码
+        :param mask: 屏蔽码，为 1 的位需要与 code 一致
+        :param extended: 0，作用于标准帧；非 0，作用于扩展帧
+        :return: self
+        """
+        if extended:
+            mask &= _EXTENDED_ID_MASK
+            code &= mask
+            free_bits = 29 - bin(mask).count('1')
+            if free_bits <= _EXPAND_MASK_BITS:
+                self._extended_ids.update(_expand_mask(code, mask, _EXTENDED_ID_MASK))
+            else:
+                self._extended_masks.append((code, mask))
+        else:
+            mask &= _STANDARD_ID_COUNT - 1
+            self._standard_rules.append(('mask', code & mask, mask))
+        self._compile()
+        return self
+
+    def add_range(self, first: int, last: int, extended: int = 0):
+        """
+        接收 id 在 [first, last] 范围内的 CAN 消息
+
+        :param first: 起始 id（含）
+        :param last: 结束 id（含）
+        :param extended: 0，标准帧；非 0，扩展帧
+        :return: self
+        """
+        if first > last:
+            raise ValueError("first must not be greater than last")
+        if extended:
+            self._extended_ranges.append((max(first, 0), min(last, _EXTENDED_ID_MASK)))
+        else:
+            self._standard_rules.append(('range', max(first, 0), min(last, _STANDARD_ID_COUNT - 1)))
+        self._compile()
+        return self
+
+    def add_ids(self, ids, extended: int = 0):
+        """
+        接收 id 在给定集合中的 CAN 消息
+
+        :param ids: 可迭代的 id
+        :param extended: 0，标准帧；非 0，扩展帧
+        :return: self
+        """
+        if extended:
+            self._extended_ids.update(can_id & _EXTENDED_ID_MASK for can_id in ids)
+        else:
+            self._standard_rules.append(('ids', frozenset(can_id for can_id in ids if 0 <= can_id < _STANDARD_ID_COUNT),
+                                         None))
+        self._compile()
+        return self
+
+    def clear(self):
+        """
+        清除全部规则（之后不接收任何消息）
+
+        :return: self
+        """
+        self._standard_rules = []
+        self._extended_ids = set()
+        self._extended_ranges = []
+        self._extended_masks = []
+        self._compile()
+        return self
+
+    def _compile(self):
+        table = bytearray(_STANDARD_ID_COUNT)
+        for kind, first, second in self._standard_rules:
+            if kind == 'mask':
+                for can_id in _expand_mask(first, second, _STANDARD_ID_COUNT - 1):
+                    table[can_id] = 1
+            elif kind == 'range':
+                table[first:second + 1] = b'\x01' * (second - first + 1)
+            else:
+                for can_id in first:
+                    table[can_id] = 1
+        # 合并重叠或相邻的范围
+        merged = []
+        for first, last in sorted(self._extended_ranges):
+            if merged and first <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], last)
+            else:
+                merged.append([first, last])
+        starts = [first for first, _ in merged]
+        ends = [last for _, last in merged]
+        ids = frozenset(can_id for can_id in self._extended_ids
+                        if not (starts and _in_ranges(can_id, starts, ends)))
+        has_extended = bool(ids or starts or self._extended_masks)
+        self._compiled = (bytes(table), ids, starts, ends, tuple(self._extended_masks), has_extended)
+
+    def accepts(self, can_id: int, can_extended: int) -> bool:
+        """
+        判断一条 CAN 消息是否通过过滤
+
+        :param can_id: CAN 通信id
+        :param can_extended: CAN 消息拓展帧属性
+        :return: 是否接收
+        """
+        table, ids, starts, ends, masks, has_extended = self._compiled
+        if not can_extended:
+            return can_id < _STANDARD_ID_COUNT and table[can_id] == 1
+        if not has_extended:
+            return False
+        if can_id in ids:
+            return True
+        if starts and _in_ranges(can_id, starts, ends):
+            return True
+        for code, mask in masks:
+            if can_id & mask == code:
+                return True
+        return False
+
+    def filter_batch(self, batch: CANMessageBatch) -> int:
+        """
+        在批次的原始缓冲区上过滤，被拒绝的 CAN 消息移除后其余消息按原顺序前移（各列与数据段原地移动）
+
+        :param batch: CANMessageBatch
+        :return: 保留的 CAN 消息个数（即过滤后的 batch.count）
+        """
+        count = batch.count
+        if count == 0:
+            return 0
+        table, ids, starts, ends, masks, has_extended = self._compiled
+        id_view = batch._id_view
+        extended_view = batch._extended_view
+        accepts = self.accepts
+        # 按连续保留的区间 [start, end) 记录
+        runs = []
+        run_start = -1
+        for i in range(count):
+            can_id = id_view[i]
+            if not extended_view[i]:
+                accepted = can_id < _STANDARD_ID_COUNT and table[can_id] == 1
+            elif not has_extended:
+                accepted = False
+            elif can_id in ids:
+                accepted = True
+            else:
+                accepted = accepts(can_id, 1)
+            if accepted:
+                if run_start < 0:
+                    run_start = i
+            elif run_start >= 0:
+                runs.append((run_start, i))
+                run_start = -1
+        if run_start >= 0:
+            runs.append((run_start, count))
+        if len(runs) == 1 and runs[0] == (0, count):
+            self.frames_accepted += count
+            return count
+
+        offsets = batch.offsets
+        columns = (batch._id_view, batch._type_view, batch._extended_view, batch._transmitted_view,
+                   batch._timestamp_view, batch._data_length_view)
+        data = batch._data_view
+        kept = 0
+        data_end = 0
+        for start, end in runs:
+            length = end - start
+            data_start = offsets[start]
+            data_length = offsets[end] - data_start
+            if start != kept:
+                for column in columns:
+                    column[kept:kept + length] = column[start:end]
+                data[data_end:data_end + data_length] = data[data_start:data_start + data_length]
+            kept += length
+            data_end += data_length
+        batch._set_count(kept)
+        batch._data_end = data_end
+        self.frames_accepted += kept
+        self.frames_rejected += count - kept
+        return kept
+
+
+def _in_ranges(can_id, starts, ends):
+    index = bisect_right(starts, can_id) - 1
+    return index >= 0 and can_id <= ends[index]
+
+
+def _expand_mask(code, mask, full_mask):
+    """
+    枚举满足 (id & mask) == code 的全部 id（code 已按 mask 截取）
+    """
+    free = full_mask & ~mask
+    subset = 0
+    while True:
+        yield code | subset
+        # 按无关位枚举子集
+        subset = (subset - free) & free
+        if subset == 0:
+            return
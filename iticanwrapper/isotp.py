@@ -0,0 +1,479 @@
+import threading
+import time
+from collections import deque
+
+from iticanwrapper.errors import ITICANTimeoutError, TxQueueFullError
+from iticanwrapper.itican_py_wrapper import CANFrame, CANMessageBatch, ITICANChannel, MessageType
+
+__all__ = ['N_OK', 'N_TIMEOUT_A', 'N_TIMEOUT_BS', 'N_TIMEOUT_CR', 'N_WRONG_SN', 'N_INVALID_FS', 'N_UNEXP_PDU',
+           'N_WFT_OVRN', 'N_BUFFER_OVFLW', 'N_ERROR', 'N_RX_TIMEOUT', 'ISOTPTransport', 'ISOTPLink']
+
+# N_Result（ISO 15765-2），send / recv 的返回值
+N_OK = 0
+N_TIMEOUT_A = -1
+N_TIMEOUT_BS = -2
+N_TIMEOUT_CR = -3
+N_WRONG_SN = -4
+N_INVALID_FS = -5
+N_UNEXP_PDU = -6
+N_WFT_OVRN = -7
+N_BUFFER_OVFLW = -8
+N_ERROR = -9
+# recv 在等待时长内没有收到报文（不属于 ISO 15765-2 定义的 N_Result）
+N_RX_TIMEOUT = -10
+
+_SINGLE_FRAME = 0x0
+_FIRST_FRAME = 0x1
+_CONSECUTIVE_FRAME = 0x2
+_FLOW_CONTROL = 0x3
+
+_FS_CTS = 0
+_FS_WAIT = 1
+_FS_OVFLW = 2
+
+_FD_LENGTHS = (8, 12, 16, 20, 24, 32, 48, 64)
+
+
+def _frame_length(length: int, fd: bool) -> int:
+    # CAN FD 数据段只能取 DLC 对应的长度
+    if not fd or length <= 8:
+        return 8
+    for valid in _FD_LENGTHS:
+        if length <= valid:
+            return valid
+    raise ValueError("frame length exceeds 64 bytes")
+
+
+def _decode_st_min(value: int) -> float:
+    """
+    STmin 编码转换为秒：0x00~0x7F 为毫秒，0xF1~0xF9 为 100~900 us，保留值按 127 ms 处理
+    """
+    if value <= 0x7F:
+        return value / 1000.0
+    if 0xF1 <= value <= 0xF9:
+        return (value - 0xF0) / 10000.0
+    return 0.127
+
+
+def _sleep_until(deadline: float, spin_time: float):
+    """
+    等待到 deadline（perf_counter 时间）：先休眠，最后 spin_time 秒忙等
+    """
+    remaining = deadline - time.perf_counter()
+    if remaining > spin_time:
+        time.sleep(remaining - spin_time)
+    while time.perf_counter() < deadline:
+        pass
+
+
+class ISOTPLink:
+    """
+    一对 CAN id 之间的 ISO-TP 连接（正常寻址），通过 ISOTPTransport.open_link 创建
+
+    :param transport: ISOTPTransport
+    :param tx_id: 发送使用的 CAN id
+    :param rx_id: 接收使用的 CAN id（对方发送的数据和流控帧）
+    :param extended: 是否为扩展帧
+    :param tx_dl: 发送帧的数据段长度：8，经典 CAN；12~64，CAN FD
+    :param brs: CAN FD 帧是否切换波特率
+    :param block_size: 接收时流控帧中的 BS；0，不分块
+    :param st_min: 接收时流控帧中的 STmin（编码值，见 ISO 15765-2）
+    :param padding: 填充字节；None，经典 CAN 帧不填充（CAN FD 帧仍需填充到有效长度，使用 0xCC）
+    :param max_length: 接收的最大报文长度，超出时回复溢出流控帧
+    :param timeout_bs: 发送时等待流控帧的超时时间 (ms)
+    :param timeout_cr: 接收时等待连续帧的超时时间 (ms)
+    :param max_wait_frames: 发送时最多接受的连续 WAIT 流控帧个数
+    :param bus_frame_time: 一帧连续帧在总线上的传输时间估计 (us)；对方要求的 STmin 不大于该值时，
+                           连续帧整块批量发送，由总线保证帧间隔
+    :param spin_time: STmin 计时中最后忙等的时长 (ms)
+    """
+
+    def __init__(self, transport, tx_id: int, rx_id: int, extended: bool = False, tx_dl: int = 8,
+                 brs: bool = False, block_size: int = 0, st_min: int = 0, padding=0xCC, max_length: int = 1 << 24,
+                 timeout_bs: int = 1000, timeout_cr: int = 1000, max_wait_frames: int = 10,
+                 bus_frame_time: float = 0, spin_time: float = 0.5):
+        if tx_dl != _frame_length(tx_dl, True):
+            raise ValueError("tx_dl must be one of %s" % (_FD_LENGTHS,))
+        self.transport = transport
+        self.tx_id = tx_id
+        self.rx_id = rx_id
+        self.extended = extended
+        self.tx_dl = tx_dl
+        self.fd = tx_dl > 8
+        self.message_type = (MessageType.FD_BRS_CAN if brs else MessageType.FD_CAN) if self.fd \
+            else MessageType.Classic_CAN
+        self.block_size = block_size
+        self.st_min = st_min
+        self.padding = padding
+        self.max_length = max_length
+        self.timeout_bs = timeout_bs / 1000.0
+        self.timeout_cr = timeout_cr * 1000
+        self.max_wait_frames = max_wait_frames
+        self.bus_frame_time = bus_frame_time / 1e6
+        self.spin_time = spin_time / 1000.0
+        self.last_error = N_OK
+        """接收过程中最近一次错误（N_Result）"""
+        self.last_send_error = 0
+        """发送返回 N_ERROR 时 setMessages 的错误码"""
+        self._send_lock = threading.Lock()
+        self._condition = threading.Condition()
+        self._received = deque()
+        self._flow_control = None
+        self._rx_buffer = None
+        self._rx_length = 0
+        self._rx_sequence = 0
+        self._rx_block_count = 0
+        self._rx_last = 0
+        self._rx_deadline = 0.0
+        self._rx_expired = 0
+        """因 N_Cr 超时放弃的多帧接收次数，recv 据此判断等待期间是否有接收超时"""
+        self._batch = CANMessageBatch(256)
+
+    # ------------------------------------------------------------------ 帧构造
+
+    def _pad(self, data: bytes) -> bytes:
+        length = _frame_length(len(data), self.fd)
+        if len(data) == length or (self.padding is None and not self.fd):
+            return data
+        return data + bytes([0xCC if self.padding is None else self.padding]) * (length - len(data))
+
+    def _send_flow_control(self, status: int) -> int:
+        frame = CANFrame(self.tx_id, self.message_type, int(self.extended),
+                         self._pad(bytes((0x30 | status, self.block_size, self.st_min))))
+        return self.transport.channel.set_message(frame)
+
+    # ------------------------------------------------------------------ 接收（接收线程中调用）
+    # 接收状态（_rx_*、last_error）只在持有 self._condition 时读写；流控帧在释放后发送
+
+    def _expire_reception(self, now: float) -> bool:
+        """
+        多帧接收在 N_Cr 内（按主机时钟）没有收到下一个连续帧时放弃接收；总线静默时由 recv 和其他帧的到达触发检查。
+        调用方需持有 self._condition
+        """
+        if self._rx_buffer is None or now < self._rx_deadline:
+            return False
+        self._rx_buffer = None
+        self.last_error = N_TIMEOUT_CR
+        self._rx_expired += 1
+        self._condition.notify_all()
+        return True
+
+    def _on_frame(self, data: memoryview, timestamp: int):
+        if not len(data):
+            return
+        with self._condition:
+            status = self._receive(data, timestamp)
+        if status is not None:
+            self._send_flow_control(status)
+
+    def _receive(self, data: memoryview, timestamp: int):
+        """
+        处理一帧，返回需要回复的流控状态（None，不回复）；调用方需持有 self._condition。
+        连续帧的 N_Cr 按帧的接收时间戳 (us) 判断，不受接收线程处理延迟的影响
+        """
+        pci = data[0] >> 4
+        if pci == _FLOW_CONTROL:
+            if len(data) >= 3:
+                self._flow_control = (data[0] & 0x0F, data[1], data[2])
+                self._condition.notify_all()
+        elif pci == _SINGLE_FRAME:
+            length = data[0] & 0x0F
+            start = 1
+            if length == 0 and len(data) > 8:
+                length = data[1]
+                start = 2
+            if length == 0 or start + length > len(data):
+                return None
+            if self._rx_buffer is not None:
+                # 多帧接收过程中收到单帧：放弃当前接收
+                self._rx_buffer = None
+                self.last_error = N_UNEXP_PDU
+            self._deliver(bytes(data[start:start + length]))
+        elif pci == _FIRST_FRAME:
+            if len(data) < 8:
+                return None
+            length = ((data[0] & 0x0F) << 8) | data[1]
+            start = 2
+            if length == 0:
+                length = int.from_bytes(data[2:6], 'big')
+                start = 6
+            if self._rx_buffer is not None:
+                self.last_error = N_UNEXP_PDU
+            if length > self.max_length:
+                self._rx_buffer = None
+                self.last_error = N_BUFFER_OVFLW
+                return _FS_OVFLW
+            self._rx_buffer = bytearray(data[start:])
+            self._rx_length = length
+            self._rx_sequence = 1
+            self._rx_block_count = 0
+            self._rx_last = timestamp
+            self._rx_deadline = time.monotonic() + self.timeout_cr / 1e6
+            # 唤醒等待中的 recv，使其按 N_Cr 截止时间检查
+            self._condition.notify_all()
+            return _FS_CTS
+        elif pci == _CONSECUTIVE_FRAME:
+            buffer = self._rx_buffer
+            if buffer is None:
+                return None
+            if timestamp - self._rx_last > self.timeout_cr:
+                self._rx_buffer = None
+                self.last_error = N_TIMEOUT_CR
+                self._rx_expired += 1
+                self._condition.notify_all()
+                return None
+            if data[0] & 0x0F != self._rx_sequence:
+                self._rx_buffer = None
+                self.last_error = N_WRONG_SN
+                return None
+            self._rx_last = timestamp
+            self._rx_deadline = time.monotonic() + self.timeout_cr / 1e6
+            self._rx_sequence = (self._rx_sequence + 1) & 0x0F
+            buffer += data[1:1 + self._rx_length - len(buffer)]
+            if len(buffer) >= self._rx_length:
+                self._rx_buffer = None
+                self._deliver(bytes(buffer))
+                return None
+            self._rx_block_count += 1
+            if self.block_size and self._rx_block_count >= self.block_size:
+                self._rx_block_count = 0
+                return _FS_CTS
+        return None
+
+    def _deliver(self, data: bytes):
+        # 调用方需持有 self._condition
+        self._received.append(data)
+        self._condition.notify_all()
+
+    def recv(self, data_output: list, timeout: int = -1) -> int:
+        """
+        接收一条完整的 ISO-TP 报文
+
+        :param data_output: 传出报文数据（bytes），清空 list 后，保存到 index=0 处
+        :param timeout: 等待时长 (ms)；0，不等待；负数，一直等待
+        :return: N_OK；等待期间进行中的多帧接收超过 N_Cr，返回 N_TIMEOUT_CR；
+                 等待时长内没有收到报文，返回 N_RX_TIMEOUT
+        """
+        data_output.clear()
+        deadline = None if timeout < 0 else time.monotonic() + timeout / 1000.0
+        with self._condition:
+            expired = self._rx_expired
+            while not self._received:
+                now = time.monotonic()
+                self._expire_reception(now)
+                if self._rx_expired != expired:
+                    return N_TIMEOUT_CR
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return N_RX_TIMEOUT
+                if self._rx_buffer is not None:
+                    # 在 N_Cr 截止时间醒来检查
+                    until_cr = self._rx_deadline - now
+                    remaining = until_cr if remaining is None else min(remaining, until_cr)
+                self._condition.wait(remaining)
+            data_output.append(self._received.popleft())
+        return N_OK
+
+    # ------------------------------------------------------------------ 发送
+
+    def _wait_flow_control(self):
+        """
+        等待流控帧，返回 (N_Result, BS, STmin 秒)
+        """
+        waits = 0
+        with self._condition:
+            while True:
+                deadline = time.monotonic() + self.timeout_bs
+                while self._flow_control is None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return N_TIMEOUT_BS, 0, 0.0
+                    self._condition.wait(remaining)
+                status, block_size, st_min = self._flow_control
+                self._flow_control = None
+                if status == _FS_CTS:
+                    return N_OK, block_size, _decode_st_min(st_min)
+                if status == _FS_WAIT:
+                    waits += 1
+                    if waits > self.max_wait_frames:
+                        return N_WFT_OVRN, 0, 0.0
+                    continue
+                if status == _FS_OVFLW:
+                    return N_BUFFER_OVFLW, 0, 0.0
+                return N_INVALID_FS, 0, 0.0
+
+    def _send_frames(self, frames: list, timeout: float) -> int:
+        """
+        以 setMessages 批量发送多帧（每批最多 batch 容量个）；发送队列已满时重试，timeout 秒内没有进展时超时；
+        setMessages 返回其他错误且一帧也未发送时返回 N_ERROR，错误码保存在 last_send_error
+        """
+        batch = self._batch
+        channel = self.transport.channel
+        items_output = []
+        total = len(frames)
+        sent = 0
+        deadline = time.perf_counter() + timeout
+        while sent < total:
+            batch.clear()
+            for data in frames[sent:sent + batch.capacity]:
+                batch.append(self.tx_id, self.message_type, int(self.extended), data)
+            result = channel.set_messages_batch(batch, items_output, 0)
+            sent += items_output[0]
+            if items_output[0]:
+                deadline = time.perf_counter() + timeout
+            elif result < 0 and not self._is_retriable(result):
+                self.last_send_error = result
+                return N_ERROR
+            if items_output[0] < batch.count:
+                if time.perf_counter() > deadline:
+                    return N_TIMEOUT_A
+                time.sleep(0)
+        return N_OK
+
+    def _is_retriable(self, result: int) -> bool:
+        # 发送队列已满、超时可以重试；其他错误（通道关闭、设备断开等）立即返回
+        error_class = self.transport.channel._dll.error_classes.get(result)
+        return error_class is not None and issubclass(error_class, (TxQueueFullError, ITICANTimeoutError))
+
+    def send(self, data, timeout: int = 1000) -> int:
+        """
+        发送一条 ISO-TP 报文；同一连接上的发送依次进行
+
+        :param data: 报文数据（bytes / bytearray / list）
+        :param timeout: 发送队列已满时等待的超时时间 (ms)
+        :return: N_Result
+        """
+        data = bytes(data)
+        length = len(data)
+        tx_dl = self.tx_dl
+        send_timeout = timeout / 1000.0
+        with self._send_lock:
+            if length <= 7:
+                return self._send_frames([self._pad(bytes((length,)) + data)], send_timeout)
+            if self.fd and length <= tx_dl - 2:
+                return self._send_frames([self._pad(bytes((0, length)) + data)], send_timeout)
+            with self._condition:
+                self._flow_control = None
+            if length <= 0xFFF:
+                header = bytes((0x10 | (length >> 8), length & 0xFF))
+            else:
+                # 超过 4095 字节时使用 32 位长度的首帧
+                header = b'\x10\x00' + length.to_bytes(4, 'big')
+            position = tx_dl - len(header)
+            first = header + data[:position]
+            result = self._send_frames([first], send_timeout)
+            if result != N_OK:
+                return result
+            view = memoryview(data)
+            chunk = tx_dl - 1
+            sequence = 1
+            # STmin 跨块连续计时
+            next_time = time.perf_counter()
+            while position < length:
+                result, block_size, st_min = self._wait_flow_control()
+                if result != N_OK:
+                    return result
+                # 本块的连续帧
+                count = -(-(length - position) // chunk)
+                if block_size:
+                    count = min(count, block_size)
+                frames = []
+                for _ in range(count):
+                    frames.append(self._pad(bytes((0x20 | sequence,)) + view[position:position + chunk]))
+                    position += chunk
+                    sequence = (sequence + 1) & 0x0F
+                if st_min <= self.bus_frame_time:
+                    # 总线本身保证帧间隔，整块批量发送
+                    result = self._send_frames(frames, send_timeout)
+                    if result != N_OK:
+                        return result
+                    continue
+                for frame in frames:
+                    _sleep_until(next_time, self.spin_time)
+                    result = self._send_frames([frame], send_timeout)
+                    if result != N_OK:
+                        return result
+                    # 以绝对时间推进，避免发送耗时累积；落后时以当前时间为基准
+                    next_time = max(next_time + st_min, time.perf_counter())
+        return N_OK
+
+    def close(self):
+        """
+        从传输层移除该连接
+        """
+        self.transport._remove_link(self)
+
+
+class ISOTPTransport:
+    """
+    基于 ITICANChannel 的 ISO-TP（ISO 15765-2）传输层
+
+    挂接到通道的接收路径上（通道的后台接收线程未启动时自动启动），按接收 CAN id 将帧分发到各连接，
+    多个连接可同时收发。流控帧在接收线程中直接回复。
+
+    :param channel: ITICANChannel，已开启的通道
+    """
+
+    def __init__(self, channel: ITICANChannel):
+        self.channel = channel
+        self._links = {}
+        self._lock = threading.Lock()
+        channel.add_receive_listener(self._on_batch)
+        if channel.receiver is None or not channel.receiver.running:
+            channel.start_receiver()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def open_link(self, tx_id: int, rx_id: int, **kwargs) -> ISOTPLink:
+        """
+        创建连接，参数见 ISOTPLink
+
+        :param tx_id: 发送使用的 CAN id
+        :param rx_id: 接收使用的 CAN id
+        :return: ISOTPLink
+        """
+        link = ISOTPLink(self, tx_id, rx_id, **kwargs)
+        with self._lock:
+            if (rx_id, int(link.extended)) in self._links:
+                raise ValueError("rx_id 0x%X is already in use" % rx_id)
+            links = dict(self._links)
+            links[(rx_id, int(link.extended))] = link
+            self._links = links
+        return link
+
+    def _remove_link(self, link: ISOTPLink):
+        with self._lock:
+            links = dict(self._links)
+            if links.get((link.rx_id, int(link.extended))) is link:
+                del links[(link.rx_id, int(link.extended))]
+            self._links = links
+
+    def close(self):
+        """
+        从通道的接收路径上移除；不停止通道的后台接收线程
+        """
+        self.channel.remove_receive_listener(self._on_batch)
+        self._links = {}
+
+    def _on_batch(self, batch: CANMessageBatch):
+        links = self._links
+        if not links:
+            return
+        ids = batch.ids
+        extended = batch.extended
+        transmitted = batch.transmitted
+        timestamps = batch.timestamps
+        for i in range(batch.count):
+            link = links.get((ids[i], 1 if extended[i] else 0))
+            if link is not None and not transmitted[i]:
+                link._on_frame(batch.payload(i), timestamps[i])
+        now = time.monotonic()
+        for link in links.values():
+            with link._condition:
+                link._expire_reception(now)
@@ -1,14 +1,35 @@
 import ctypes
+import importlib.util
+import threading
+import time
 
-from iticanwrapper.bin import importDLL
+from iticanwrapper.backend import ITICANBackend, get_default_backend
 from enum import Enum
 
-__all__ = ['OpenType', 'OpenMode', 'MessageType', 'TxMode', 'CANMessage', 'ITICANChannel']
+__all__ = ['OpenType', 'OpenMode', 'MessageType', 'TxMode', 'CANMessage', 'CANFrame', 'CANMessageBatch',
+           'ITICANChannel']
 
 _debug_mode = False
 
 _CAN_Clock_Frequency_MHz = 80
 
+_MAX_DATA_LENGTH = 64
+"""
+单帧 CAN FD 数据段最大字节数
+"""
+
+# 可直接拷贝到 ctypes 缓冲区的数据段类型，其他序列（list / tuple 等）先转换为 bytes
+_BUFFER_TYPES = (bytes, bytearray, memoryview)
+
+_DEFAULT_BATCH_CAPACITY = 1024
+
+
+def _numpy_available() -> bool:
+    """
+    是否安装了 numpy（只查找模块，不导入），用于可选的向量化路径的默认值
+    """
+    return importlib.util.find_spec('numpy') is not None
+
 
 class OpenType(Enum):
     Classic_CAN = 0
@@ -61,6 +82,9 @@ class MessageType(Enum):
     """
 
 
+_message_types = {message_type.value: message_type for message_type in MessageType}
+
+
 class TxMode(Enum):
     Normal = 0
     """普通 CAN 消息"""
@@ -80,6 +104,7 @@ class CANMessage:
                 :param can_data:  CAN 消息数据段
                 :param timestamp: 接收 CAN 消息时间戳
             """
+
     def __init__(self, can_id: int, can_type: MessageType, can_extended: int, can_data: list, timestamp=0):
 
         """
@@ -98,29 +123,362 @@ class CANMessage:
         self.timestamp_ = timestamp
 
 
+class CANFrame:
+    """
+    紧凑 CAN 消息数据结构，字段与 CANMessage 相同，数据段为 bytes
+
+    使用 __slots__，不创建实例 __dict__；收发时数据段只拷贝一次，适合大量保存 CAN 消息。
+
+    :param can_id: CAN 通信id
+    :param can_type: CAN 消息类型
+    :param can_extended: CAN 消息拓展帧属性； 0, 非拓展帧；非 0， 拓展帧
+    :param can_data: CAN 消息数据段（bytes，也可为 bytearray / memoryview）
+    :param timestamp: 接收 CAN 消息时间戳
+    """
+    __slots__ = ('id_', 'type_', 'extended_', 'data_', 'timestamp_')
+
+    def __init__(self, can_id: int, can_type: MessageType, can_extended: int, can_data: bytes = b'', timestamp=0):
+        self.id_ = can_id
+        self.type_: MessageType = can_type
+        self.extended_ = can_extended
+        self.data_ = can_data
+        self.timestamp_ = timestamp
+
+    @staticmethod
+    def from_message(message: CANMessage):
+        """
+        由 CANMessage 创建 CANFrame
+
+        :param message: CANMessage
+        :return: CANFrame
+        """
+        return CANFrame(message.id_, message.type_, message.extended_, bytes(message.data_), message.timestamp_)
+
+    def to_message(self) -> CANMessage:
+        """
+        转换为数据段为 list 的 CANMessage
+
+        :return: CANMessage
+        """
+        return CANMessage(self.id_, self.type_, self.extended_, list(self.data_), self.timestamp_)
+
+
+class CANMessageBatch:
+    """
+    列式 CAN 消息批次，用于 getMessages 批量接收
+
+    各字段保存在预分配的连续 ctypes 数组中，可重复用于多次接收，不为单帧创建对象。
+    数据段按 dataLength 紧密排列（与 canwrapper.h 中 getMessages 的 data 参数一致）。
+
+    :param capacity: 批次容量（最多容纳的 CAN 消息个数）
+    """
+
+    def __init__(self, capacity: int = _DEFAULT_BATCH_CAPACITY):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.count = 0
+        """当前批次中有效的 CAN 消息个数"""
+        self.id_array = (ctypes.c_uint32 * capacity)()
+        self.type_array = (ctypes.c_uint8 * capacity)()
+        self.extended_array = (ctypes.c_uint8 * capacity)()
+        self.transmitted_array = (ctypes.c_uint8 * capacity)()
+        self.timestamp_array = (ctypes.c_uint64 * capacity)()
+        self.data_array = (ctypes.c_uint8 * (capacity * _MAX_DATA_LENGTH))()
+        self.data_length_array = (ctypes.c_uint8 * capacity)()
+        # 预先建立零拷贝视图，访问列时只做切片
+        self._id_view = memoryview(self.id_array).cast('B').cast('I')
+        self._type_view = memoryview(self.type_array).cast('B')
+        self._extended_view = memoryview(self.extended_array).cast('B')
+        self._transmitted_view = memoryview(self.transmitted_array).cast('B')
+        self._timestamp_view = memoryview(self.timestamp_array).cast('B').cast('Q')
+        self._data_view = memoryview(self.data_array).cast('B')
+        self._data_length_view = memoryview(self.data_length_array).cast('B')
+        self._offsets = None
+        self._data_end = 0
+
+    def __len__(self):
+        return self.count
+
+    def _set_count(self, count: int):
+        self.count = count
+        self._offsets = None
+        self._data_end = -1
+
+    def clear(self):
+        """
+        清空批次，保留已分配的缓冲区
+        """
+        self.count = 0
+        self._offsets = None
+        self._data_end = 0
+
+    def append(self, can_id: int, can_type, can_extended: int, can_data):
+        """
+        在批次末尾追加一条 CAN 消息，数据段紧密拷贝到连续缓冲区中
+
+        :param can_id: CAN 通信id
+        :param can_type: CAN 消息类型（MessageType 或其数值）
+        :param can_extended: CAN 消息拓展帧属性
+        :param can_data: CAN 消息数据段（list / bytes / bytearray / memoryview）
+        """
+        index = self.count
+        if index >= self.capacity:
+            raise IndexError("batch is full")
+        length = len(can_data)
+        if length > _MAX_DATA_LENGTH:
+            raise ValueError("data length exceeds %d bytes" % _MAX_DATA_LENGTH)
+        end = self._data_end if self._data_end >= 0 else self.offsets[-1]
+        self.id_array[index] = can_id
+        self.type_array[index] = can_type.value if isinstance(can_type, MessageType) else can_type
+        self.extended_array[index] = can_extended
+        self.transmitted_array[index] = 0
+        self.timestamp_array[index] = 0
+        self.data_length_array[index] = length
+        self._data_view[end:end + length] = bytes(can_data)
+        self.count = index + 1
+        self._offsets = None
+        self._data_end = end + length
+
+    def extend_messages(self, messages):
+        """
+        依次追加多条 CANMessage
+
+        :param messages: 可迭代的 CANMessage
+        """
+        for msg in messages:
+            self.append(msg.id_, msg.type_, msg.extended_, msg.data_)
+
+    def pack(self, ids, types, extended, payloads):
+        """
+        清空批次后按列写入多条 CAN 消息
+
+        :param ids: CAN 通信id 序列
+        :param types: CAN 消息类型序列（MessageType 或其数值）
+        :param extended: CAN 消息拓展帧属性序列
+        :param payloads: CAN 消息数据段序列
+        """
+        if not len(ids) == len(types) == len(extended) == len(payloads):
+            raise ValueError("column lengths differ")
+        self.clear()
+        for can_id, can_type, can_extended, can_data in zip(ids, types, extended, payloads):
+            self.append(can_id, can_type, can_extended, can_data)
+
+    @property
+    def ids(self) -> memoryview:
+        """CAN 通信 id 列（零拷贝视图）"""
+        return self._id_view[:self.count]
+
+    @property
+    def types(self) -> memoryview:
+        """CAN 消息类型列（MessageType 的数值）"""
+        return self._type_view[:self.count]
+
+    @property
+    def extended(self) -> memoryview:
+        """CAN 消息拓展帧属性列"""
+        return self._extended_view[:self.count]
+
+    @property
+    def transmitted(self) -> memoryview:
+        """CAN 消息是否为已发送消息列"""
+        return self._transmitted_view[:self.count]
+
+    @property
+    def timestamps(self) -> memoryview:
+        """接收 CAN 消息时间戳列"""
+        return self._timestamp_view[:self.count]
+
+    @property
+    def data_lengths(self) -> memoryview:
+        """CAN 消息数据段长度列"""
+        return self._data_length_view[:self.count]
+
+    @property
+    def offsets(self) -> list:
+        """
+        每条 CAN 消息数据段在 data 中的起始偏移，共 count + 1 项，最后一项为数据段总长度
+        """
+        if self._offsets is None:
+            offsets = [0] * (self.count + 1)
+            total = 0
+            lengths = self._data_length_view
+            for i in range(self.count):
+                total += lengths[i]
+                offsets[i + 1] = total
+            self._offsets = offsets
+        return self._offsets
+
+    @property
+    def data(self) -> memoryview:
+        """紧密排列的数据段（零拷贝视图）"""
+        return self._data_view[:self.offsets[-1]]
+
+    def payload(self, index: int) -> memoryview:
+        """
+        读取单条 CAN 消息的数据段
+
+        :param index: 批次内序号
+        :return: 数据段零拷贝视图
+        """
+        if not 0 <= index < self.count:
+            raise IndexError("batch index out of range")
+        offsets = self.offsets
+        return self._data_view[offsets[index]:offsets[index + 1]]
+
+    def message(self, index: int) -> CANMessage:
+        """
+        将批次中的单条消息转换为 CANMessage
+
+        :param index: 批次内序号
+        :return: CANMessage
+        """
+        return CANMessage(self.id_array[index], _message_types[self.type_array[index]], self.extended_array[index],
+                          list(self.payload(index)), self.timestamp_array[index])
+
+    def frame(self, index: int) -> CANFrame:
+        """
+        将批次中的单条消息转换为 CANFrame，数据段拷贝一次为 bytes
+
+        :param index: 批次内序号
+        :return: CANFrame
+        """
+        return CANFrame(self.id_array[index], _message_types[self.type_array[index]], self.extended_array[index],
+                        bytes(self.payload(index)), self.timestamp_array[index])
+
+    def to_messages(self) -> list:
+        """
+        将整个批次转换为 CANMessage 列表
+
+        :return: CANMessage 列表
+        """
+        return [self.message(i) for i in range(self.count)]
+
+    def to_frames(self) -> list:
+        """
+        将整个批次转换为 CANFrame 列表
+
+        :return: CANFrame 列表
+        """
+        offsets = self.offsets
+        data_view = self._data_view
+        ids = self.id_array
+        types = self.type_array
+        extended = self.extended_array
+        timestamps = self.timestamp_array
+        return [CANFrame(ids[i], _message_types[types[i]], extended[i], bytes(data_view[offsets[i]:offsets[i + 1]]),
+                         timestamps[i]) for i in range(self.count)]
+
+    def as_numpy(self) -> dict:
+        """
+        以 NumPy 数组视图形式返回各列（零拷贝，需要安装 numpy）
+
+        :return: 包含 id, type, extended, transmitted, timestamp, data_length, offset, data 的字典
+        """
+        # numpy 为可选依赖，使用时才导入
+        import numpy as _np
+        n = self.count
+        data_length = _np.frombuffer(self.data_length_array, dtype=_np.uint8, count=n)
+        offset = _np.zeros(n + 1, dtype=_np.int64)
+        _np.cumsum(data_length, out=offset[1:])
+        return {
+            'id': _np.frombuffer(self.id_array, dtype=_np.uint32, count=n),
+            'type': _np.frombuffer(self.type_array, dtype=_np.uint8, count=n),
+            'extended': _np.frombuffer(self.extended_array, dtype=_np.uint8, count=n),
+            'transmitted': _np.frombuffer(self.transmitted_array, dtype=_np.uint8, count=n),
+            'timestamp': _np.frombuffer(self.timestamp_array, dtype=_np.uint64, count=n),
+            'data_length': data_length,
+            'offset': offset,
+            'data': _np.frombuffer(self.data_array, dtype=_np.uint8, count=int(offset[-1])),
+        }
+
+
 initialization_error = "this instance is not acquired from ITICANChannel's static method"
 
 
 class ITICANChannel:
 
-    def __init__(self, pointer):
+    def __init__(self, pointer, backend: ITICANBackend = None):
         self._chn_pointer = pointer
         self._inner_flag = False
+        self._dll = backend if backend is not None else get_default_backend()
+        self._rx_batch = None
+        self._tx_batch = None
+        self._rx_batch_lock = threading.Lock()
+        self._tx_batch_lock = threading.Lock()
+        self._receiver = None
+        self._transmitter = None
+        self._pacer = None
+        self._baud_rate = None
+        self._fd_baud_rate = None
+        self._receive_listeners = ()
+        self._metrics = None
+        self._filter = None
+        self._bind_call_frames()
+
+    def _bind_call_frames(self):
+        """
+        预先绑定常用的 DLL 函数，并为其分配可重复使用的 ctypes 参数，
+        避免每次调用时查找属性、创建 ctypes 对象和 byref
+        """
+        self._bind_functions()
+
+        # getMessage 的输出参数
+        self._rx_id = ctypes.c_uint32(0)
+        self._rx_type = ctypes.c_uint8(0)
+        self._rx_extended = ctypes.c_uint8(0)
+        self._rx_transmitted = ctypes.c_uint8(0)
+        self._rx_timestamp = ctypes.c_uint64(0)
+        self._rx_data = (ctypes.c_uint8 * _MAX_DATA_LENGTH)()
+        self._rx_data_length = ctypes.c_uint8(0)
+        self._rx_args = (ctypes.pointer(self._rx_id), ctypes.pointer(self._rx_type),
+                         ctypes.pointer(self._rx_extended), ctypes.pointer(self._rx_transmitted),
+                         ctypes.pointer(self._rx_timestamp), self._rx_data, ctypes.pointer(self._rx_data_length))
+        self._rx_data_view = memoryview(self._rx_data).cast('B')
+        self._rx_lock = threading.Lock()
+
+        # setMessage 的数据缓冲区
+        self._tx_data = (ctypes.c_uint8 * _MAX_DATA_LENGTH)()
+        self._tx_data_view = memoryview(self._tx_data).cast('B')
+        self._tx_lock = threading.Lock()
+
+    def _bind_functions(self):
+        """
+        从当前后端重新绑定常用的 DLL 函数（更换 self._dll 后调用）
+        """
+        dll = self._dll
+        self._fn_get_message = dll.getMessage
+        self._fn_get_messages = dll.getMessages
+        self._fn_set_message = dll.setMessage
+        self._fn_set_messages = dll.setMessages
+        self._fn_get_message_count = dll.getMessageCount
+        self._fn_get_baud_rate = dll.getBaudRate
+        self._fn_get_fd_baud_rate = dll.getFdBaudRate
+        self._fn_is_termination_supported = dll.isTerminationSupported
+        self._fn_is_termination_enabled = dll.isTerminationEnabled
+        self._fn_is_echo_message_supported = dll.isEchoMessageSupported
+        self._fn_is_echo_message_enabled = dll.isEchoMessageEnabled
+        self._fn_is_tx_mode_supported = dll.isTxModeSupported
+        self._fn_is_blink_supported = dll.isBlinkSupported
+        self._fn_is_channel_blinking = dll.isChannelBlinking
 
     @staticmethod
-    def find_all_channels(chn_names_output: list, chn_count_output: list):
+    def find_all_channels(chn_names_output: list, chn_count_output: list, backend: ITICANBackend = None):
         """
         查找所有通道引用名
 
         :param chn_names_output: 清空 list 后，传出存在的所有通道索引名的列表
         :param chn_count_output: 清空 list 后，传出通道索引个数，保存在 index=0 处
+        :param backend: 使用的后端，默认为 get_default_backend()
         :return: getLastError 错误码
         """
+        if backend is None:
+            backend = get_default_backend()
         chn_names_output.clear()
         chn_count_output.clear()
         str_temp = ctypes.create_string_buffer(500)
         chn_count = ctypes.c_int()
-        result = importDLL.dll.findAllChannels(str_temp, ctypes.byref(chn_count))
+        result = backend.findAllChannels(str_temp, ctypes.byref(chn_count))
         str_temp_ = str_temp.value.decode('utf-8')
 
         for item in str_temp_.split('\t'):
@@ -133,14 +491,17 @@ class ITICANChannel:
         return result
 
     @staticmethod
-    def get_channel(chn_container: list, chn_index: str):
+    def get_channel(chn_container: list, chn_index: str, backend: ITICANBackend = None):
         """
         获取通道
 
         :param chn_container: 用于传出通道实例对象，清空 list 后，保存在 index=0 处
         :param chn_index: 目标通道对应索引名
+        :param backend: 使用的后端，默认为 get_default_backend()
         :return: getLastError 错误码
         """
+        if backend is None:
+            backend = get_default_backend()
         chn_container.clear()
         # 转换参数
         str_temp = ctypes.create_string_buffer(500)
@@ -148,25 +509,28 @@ class ITICANChannel:
         int_param = ctypes.c_int32(0)
         chn_ptr = ctypes.c_void_p()
         # 发起dll调用
-        result = importDLL.dll.getChannel(ctypes.byref(chn_ptr), str_temp.value, int_param)
+        result = backend.getChannel(ctypes.byref(chn_ptr), str_temp.value, int_param)
         if result == 0:
-            instance = ITICANChannel(chn_ptr)
+            instance = ITICANChannel(chn_ptr, backend)
             instance._inner_flag = True
             chn_container.append(instance)
         return result
 
     @staticmethod
-    def get_last_error(error_code, error_specification_output: list):
+    def get_last_error(error_code, error_specification_output: list, backend: ITICANBackend = None):
         """
         解析错误码
 
         :param error_code: 其他函数返回值（错误码）
         :param error_specification_output: 清空 list，在 index=0 处填入错误描述
+        :param backend: 使用的后端，默认为 get_default_backend()
         :return: 0
         """
+        if backend is None:
+            backend = get_default_backend()
         str_temp = ctypes.create_string_buffer(500)
         error_code_temp = ctypes.c_int32(error_code)
-        result = importDLL.dll.getLastError(str_temp, ctypes.byref(error_code_temp))
+        result = backend.getLastError(str_temp, ctypes.byref(error_code_temp))
         str_temp_ = str_temp.value.decode('utf-8')
         error_specification_output.clear()
         error_specification_output.append(str_temp_)
@@ -205,7 +569,7 @@ class ITICANChannel:
         mode_param = ctypes.c_int32(mode_)
 
         # 发起dll调用
-        result = importDLL.dll.openChannel(self._chn_pointer, type_param, mode_param)
+        result = self._dll.openChannel(self._chn_pointer, type_param, mode_param)
 
         return result
 
@@ -218,7 +582,9 @@ class ITICANChannel:
         """
         if not self._inner_flag:
             raise TypeError(initialization_error)
-        result = importDLL.dll.closeChannel(self._chn_pointer)
+        self.stop_transmitter()
+        self.stop_receiver()
+        result = self._dll.closeChannel(self._chn_pointer)
         return result
 
     def get_channel_name(self, chn_name_output: list):
@@ -232,7 +598,7 @@ class ITICANChannel:
             raise TypeError(initialization_error)
         chn_name_output.clear()
         str_temp = ctypes.create_string_buffer(500)
-        result = importDLL.dll.getChannelName(self._chn_pointer, str_temp)
+        result = self._dll.getChannelName(self._chn_pointer, str_temp)
         chn_name = str_temp.value.decode('utf-8')
         chn_name_output.append(chn_name)
         return result
@@ -247,7 +613,9 @@ class ITICANChannel:
         if not self._inner_flag:
             raise TypeError(initialization_error)
         baud_rate_ = ctypes.c_uint64(baud_rate)
-        result = importDLL.dll.setBaudRate(self._chn_pointer, baud_rate_)
+        result = self._dll.setBaudRate(self._chn_pointer, baud_rate_)
+        if result >= 0:
+            self._baud_rate = baud_rate
         return result
 
     def set_custom_baud_rate(self, brp: int, ts1: int, ts2: int, sjw: int):
@@ -282,11 +650,12 @@ class ITICANChannel:
         """
         if not self._inner_flag:
             raise TypeError(initialization_error)
-        baud_rate_ = ctypes.c_uint64(0)
-        result = importDLL.dll.getBaudRate(self._chn_pointer, ctypes.byref(baud_rate_))
+        output = ctypes.c_uint64(0)
+        result = self._fn_get_baud_rate(self._chn_pointer, ctypes.byref(output))
+        baud_rate_ = output.value
         if result == 0:
             baud_rate_output.clear()
-            baud_rate_output.append(baud_rate_.value)
+            baud_rate_output.append(baud_rate_)
         return result
 
     def set_fd_baud_rate(self, baud_rate_input: int):
@@ -299,7 +668,9 @@ class ITICANChannel:
         if not self._inner_flag:
             raise TypeError(initialization_error)
         baud_rate_ = ctypes.c_uint64(baud_rate_input)
-        result = importDLL.dll.setFdBaudRate(self._chn_pointer, baud_rate_)
+        result = self._dll.setFdBaudRate(self._chn_pointer, baud_rate_)
+        if result >= 0:
+            self._fd_baud_rate = baud_rate_input
         return result
 
     def set_custom_fd_baud_rate(self, brp: int, ts1: int, ts2: int, sjw: int, tdc_o: int):
@@ -342,11 +713,12 @@ class ITICANChannel:
         """
         if not self._inner_flag:
             raise TypeError(initialization_error)
-        baud_rate_ = ctypes.c_uint64(0)
-        result = importDLL.dll.getBaudRate(self._chn_pointer, ctypes.byref(baud_rate_))
+        output = ctypes.c_uint64(0)
+        result = self._fn_get_fd_baud_rate(self._chn_pointer, ctypes.byref(output))
+        baud_rate_ = output.value
         if result == 0:
             baud_rate_output.clear()
-            baud_rate_output.append(baud_rate_.value)
+            baud_rate_output.append(baud_rate_)
         return result
 
     def get_custom_baud_rate(self, custom_baud_rate_str_output: list):
@@ -359,55 +731,122 @@ class ITICANChannel:
         if not self._inner_flag:
             raise TypeError(initialization_error)
         str_temp = ctypes.create_string_buffer(500)
-        result = importDLL.dll.getCustomBaudRate(self._chn_pointer, str_temp)
+        result = self._dll.getCustomBaudRate(self._chn_pointer, str_temp)
         if result == 0:
             baud_rate_ = str_temp.value.decode('utf-8')
             custom_baud_rate_str_output.append(baud_rate_)
         return result
 
+    @property
+    def bit_rates(self) -> tuple:
+        """
+        (仲裁段波特率, 数据段波特率) (bit/s)，由最近一次 set_baud_rate / set_fd_baud_rate 的参数换算；
+        未设置时从通道读取，仍无法获得的一项为 None
+        """
+        from iticanwrapper.bittiming import decode_baud_rate, decode_fd_baud_rate
+        baud_rate = self._baud_rate
+        fd_baud_rate = self._fd_baud_rate
+        if baud_rate is None or fd_baud_rate is None:
+            output = ctypes.c_uint64(0)
+            if baud_rate is None and self._fn_get_baud_rate(self._chn_pointer, ctypes.byref(output)) == 0:
+                baud_rate = output.value or None
+            if fd_baud_rate is None and self._fn_get_fd_baud_rate(self._chn_pointer, ctypes.byref(output)) == 0:
+                fd_baud_rate = output.value or None
+        return (decode_baud_rate(baud_rate) if baud_rate is not None else None,
+                decode_fd_baud_rate(fd_baud_rate) if fd_baud_rate is not None else None)
+
+    def set_pacing(self, target_load: float = None, burst: float = 2.0):
+        """
+        设置发送限速：按每帧在总线上的精确传输时长（含位填充、CRC 和 BRS 数据段速率），
+        以令牌桶将 set_message / set_messages / set_messages_batch 的发送速率限制在目标总线负载以下
+
+        :param target_load: 目标总线负载，0~1；None，关闭限速
+        :param burst: 令牌桶容量 (ms 总线时间)，即不等待时最多连续发送的总线时间
+        :return: bittiming.BusLoadPacer；关闭时为 None
+        """
+        if not self._inner_flag:
+            raise TypeError(initialization_error)
+        if target_load is None:
+            self._pacer = None
+            return None
+        from iticanwrapper.bittiming import BusLoadPacer
+        pacer = BusLoadPacer(self, target_load, burst)
+        pacer.duration(MessageType.Classic_CAN, 0, 0, b'')  # 检查波特率可用
+        self._pacer = pacer
+        return pacer
+
+    @property
+    def pacer(self):
+        """
+        发送限速（bittiming.BusLoadPacer），未启用时为 None
+        """
+        return self._pacer
+
     def set_message(self, one_message: CANMessage, timeout=0):
         """
         设置一条 CAN 消息
 
-        :param one_message: CAN 消息（CANMessage）
+        :param one_message: CAN 消息（CANMessage 或 CANFrame）
         :param timeout: 设置 CAN 消息操作的超时时间，底层使用队列缓冲则该参数无效（底层使用队列缓冲）
         :return: getLastError 错误码
         """
         if not self._inner_flag:
             raise TypeError(initialization_error)
-        can_id_ = ctypes.c_uint32(one_message.id_)
-        message_type_ = ctypes.c_uint8(one_message.type_.value)
-        is_extended_ = ctypes.c_uint8(one_message.extended_)
-        data_array_ = (ctypes.c_uint8 * len(one_message.data_))(*(one_message.data_))
-        date_length_ = ctypes.c_uint8(len(one_message.data_))
-        timeout_ = ctypes.c_int32(timeout)
-        result = importDLL.dll.setMessage(self._chn_pointer, can_id_, message_type_, is_extended_, data_array_,
-                                          date_length_,
-                                          timeout_)
+        data = one_message.data_
+        length = len(data)
+        if length > _MAX_DATA_LENGTH:
+            raise ValueError("data length exceeds %d bytes" % _MAX_DATA_LENGTH)
+        if self._pacer is not None:
+            self._pacer.pace_message(one_message)
+        with self._tx_lock:
+            # 数据段拷贝到通道预分配的缓冲区，整数参数由 ctypes 按 argtypes 直接转换
+            self._tx_data_view[:length] = data if type(data) in _BUFFER_TYPES else bytes(data)
+            result = self._fn_set_message(self._chn_pointer, one_message.id_, one_message.type_.value,
+                                          one_message.extended_, self._tx_data, length, timeout)
         return result
 
     def set_messages(self, messages_container: list, items_output: list, timeout=0):
         """
-        设置多条 CAN 消息
+        设置多条 CAN 消息，打包到连续缓冲区后通过一次 setMessages 调用发送
 
         :param messages_container: 容纳多条 CAN 消息（CANMessage）
         :param items_output: 传出设置成功的 CAN 消息的个数，清空 list 后，保存到 index=0 处
-        :param timeout: 设置单条 CAN 消息的超时时间
+        :param timeout: 设置 CAN 消息操作的超时时间
+        :return: getLastError 错误码
+        """
+        if not self._inner_flag:
+            raise TypeError(initialization_error)
+        capacity = max(len(messages_container), 1)
+        with self._tx_batch_lock:
+            if self._tx_batch is None or self._tx_batch.capacity < capacity:
+                self._tx_batch = CANMessageBatch(capacity)
+            batch = self._tx_batch
+            batch.clear()
+            batch.extend_messages(messages_container)
+            return self.set_messages_batch(batch, items_output, timeout)
+
+    def set_messages_batch(self, batch: CANMessageBatch, items_output: list, timeout=0):
+        """
+        发送列式批次中的全部 CAN 消息，一次 setMessages 调用完成
+
+        :param batch: CANMessageBatch，可通过 append / pack 填充
+        :param items_output: 传出设置成功的 CAN 消息的个数，清空 list 后，保存到 index=0 处
+        :param timeout: 设置 CAN 消息操作的超时时间
         :return: getLastError 错误码
         """
         if not self._inner_flag:
             raise TypeError(initialization_error)
         items_output.clear()
-        counter = 0
-        for can_msg in messages_container:
-            result = self.set_message(can_msg, timeout)
-            if result == 0:
-                counter += 1
-            else:
-                items_output.append(counter)
-                return result
-        items_output.append(counter)
-        return 0
+        if batch.count == 0:
+            items_output.append(0)
+            return 0
+        if self._pacer is not None:
+            return self._pacer.send_batch(batch, items_output, timeout)
+        items_temp = ctypes.c_uint32(batch.count)
+        result = self._fn_set_messages(self._chn_pointer, batch.id_array, batch.type_array, batch.extended_array,
+                                       batch.data_array, batch.data_length_array, ctypes.byref(items_temp), timeout)
+        items_output.append(min(items_temp.value, batch.count))
+        return result
 
     def get_message_count(self, message_count_output: list):
         """
@@ -421,10 +860,10 @@ class ITICANChannel:
         """
         if not self._inner_flag:
             raise TypeError(initialization_error)
-        count_temp = ctypes.c_int32(0)
-        result = importDLL.dll.getMessageCount(self._chn_pointer, ctypes.byref(count_temp))
+        output = ctypes.c_int32(0)
+        result = self._fn_get_message_count(self._chn_pointer, ctypes.byref(output))
+        val = output.value
         if result == 0:
-            val = count_temp.value
             message_count_output.clear()
             message_count_output.append(val)
         return result
@@ -437,50 +876,254 @@ class ITICANChannel:
         :param timeout: 读取操作超时时长
         :return:
         """
+        return self._get_message(one_message_output, timeout, False)
+
+    def get_frame(self, one_frame_output: list, timeout=0):
+        """
+        读取一条 CAN 消息，以 CANFrame（数据段为 bytes）传出
+
+        :param one_frame_output: 清空List后，在 index=0 处填入一条 CANFrame
+        :param timeout: 读取操作超时时长
+        :return: getLastError 错误码
+        """
+        return self._get_message(one_frame_output, timeout, True)
+
+    def _get_message(self, one_message_output: list, timeout, as_frame: bool):
         if not self._inner_flag:
             raise TypeError(initialization_error)
-        id_temp = ctypes.c_uint32(0)
-        message_type_temp = ctypes.c_uint8(0)
-        can_extended_temp = ctypes.c_uint8(0)
-        transmitted_temp = ctypes.c_uint8(0)  # no output
-        timestamp_temp = ctypes.c_uint64(0)  # no output
-        data_temp = (ctypes.c_uint8 * 64)()
-        data_l_temp = ctypes.c_uint8(0)
-        timeout_temp = ctypes.c_int32(timeout)
-
-        result = importDLL.dll.getMessage(self._chn_pointer, ctypes.byref(id_temp), ctypes.byref(message_type_temp),
-                                          ctypes.byref(can_extended_temp), ctypes.byref(transmitted_temp),
-                                          ctypes.byref(timestamp_temp), data_temp, ctypes.byref(data_l_temp),
-                                          timeout_temp)
-        if result == 0:
-            data_list = list(data_temp)[:data_l_temp.value]
-            one_message_output.clear()
-            one_message_output.append(
-                CANMessage(id_temp.value, MessageType(message_type_temp.value), can_extended_temp.value, data_list[:],timestamp_temp.value))
+        with self._rx_lock:
+            if self._filter is None:
+                result = self._fn_get_message(self._chn_pointer, *self._rx_args, timeout)
+            else:
+                result = self._get_filtered_message(self._filter, timeout)
+            if result != 0:
+                return result
+            length = self._rx_data_length.value
+            if as_frame:
+                data = bytes(self._rx_data_view[:length])
+            else:
+                # ctypes 数组切片直接得到 list，只拷贝一次
+                data = self._rx_data[:length]
+            can_id = self._rx_id.value
+            message_type = _message_types[self._rx_type.value]
+            can_extended = self._rx_extended.value
+            timestamp = self._rx_timestamp.value
+        one_message_output.clear()
+        if as_frame:
+            one_message_output.append(CANFrame(can_id, message_type, can_extended, data, timestamp))
+        else:
+            one_message_output.append(CANMessage(can_id, message_type, can_extended, data, timestamp))
         return result
 
+    def _get_filtered_message(self, acceptance_filter, timeout):
+        """
+        读取下一条通过过滤的 CAN 消息（结果保留在 self._rx_* 中），调用方需持有 self._rx_lock；
+        被拒绝的消息只读取 id 和拓展帧属性，超时时长按剩余时间递减
+        """
+        deadline = time.monotonic() + timeout / 1000.0 if timeout > 0 else None
+        while True:
+            result = self._fn_get_message(self._chn_pointer, *self._rx_args, timeout)
+            # 正数（警告）时仍读取到了 CAN 消息，同样需要过滤
+            if result < 0:
+                return result
+            if acceptance_filter.accepts(self._rx_id.value, self._rx_extended.value):
+                acceptance_filter.frames_accepted += 1
+                return result
+            acceptance_filter.frames_rejected += 1
+            if deadline is not None:
+                timeout = max(int((deadline - time.monotonic()) * 1000), 0)
+
     def get_messages(self, messages_container: list, items: int, timeout: int = 0):
         """
-        读取多条 CAN 消息
+        读取多条 CAN 消息，通过一次 getMessages 调用完成
 
         :param messages_container: 清空list后，填入 CAN 消息
-        :param items: 预期读取 CAN 消息个数
-        :param timeout: 单条 CAN消息接收操作超时时长
+        :param items: 预期读取 CAN 消息个数；为负数（-1）时读取当前所有可用的 CAN 消息
+        :param timeout: 接收操作超时时长；0，立即返回已接收的消息；负数，一直等待 items 条消息
         :return: getLastError 错误码
         """
 
         if not self._inner_flag:
             raise TypeError(initialization_error)
         messages_container.clear()
-        counter = 0
-        for i in range(items):
-            one_message = []
-            rt_val = self.get_message(one_message, timeout)
-            if rt_val == 0:
-                messages_container.append(one_message[0])
-            else:
-                return rt_val
-        return 0
+        capacity = items if items > 0 else _DEFAULT_BATCH_CAPACITY
+        with self._rx_batch_lock:
+            if self._rx_batch is None or self._rx_batch.capacity < capacity:
+                self._rx_batch = CANMessageBatch(capacity)
+            result = self.get_messages_batch(self._rx_batch, items, timeout)
+            messages_container.extend(self._rx_batch.to_messages())
+        return result
+
+    def get_messages_batch(self, batch: CANMessageBatch, items: int = -1, timeout: int = 0):
+        """
+        批量读取 CAN 消息，结果以列式形式写入预分配的批次中，不创建单帧对象
+
+        :param batch: CANMessageBatch，接收结果的批次，可重复使用；调用后 batch.count 为读取到的消息个数
+        :param items: 预期读取 CAN 消息个数；为负数（-1）时读取当前所有可用的 CAN 消息，最多 batch.capacity 条；
+            设置了接收过滤器时为过滤前的个数
+        :param timeout: 接收操作超时时长；0，立即返回已接收的消息；负数，一直等待 items 条消息
+        :return: getLastError 错误码
+        """
+        if not self._inner_flag:
+            raise TypeError(initialization_error)
+        if items < 0:
+            # 以批次容量作为上限，立即返回所有可用消息，避免底层写出缓冲区
+            items = batch.capacity
+            timeout = 0
+        elif items > batch.capacity:
+            raise ValueError("items exceeds batch capacity")
+        items_temp = ctypes.c_uint32(items)
+        result = self._fn_get_messages(self._chn_pointer, batch.id_array, batch.type_array, batch.extended_array,
+                                       batch.transmitted_array, batch.timestamp_array, batch.data_array,
+                                       batch.data_length_array, ctypes.byref(items_temp), timeout)
+        if result >= 0 or items_temp.value < items:
+            # 超时等错误时，底层更新 items 则保留已接收的部分消息
+            batch._set_count(min(items_temp.value, batch.capacity))
+            if self._filter is not None:
+                self._filter.filter_batch(batch)
+        else:
+            batch._set_count(0)
+        return result
+
+    def start_receiver(self, capacity: int = 65536, policy=None, batch_size: int = 256, poll_timeout: int = 10):
+        """
+        启动后台接收线程，持续批量读取硬件队列并写入环形缓冲区；消费者从缓冲区读取，不再调用 DLL
+
+        :param capacity: 环形缓冲区容量（CAN 消息个数）
+        :param policy: receiver.OverflowPolicy，缓冲区已满时的处理策略，默认覆盖最早的消息
+        :param batch_size: 单次批量读取的最大个数
+        :param poll_timeout: 硬件队列为空时单次等待时长 (ms)
+        :return: receiver.FrameRingBuffer
+        """
+        if not self._inner_flag:
+            raise TypeError(initialization_error)
+        from iticanwrapper.receiver import ChannelReceiver, FrameRingBuffer, OverflowPolicy
+        if self._receiver is not None and self._receiver.running:
+            raise RuntimeError("receiver is already running")
+        if policy is None:
+            policy = OverflowPolicy.OVERWRITE_OLDEST
+        self._receiver = ChannelReceiver(self, FrameRingBuffer(capacity, policy), batch_size, poll_timeout)
+        self._receiver.start()
+        return self._receiver.ring
+
+    def stop_receiver(self):
+        """
+        停止后台接收线程，缓冲区中未读取的消息仍可读取
+        """
+        if self._receiver is not None:
+            self._receiver.stop()
+
+    @property
+    def receiver(self):
+        """
+        后台接收线程（receiver.ChannelReceiver），未启动时为 None
+        """
+        return self._receiver
+
+    def start_transmitter(self, capacity: int = 4096, policy=None, batch_size: int = 256, linger: float = 0,
+                          retry_interval: float = 1, retry_timeout: float = 1000):
+        """
+        启动后台发送线程：多个线程通过 put 提交 CAN 消息，按 id 优先级合并为批量 setMessages 调用发送
+
+        :param capacity: 发送队列容量（CAN 消息个数）
+        :param policy: tx_queue.BackpressurePolicy，队列已满时的处理策略，默认等待
+        :param batch_size: 单次 setMessages 的最大个数
+        :param linger: 取出批次前等待更多消息到达的时长 (ms)
+        :param retry_interval: 未全部发送时重试的间隔 (ms)
+        :param retry_timeout: 消息提交后最长的发送时限 (ms)；负数，一直重试
+        :return: tx_queue.TransmitQueue
+        """
+        if not self._inner_flag:
+            raise TypeError(initialization_error)
+        from iticanwrapper.tx_queue import BackpressurePolicy, TransmitQueue
+        if self._transmitter is not None and self._transmitter.running:
+            raise RuntimeError("transmitter is already running")
+        if policy is None:
+            policy = BackpressurePolicy.BLOCK
+        self._transmitter = TransmitQueue(self, capacity, policy, batch_size, linger, retry_interval, retry_timeout)
+        self._transmitter.start()
+        return self._transmitter
+
+    def stop_transmitter(self, drain: bool = True, timeout: float = 1.0):
+        """
+        停止后台发送线程
+
+        :param drain: True，先等待队列中的消息发送完毕；False，立即停止并取消未发送消息的 Future
+        :param timeout: 等待时长 (s)
+        """
+        if self._transmitter is not None:
+            self._transmitter.stop(drain, timeout)
+
+    @property
+    def transmitter(self):
+        """
+        后台发送线程（tx_queue.TransmitQueue），未启动时为 None
+        """
+        return self._transmitter
+
+    def add_receive_listener(self, listener):
+        """
+        添加接收监听器：后台接收线程每读取一个批次，写入环形缓冲区后调用 listener(batch)
+
+        批次在回调返回后会被复用，监听器需在回调中拷贝所需数据，且不应阻塞接收线程。
+        监听器在后台接收线程重新启动后仍然有效。
+
+        :param listener: 参数为 CANMessageBatch 的可调用对象
+        """
+        self._receive_listeners = self._receive_listeners + (listener,)
+
+    def remove_receive_listener(self, listener):
+        """
+        移除接收监听器
+
+        :param listener: add_receive_listener 添加的可调用对象
+        """
+        self._receive_listeners = tuple(item for item in self._receive_listeners if item != listener)
+
+    def set_filter(self, acceptance_filter):
+        """
+        设置软件接收过滤器：get_message / get_frame 跳过被拒绝的消息，get_messages_batch（及基于它的
+        get_messages、后台接收线程）在原始缓冲区中移除被拒绝的消息，均不为其创建对象
+
+        :param acceptance_filter: filters.AcceptanceFilter；None，取消过滤
+        """
+        self._filter = acceptance_filter
+
+    @property
+    def filter(self):
+        """
+        当前的接收过滤器（filters.AcceptanceFilter），未设置时为 None
+        """
+        return self._filter
+
+    def enable_metrics(self, name: str = None):
+        """
+        启用运行指标统计：收发帧数与字节数、错误码计数、接收队列深度和各 DLL 函数的调用延迟
+
+        :param name: 导出时使用的通道名；None，通过 get_channel_name 读取
+        :return: metrics.ChannelMetrics
+        """
+        if not self._inner_flag:
+            raise TypeError(initialization_error)
+        from iticanwrapper.metrics import ChannelMetrics
+        if self._metrics is None:
+            self._metrics = ChannelMetrics(self, name)
+        self._metrics.enable()
+        return self._metrics
+
+    def disable_metrics(self):
+        """
+        停止运行指标统计，已有统计结果仍可读取
+        """
+        if self._metrics is not None:
+            self._metrics.disable()
+
+    @property
+    def metrics(self):
+        """
+        运行指标（metrics.ChannelMetrics），未启用过时为 None
+        """
+        return self._metrics
 
     def check_if_termination_supported(self, check_result: list):
         """
@@ -494,11 +1137,12 @@ class ITICANChannel:
         """
         if not self._inner_flag:
             raise TypeError(initialization_error)
-        supported_temp = ctypes.c_uint8(0)
-        result = importDLL.dll.isTerminationSupported(self._chn_pointer, ctypes.byref(supported_temp))
+        output = ctypes.c_uint8(0)
+        result = self._fn_is_termination_supported(self._chn_pointer, ctypes.byref(output))
+        supported_temp = output.value
         if result == 0:
             check_result.clear()
-            check_result.append(supported_temp.value != 0)
+            check_result.append(supported_temp != 0)
         return result
 
     def set_termination(self, enable: bool):
@@ -515,9 +1159,9 @@ class ITICANChannel:
             raise TypeError(initialization_error)
         result = 0
         if enable:
-            result = importDLL.dll.setTermination(self._chn_pointer, ctypes.c_uint8(1))
+            result = self._dll.setTermination(self._chn_pointer, ctypes.c_uint8(1))
         else:
-            result = importDLL.dll.setTermination(self._chn_pointer, ctypes.c_uint8(0))
+            result = self._dll.setTermination(self._chn_pointer, ctypes.c_uint8(0))
         return result
 
     def check_if_termination_enabled(self, enabled_output: list):
@@ -533,11 +1177,12 @@ class ITICANChannel:
 
         if not self._inner_flag:
             raise TypeError(initialization_error)
-        enabled_temp = ctypes.c_uint8(0)
-        result = importDLL.dll.isTerminationEnabled(self._chn_pointer, ctypes.byref(enabled_temp))
+        output = ctypes.c_uint8(0)
+        result = self._fn_is_termination_enabled(self._chn_pointer, ctypes.byref(output))
+        enabled_temp = output.value
         if result == 0:
             enabled_output.clear()
-            enabled_output.append(enabled_temp.value != 0)
+            enabled_output.append(enabled_temp != 0)
         return result
 
     def check_if_echo_message_supported(self, check_result: list):
@@ -552,11 +1197,12 @@ class ITICANChannel:
         """
         if not self._inner_flag:
             raise TypeError(initialization_error)
-        supported_temp = ctypes.c_uint8(0)
-        result = importDLL.dll.isEchoMessageSupported(self._chn_pointer, ctypes.byref(supported_temp))
+        output = ctypes.c_uint8(0)
+        result = self._fn_is_echo_message_supported(self._chn_pointer, ctypes.byref(output))
+        supported_temp = output.value
         if result == 0:
             check_result.clear()
-            check_result.append(supported_temp.value != 0)
+            check_result.append(supported_temp != 0)
         return result
 
     def set_echo_message(self, enable: bool):
@@ -573,9 +1219,9 @@ class ITICANChannel:
             raise TypeError(initialization_error)
         result = 0
         if enable:
-            result = importDLL.dll.setTermination(self._chn_pointer, ctypes.c_uint8(1))
+            result = self._dll.setTermination(self._chn_pointer, ctypes.c_uint8(1))
         else:
-            result = importDLL.dll.setTermination(self._chn_pointer, ctypes.c_uint8(0))
+            result = self._dll.setTermination(self._chn_pointer, ctypes.c_uint8(0))
         return result
 
     def check_if_echo_message_enabled(self, check_result: list):
@@ -590,11 +1236,12 @@ class ITICANChannel:
         """
         if not self._inner_flag:
             raise TypeError(initialization_error)
-        enabled_temp = ctypes.c_uint8(0)
-        result = importDLL.dll.isEchoMessageEnabled(self._chn_pointer, ctypes.byref(enabled_temp))
+        output = ctypes.c_uint8(0)
+        result = self._fn_is_echo_message_enabled(self._chn_pointer, ctypes.byref(output))
+        enabled_temp = output.value
         if result == 0:
             check_result.clear()
-            check_result.append(enabled_temp.value != 0)
+            check_result.append(enabled_temp != 0)
         return result
 
     def bus_error_report(self, enable: bool):
@@ -611,9 +1258,9 @@ class ITICANChannel:
             raise TypeError(initialization_error)
         result = 0
         if enable:
-            result = importDLL.dll.setBusErrorReport(self._chn_pointer, ctypes.c_uint8(1))
+            result = self._dll.setBusErrorReport(self._chn_pointer, ctypes.c_uint8(1))
         else:
-            result = importDLL.dll.setBusErrorReport(self._chn_pointer, ctypes.c_uint8(0))
+            result = self._dll.setBusErrorReport(self._chn_pointer, ctypes.c_uint8(0))
         return result
 
     def apply_settings(self, temporary: bool):
@@ -630,9 +1277,9 @@ class ITICANChannel:
             raise TypeError(initialization_error)
         result = 0
         if temporary:
-            result = importDLL.dll.applySettings(self._chn_pointer, ctypes.c_uint8(1))
+            result = self._dll.applySettings(self._chn_pointer, ctypes.c_uint8(1))
         else:
-            result = importDLL.dll.applySettings(self._chn_pointer, ctypes.c_uint8(0))
+            result = self._dll.applySettings(self._chn_pointer, ctypes.c_uint8(0))
         return result
 
     def check_if_tx_mode_supported(self, mode: TxMode, check_result):
@@ -645,12 +1292,12 @@ class ITICANChannel:
         """
         if not self._inner_flag:
             raise TypeError(initialization_error)
-        mode_temp = ctypes.c_uint8(mode.value)
-        supported_temp = ctypes.c_uint8(0)
-        result = importDLL.dll.isTxModeSupported(self._chn_pointer, mode_temp, ctypes.byref(supported_temp))
+        output = ctypes.c_uint8(0)
+        result = self._fn_is_tx_mode_supported(self._chn_pointer, mode.value, ctypes.byref(output))
+        supported_temp = output.value
         if result == 0:
             check_result.clear()
-            check_result.append(supported_temp.value != 0)
+            check_result.append(supported_temp != 0)
         return result
 
     def set_tx_mode(self, mode: TxMode):
@@ -666,7 +1313,7 @@ class ITICANChannel:
         if not self._inner_flag:
             raise TypeError(initialization_error)
         mode_temp = ctypes.c_uint8(mode.value)
-        result = importDLL.dll.setTxMode(self._chn_pointer, mode_temp)
+        result = self._dll.setTxMode(self._chn_pointer, mode_temp)
         return result
 
     def set_tx_timing(self, can_id, period):
@@ -684,7 +1331,7 @@ class ITICANChannel:
             raise TypeError(initialization_error)
         can_id_temp = ctypes.c_uint32(can_id)
         period_temp = ctypes.c_int32(period)
-        result = importDLL.dll.setTxTiming(self._chn_pointer, can_id_temp, period_temp)
+        result = self._dll.setTxTiming(self._chn_pointer, can_id_temp, period_temp)
         return result
 
     def check_if_blink_supported(self, check_result: list):
@@ -699,11 +1346,12 @@ class ITICANChannel:
         """
         if not self._inner_flag:
             raise TypeError(initialization_error)
-        supported_temp = ctypes.c_uint8(0)
-        result = importDLL.dll.isBlinkSupported(self._chn_pointer, ctypes.byref(supported_temp))
+        output = ctypes.c_uint8(0)
+        result = self._fn_is_blink_supported(self._chn_pointer, ctypes.byref(output))
+        supported_temp = output.value
         if result == 0:
             check_result.clear()
-            check_result.append(supported_temp.value != 0)
+            check_result.append(supported_temp != 0)
         return result
 
     def set_channel_blink(self, enable: bool):
@@ -720,9 +1368,9 @@ class ITICANChannel:
             raise TypeError(initialization_error)
         result = 0
         if enable:
-            result = importDLL.dll.blinkChannel(self._chn_pointer, ctypes.c_uint8(1))
+            result = self._dll.blinkChannel(self._chn_pointer, ctypes.c_uint8(1))
         else:
-            result = importDLL.dll.blinkChannel(self._chn_pointer, ctypes.c_uint8(0))
+            result = self._dll.blinkChannel(self._chn_pointer, ctypes.c_uint8(0))
         return result
 
     def check_if_channel_blinking(self, check_result: list):
@@ -737,11 +1385,12 @@ class ITICANChannel:
         """
         if not self._inner_flag:
             raise TypeError(initialization_error)
-        status = ctypes.c_uint8(0)
-        result = importDLL.dll.isChannelBlinking(self._chn_pointer, ctypes.byref(status))
+        output = ctypes.c_uint8(0)
+        result = self._fn_is_channel_blinking(self._chn_pointer, ctypes.byref(output))
+        status = output.value
         if result == 0:
             check_result.clear()
-            check_result.append(status.value != 0)
+            check_result.append(status != 0)
         return result
 
 
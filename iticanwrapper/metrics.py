@@ -0,0 +1,402 @@
+import threading
+import time
+from collections import defaultdict
+
+__all__ = ['LatencyHistogram', 'ChannelMetrics', 'to_prometheus']
+
+
+class LatencyHistogram:
+    """
+    对数-线性分桶的延迟直方图（HDR 风格），单位为纳秒
+
+    每个 2 的幂区间再均分为 2 ** sub_bucket_bits 个桶，相对误差不超过 1 / 2 ** sub_bucket_bits；
+    记录一次只做一次下标计算和一次加法。
+
+    :param sub_bucket_bits: 每个 2 的幂区间的细分位数
+    """
+
+    def __init__(self, sub_bucket_bits: int = 4):
+        self.sub_bucket_bits = sub_bucket_bits
+        self._sub_count = 1 << sub_bucket_bits
+        self.counts = [0] * (self._sub_count * 48)
+        """各桶计数"""
+        self.count = 0
+        self.total = 0
+        """记录值之和 (ns)"""
+        self.min = 0
+        self.max = 0
+
+    def _index(self, value: int) -> int:
+        sub_count = self._sub_count
+        if value < sub_count:
+            return value
+        shift = value.bit_length() - 1 - self.sub_bucket_bits
+        return (shift + 1) * sub_count + (value >> shift) - sub_count
+
+    def bucket_range(self, index: int) -> tuple:
+        """
+        桶的取值范围
+
+        :param index: 桶序号
+        :return: (下界, 上界)，左闭右开 (ns)
+        """
+        sub_count = self._sub_count
+        if index < sub_count:
+            return index, index + 1
+        shift = index // sub_count - 1
+        lower = (sub_count + index % sub_count) << shift
+        return lower, lower + (1 << shift)
+
+    def record(self, value: int):
+        """
+        记录一个值
+
+        :param value: 延迟 (ns)
+        """
+        if value < 0:
+            value = 0
+        index = self._index(value)
+        counts = self.counts
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+        counts[index] += 1
+        if self.count == 0 or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.count += 1
+        self.total += value
+
+    def reset(self):
+        self.counts = [0] * len(self.counts)
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent: float) -> int:
+        """
+        百分位数（所在桶的上界，且不超过最大值）
+
+        :param percent: 0~100
+        :return: 延迟 (ns)
+        """
+        if not self.count:
+            return 0
+        target = max(int(self.count * percent / 100.0 + 0.5), 1)
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return min(self.bucket_range(index)[1] - 1, self.max)
+        return self.max
+
+    def cumulative_counts(self, bounds: list) -> list:
+        """
+        不超过各上界的记录个数（用于导出固定分桶的直方图）
+
+        :param bounds: 递增的上界列表 (ns)
+        :return: 与 bounds 等长的累计个数列表
+        """
+        result = []
+        cumulative = 0
+        index = 0
+        counts = self.counts
+        for bound in bounds:
+            while index < len(counts) and self.bucket_range(index)[1] - 1 <= bound:
+                cumulative += counts[index]
+                index += 1
+            result.append(cumulative)
+        return result
+
+    def snapshot(self) -> dict:
+        """
+        :return: 包含 count, min, max, mean, p50, p90, p99, p999 的字典 (ns)
+        """
+        return {'count': self.count, 'min': self.min, 'max': self.max, 'mean': self.mean,
+                'p50': self.percentile(50), 'p90': self.percentile(90), 'p99': self.percentile(99),
+                'p999': self.percentile(99.9)}
+
+
+class _InstrumentedBackend:
+    """
+    包装通道后端：每个函数调用记录延迟、负数错误码和正数警告码，收发函数额外统计帧数和字节数
+    """
+
+    def __init__(self, backend, metrics):
+        self._backend = backend
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        function = getattr(self._backend, name)
+        if not callable(function) or name.startswith('_'):
+            return function
+        wrapped = self._metrics._wrap(name, function)
+        self.__dict__[name] = wrapped
+        return wrapped
+
+
+class ChannelMetrics:
+    """
+    通道运行指标：收发帧数与字节数、各 DLL 函数的错误码和警告码计数、接收队列深度和调用延迟直方图
+
+    返回正数警告码（例如接收队列溢出）的调用仍完成了操作，其收发的帧计入吞吐量，警告码计入 warnings 而不是 errors。
+
+    通过 ITICANChannel.enable_metrics 启用：将通道预先绑定的 DLL 函数替换为计时包装，
+    disable 后恢复原函数，因此未启用时没有任何额外开销。
+
+    :param channel: ITICANChannel
+    :param name: 通道名（导出时的标签）；None，通过 get_channel_name 读取
+    """
+
+    def __init__(self, channel, name: str = None):
+        if name is None:
+            name_output = []
+            channel.get_channel_name(name_output)
+            name = name_output[0] if name_output else ''
+        self.channel = channel
+        self.name = name
+        self.tx_frames = 0
+        self.tx_bytes = 0
+        self.rx_frames = 0
+        self.rx_bytes = 0
+        self.rx_queue_depth = 0
+        """最近一次 getMessageCount 读取的接收队列深度"""
+        self.rx_queue_depth_max = 0
+        self.errors = defaultdict(lambda: defaultdict(int))
+        """{函数名: {错误码: 次数}}，只包含负数错误码"""
+        self.warnings = defaultdict(lambda: defaultdict(int))
+        """{函数名: {警告码: 次数}}，正数返回值"""
+        self.latency = {}
+        """{函数名: LatencyHistogram}"""
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._original_backend = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._original_backend is not None
+
+    def enable(self):
+        """
+        开始统计
+        """
+        channel = self.channel
+        if self._original_backend is not None:
+            return
+        self._original_backend = channel._dll
+        channel._dll = _InstrumentedBackend(channel._dll, self)
+        channel._bind_functions()
+
+    def disable(self):
+        """
+        停止统计，恢复通道原有的 DLL 函数
+        """
+        channel = self.channel
+        if self._original_backend is None:
+            return
+        channel._dll = self._original_backend
+        self._original_backend = None
+        channel._bind_functions()
+
+    def reset(self):
+        """
+        清零全部统计
+        """
+        with self._lock:
+            self.tx_frames = self.tx_bytes = self.rx_frames = self.rx_bytes = 0
+            self.rx_queue_depth = self.rx_queue_depth_max = 0
+            # 包装函数持有各函数的计数字典，只清空内容
+            for codes in self.errors.values():
+                codes.clear()
+            for codes in self.warnings.values():
+                codes.clear()
+            for histogram in self.latency.values():
+                histogram.reset()
+            self.started = time.time()
+
+    def sample_queue_depth(self) -> int:
+        """
+        调用 get_message_count 更新接收队列深度
+
+        :return: getLastError 错误码
+        """
+        return self.channel.get_message_count([])
+
+    def _wrap(self, name, function):
+        histogram = self.latency.setdefault(name, LatencyHistogram())
+        errors = self.errors[name]
+        warnings = self.warnings[name]
+
+        def record_code(result):
+            # 调用方需持有 lock
+            if result < 0:
+                errors[result] += 1
+            elif result > 0:
+                warnings[result] += 1
+
+        lock = self._lock
+        perf_counter_ns = time.perf_counter_ns
+
+        if name == 'setMessage':
+            def call(*args):
+                start = perf_counter_ns()
+                result = function(*args)
+                elapsed = perf_counter_ns() - start
+                with lock:
+                    histogram.record(elapsed)
+                    if result >= 0:
+                        self.tx_frames += 1
+                        self.tx_bytes += args[5]
+                    record_code(result)
+                return result
+        elif name == 'getMessage':
+            def call(*args):
+                start = perf_counter_ns()
+                result = function(*args)
+                elapsed = perf_counter_ns() - start
+                with lock:
+                    histogram.record(elapsed)
+                    if result >= 0:
+                        self.rx_frames += 1
+                        self.rx_bytes += args[7].contents.value
+                    record_code(result)
+                return result
+        elif name in ('setMessages', 'getMessages'):
+            # 参数中 dataLength 数组与 items 指针的位置
+            length_index, items_index = (5, 6) if name == 'setMessages' else (7, 8)
+            transmit = name == 'setMessages'
+
+            def call(*args):
+                items = args[items_index]._obj
+                requested = items.value
+                start = perf_counter_ns()
+                result = function(*args)
+                elapsed = perf_counter_ns() - start
+                count = min(items.value, requested)
+                if not transmit and result < 0 and count >= requested:
+                    count = 0
+                # dataLength 可能是数组或指向数组中间的指针，切片均得到 list
+                size = sum(args[length_index][:count]) if count else 0
+                with lock:
+                    histogram.record(elapsed)
+                    if transmit:
+                        self.tx_frames += count
+                        self.tx_bytes += size
+                    else:
+                        self.rx_frames += count
+                        self.rx_bytes += size
+                    record_code(result)
+                return result
+        elif name == 'getMessageCount':
+            def call(*args):
+                start = perf_counter_ns()
+                result = function(*args)
+                elapsed = perf_counter_ns() - start
+                with lock:
+                    histogram.record(elapsed)
+                    if result >= 0:
+                        depth = args[1].contents.value
+                        self.rx_queue_depth = depth
+                        if depth > self.rx_queue_depth_max:
+                            self.rx_queue_depth_max = depth
+                    record_code(result)
+                return result
+        else:
+            def call(*args):
+                start = perf_counter_ns()
+                result = function(*args)
+                elapsed = perf_counter_ns() - start
+                with lock:
+                    histogram.record(elapsed)
+                    record_code(result)
+                return result
+        return call
+
+    def snapshot(self) -> dict:
+        """
+        当前统计的快照
+
+        :return: 包含 name, uptime, tx_frames, tx_bytes, rx_frames, rx_bytes, rx_queue_depth, rx_queue_depth_max,
+                 errors（{函数名: {错误码: 次数}}）、warnings（{函数名: {警告码: 次数}}）和 latency（{函数名: LatencyHistogram.snapshot()}）的字典
+        """
+        with self._lock:
+            return {
+                'name': self.name,
+                'uptime': time.time() - self.started,
+                'tx_frames': self.tx_frames,
+                'tx_bytes': self.tx_bytes,
+                'rx_frames': self.rx_frames,
+                'rx_bytes': self.rx_bytes,
+                'rx_queue_depth': self.rx_queue_depth,
+                'rx_queue_depth_max': self.rx_queue_depth_max,
+                'errors': {name: dict(codes) for name, codes in self.errors.items() if codes},
+                'warnings': {name: dict(codes) for name, codes in self.warnings.items() if codes},
+                'latency': {name: histogram.snapshot() for name, histogram in self.latency.items()
+                            if histogram.count},
+            }
+
+
+# Prometheus 直方图导出的固定上界 (s)
+_PROMETHEUS_BOUNDS = (1e-6, 2e-6, 5e-6, 1e-5, 2e-5, 5e-5, 1e-4, 2e-4, 5e-4, 1e-3, 2e-3, 5e-3, 1e-2, 2e-2, 5e-2,
+                      0.1, 0.2, 0.5, 1.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def to_prometheus(metrics_list: list, prefix: str = 'itican') -> str:
+    """
+    以 Prometheus 文本格式导出多个通道的指标
+
+    :param metrics_list: ChannelMetrics 列表
+    :param prefix: 指标名前缀
+    :return: Prometheus 文本
+    """
+    lines = []
+    counters = (('tx_frames', 'counter', 'Frames sent'), ('tx_bytes', 'counter', 'Payload bytes sent'),
+                ('rx_frames', 'counter', 'Frames received'), ('rx_bytes', 'counter', 'Payload bytes received'),
+                ('rx_queue_depth', 'gauge', 'Receive queue depth from getMessageCount'),
+                ('rx_queue_depth_max', 'gauge', 'Maximum receive queue depth from getMessageCount'))
+    for field, kind, help_text in counters:
+        metric = '%s_%s%s' % (prefix, field, '_total' if kind == 'counter' else '')
+        lines.append('# HELP %s %s' % (metric, help_text))
+        lines.append('# TYPE %s %s' % (metric, kind))
+        for metrics in metrics_list:
+            lines.append('%s{channel="%s"} %d' % (metric, _escape(metrics.name), getattr(metrics, field)))
+
+    for field, help_text in (('errors', 'Negative error codes per DLL function'),
+                             ('warnings', 'Positive warning codes per DLL function')):
+        metric = '%s_%s_total' % (prefix, field)
+        lines.append('# HELP %s %s' % (metric, help_text))
+        lines.append('# TYPE %s counter' % metric)
+        for metrics in metrics_list:
+            with metrics._lock:
+                codes_by_name = getattr(metrics, field)
+                items = [(name, code, count) for name, codes in codes_by_name.items() for code, count in codes.items()]
+            for name, code, count in sorted(items):
+                lines.append('%s{channel="%s",function="%s",code="%d"} %d' % (metric, _escape(metrics.name), name,
+                                                                              code, count))
+
+    metric = '%s_dll_call_duration_seconds' % prefix
+    bounds_ns = [int(bound * 1e9) for bound in _PROMETHEUS_BOUNDS]
+    lines.append('# HELP %s DLL call duration' % metric)
+    lines.append('# TYPE %s histogram' % metric)
+    for metrics in metrics_list:
+        channel = _escape(metrics.name)
+        with metrics._lock:
+            histograms = [(name, histogram.cumulative_counts(bounds_ns), histogram.count, histogram.total)
+                          for name, histogram in sorted(metrics.latency.items()) if histogram.count]
+        for name, cumulative, count, total in histograms:
+            labels = 'channel="%s",function="%s"' % (channel, name)
+            for bound, value in zip(_PROMETHEUS_BOUNDS, cumulative):
+                lines.append('%s_bucket{%s,le="%g"} %d' % (metric, labels, bound, value))
+            lines.append('%s_bucket{%s,le="+Inf"} %d' % (metric, labels, count))
+            lines.append('%s_sum{%s} %.9f' % (metric, labels, total / 1e9))
+            lines.append('%s_count{%s} %d' % (metric, labels, count))
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,340 @@
+import heapq
+import threading
+import time
+from collections import deque
+
+from iticanwrapper.backend import ITICANBackend
+from iticanwrapper.itican_py_wrapper import CANFrame, CANMessageBatch, ITICANChannel, OpenMode, OpenType
+
+__all__ = ['ChannelSettings', 'TaggedFrame', 'MultiChannelManager']
+
+
+class ChannelSettings:
+    """
+    多个通道共用的开启参数
+
+    :param open_type: OpenType
+    :param open_mode: OpenMode
+    :param baud_rate: 仲裁段波特率参数；None，不设置
+    :param fd_baud_rate: 数据段波特率参数；None，不设置
+    :param termination: 是否开启终端电阻；None，不设置
+    """
+
+    def __init__(self, open_type: OpenType = OpenType.FD_CAN, open_mode: OpenMode = OpenMode.Normal,
+                 baud_rate: int = None, fd_baud_rate: int = None, termination: bool = None):
+        self.open_type = open_type
+        self.open_mode = open_mode
+        self.baud_rate = baud_rate
+        self.fd_baud_rate = fd_baud_rate
+        self.termination = termination
+
+    def apply(self, channel: ITICANChannel) -> int:
+        """
+        开启通道并设置参数
+
+        :param channel: ITICANChannel
+        :return: 第一个非 0 的 getLastError 错误码；全部成功时为 0
+        """
+        result = channel.open_channel(self.open_type, self.open_mode)
+        if result != 0:
+            return result
+        if self.baud_rate is not None:
+            result = channel.set_baud_rate(self.baud_rate)
+            if result != 0:
+                return result
+        if self.fd_baud_rate is not None:
+            result = channel.set_fd_baud_rate(self.fd_baud_rate)
+            if result != 0:
+                return result
+        if self.termination is not None:
+            result = channel.set_termination(self.termination)
+        return result
+
+
+class TaggedFrame:
+    """
+    合并接收流中的一帧，带有来源通道名
+
+    :param channel: 通道索引名
+    :param frame: CANFrame
+    """
+
+    __slots__ = ('channel', 'frame')
+
+    def __init__(self, channel: str, frame: CANFrame):
+        self.channel = channel
+        self.frame = frame
+
+    def __repr__(self):
+        return 'TaggedFrame(%r, id=0x%X, timestamp=%d)' % (self.channel, self.frame.id_, self.frame.timestamp_)
+
+
+class _ChannelState:
+    __slots__ = ('name', 'channel', 'pending', 'latest', 'idle', 'idle_at', 'dropped', 'frames_received',
+                 'last_error')
+
+    def __init__(self, name, channel):
+        self.name = name
+        self.channel = channel
+        self.pending = deque()
+        self.latest = -1
+        self.idle = True
+        self.idle_at = 0.0
+        self.dropped = 0
+        self.frames_received = 0
+        self.last_error = 0
+
+
+class MultiChannelManager:
+    """
+    多通道管理器
+
+    以相同参数开启一组通道，由少量工作线程轮流批量读取各通道，接收结果按硬件时间戳 k 路归并为
+    一个带通道名的有序接收流。要求各通道的时间戳使用同一时间基准（同一设备的通道）。
+
+    归并使用水位线：只有所有非空闲通道（最近一次读取到帧的通道）都已收到不早于 t 的帧，且所有空闲通道
+    在该帧取得之后又读取过一次（结果为空）时，才输出时间戳为 t 的帧；空闲通道因此最多使其他通道的帧
+    延迟一个轮询周期。早于已输出帧到达的帧（例如各通道时间基准不一致时）仍会输出，并计入 late_frames。
+
+    :param channel_names: 通道索引名列表；None，使用 find_all_channels 找到的全部通道
+    :param settings: ChannelSettings；None，使用默认参数
+    :param backend: ITICANBackend；None，使用默认后端
+    :param workers: 工作线程个数
+    :param batch_size: 单次批量读取的最大个数
+    :param poll_interval: 所有通道均无数据时工作线程的等待时长 (ms)
+    :param capacity: 每个通道待输出帧的最大个数，超出时丢弃最早的帧
+    """
+
+    def __init__(self, channel_names: list = None, settings: ChannelSettings = None, backend: ITICANBackend = None,
+                 workers: int = 2, batch_size: int = 256, poll_interval: float = 1, capacity: int = 65536):
+        self.channel_names = channel_names
+        self.settings = settings if settings is not None else ChannelSettings()
+        self.backend = backend
+        self.workers = max(workers, 1)
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval / 1000.0
+        self.capacity = capacity
+        self.channels = {}
+        """{通道索引名: ITICANChannel}"""
+        self.late_frames = 0
+        """早于已输出帧到达的帧数"""
+        self._states = []
+        self._emitted = -1
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._threads = []
+
+    def __enter__(self):
+        result = self.open()
+        if result != 0:
+            self.close()
+            raise RuntimeError("failed to open channels, error code %d" % result)
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def open(self) -> int:
+        """
+        获取并开启全部通道
+
+        :return: 第一个非 0 的 getLastError 错误码；全部成功时为 0
+        """
+        names = self.channel_names
+        if names is None:
+            names = []
+            result = ITICANChannel.find_all_channels(names, [], self.backend)
+            if result != 0:
+                return result
+        first_error = 0
+        for name in names:
+            if name in self.channels:
+                continue
+            container = []
+            result = ITICANChannel.get_channel(container, name, self.backend)
+            if result == 0:
+                result = self.settings.apply(container[0])
+            if result != 0:
+                first_error = first_error or result
+                continue
+            self.channels[name] = container[0]
+            self._states.append(_ChannelState(name, container[0]))
+        return first_error
+
+    def start(self):
+        """
+        启动工作线程；通道按轮转方式分配给各工作线程
+        """
+        if any(thread.is_alive() for thread in self._threads):
+            return
+        self._stop_event.clear()
+        count = min(self.workers, max(len(self._states), 1))
+        self._threads = [threading.Thread(target=self._run, args=(self._states[index::count],),
+                                          name='ITICANMultiChannel-%d' % index, daemon=True)
+                         for index in range(count)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        """
+        停止工作线程；已接收的帧仍可读取
+
+        :param timeout: 等待每个线程退出的时长 (s)
+        """
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        with self._condition:
+            self._condition.notify_all()
+
+    def close(self):
+        """
+        停止工作线程并关闭全部通道
+        """
+        self.stop()
+        for channel in self.channels.values():
+            channel.close_channel()
+
+    def statistics(self) -> dict:
+        """
+        各通道的接收统计
+
+        :return: {通道索引名: {'frames_received', 'dropped', 'pending', 'last_error'}}
+        """
+        with self._condition:
+            return {state.name: {'frames_received': state.frames_received, 'dropped': state.dropped,
+                                 'pending': len(state.pending), 'last_error': state.last_error}
+                    for state in self._states}
+
+    def _run(self, states):
+        batch = CANMessageBatch(self.batch_size)
+        stop_event = self._stop_event
+        condition = self._condition
+        monotonic = time.monotonic
+        while not stop_event.is_set():
+            busy = False
+            for state in states:
+                started = monotonic()
+                result = state.channel.get_messages_batch(batch, -1, 0)
+                if result != 0:
+                    state.last_error = result
+                count = batch.count
+                if not count:
+                    # 读取开始前已到达的帧都会被本次读取取走，记录读取开始时间；归并在锁内读取这两项
+                    with condition:
+                        state.idle_at = started
+                        state.idle = True
+                    continue
+                busy = True
+                fetched = monotonic()
+                entries = [(frame.timestamp_, frame, fetched) for frame in batch.to_frames()]
+                with condition:
+                    state.idle = False
+                    pending = state.pending
+                    overflow = len(pending) + count - self.capacity
+                    if overflow > 0:
+                        # 先丢弃队列中最早的帧；本次读取的帧多于容量时再丢弃其中最早的帧
+                        from_pending = min(overflow, len(pending))
+                        for _ in range(from_pending):
+                            pending.popleft()
+                        if overflow > from_pending:
+                            entries = entries[overflow - from_pending:]
+                        state.dropped += overflow
+                    pending.extend(entries)
+                    state.frames_received += count
+                    state.latest = max(state.latest, entries[-1][0])
+                    condition.notify_all()
+            if not busy:
+                stop_event.wait(self.poll_interval)
+
+    def _ready(self):
+        """
+        返回判断帧 (timestamp, fetched) 可否输出的函数；调用方需持有 self._condition
+        """
+        if self._stop_event.is_set():
+            return lambda timestamp, fetched: True
+        active = [state.latest for state in self._states if not state.idle]
+        watermark = min(active) if active else None
+        # 空闲通道：其读取开始时间晚于某帧的取得时间时，该通道不会再出现早于该帧的帧
+        idle = [(state.latest, state.idle_at) for state in self._states if state.idle]
+        idle_since = min((idle_at for _, idle_at in idle), default=None)
+
+        def ready(timestamp, fetched):
+            if watermark is not None and timestamp > watermark:
+                return False
+            if idle_since is None or fetched < idle_since:
+                return True
+            return all(latest >= timestamp or idle_at > fetched for latest, idle_at in idle)
+
+        return ready
+
+    def _collect(self, output: list, max_items: int) -> int:
+        # 调用方需持有 self._condition；对各通道队首做 k 路归并
+        ready = self._ready()
+        states = self._states
+        heads = [(state.pending[0][0], index) for index, state in enumerate(states) if state.pending]
+        heapq.heapify(heads)
+        count = 0
+        while heads and count != max_items:
+            timestamp, index = heads[0]
+            state = states[index]
+            if not ready(timestamp, state.pending[0][2]):
+                break
+            _, frame, _ = state.pending.popleft()
+            if timestamp < self._emitted:
+                self.late_frames += 1
+            else:
+                self._emitted = timestamp
+            output.append(TaggedFrame(state.name, frame))
+            count += 1
+            if state.pending:
+                heapq.heapreplace(heads, (state.pending[0][0], index))
+            else:
+                heapq.heappop(heads)
+        return count
+
+    def get_frames(self, frames_output: list, max_items: int = -1, timeout: int = 0) -> int:
+        """
+        从合并接收流中读取按时间戳排序的帧
+
+        :param frames_output: 传出 TaggedFrame，清空 list 后依次保存
+        :param max_items: 最多读取个数；负数，不限
+        :param timeout: 没有可输出的帧时的等待时长 (ms)；0，不等待；负数，一直等待
+        :return: 读取的帧数
+        """
+        frames_output.clear()
+        deadline = None if timeout < 0 else time.monotonic() + timeout / 1000.0
+        with self._condition:
+            while True:
+                count = self._collect(frames_output, max_items)
+                if count or timeout == 0:
+                    return count
+                if self._stop_event.is_set() and not any(state.pending for state in self._states):
+                    return 0
+                # 空闲通道的读取不通知等待者，按轮询周期重新检查水位线
+                wait_slice = max(2 * self.poll_interval, 0.001)
+                if deadline is None:
+                    self._condition.wait(wait_slice)
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return 0
+                self._condition.wait(min(remaining, wait_slice))
+
+    def frames(self, timeout: int = -1):
+        """
+        迭代合并接收流::
+
+            for tagged in manager.frames():
+                print(tagged.channel, tagged.frame.id_)
+
+        :param timeout: 超过该时长没有新帧时结束迭代 (ms)；负数，直到 stop
+        """
+        output = []
+        while True:
+            if not self.get_frames(output, -1, timeout):
+                if timeout >= 0 or self._stop_event.is_set():
+                    return
+                continue
+            yield from output
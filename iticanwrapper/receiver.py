@@ -0,0 +1,344 @@
+import threading
+import time
+from array import array
+from enum import Enum
+
+from iticanwrapper.itican_py_wrapper import CANMessage, CANMessageBatch, ITICANChannel, MessageType, _MAX_DATA_LENGTH
+
+__all__ = ['OverflowPolicy', 'FrameRingBuffer', 'ChannelReceiver']
+
+# 按 id 索引的键中扩展帧的标志位，区分数值相同的标准帧 id 与扩展帧 id
+_EXTENDED_KEY = 1 << 32
+
+
+class OverflowPolicy(Enum):
+    OVERWRITE_OLDEST = 0
+    """
+    环形缓冲区已满时覆盖最早的 CAN 消息
+    """
+    BLOCK = 1
+    """
+    环形缓冲区已满时接收线程等待消费者读取，未读取的消息暂存在硬件队列中
+    """
+
+
+class FrameRingBuffer:
+    """
+    固定容量的 CAN 消息环形缓冲区
+
+    各字段按列预分配，数据段每帧固定占用 64 字节；写入和读取均以批次为单位拷贝，不创建单帧对象。
+    线程安全，支持一个写入者和多个读取者。
+
+    :param capacity: 缓冲区容量（CAN 消息个数）
+    :param policy: 缓冲区已满时的处理策略
+    """
+
+    def __init__(self, capacity: int = 65536, policy: OverflowPolicy = OverflowPolicy.OVERWRITE_OLDEST):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.policy = policy
+        self.overflow_count = 0
+        """因覆盖被丢弃的 CAN 消息个数"""
+        self.block_count = 0
+        """BLOCK 策略下写入者等待的次数"""
+        self.total_written = 0
+        """累计写入的 CAN 消息个数"""
+        self._ids = array('I', bytes(4 * capacity))
+        self._types = bytearray(capacity)
+        self._extended = bytearray(capacity)
+        self._transmitted = bytearray(capacity)
+        self._timestamps = array('Q', bytes(8 * capacity))
+        self._data_lengths = bytearray(capacity)
+        self._data = bytearray(capacity * _MAX_DATA_LENGTH)
+        self._id_view = memoryview(self._ids)
+        self._timestamp_view = memoryview(self._timestamps)
+        self._data_view = memoryview(self._data)
+        self._head = 0
+        self._size = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+
+    def __len__(self):
+        return self._size
+
+    def close(self):
+        """
+        关闭缓冲区，唤醒所有等待中的读取者和写入者
+        """
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+    def clear(self):
+        """
+        丢弃缓冲区中所有未读取的 CAN 消息
+        """
+        with self._lock:
+            self._head = 0
+            self._size = 0
+            self._not_full.notify_all()
+
+    def write_batch(self, batch: CANMessageBatch, stop_event: threading.Event = None) -> int:
+        """
+        将批次中的全部 CAN 消息写入缓冲区
+
+        :param batch: CANMessageBatch
+        :param stop_event: BLOCK 策略下等待期间用于提前退出
+        :return: 写入的 CAN 消息个数
+        """
+        count = batch.count
+        if count == 0:
+            return 0
+        ids = batch.ids
+        types = batch.types
+        extended = batch.extended
+        transmitted = batch.transmitted
+        timestamps = batch.timestamps
+        data_lengths = batch.data_lengths
+        offsets = batch.offsets
+        data = batch.data
+        capacity = self.capacity
+        written = 0
+        with self._lock:
+            while written < count:
+                free = capacity - self._size
+                if free == 0:
+                    if self._closed:
+                        break
+                    if self.policy == OverflowPolicy.OVERWRITE_OLDEST:
+                        dropped = min(count - written, capacity)
+                        self._head = (self._head + dropped) % capacity
+                        self._size -= dropped
+                        self.overflow_count += dropped
+                    else:
+                        self.block_count += 1
+                        while self._size == capacity and not self._closed:
+                            if stop_event is not None and stop_event.is_set():
+                                return written
+                            self._not_full.wait(0.1)
+                    continue
+                length = min(count - written, free)
+                tail = (self._head + self._size) % capacity
+                # 最多分两段写入（环绕）
+                while length > 0:
+                    segment = min(length, capacity - tail)
+                    src = slice(written, written + segment)
+                    dst = slice(tail, tail + segment)
+                    self._id_view[dst] = ids[src]
+                    self._types[dst] = types[src]
+                    self._extended[dst] = extended[src]
+                    self._transmitted[dst] = transmitted[src]
+                    self._timestamp_view[dst] = timestamps[src]
+                    self._data_lengths[dst] = data_lengths[src]
+                    for i in range(segment):
+                        start = offsets[written + i]
+                        end = offsets[written + i + 1]
+                        position = (tail + i) * _MAX_DATA_LENGTH
+                        self._data_view[position:position + end - start] = data[start:end]
+                    self._size += segment
+                    written += segment
+                    length -= segment
+                    tail = (tail + segment) % capacity
+                self._not_empty.notify_all()
+            self.total_written += written
+        return written
+
+    def _wait_readable(self, timeout):
+        """
+        在持有锁的情况下等待缓冲区非空；timeout 单位为毫秒，负数一直等待
+        """
+        if self._size or timeout == 0:
+            return
+        if timeout < 0:
+            while not self._size and not self._closed:
+                self._not_empty.wait()
+            return
+        deadline = time.monotonic() + timeout / 1000.0
+        while not self._size and not self._closed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            self._not_empty.wait(remaining)
+
+    def read_batch(self, batch: CANMessageBatch, max_items: int = -1, timeout: int = 0) -> int:
+        """
+        从缓冲区读取多条 CAN 消息到批次中（覆盖批次原有内容）
+
+        :param batch: CANMessageBatch，接收结果
+        :param max_items: 最多读取个数；负数，最多 batch.capacity 条
+        :param timeout: 缓冲区为空时的等待时长 (ms)；0，不等待；负数，一直等待
+        :return: 读取的 CAN 消息个数
+        """
+        if max_items < 0 or max_items > batch.capacity:
+            max_items = batch.capacity
+        capacity = self.capacity
+        with self._lock:
+            self._wait_readable(timeout)
+            count = min(self._size, max_items)
+            head = self._head
+            done = 0
+            offset = 0
+            while done < count:
+                segment = min(count - done, capacity - head)
+                src = slice(head, head + segment)
+                dst = slice(done, done + segment)
+                batch._id_view[dst] = self._id_view[src]
+                batch._type_view[dst] = self._types[src]
+                batch._extended_view[dst] = self._extended[src]
+                batch._transmitted_view[dst] = self._transmitted[src]
+                batch._timestamp_view[dst] = self._timestamp_view[src]
+                batch._data_length_view[dst] = self._data_lengths[src]
+                for i in range(segment):
+                    length = self._data_lengths[head + i]
+                    position = (head + i) * _MAX_DATA_LENGTH
+                    batch._data_view[offset:offset + length] = self._data_view[position:position + length]
+                    offset += length
+                done += segment
+                head = (head + segment) % capacity
+            self._head = head
+            self._size -= count
+            if count:
+                self._not_full.notify_all()
+        batch._set_count(count)
+        return count
+
+    def read_message(self, timeout: int = 0):
+        """
+        从缓冲区读取一条 CAN 消息
+
+        :param timeout: 缓冲区为空时的等待时长 (ms)；0，不等待；负数，一直等待
+        :return: CANMessage；超时返回 None
+        """
+        with self._lock:
+            self._wait_readable(timeout)
+            if not self._size:
+                return None
+            index = self._head
+            length = self._data_lengths[index]
+            position = index * _MAX_DATA_LENGTH
+            message = CANMessage(self._ids[index], MessageType(self._types[index]), self._extended[index],
+                                 list(self._data_view[position:position + length]), self._timestamps[index])
+            self._head = (index + 1) % self.capacity
+            self._size -= 1
+            self._not_full.notify_all()
+        return message
+
+
+class ChannelReceiver:
+    """
+    通道后台接收线程：持续以批量方式读取硬件队列，写入环形缓冲区
+
+    通常通过 ITICANChannel.start_receiver 创建。
+
+    :param channel: ITICANChannel，已开启的通道
+    :param ring: 写入的环形缓冲区
+    :param batch_size: 单次批量读取的最大个数
+    :param poll_timeout: 硬件队列为空时单次等待时长 (ms)
+    """
+
+    def __init__(self, channel, ring: FrameRingBuffer, batch_size: int = 256, poll_timeout: int = 10):
+        self.channel = channel
+        self.ring = ring
+        self.batch_size = batch_size
+        self.poll_timeout = poll_timeout
+        self.frames_received = 0
+        """累计从硬件读取的 CAN 消息个数"""
+        self.receive_errors = 0
+        """批量读取返回错误码（负数，不含等待超时）的次数"""
+        self.receive_warnings = 0
+        """批量读取返回警告（正数）的次数"""
+        self.last_error = 0
+        """最近一次非零返回值"""
+        self.listener_errors = 0
+        """接收监听器抛出异常的次数"""
+        self._batch = CANMessageBatch(batch_size)
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='ITICANReceiver', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        """
+        停止接收线程
+
+        :param timeout: 等待线程退出的时长 (s)
+        """
+        self._stop_event.set()
+        self.ring.close()
+        if self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    def _run(self):
+        channel = self.channel
+        batch = self._batch
+        stop_event = self._stop_event
+        poll_timeout = self.poll_timeout
+        while not stop_event.is_set():
+            # 先取走所有已到达的消息；硬件队列为空时等待第一条到达
+            result = channel.get_messages_batch(batch, -1, 0)
+            if result >= 0 and batch.count == 0:
+                started = time.monotonic()
+                result = channel.get_messages_batch(batch, 1, poll_timeout)
+                if result < 0 and batch.count == 0 and time.monotonic() - started >= poll_timeout / 2000.0:
+                    # 等待期间没有消息到达（超时）
+                    continue
+            if batch.count:
+                self.frames_received += batch.count
+                self._deliver(batch)
+            if result > 0:
+                self.receive_warnings += 1
+                self.last_error = result
+            elif result < 0:
+                self.receive_errors += 1
+                self.last_error = result
+                if batch.count == 0:
+                    # 避免通道异常时空转
+                    stop_event.wait(max(poll_timeout, 1) / 1000.0)
+
+    def _deliver(self, batch):
+        self.ring.write_batch(batch, self._stop_event)
+        for listener in self.channel._receive_listeners:
+            try:
+                listener(batch)
+            except Exception:
+                self.listener_errors += 1
+
+
+class _ReceiveListener:
+    """
+    挂接到通道接收路径的组件的 attach/detach 实现
+
+    子类以 _listener 指定接收 CANMessageBatch 的方法名。
+    """
+
+    _listener = 'add_batch'
+    _channel = None
+
+    def attach(self, channel: ITICANChannel):
+        """
+        挂接到通道的接收路径，并确保后台接收线程已启动
+
+        :param channel: ITICANChannel，已开启的通道
+        """
+        self.detach()
+        channel.add_receive_listener(getattr(self, self._listener))
+        self._channel = channel
+        if channel.receiver is None or not channel.receiver.running:
+            channel.start_receiver()
+
+    def detach(self):
+        """
+        从通道的接收路径移除
+        """
+        if self._channel is not None:
+            self._channel.remove_receive_listener(getattr(self, self._listener))
+            self._channel = None
@@ -0,0 +1,281 @@
+import heapq
+import math
+import threading
+import time
+
+from iticanwrapper.itican_py_wrapper import CANMessageBatch, ITICANChannel
+
+__all__ = ['PeriodStatistics', 'PeriodicScheduler']
+
+
+class PeriodStatistics:
+    """
+    单个周期消息的实际发送周期统计，单位均为毫秒
+
+    :param can_id: CAN 通信id
+    :param period: 设定周期
+    """
+
+    __slots__ = ('can_id', 'period', 'count', 'mean_period', 'min_period', 'max_period', 'jitter', 'max_deviation',
+                 'skipped', '_last', '_sum', '_sum_sq')
+
+    def __init__(self, can_id: int, period: float):
+        self.can_id = can_id
+        self.period = period
+        self.count = 0
+        """已发送次数"""
+        self.mean_period = 0.0
+        """实际平均周期"""
+        self.min_period = 0.0
+        """实际最小周期"""
+        self.max_period = 0.0
+        """实际最大周期"""
+        self.jitter = 0.0
+        """实际周期的标准差"""
+        self.max_deviation = 0.0
+        """实际周期与设定周期的最大偏差"""
+        self.skipped = 0
+        """调度落后超过一个周期而跳过的发送次数"""
+        self._last = None
+        self._sum = 0.0
+        self._sum_sq = 0.0
+
+    def _record(self, sent_at: float):
+        last = self._last
+        self._last = sent_at
+        self.count += 1
+        if last is None:
+            return
+        interval = (sent_at - last) * 1000.0
+        n = self.count - 1
+        self._sum += interval
+        self._sum_sq += interval * interval
+        if n == 1:
+            self.min_period = self.max_period = interval
+        else:
+            self.min_period = min(self.min_period, interval)
+            self.max_period = max(self.max_period, interval)
+        self.mean_period = self._sum / n
+        self.jitter = math.sqrt(max(self._sum_sq / n - self.mean_period * self.mean_period, 0.0))
+        self.max_deviation = max(self.max_deviation, abs(interval - self.period))
+
+    def copy(self):
+        other = PeriodStatistics(self.can_id, self.period)
+        for name in self.__slots__:
+            setattr(other, name, getattr(self, name))
+        return other
+
+
+class _PeriodicJob:
+    __slots__ = ('message', 'period', 'deadline', 'callback', 'statistics', 'active')
+
+    def __init__(self, message, period, deadline, callback):
+        self.message = message
+        self.period = period
+        self.deadline = deadline
+        self.callback = callback
+        self.statistics = PeriodStatistics(message.id_, period * 1000.0)
+        self.active = True
+
+
+class PeriodicScheduler:
+    """
+    软件周期发送调度器
+
+    所有周期消息由一个定时线程按绝对截止时间（最小堆）调度：下一次截止时间为上一次截止时间加周期，
+    不随发送延迟累积漂移。同一时刻到期的消息合并为一次 setMessages 批量发送。
+    update_callback 抛出异常时只跳过该消息的本次发送并计入 callback_errors，不影响同批的其他消息。
+
+    :param channel: ITICANChannel，已开启的通道
+    :param batch_window: 合并窗口 (ms)，在此时间内到期的消息与当前消息一起发送
+    :param spin_time: 截止时间前改为忙等的时长 (ms)，用于降低操作系统休眠精度带来的抖动；0，不忙等
+    :param timeout: 发送 CAN 消息操作的超时时间
+    """
+
+    def __init__(self, channel: ITICANChannel, batch_window: float = 0.5, spin_time: float = 0.5, timeout: int = 0):
+        self.channel = channel
+        self.batch_window = batch_window / 1000.0
+        self.spin_time = spin_time / 1000.0
+        self.timeout = timeout
+        self.send_errors = 0
+        """批量发送返回错误码的次数"""
+        self.last_error = 0
+        """最近一次非零返回值"""
+        self.callback_errors = 0
+        """update_callback 抛出异常、跳过该次发送的次数"""
+        self.last_callback_error = None
+        """update_callback 最近一次抛出的异常"""
+        self._jobs = {}
+        self._heap = []
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._batch = CANMessageBatch(64)
+
+    def add(self, message, period: float, update_callback=None, start_delay: float = 0.0):
+        """
+        添加（或替换同 id 的）周期消息
+
+        :param message: CANMessage 或 CANFrame
+        :param period: 发送周期 (ms)
+        :param update_callback: 每次发送前调用 update_callback(message)，可原地修改数据段；
+                                返回新的消息对象时使用返回值发送
+        :param start_delay: 首次发送相对当前时间的延迟 (ms)
+        """
+        if period <= 0:
+            raise ValueError("period must be positive")
+        job = _PeriodicJob(message, period / 1000.0, time.perf_counter() + start_delay / 1000.0, update_callback)
+        with self._lock:
+            old = self._jobs.get(message.id_)
+            if old is not None:
+                old.active = False
+            self._jobs[message.id_] = job
+            self._push(job)
+        self._wakeup.set()
+
+    def remove(self, can_id: int):
+        """
+        移除周期消息
+
+        :param can_id: CAN 通信id
+        """
+        with self._lock:
+            job = self._jobs.pop(can_id, None)
+            if job is not None:
+                job.active = False
+
+    def update(self, message):
+        """
+        替换周期消息的内容，保持原有的周期和截止时间
+
+        :param message: 与已添加消息 id 相同的 CANMessage 或 CANFrame
+        """
+        with self._lock:
+            job = self._jobs.get(message.id_)
+            if job is None:
+                raise KeyError(message.id_)
+            job.message = message
+
+    def statistics(self) -> dict:
+        """
+        各周期消息的实际周期统计快照
+
+        :return: {CAN id: PeriodStatistics}
+        """
+        with self._lock:
+            return {can_id: job.statistics.copy() for can_id, job in self._jobs.items()}
+
+    def start(self):
+        """
+        启动定时线程
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='ITICANScheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        """
+        停止定时线程
+
+        :param timeout: 等待线程退出的时长 (s)
+        """
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _push(self, job):
+        # 调用方需持有 self._lock；序号用于截止时间相同时保持加入顺序
+        self._sequence += 1
+        heapq.heappush(self._heap, (job.deadline, self._sequence, job))
+
+    def _wait_until(self, deadline):
+        """
+        等待到 deadline，有新消息加入或停止时提前返回 False
+        """
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return True
+            if remaining > self.spin_time:
+                if self._wakeup.wait(remaining - self.spin_time):
+                    self._wakeup.clear()
+                    return False
+            elif self._stop_event.is_set():
+                return False
+
+    def _collect_due(self, now):
+        """
+        取出 now + batch_window 之前到期的消息，并安排各自的下一次截止时间
+        """
+        due = []
+        horizon = now + self.batch_window
+        heap = self._heap
+        with self._lock:
+            while heap and heap[0][0] <= horizon:
+                _, _, job = heapq.heappop(heap)
+                if not job.active:
+                    continue
+                due.append(job)
+                deadline = job.deadline + job.period
+                if deadline <= now:
+                    # 落后超过一个周期：跳过已错过的周期，保持原有相位
+                    missed = int((now - deadline) // job.period) + 1
+                    job.statistics.skipped += missed
+                    deadline += missed * job.period
+                job.deadline = deadline
+                self._push(job)
+        return due
+
+    def _send(self, due):
+        batch = self._batch
+        if batch.capacity < len(due):
+            batch = self._batch = CANMessageBatch(max(len(due), 2 * batch.capacity))
+        batch.clear()
+        jobs = []
+        for job in due:
+            if job.callback is not None:
+                try:
+                    replacement = job.callback(job.message)
+                except Exception as e:
+                    self.callback_errors += 1
+                    self.last_callback_error = e
+                    continue
+                if replacement is not None:
+                    job.message = replacement
+            message = job.message
+            batch.append(message.id_, message.type_, message.extended_, message.data_)
+            jobs.append(job)
+        if not jobs:
+            return
+        items_output = []
+        result = self.channel.set_messages_batch(batch, items_output, self.timeout)
+        sent_at = time.perf_counter()
+        if result != 0:
+            self.last_error = result
+            if result < 0:
+                self.send_errors += 1
+        with self._lock:
+            for job in jobs[:items_output[0] if items_output else 0]:
+                job.statistics._record(sent_at)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            with self._lock:
+                next_deadline = self._heap[0][0] if self._heap else None
+            if next_deadline is None:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            if not self._wait_until(next_deadline):
+                continue
+            due = self._collect_due(time.perf_counter())
+            if due:
+                try:
+                    self._send(due)
+                except Exception:
+                    self.send_errors += 1
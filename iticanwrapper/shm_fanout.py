@@ -0,0 +1,514 @@
+import struct
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+from iticanwrapper.itican_py_wrapper import CANMessageBatch, _MAX_DATA_LENGTH
+from iticanwrapper.receiver import _ReceiveListener
+
+__all__ = ['RECORD_SIZE', 'SharedFrameRing', 'FrameConsumer', 'RecordSpan', 'record_dtype']
+
+_MAGIC = 0x52435449
+_VERSION = 1
+
+# 头部：magic, version, capacity, record_size, max_consumers, closed, claimed, published
+_HEADER = struct.Struct('<6I2Q')
+_HEADER_SIZE = 64
+_CLOSED_OFFSET = 20
+_CLAIMED_OFFSET = 24
+_PUBLISHED_OFFSET = 32
+
+# 消费者表的每项：active, 保留, cursor
+_CONSUMER = struct.Struct('<2IQ')
+
+# 帧记录：id, type, extended, transmitted, data_length, timestamp, data[64]
+_RECORD = struct.Struct('<I4BQ%ds' % _MAX_DATA_LENGTH)
+RECORD_SIZE = _RECORD.size
+"""每条 CAN 消息记录的字节数"""
+
+_U64 = struct.Struct('<Q')
+_U32 = struct.Struct('<I')
+
+_attach_lock = threading.Lock()
+
+
+def record_dtype():
+    """
+    帧记录对应的 numpy 结构化类型（需要安装 numpy）
+
+    :return: numpy.dtype，字段为 id, type, extended, transmitted, data_length, timestamp, data
+    """
+    # numpy 为可选依赖，使用时才导入
+    import numpy as _np
+    return _np.dtype([('id', '<u4'), ('type', 'u1'), ('extended', 'u1'), ('transmitted', 'u1'),
+                      ('data_length', 'u1'), ('timestamp', '<u8'), ('data', 'u1', (_MAX_DATA_LENGTH,))])
+
+
+def _attach_shared_memory(name):
+    """
+    连接已存在的共享内存，不交给 resource_tracker 管理，避免消费者进程退出时删除生产者创建的共享内存
+    """
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        pass
+    # Python 3.13 之前没有 track 参数；连接时也会登记到 resource_tracker，
+    # fork 的子进程与创建者共用同一个 resource_tracker，事后 unregister 会撤销创建者的登记，因此连接期间跳过登记
+    with _attach_lock:
+        register = resource_tracker.register
+
+        def skip_shared_memory(resource_name, resource_type):
+            if resource_type != 'shared_memory':
+                register(resource_name, resource_type)
+
+        resource_tracker.register = skip_shared_memory
+        try:
+            return shared_memory.SharedMemory(name)
+        finally:
+            resource_tracker.register = register
+
+
+class SharedFrameRing(_ReceiveListener):
+    """
+    共享内存中的 CAN 消息环形缓冲区，用于将一个通道的接收数据分发给多个进程
+
+    一个写入者（持有通道的进程，见 attach）按批次写入定长记录，多个消费者进程各自持有读取位置，
+    互不影响；写入者不等待消费者，消费者落后超过容量时检测为溢出并跳到最早的有效记录。
+    共享内存中保存两个 64 位序号：claimed（正在写入的末尾）和 published（已写完的末尾），
+    消费者按 published 读取，读取后再检查 claimed，丢弃可能被同时覆盖的记录。
+
+    创建者负责 close(unlink=True)；其他进程以 name 连接（create=False），退出前 close()。
+    序号的读写依赖 8 字节对齐访问的原子性和 x86 的存储顺序。
+
+    :param name: 共享内存名称；创建时 None，自动生成
+    :param capacity: 容量（记录个数），仅创建时使用
+    :param max_consumers: 最多消费者个数，仅创建时使用
+    :param create: True，创建；False，连接已存在的共享内存
+    """
+
+    _listener = 'write_batch'
+
+    def __init__(self, name: str = None, capacity: int = 65536, max_consumers: int = 16, create: bool = True):
+        if create:
+            if capacity <= 0 or max_consumers <= 0:
+                raise ValueError("capacity and max_consumers must be positive")
+            records_offset = _records_offset(max_consumers)
+            self._shm = shared_memory.SharedMemory(name, create=True, size=records_offset + capacity * RECORD_SIZE)
+            _HEADER.pack_into(self._shm.buf, 0, _MAGIC, _VERSION, capacity, RECORD_SIZE, max_consumers, 0, 0, 0)
+            for index in range(max_consumers):
+                _CONSUMER.pack_into(self._shm.buf, _HEADER_SIZE + index * _CONSUMER.size, 0, 0, 0)
+        else:
+            if name is None:
+                raise ValueError("name is required to attach to an existing ring")
+            self._shm = _attach_shared_memory(name)
+            magic, version, capacity, record_size, max_consumers = _HEADER.unpack_from(self._shm.buf, 0)[:5]
+            if magic != _MAGIC or version != _VERSION or record_size != RECORD_SIZE:
+                self._shm.close()
+                raise ValueError("shared memory %r is not a frame ring" % name)
+        self.name = self._shm.name
+        self.capacity = capacity
+        self.max_consumers = max_consumers
+        self.creator = create
+        self.frames_written = 0
+        """本进程写入的 CAN 消息个数"""
+        self._buf = self._shm.buf
+        self._records_offset = _records_offset(max_consumers)
+        self._records = self._buf[self._records_offset:self._records_offset + capacity * RECORD_SIZE]
+        self._write_lock = threading.Lock()
+        self._channel = None
+        self._array = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ------------------------------------------------------------------ 序号
+
+    @property
+    def published(self) -> int:
+        """已写完的 CAN 消息总数（下一条记录的序号）"""
+        return _U64.unpack_from(self._buf, _PUBLISHED_OFFSET)[0]
+
+    def _claimed(self) -> int:
+        return _U64.unpack_from(self._buf, _CLAIMED_OFFSET)[0]
+
+    @property
+    def closed(self) -> bool:
+        """写入者是否已关闭"""
+        return _U32.unpack_from(self._buf, _CLOSED_OFFSET)[0] != 0
+
+    def consumer_lags(self) -> dict:
+        """
+        各活动消费者落后的记录个数（可能超过容量，即已溢出）
+
+        :return: {消费者序号: 落后个数}
+        """
+        published = self.published
+        lags = {}
+        for index in range(self.max_consumers):
+            active, _, cursor = _CONSUMER.unpack_from(self._buf, _HEADER_SIZE + index * _CONSUMER.size)
+            if active:
+                lags[index] = published - cursor
+        return lags
+
+    def _array_view(self):
+        # 记录区的 numpy 结构化视图（零拷贝），首次使用时创建；没有 numpy 时为 None
+        if self._array is None:
+            try:
+                # numpy 为可选依赖，使用时才导入
+                import numpy as _np
+            except ImportError:
+                self._array = False
+                return None
+            self._array = _np.frombuffer(self._records, dtype=record_dtype(), count=self.capacity)
+        return self._array if self._array is not False else None
+
+    # ------------------------------------------------------------------ 写入
+
+    def write_batch(self, batch: CANMessageBatch) -> int:
+        """
+        写入批次中的全部 CAN 消息；超过容量的部分覆盖最早的记录
+
+        :param batch: CANMessageBatch
+        :return: 写入的 CAN 消息个数
+        """
+        count = batch.count
+        if count == 0:
+            return 0
+        with self._write_lock:
+            done = 0
+            while done < count:
+                length = min(count - done, self.capacity)
+                sequence = self.published
+                _U64.pack_into(self._buf, _CLAIMED_OFFSET, sequence + length)
+                self._write_records(batch, done, length, sequence)
+                _U64.pack_into(self._buf, _PUBLISHED_OFFSET, sequence + length)
+                done += length
+            self.frames_written += count
+        return count
+
+    def _write_records(self, batch, first, length, sequence):
+        array = self._array_view()
+        capacity = self.capacity
+        if array is None:
+            records = self._records
+            ids = batch._id_view
+            types = batch._type_view
+            extended = batch._extended_view
+            transmitted = batch._transmitted_view
+            timestamps = batch._timestamp_view
+            lengths = batch._data_length_view
+            offsets = batch.offsets
+            data = batch._data_view
+            pack_into = _RECORD.pack_into
+            for i in range(first, first + length):
+                pack_into(records, ((sequence + i - first) % capacity) * RECORD_SIZE, ids[i], types[i], extended[i],
+                          transmitted[i], lengths[i], timestamps[i], bytes(data[offsets[i]:offsets[i + 1]]))
+            return
+        # numpy 为可选依赖，使用时才导入
+        import numpy as _np
+        columns = batch.as_numpy()
+        end = first + length
+        start_slot = sequence % capacity
+        # 最多分两段写入（环绕）
+        segments = [(start_slot, first, min(length, capacity - start_slot))]
+        if segments[0][2] < length:
+            segments.append((0, first + segments[0][2], length - segments[0][2]))
+        data_length = columns['data_length'][first:end]
+        matrix = _np.zeros((length, _MAX_DATA_LENGTH), dtype=_np.uint8)
+        matrix[_np.arange(_MAX_DATA_LENGTH) < data_length[:, None]] = \
+            columns['data'][int(columns['offset'][first]):int(columns['offset'][end])]
+        for slot, source, size in segments:
+            target = array[slot:slot + size]
+            part = slice(source, source + size)
+            local = slice(source - first, source - first + size)
+            target['id'] = columns['id'][part]
+            target['type'] = columns['type'][part]
+            target['extended'] = columns['extended'][part]
+            target['transmitted'] = columns['transmitted'][part]
+            target['data_length'] = columns['data_length'][part]
+            target['timestamp'] = columns['timestamp'][part]
+            target['data'] = matrix[local]
+
+    # ------------------------------------------------------------------ 读取
+
+    def consumer(self, index: int, from_start: bool = False):
+        """
+        注册消费者；通常每个工作进程使用不同的 index
+
+        :param index: 消费者序号，0 ~ max_consumers - 1
+        :param from_start: True，从最早的有效记录开始读取；False，只读取之后写入的记录
+        :return: FrameConsumer
+        """
+        return FrameConsumer(self, index, from_start)
+
+    def close(self, unlink: bool = None):
+        """
+        关闭共享内存；写入者关闭时通知消费者不再有新数据。关闭前需释放 RecordSpan 的视图
+
+        :param unlink: 是否删除共享内存；None，创建者删除
+        """
+        self.detach()
+        if self._shm is None:
+            return
+        if self.creator:
+            _U32.pack_into(self._buf, _CLOSED_OFFSET, 1)
+        self._array = None
+        self._records.release()
+        self._buf = None
+        self._shm.close()
+        if unlink if unlink is not None else self.creator:
+            self._shm.unlink()
+        self._shm = None
+
+
+def _records_offset(max_consumers):
+    return (_HEADER_SIZE + max_consumers * _CONSUMER.size + 63) // 64 * 64
+
+
+class RecordSpan:
+    """
+    FrameConsumer.read_records 的结果：共享内存中连续序号的记录（零拷贝），环绕时分为两段
+
+    记录可能在处理期间被写入者覆盖，处理完成后应调用 valid 确认。
+
+    :param ring: SharedFrameRing
+    :param start: 首条记录的序号
+    :param count: 记录个数
+    """
+
+    def __init__(self, ring: SharedFrameRing, start: int, count: int):
+        self.ring = ring
+        self.start = start
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def _segments(self):
+        capacity = self.ring.capacity
+        slot = self.start % capacity
+        first = min(self.count, capacity - slot)
+        segments = [(slot, first)]
+        if first < self.count:
+            segments.append((0, self.count - first))
+        return segments
+
+    @property
+    def segments(self) -> list:
+        """
+        记录的字节视图（memoryview，每条 RECORD_SIZE 字节，布局见 record_dtype），最多两段
+        """
+        records = self.ring._records
+        return [records[slot * RECORD_SIZE:(slot + size) * RECORD_SIZE] for slot, size in self._segments()]
+
+    @property
+    def arrays(self) -> list:
+        """
+        记录的 numpy 结构化数组视图（零拷贝，需要安装 numpy），最多两段
+        """
+        array = self.ring._array_view()
+        if array is None:
+            raise ImportError("numpy is required for record arrays")
+        return [array[slot:slot + size] for slot, size in self._segments()]
+
+    def valid(self) -> bool:
+        """
+        检查这些记录是否仍未被覆盖
+
+        :return: True，读取到的内容有效
+        """
+        return self.ring._claimed() - self.ring.capacity <= self.start
+
+
+class FrameConsumer:
+    """
+    SharedFrameRing 的一个消费者，读取位置保存在共享内存中，写入者和其他进程可据此查看落后情况
+
+    通常通过 SharedFrameRing.consumer 创建。不是线程安全的，每个线程（进程）使用一个消费者。
+
+    :param ring: SharedFrameRing
+    :param index: 消费者序号
+    :param from_start: True，从最早的有效记录开始读取；False，只读取之后写入的记录
+    :param poll_interval: 等待新数据时的轮询间隔 (ms)
+    """
+
+    def __init__(self, ring: SharedFrameRing, index: int, from_start: bool = False, poll_interval: float = 0.5):
+        if not 0 <= index < ring.max_consumers:
+            raise ValueError("consumer index out of range")
+        self.ring = ring
+        self.index = index
+        self.poll_interval = poll_interval / 1000.0
+        self.overruns = 0
+        """检测到溢出（落后超过容量）的次数"""
+        self.frames_lost = 0
+        """因溢出跳过的 CAN 消息个数"""
+        self.frames_read = 0
+        """读取的 CAN 消息个数"""
+        self._entry = _HEADER_SIZE + index * _CONSUMER.size
+        published = ring.published
+        self._cursor = max(published - ring.capacity, 0) if from_start else published
+        _CONSUMER.pack_into(ring._buf, self._entry, 1, 0, self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def cursor(self) -> int:
+        """下一条读取的记录序号"""
+        return self._cursor
+
+    @property
+    def lag(self) -> int:
+        """落后的记录个数（超过容量时下次读取将检测为溢出）"""
+        return self.ring.published - self._cursor
+
+    def close(self):
+        """
+        注销消费者
+        """
+        if self.ring._buf is not None:
+            _CONSUMER.pack_into(self.ring._buf, self._entry, 0, 0, self._cursor)
+
+    def _set_cursor(self, cursor):
+        self._cursor = cursor
+        _U64.pack_into(self.ring._buf, self._entry + 8, cursor)
+
+    def _skip_overrun(self, oldest):
+        # 落后超过容量：跳到最早的有效记录
+        if oldest > self._cursor:
+            self.overruns += 1
+            self.frames_lost += oldest - self._cursor
+            self._set_cursor(oldest)
+
+    def _wait(self, timeout) -> int:
+        """
+        等待新数据；timeout 单位为毫秒，负数一直等待
+
+        :return: published；没有新数据时等于当前 cursor
+        """
+        ring = self.ring
+        published = ring.published
+        if published > self._cursor or timeout == 0:
+            return published
+        deadline = None if timeout < 0 else time.monotonic() + timeout / 1000.0
+        while published <= self._cursor and not ring.closed:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(self.poll_interval)
+            published = ring.published
+        return published
+
+    def read_records(self, max_items: int = -1, timeout: int = 0) -> RecordSpan:
+        """
+        零拷贝读取：返回共享内存中记录的视图并前移读取位置
+
+        :param max_items: 最多读取个数；负数，读取全部可用记录
+        :param timeout: 没有新数据时的等待时长 (ms)；0，不等待；负数，一直等待
+        :return: RecordSpan；处理完后用 RecordSpan.valid 确认未被覆盖
+        """
+        ring = self.ring
+        published = self._wait(timeout)
+        self._skip_overrun(ring._claimed() - ring.capacity)
+        count = published - self._cursor
+        if count < 0:
+            count = 0
+        if 0 <= max_items < count:
+            count = max_items
+        span = RecordSpan(ring, self._cursor, count)
+        self._set_cursor(self._cursor + count)
+        self.frames_read += count
+        return span
+
+    def read_batch(self, batch: CANMessageBatch, max_items: int = -1, timeout: int = 0) -> int:
+        """
+        读取记录到批次中（覆盖批次原有内容），只拷贝一次
+
+        :param batch: CANMessageBatch
+        :param max_items: 最多读取个数；负数，最多 batch.capacity 条
+        :param timeout: 没有新数据时的等待时长 (ms)；0，不等待；负数，一直等待
+        :return: 读取的 CAN 消息个数
+        """
+        if max_items < 0 or max_items > batch.capacity:
+            max_items = batch.capacity
+        ring = self.ring
+        published = self._wait(timeout)
+        while True:
+            self._skip_overrun(ring._claimed() - ring.capacity)
+            count = min(published - self._cursor, max_items)
+            if count <= 0:
+                batch._set_count(0)
+                return 0
+            span = RecordSpan(ring, self._cursor, count)
+            self._copy(span, batch)
+            if span.valid():
+                break
+            # 拷贝期间被覆盖，跳过被覆盖的部分后重新读取
+            published = ring.published
+        self._set_cursor(self._cursor + count)
+        self.frames_read += count
+        return count
+
+    def _copy(self, span, batch):
+        count = span.count
+        if self.ring._array_view() is None:
+            unpack_from = _RECORD.unpack_from
+            ids = batch.id_array
+            types = batch.type_array
+            extended = batch.extended_array
+            transmitted = batch.transmitted_array
+            timestamps = batch.timestamp_array
+            lengths = batch.data_length_array
+            data = batch._data_view
+            index = 0
+            offset = 0
+            for segment in span.segments:
+                for position in range(0, len(segment), RECORD_SIZE):
+                    can_id, can_type, can_extended, can_transmitted, length, timestamp, payload = \
+                        unpack_from(segment, position)
+                    ids[index] = can_id
+                    types[index] = can_type
+                    extended[index] = can_extended
+                    transmitted[index] = can_transmitted
+                    timestamps[index] = timestamp
+                    lengths[index] = length
+                    data[offset:offset + length] = payload[:length]
+                    offset += length
+                    index += 1
+            batch._set_count(count)
+            return
+        # numpy 为可选依赖，使用时才导入
+        import numpy as _np
+        arrays = span.arrays
+        records = arrays[0] if len(arrays) == 1 else _np.concatenate(arrays)
+        _np.frombuffer(batch.id_array, dtype=_np.uint32, count=count)[:] = records['id']
+        _np.frombuffer(batch.type_array, dtype=_np.uint8, count=count)[:] = records['type']
+        _np.frombuffer(batch.extended_array, dtype=_np.uint8, count=count)[:] = records['extended']
+        _np.frombuffer(batch.transmitted_array, dtype=_np.uint8, count=count)[:] = records['transmitted']
+        _np.frombuffer(batch.timestamp_array, dtype=_np.uint64, count=count)[:] = records['timestamp']
+        lengths = records['data_length']
+        _np.frombuffer(batch.data_length_array, dtype=_np.uint8, count=count)[:] = lengths
+        payload = records['data'][_np.arange(_MAX_DATA_LENGTH) < lengths[:, None]]
+        _np.frombuffer(batch.data_array, dtype=_np.uint8, count=len(payload))[:] = payload
+        batch._set_count(count)
+
+    def frames(self, timeout: int = -1):
+        """
+        逐条读取 CAN 消息的生成器，写入者关闭且数据读完后结束
+
+        :param timeout: 单次等待时长 (ms)；超时后结束；负数，一直等待
+        :return: CANFrame 生成器
+        """
+        batch = CANMessageBatch()
+        while True:
+            if not self.read_batch(batch, -1, timeout):
+                if timeout >= 0 or self.ring.closed:
+                    return
+                continue
+            for frame in batch.to_frames():
+                yield frame
@@ -0,0 +1,312 @@
+import heapq
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from enum import Enum
+
+from iticanwrapper.errors import ITICANTimeoutError, error_for
+from iticanwrapper.itican_py_wrapper import CANMessage, CANMessageBatch, _MAX_DATA_LENGTH
+
+__all__ = ['BackpressurePolicy', 'TransmitQueue', 'arbitration_key']
+
+
+class BackpressurePolicy(Enum):
+    BLOCK = 0
+    """
+    队列已满时生产者等待，直到有空位或超时（超时抛出 queue.Full）
+    """
+    DROP = 1
+    """
+    队列已满时丢弃新提交的 CAN 消息，put 返回 None
+    """
+    ERROR = 2
+    """
+    队列已满时立即抛出 queue.Full
+    """
+
+
+def _set_result(future: Future):
+    # Future 可能已被调用方取消或设置，此时忽略，不能让发送线程因 InvalidStateError 退出
+    try:
+        future.set_result(None)
+    except InvalidStateError:
+        pass
+
+
+def _set_exception(future: Future, error: BaseException):
+    try:
+        future.set_exception(error)
+    except InvalidStateError:
+        pass
+
+
+def arbitration_key(can_id: int, can_extended: int) -> int:
+    """
+    CAN 总线仲裁优先级，数值越小优先级越高
+
+    先比较 11 位基本 id；基本 id 相同时标准帧优先于扩展帧（IDE 位），最后比较扩展帧的低 18 位。
+
+    :param can_id: CAN 通信id
+    :param can_extended: 是否为扩展帧
+    :return: 排序键
+    """
+    if can_extended:
+        return (((can_id >> 18) & 0x7FF) << 19) | (1 << 18) | (can_id & 0x3FFFF)
+    return (can_id & 0x7FF) << 19
+
+
+class TransmitQueue:
+    """
+    通道发送队列
+
+    多个生产者线程将 CAN 消息放入有界队列，由一个发送线程按总线仲裁优先级（id 越小越先）取出，
+    合并为一次 setMessages 批量调用发送；同一 id 的消息保持提交顺序。每条消息对应一个
+    concurrent.futures.Future，发送成功后结果为 None，失败时为 errors.ITICANError；
+    发送线程取出之前可以取消 Future，取消的消息不会发送。
+
+    设备发送队列已满等原因导致部分消息未发送时，剩余消息留在队列中，间隔 retry_interval 后重试；
+    消息提交后超过 retry_timeout 仍未发送成功时，以最近一次的错误码结束其 Future。
+
+    通常通过 ITICANChannel.start_transmitter 创建。
+
+    :param channel: ITICANChannel，已开启的通道
+    :param capacity: 队列容量（CAN 消息个数），不含发送中的批次
+    :param policy: BackpressurePolicy，队列已满时的处理策略
+    :param batch_size: 单次 setMessages 的最大个数
+    :param linger: 取出批次前等待更多消息到达的时长 (ms)；0，不等待
+    :param retry_interval: 未全部发送时重试的间隔 (ms)
+    :param retry_timeout: 消息提交后最长的发送时限 (ms)；负数，一直重试
+    :param send_timeout: setMessages 的超时参数
+    """
+
+    def __init__(self, channel, capacity: int = 4096, policy: BackpressurePolicy = BackpressurePolicy.BLOCK,
+                 batch_size: int = 256, linger: float = 0, retry_interval: float = 1, retry_timeout: float = 1000,
+                 send_timeout: int = 0):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.channel = channel
+        self.capacity = capacity
+        self.policy = policy
+        self.batch_size = batch_size
+        self.linger = linger / 1000.0
+        self.retry_interval = retry_interval / 1000.0
+        self.retry_timeout = retry_timeout / 1000.0
+        self.send_timeout = send_timeout
+        self.frames_sent = 0
+        """发送成功的 CAN 消息个数"""
+        self.frames_dropped = 0
+        """DROP 策略下因队列已满被丢弃的 CAN 消息个数"""
+        self.frames_failed = 0
+        """超过发送时限而失败的 CAN 消息个数"""
+        self.batches_sent = 0
+        """setMessages 调用次数"""
+        self.retries = 0
+        """未全部发送而重试的次数"""
+        self.last_error = 0
+        """setMessages 最近一次非零返回值"""
+        self._heap = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._idle = threading.Condition(self._lock)
+        self._in_flight = 0
+        self._closed = False
+        self._batch = CANMessageBatch(batch_size)
+        self._thread = threading.Thread(target=self._run, name='ITICANTransmitter', daemon=True)
+
+    def __len__(self):
+        return len(self._heap)
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, drain: bool = True, timeout: float = 1.0):
+        """
+        停止发送线程
+
+        :param drain: True，先等待队列中的消息发送完毕（最长 timeout）；False，立即停止
+        :param timeout: 等待时长 (s)
+        """
+        if drain:
+            self.flush(timeout)
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        self._cancel_pending()
+
+    def _cancel_pending(self):
+        with self._lock:
+            entries = self._heap
+            self._heap = []
+            self._idle.notify_all()
+        for entry in entries:
+            # 重试中的消息已处于运行状态，不能取消
+            if not entry[3].cancel():
+                _set_exception(entry[3], RuntimeError("transmit queue is stopped"))
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        等待队列中的消息全部发送完毕（成功或失败）
+
+        :param timeout: 等待时长 (s)；None，一直等待
+        :return: 是否已全部完成
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while self._heap or self._in_flight:
+                if self._closed and not self._thread.is_alive():
+                    return False
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining if remaining is not None else 0.1)
+        return True
+
+    def _wait_space(self, count: int, timeout):
+        # 调用方需持有 self._lock；返回 False 表示队列空间不足
+        if len(self._heap) + count <= self.capacity:
+            return True
+        if self.policy != BackpressurePolicy.BLOCK:
+            return False
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while len(self._heap) + count > self.capacity and not self._closed:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            self._not_full.wait(remaining)
+        return not self._closed
+
+    def put(self, message: CANMessage, timeout: float = None):
+        """
+        提交一条 CAN 消息
+
+        :param message: CANMessage 或 CANFrame
+        :param timeout: BLOCK 策略下队列已满时的等待时长 (s)；None，一直等待
+        :return: concurrent.futures.Future；DROP 策略下被丢弃时为 None
+        :raises queue.Full: ERROR 策略下队列已满，或 BLOCK 策略下等待超时
+        """
+        return self._put((message,), timeout)[0]
+
+    def put_many(self, messages: list, timeout: float = None) -> list:
+        """
+        提交多条 CAN 消息，整体占用队列空间（全部放入或全部按策略处理）
+
+        :param messages: CANMessage 或 CANFrame 列表，数量不能超过 capacity
+        :param timeout: BLOCK 策略下队列已满时的等待时长 (s)；None，一直等待
+        :return: 与 messages 对应的 Future 列表；DROP 策略下被丢弃时各项为 None
+        :raises queue.Full: ERROR 策略下队列已满，或 BLOCK 策略下等待超时
+        """
+        if len(messages) > self.capacity:
+            raise ValueError("more messages than queue capacity")
+        return self._put(messages, timeout)
+
+    def _put(self, messages, timeout):
+        now = time.monotonic()
+        entries = []
+        for message in messages:
+            if len(message.data_) > _MAX_DATA_LENGTH:
+                raise ValueError("data length exceeds %d bytes" % _MAX_DATA_LENGTH)
+            entries.append([arbitration_key(message.id_, message.extended_), 0, message, Future(), now])
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("transmit queue is stopped")
+            if not self._wait_space(len(entries), timeout):
+                if self._closed:
+                    raise RuntimeError("transmit queue is stopped")
+                if self.policy == BackpressurePolicy.DROP:
+                    self.frames_dropped += len(entries)
+                    return [None] * len(entries)
+                raise queue.Full
+            heap = self._heap
+            for entry in entries:
+                entry[1] = next(self._sequence)
+                heapq.heappush(heap, entry)
+            self._not_empty.notify()
+        return [entry[3] for entry in entries]
+
+    def _take(self):
+        """
+        取出一批待发送的消息，跳过调用方已取消的消息；队列关闭且为空时返回 None
+        """
+        while True:
+            with self._lock:
+                while not self._heap or self._closed:
+                    if self._closed:
+                        return None
+                    self._not_empty.wait(0.1)
+            if self.linger and len(self._heap) < self.batch_size:
+                time.sleep(self.linger)
+            with self._lock:
+                heap = self._heap
+                entries = []
+                while heap and len(entries) < self.batch_size:
+                    entry = heapq.heappop(heap)
+                    # 重试的消息已处于运行状态；其余消息在此转为运行状态，之后不能再被取消
+                    if entry[3].running() or entry[3].set_running_or_notify_cancel():
+                        entries.append(entry)
+                self._in_flight = len(entries)
+                self._not_full.notify_all()
+                if entries:
+                    return entries
+                if not heap:
+                    self._idle.notify_all()
+
+    def _run(self):
+        batch = self._batch
+        items_output = []
+        while True:
+            entries = self._take()
+            if entries is None:
+                return
+            batch.clear()
+            for entry in entries:
+                message = entry[2]
+                batch.append(message.id_, message.type_, message.extended_, message.data_)
+            try:
+                result = self.channel.set_messages_batch(batch, items_output, self.send_timeout)
+                sent = items_output[0] if items_output else 0
+            except Exception as e:
+                result, sent = None, 0
+                for entry in entries:
+                    _set_exception(entry[3], e)
+                entries = []
+            self.batches_sent += 1
+            if result:
+                self.last_error = result
+            for entry in entries[:sent]:
+                _set_result(entry[3])
+            self.frames_sent += sent
+            remaining = entries[sent:]
+            failed = []
+            if remaining:
+                self.retries += 1
+                if self.retry_timeout >= 0:
+                    expired = time.monotonic() - self.retry_timeout
+                    failed = [entry for entry in remaining if entry[4] <= expired]
+                    remaining = [entry for entry in remaining if entry[4] > expired]
+                if failed:
+                    if result is not None and result < 0:
+                        error = error_for(result, 'setMessages', self.channel._dll)
+                    else:
+                        error = ITICANTimeoutError(0, 'setMessages', 'message was not sent within retry_timeout')
+                    for entry in failed:
+                        _set_exception(entry[3], error)
+                    self.frames_failed += len(failed)
+            with self._lock:
+                for entry in remaining:
+                    heapq.heappush(self._heap, entry)
+                self._in_flight = 0
+                if not self._heap:
+                    self._idle.notify_all()
+            if remaining:
+                time.sleep(self.retry_interval)
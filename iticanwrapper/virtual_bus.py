@@ -0,0 +1,577 @@
+import ctypes
+import threading
+import time
+from collections import deque
+
+from iticanwrapper.backend import PythonBackend
+from iticanwrapper.bittiming import decode_baud_rate, decode_fd_baud_rate, frame_duration
+from iticanwrapper.errors import ChannelNotFoundError, ChannelStateError, InvalidParameterError, ITICANTimeoutError, \
+    NotSupportedError, RxOverflowWarning, TxQueueFullError
+
+__all__ = ['VirtualBusBackend',
+           'ERROR_NONE', 'ERROR_INTERNAL', 'ERROR_CHANNEL_NOT_FOUND', 'ERROR_INVALID_HANDLE', 'ERROR_NOT_OPEN',
+           'ERROR_ALREADY_OPEN', 'ERROR_INVALID_PARAMETER', 'ERROR_NOT_SUPPORTED', 'ERROR_TIMEOUT',
+           'ERROR_TX_QUEUE_FULL', 'ERROR_LISTEN_ONLY', 'WARNING_RX_OVERFLOW']
+
+ERROR_NONE = 0
+ERROR_INTERNAL = -1
+ERROR_CHANNEL_NOT_FOUND = -2
+ERROR_INVALID_HANDLE = -3
+ERROR_NOT_OPEN = -4
+ERROR_ALREADY_OPEN = -5
+ERROR_INVALID_PARAMETER = -6
+ERROR_NOT_SUPPORTED = -7
+ERROR_TIMEOUT = -8
+ERROR_TX_QUEUE_FULL = -9
+ERROR_LISTEN_ONLY = -10
+WARNING_RX_OVERFLOW = 1
+"""接收队列已溢出，部分 CAN 消息被丢弃（警告，本次调用仍然成功）"""
+
+_error_descriptions = {
+    ERROR_NONE: 'no error',
+    ERROR_INTERNAL: 'virtual bus internal error',
+    ERROR_CHANNEL_NOT_FOUND: 'channel not found',
+    ERROR_INVALID_HANDLE: 'invalid channel handle',
+    ERROR_NOT_OPEN: 'channel is not open',
+    ERROR_ALREADY_OPEN: 'channel is already open',
+    ERROR_INVALID_PARAMETER: 'invalid parameter',
+    ERROR_NOT_SUPPORTED: 'function not supported by virtual bus',
+    ERROR_TIMEOUT: 'timeout',
+    ERROR_TX_QUEUE_FULL: 'transmit queue is full',
+    ERROR_LISTEN_ONLY: 'channel is in listen only mode',
+    WARNING_RX_OVERFLOW: 'receive queue overflow, messages were dropped',
+}
+
+_FD_TYPE_FLAG = 16
+
+
+class _VirtualChannel:
+
+    def __init__(self, handle, name, baud_rate, fd_baud_rate):
+        self.handle = handle
+        self.name = name
+        self.opened = False
+        self.open_type = 0
+        self.open_mode = 0
+        self.raw_baud_rate = baud_rate
+        self.raw_fd_baud_rate = fd_baud_rate
+        self.baud_rate = float(baud_rate)
+        self.fd_baud_rate = float(fd_baud_rate)
+        self.echo = False
+        self.termination = False
+        self.blinking = False
+        self.bus_error_report = True
+        self.tx_mode = 0
+        self.rx_queue = deque()
+        self.tx_pending = deque()
+        self.rx_overflow = False
+        self.rx_dropped = 0
+
+
+class VirtualBusBackend(PythonBackend):
+    """
+    进程内虚拟总线后端
+
+    模拟同一条总线上的多个通道：一个通道发送的 CAN 消息会被其余已开启的通道接收，
+    开启回显时发送方也会收到（transmitted=1）。可配置接收/发送队列深度，
+    以及是否按波特率模拟帧在总线上的传输时间；并可通过 inject_error 注入错误码。
+
+    :param channel_count: 通道个数
+    :param device_name: 设备名，通道索引名为 ``<device_name>-<序号>``
+    :param baud_rate: 默认仲裁段波特率
+    :param fd_baud_rate: 默认数据段波特率
+    :param rx_queue_depth: 每个通道接收队列深度，队列满时丢弃新到达的消息
+    :param tx_queue_depth: 每个通道发送队列深度，仅在 bit_timing 为 True 时生效
+    :param bit_timing: True，按波特率模拟传输时间，消息在传输完成后才能被接收；False，立即送达
+    """
+
+    name = 'virtual'
+
+    internal_error = ERROR_INTERNAL
+
+    not_implemented_error = ERROR_NOT_SUPPORTED
+
+    error_classes = {
+        ERROR_CHANNEL_NOT_FOUND: ChannelNotFoundError,
+        ERROR_INVALID_HANDLE: ChannelStateError,
+        ERROR_NOT_OPEN: ChannelStateError,
+        ERROR_ALREADY_OPEN: ChannelStateError,
+        ERROR_INVALID_PARAMETER: InvalidParameterError,
+        ERROR_NOT_SUPPORTED: NotSupportedError,
+        ERROR_TIMEOUT: ITICANTimeoutError,
+        ERROR_TX_QUEUE_FULL: TxQueueFullError,
+        ERROR_LISTEN_ONLY: ChannelStateError,
+        WARNING_RX_OVERFLOW: RxOverflowWarning,
+    }
+
+    def __init__(self, channel_count: int = 2, device_name: str = 'VCAN', baud_rate: int = 500000,
+                 fd_baud_rate: int = 2000000, rx_queue_depth: int = 65536, tx_queue_depth: int = 256,
+                 bit_timing: bool = False):
+        super().__init__()
+        self.device_name = device_name
+        self.rx_queue_depth = rx_queue_depth
+        self.tx_queue_depth = tx_queue_depth
+        self.bit_timing = bit_timing
+        self._lock = threading.Condition()
+        self._channels = [_VirtualChannel(i + 1, '%s-%d' % (device_name, i), baud_rate, fd_baud_rate)
+                          for i in range(channel_count)]
+        self._bus_free_at = 0.0
+        self._start_time = time.perf_counter()
+        self._injected_errors = {}
+
+    # ------------------------------------------------------------------ 模拟控制
+
+    def inject_error(self, function_name: str, error_code: int, count: int = 1):
+        """
+        注入错误：之后 count 次调用 function_name 时直接返回 error_code，不执行操作
+
+        :param function_name: canwrapper.h 中的函数名，例如 'setMessage'
+        :param error_code: 返回的错误码
+        :param count: 生效次数；负数，一直生效直到 clear_errors
+        """
+        if function_name not in self.function_names:
+            raise ValueError("unknown function: %s" % function_name)
+        with self._lock:
+            self._injected_errors[function_name] = [error_code, count]
+
+    def clear_errors(self):
+        """
+        清除所有注入的错误
+        """
+        with self._lock:
+            self._injected_errors.clear()
+
+    def dropped_count(self, handle: int) -> int:
+        """
+        读取通道因接收队列溢出丢弃的消息个数
+
+        :param handle: 通道句柄
+        :return: 丢弃个数
+        """
+        return self._channels[handle - 1].rx_dropped
+
+    # ------------------------------------------------------------------ 内部工具
+
+    def _now(self):
+        return time.perf_counter()
+
+    def _timestamp(self, at):
+        return int((at - self._start_time) * 1000000)
+
+    def _injected(self, function_name):
+        entry = self._injected_errors.get(function_name)
+        if entry is None:
+            return None
+        code, count = entry
+        if count > 0:
+            count -= 1
+            if count == 0:
+                del self._injected_errors[function_name]
+            else:
+                entry[1] = count
+        return code
+
+    def _unsupported(self, function_name):
+        # 不支持的函数返回 ERROR_NOT_SUPPORTED，注入的错误码（包括 ERROR_NONE）优先
+        with self._lock:
+            code = self._injected(function_name)
+        return code if code is not None else ERROR_NOT_SUPPORTED
+
+    def _channel(self, handle):
+        if handle is None or not 0 < handle <= len(self._channels):
+            return None
+        return self._channels[handle - 1]
+
+    def _begin(self, function_name, handle, need_open=True):
+        """
+        返回 (错误码, 通道)；错误码不为 None 时直接返回
+        """
+        code = self._injected(function_name)
+        if code is not None:
+            return code, None
+        channel = self._channel(handle)
+        if channel is None:
+            return ERROR_INVALID_HANDLE, None
+        if need_open and not channel.opened:
+            return ERROR_NOT_OPEN, None
+        return None, channel
+
+    @staticmethod
+    def _write_string(address, text):
+        raw = text.encode('utf-8') + b'\0'
+        ctypes.memmove(address, raw, len(raw))
+
+    @staticmethod
+    def _deadline(now, timeout):
+        if timeout < 0:
+            return None
+        return now + timeout / 1000.0
+
+    def _transmit(self, channel, can_id, message_type, extended, payload, now):
+        """
+        在持有锁的情况下将一帧放到总线上，返回错误码
+        """
+        if channel.open_mode == 1:
+            return ERROR_LISTEN_ONLY
+        if len(payload) > 64 or (not message_type & _FD_TYPE_FLAG and len(payload) > 8):
+            return ERROR_INVALID_PARAMETER
+        due = now
+        if self.bit_timing:
+            pending = channel.tx_pending
+            while pending and pending[0] <= now:
+                pending.popleft()
+            if len(pending) >= self.tx_queue_depth:
+                return ERROR_TX_QUEUE_FULL
+            start = max(now, self._bus_free_at)
+            due = start + frame_duration(message_type, extended, can_id, payload, channel.baud_rate,
+                                         channel.fd_baud_rate)
+            self._bus_free_at = due
+            pending.append(due)
+        timestamp = self._timestamp(due)
+        if channel.open_mode == 2:
+            receivers = (channel,)
+        else:
+            receivers = self._channels
+        for receiver in receivers:
+            if not receiver.opened:
+                continue
+            if receiver is channel:
+                if channel.open_mode != 2 and not channel.echo:
+                    continue
+                transmitted = 1
+            else:
+                transmitted = 0
+            if len(receiver.rx_queue) >= self.rx_queue_depth:
+                receiver.rx_overflow = True
+                receiver.rx_dropped += 1
+                continue
+            receiver.rx_queue.append((due, can_id, message_type, extended, transmitted, timestamp, payload))
+        self._lock.notify_all()
+        return ERROR_NONE
+
+    def _transmit_wait(self, channel, can_id, message_type, extended, payload, timeout):
+        now = self._now()
+        deadline = self._deadline(now, timeout)
+        while True:
+            result = self._transmit(channel, can_id, message_type, extended, payload, now)
+            if result != ERROR_TX_QUEUE_FULL or timeout == 0:
+                return result
+            # 等待最早的一帧发送完成
+            wake = channel.tx_pending[0]
+            if deadline is not None:
+                if wake > deadline:
+                    return ERROR_TX_QUEUE_FULL
+            self._lock.wait(max(wake - self._now(), 0))
+            now = self._now()
+
+    def _available(self, channel, now):
+        """
+        在持有锁的情况下返回已传输完成、可被接收的消息个数
+        """
+        queue = channel.rx_queue
+        if not self.bit_timing:
+            return len(queue)
+        count = 0
+        for entry in queue:
+            if entry[0] > now:
+                break
+            count += 1
+        return count
+
+    def _receive_wait(self, channel, items, timeout):
+        """
+        在持有锁的情况下等待至少 items 条消息可接收，返回 (可接收个数, 是否超时)
+        """
+        now = self._now()
+        deadline = self._deadline(now, timeout)
+        while True:
+            available = self._available(channel, now)
+            if available >= items or timeout == 0 or not channel.opened:
+                return available, available < items
+            wake = deadline
+            if self.bit_timing and len(channel.rx_queue) > available:
+                due = channel.rx_queue[available][0]
+                wake = due if wake is None else min(wake, due)
+            if wake is None:
+                self._lock.wait()
+            else:
+                remaining = wake - self._now()
+                if remaining <= 0 and wake == deadline:
+                    return available, True
+                self._lock.wait(max(remaining, 0))
+            now = self._now()
+
+    def _overflow_result(self, channel):
+        if channel.rx_overflow:
+            channel.rx_overflow = False
+            return WARNING_RX_OVERFLOW
+        return ERROR_NONE
+
+    # ------------------------------------------------------------------ canwrapper.h
+
+    def _findAllChannels(self, address, chn_count):
+        with self._lock:
+            code = self._injected('findAllChannels')
+            if code is not None:
+                return code
+            self._write_string(address, '\t'.join(channel.name for channel in self._channels))
+            chn_count[0] = len(self._channels)
+        return ERROR_NONE
+
+    def _getLastError(self, address, event_num):
+        self._write_string(address, _error_descriptions.get(event_num[0], 'unknown error code'))
+        return ERROR_NONE
+
+    def _getChannel(self, channel_ptr, device_address, chn_index):
+        device = ctypes.string_at(device_address).decode('utf-8')
+        with self._lock:
+            code = self._injected('getChannel')
+            if code is not None:
+                return code
+            for channel in self._channels:
+                if channel.name == device:
+                    channel_ptr[0] = channel.handle
+                    return ERROR_NONE
+            if device == self.device_name and 0 <= chn_index < len(self._channels):
+                channel_ptr[0] = self._channels[chn_index].handle
+                return ERROR_NONE
+        return ERROR_CHANNEL_NOT_FOUND
+
+    def _openChannel(self, handle, open_type, open_mode):
+        with self._lock:
+            code, channel = self._begin('openChannel', handle, need_open=False)
+            if code is not None:
+                return code
+            if channel.opened:
+                return ERROR_ALREADY_OPEN
+            if not 0 <= open_type <= 3 or not 0 <= open_mode <= 2:
+                return ERROR_INVALID_PARAMETER
+            channel.opened = True
+            channel.open_type = open_type
+            channel.open_mode = open_mode
+            channel.rx_queue.clear()
+            channel.tx_pending.clear()
+            channel.rx_overflow = False
+        return ERROR_NONE
+
+    def _closeChannel(self, handle):
+        with self._lock:
+            code, channel = self._begin('closeChannel', handle)
+            if code is not None:
+                return code
+            channel.opened = False
+            channel.rx_queue.clear()
+            channel.tx_pending.clear()
+            self._lock.notify_all()
+        return ERROR_NONE
+
+    def _getChannelName(self, handle, address):
+        with self._lock:
+            code, channel = self._begin('getChannelName', handle, need_open=False)
+            if code is not None:
+                return code
+            self._write_string(address, channel.name)
+        return ERROR_NONE
+
+    def _set_attribute(self, function_name, handle, attribute, value, need_open=True):
+        with self._lock:
+            code, channel = self._begin(function_name, handle, need_open)
+            if code is not None:
+                return code
+            setattr(channel, attribute, value)
+        return ERROR_NONE
+
+    def _get_attribute(self, function_name, handle, attribute, output, need_open=True):
+        with self._lock:
+            code, channel = self._begin(function_name, handle, need_open)
+            if code is not None:
+                return code
+            output[0] = getattr(channel, attribute)
+        return ERROR_NONE
+
+    def _setBaudRate(self, handle, baud_rate):
+        if baud_rate == 0:
+            return ERROR_INVALID_PARAMETER
+        with self._lock:
+            code, channel = self._begin('setBaudRate', handle)
+            if code is not None:
+                return code
+            channel.baud_rate = decode_baud_rate(baud_rate)
+            channel.raw_baud_rate = baud_rate
+        return ERROR_NONE
+
+    def _getBaudRate(self, handle, baud_rate):
+        with self._lock:
+            code, channel = self._begin('getBaudRate', handle)
+            if code is not None:
+                return code
+            baud_rate[0] = channel.raw_baud_rate
+        return ERROR_NONE
+
+    def _setFdBaudRate(self, handle, baud_rate):
+        if baud_rate == 0:
+            return ERROR_INVALID_PARAMETER
+        with self._lock:
+            code, channel = self._begin('setFdBaudRate', handle)
+            if code is not None:
+                return code
+            channel.fd_baud_rate = decode_fd_baud_rate(baud_rate)
+            channel.raw_fd_baud_rate = baud_rate
+        return ERROR_NONE
+
+    def _getFdBaudRate(self, handle, baud_rate):
+        with self._lock:
+            code, channel = self._begin('getFdBaudRate', handle)
+            if code is not None:
+                return code
+            baud_rate[0] = channel.raw_fd_baud_rate
+        return ERROR_NONE
+
+    def _setCustomBaudRate(self, handle, address):
+        return self._unsupported('setCustomBaudRate')
+
+    def _getCustomBaudRate(self, handle, address):
+        with self._lock:
+            code, channel = self._begin('getCustomBaudRate', handle)
+            if code is not None:
+                return code
+            self._write_string(address, '%x,%x' % (channel.raw_baud_rate, channel.raw_fd_baud_rate))
+        return ERROR_NONE
+
+    def _setMessage(self, handle, can_id, message_type, extended, data, data_length, timeout):
+        payload = ctypes.string_at(data, data_length) if data_length else b''
+        with self._lock:
+            code, channel = self._begin('setMessage', handle)
+            if code is not None:
+                return code
+            return self._transmit_wait(channel, can_id, message_type, extended, payload, timeout)
+
+    def _setMessages(self, handle, ids, types, extended, data, data_length, items, timeout):
+        total = items[0]
+        with self._lock:
+            code, channel = self._begin('setMessages', handle)
+            if code is not None:
+                items[0] = 0
+                return code
+            address = ctypes.cast(data, ctypes.c_void_p).value
+            offset = 0
+            sent = 0
+            result = ERROR_NONE
+            for i in range(total):
+                length = data_length[i]
+                payload = ctypes.string_at(address + offset, length) if length else b''
+                offset += length
+                result = self._transmit_wait(channel, ids[i], types[i], extended[i], payload, timeout)
+                if result < 0:
+                    break
+                sent += 1
+            items[0] = sent
+        return result
+
+    def _getMessageCount(self, handle, count):
+        with self._lock:
+            code, channel = self._begin('getMessageCount', handle)
+            if code is not None:
+                return code
+            count[0] = self._available(channel, self._now())
+        return ERROR_NONE
+
+    def _getMessage(self, handle, can_id, message_type, extended, transmitted, timestamp, data, data_length,
+                    timeout):
+        with self._lock:
+            code, channel = self._begin('getMessage', handle)
+            if code is not None:
+                return code
+            available, timed_out = self._receive_wait(channel, 1, timeout)
+            if timed_out:
+                return ERROR_TIMEOUT
+            _, can_id[0], message_type[0], extended[0], transmitted[0], timestamp[0], payload = \
+                channel.rx_queue.popleft()
+            data_length[0] = len(payload)
+            ctypes.memmove(data, payload, len(payload))
+            return self._overflow_result(channel)
+
+    def _getMessages(self, handle, can_ids, message_types, extended, transmitted, timestamps, data, data_length,
+                     items, timeout):
+        wanted = items[0]
+        if wanted >= 0x80000000:
+            # items 为负数（-1）：返回所有可用的消息
+            wanted = -1
+        with self._lock:
+            code, channel = self._begin('getMessages', handle)
+            if code is not None:
+                items[0] = 0
+                return code
+            if wanted < 0:
+                available, timed_out = self._available(channel, self._now()), False
+            else:
+                available, timed_out = self._receive_wait(channel, wanted, timeout)
+                available = min(available, wanted)
+            queue = channel.rx_queue
+            address = ctypes.cast(data, ctypes.c_void_p).value
+            offset = 0
+            for i in range(available):
+                _, can_ids[i], message_types[i], extended[i], transmitted[i], timestamps[i], payload = \
+                    queue.popleft()
+                length = len(payload)
+                data_length[i] = length
+                ctypes.memmove(address + offset, payload, length)
+                offset += length
+            items[0] = available
+            if timed_out and timeout != 0:
+                return ERROR_TIMEOUT
+            return self._overflow_result(channel)
+
+    def _isTerminationSupported(self, handle, supported):
+        return self._constant('isTerminationSupported', handle, supported, 1)
+
+    def _setTermination(self, handle, enabled):
+        return self._set_attribute('setTermination', handle, 'termination', enabled != 0)
+
+    def _isTerminationEnabled(self, handle, enabled):
+        return self._get_attribute('isTerminationEnabled', handle, 'termination', enabled)
+
+    def _isEchoMessageSupported(self, handle, supported):
+        return self._constant('isEchoMessageSupported', handle, supported, 1)
+
+    def _setEchoMessage(self, handle, echo):
+        return self._set_attribute('setEchoMessage', handle, 'echo', echo != 0)
+
+    def _isEchoMessageEnabled(self, handle, echo):
+        return self._get_attribute('isEchoMessageEnabled', handle, 'echo', echo)
+
+    def _setBusErrorReport(self, handle, enabled):
+        return self._set_attribute('setBusErrorReport', handle, 'bus_error_report', enabled != 0)
+
+    def _applySettings(self, handle, temporary):
+        with self._lock:
+            code, _ = self._begin('applySettings', handle)
+        return ERROR_NONE if code is None else code
+
+    def _isTxModeSupported(self, handle, mode, supported):
+        return self._constant('isTxModeSupported', handle, supported, 1 if mode == 0 else 0)
+
+    def _setTxMode(self, handle, mode):
+        if mode != 0:
+            return self._unsupported('setTxMode')
+        return self._set_attribute('setTxMode', handle, 'tx_mode', mode)
+
+    def _setTxTiming(self, handle, can_id, period):
+        return self._unsupported('setTxTiming')
+
+    def _isBlinkSupported(self, handle, supported):
+        return self._constant('isBlinkSupported', handle, supported, 1)
+
+    def _blinkChannel(self, handle, blink):
+        return self._set_attribute('blinkChannel', handle, 'blinking', blink != 0, need_open=False)
+
+    def _isChannelBlinking(self, handle, blinking):
+        return self._get_attribute('isChannelBlinking', handle, 'blinking', blinking, need_open=False)
+
+    def _constant(self, function_name, handle, output, value):
+        with self._lock:
+            code, _ = self._begin(function_name, handle, need_open=False)
+            if code is not None:
+                return code
+            output[0] = value
+        return ERROR_NONE
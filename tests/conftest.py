@@ -0,0 +1,30 @@
+import pytest
+
+from iticanwrapper import ITICANChannel
+from iticanwrapper.itican_py_wrapper import OpenMode, OpenType
+from iticanwrapper.virtual_bus import VirtualBusBackend
+
+
+@pytest.fixture
+def backend():
+    return VirtualBusBackend(channel_count=2)
+
+
+@pytest.fixture
+def channels(backend):
+    """
+    虚拟总线上已开启的两个通道 (发送方, 接收方)
+    """
+    names = []
+    ITICANChannel.find_all_channels(names, [], backend)
+    opened = []
+    for name in names:
+        output = []
+        ITICANChannel.get_channel(output, name, backend)
+        output[0].open_channel(OpenType.FD_CAN_BRS, OpenMode.Normal)
+        opened.append(output[0])
+    yield opened[0], opened[1]
+    for channel in opened:
+        if channel.receiver is not None:
+            channel.stop_receiver()
+        channel.close_channel()
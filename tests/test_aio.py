@@ -0,0 +1,26 @@
+import asyncio
+
+import pytest
+
+from iticanwrapper import CANMessage, MessageType
+from iticanwrapper.aio import AsyncITICANChannel
+
+
+def test_failing_channel_does_not_stop_other_channels(channels):
+    sender, receiver = channels
+
+    def broken(batch, items=-1, timeout=0):
+        raise OSError('device removed')
+
+    sender.get_messages_batch = broken
+
+    async def scenario():
+        async with AsyncITICANChannel(sender) as failing, AsyncITICANChannel(receiver) as healthy:
+            with pytest.raises(OSError):
+                await failing.recv(timeout=1000)
+            assert isinstance(failing.last_error, OSError)
+            assert await failing.send(CANMessage(0x123, MessageType.Classic_CAN, 0, [1, 2])) == 0
+            message = await healthy.recv(timeout=1000)
+            assert (message.id_, list(message.data_)) == (0x123, [1, 2])
+
+    asyncio.run(scenario())
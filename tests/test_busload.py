@@ -0,0 +1,45 @@
+import time
+
+import pytest
+
+from iticanwrapper import CANFrame, MessageType
+from iticanwrapper.busload import BusLoadAnalyzer
+
+
+@pytest.mark.parametrize('use_numpy', [False, True])
+def test_advance_drains_window_on_idle_bus(use_numpy):
+    if use_numpy:
+        pytest.importorskip('numpy')
+    analyzer = BusLoadAnalyzer(500000, window=100, resolution=10, use_numpy=use_numpy)
+    for i in range(50):
+        analyzer.add_frame(CANFrame(0x100, MessageType.Classic_CAN, 0, bytes(8), timestamp=i * 2000))
+    assert analyzer.load > 0.1
+    analyzer.advance(98000 + 50000)
+    assert 0 < analyzer.load < 0.1
+    analyzer.advance(98000 + 100000)
+    assert analyzer.load == 0.0
+    assert analyzer.frames_per_second == 0.0
+    assert analyzer.top_talkers() == []
+    # 推进后到达的旧帧计为迟到帧
+    analyzer.add_frame(CANFrame(0x100, MessageType.Classic_CAN, 0, bytes(8), timestamp=98000))
+    assert analyzer.late_frames == 1
+    assert analyzer.load == 0.0
+
+
+def test_attached_analyzer_decays_to_zero_when_bus_goes_idle(channels):
+    sender, receiver = channels
+    analyzer = BusLoadAnalyzer(500000, 2000000, window=100, resolution=10)
+    analyzer.attach(receiver)
+    try:
+        for i in range(20):
+            sender.set_message(CANFrame(0x100 + i, MessageType.Classic_CAN, 0, bytes(8)))
+        deadline = time.monotonic() + 2
+        while analyzer.total_frames < 20 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert analyzer.total_frames == 20
+        assert analyzer.load > 0
+        time.sleep(0.2)
+        assert analyzer.load == 0.0
+        assert analyzer.snapshot()['frames'] == 0
+    finally:
+        analyzer.detach()
@@ -0,0 +1,124 @@
+import os
+import time
+
+from iticanwrapper import CANMessageBatch, MessageType
+from iticanwrapper.capture import CaptureReader, CaptureRecorder
+
+
+class _LimitedChannel:
+    """
+    模拟通道：每次 set_messages_batch 最多发送 limit 条；limit 为 0 时返回错误码
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.sent_ids = []
+
+    def set_messages_batch(self, batch, items_output, timeout=0):
+        count = min(batch.count, self.limit)
+        self.sent_ids.extend(batch.id_array[:count])
+        items_output.clear()
+        items_output.append(count)
+        if self.limit == 0:
+            return -9
+        return 0
+
+
+def _record(path, count):
+    batch = CANMessageBatch(count)
+    for i in range(count):
+        batch.append(i, MessageType.Classic_CAN, 0, bytes([i]))
+    with CaptureRecorder(str(path)) as recorder:
+        recorder.write_batch(batch)
+    return recorder.files[0]
+
+
+def test_replay_resends_frames_after_partial_send(tmp_path):
+    with CaptureReader(_record(tmp_path / 'partial.bin', 10)) as reader:
+        channel = _LimitedChannel(3)
+        assert reader.replay(channel, speed=0, retry_interval=0) == 10
+        assert channel.sent_ids == list(range(10))
+
+
+def test_replay_stops_on_error_without_progress(tmp_path):
+    with CaptureReader(_record(tmp_path / 'error.bin', 5)) as reader:
+        assert reader.replay(_LimitedChannel(0), speed=0) == 0
+
+
+def _batch(first, count):
+    batch = CANMessageBatch(count)
+    for i in range(first, first + count):
+        batch.append(i, MessageType.Classic_CAN, 0, bytes([i]))
+    return batch
+
+
+def _wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_restart_appends_to_existing_capture(tmp_path):
+    path = str(tmp_path / 'restart.bin')
+    recorder = CaptureRecorder(path)
+    recorder.start()
+    recorder.write_batch(_batch(0, 3))
+    recorder.stop()
+    recorder.start()
+    recorder.write_batch(_batch(3, 2))
+    recorder.stop()
+    assert recorder.files == [path]
+    with CaptureReader(path) as reader:
+        assert [frame.id_ for frame in reader] == [0, 1, 2, 3, 4]
+
+
+def test_restart_continues_rotation_sequence(tmp_path):
+    recorder = CaptureRecorder(str(tmp_path / 'rotate.bin'), max_seconds=3600)
+    for first in (0, 1):
+        recorder.start()
+        recorder.write_batch(_batch(first, 1))
+        recorder.stop()
+    assert [os.path.basename(path) for path in recorder.files] == ['rotate_0000.bin', 'rotate_0001.bin']
+    for first, path in enumerate(recorder.files):
+        with CaptureReader(path) as reader:
+            assert [frame.id_ for frame in reader] == [first]
+
+
+def test_failing_open_is_counted_and_retried(tmp_path):
+    directory = tmp_path / 'missing'
+    recorder = CaptureRecorder(str(directory / 'capture.bin'))
+    recorder.start()
+    try:
+        recorder.write_batch(_batch(0, 2))
+        assert _wait_for(lambda: recorder.write_errors >= 2)
+        assert recorder._thread.is_alive()
+        directory.mkdir()
+        recorder.write_batch(_batch(2, 2))
+        assert _wait_for(lambda: recorder.frames_written == 2)
+    finally:
+        recorder.stop()
+    with CaptureReader(recorder.files[0]) as reader:
+        assert [frame.id_ for frame in reader] == [2, 3]
+
+
+def test_failing_idle_rotation_keeps_writer_alive(tmp_path):
+    recorder = CaptureRecorder(str(tmp_path / 'idle.bin'), max_seconds=0.05)
+    recorder.start()
+    try:
+        recorder.write_batch(_batch(0, 1))
+        assert _wait_for(lambda: recorder.frames_written == 1)
+        open_file = recorder._open
+
+        def failing_open():
+            raise OSError("disk full")
+
+        recorder._open = failing_open
+        assert _wait_for(lambda: recorder.write_errors >= 1)
+        assert recorder._thread.is_alive()
+        recorder._open = open_file
+        recorder.write_batch(_batch(1, 1))
+        assert _wait_for(lambda: recorder.frames_written == 2)
+    finally:
+        recorder.stop()
+    assert len(recorder.files) >= 2
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+from iticanwrapper import CANFrame, CANMessageBatch, MessageType
+from iticanwrapper.backend import DLL_ERROR_NO_MESSAGE, DLL_ERROR_TIMEOUT, DLLBackend
+from iticanwrapper.channel import CANChannel
+from iticanwrapper.errors import ITICANError, ITICANTimeoutError
+from iticanwrapper.filters import AcceptanceFilter
+from iticanwrapper.virtual_bus import ERROR_TIMEOUT, VirtualBusBackend
+
+_UNMAPPED_ERROR = -200
+
+
+class _SlowFailingBackend(VirtualBusBackend):
+    """
+    getMessages 等待 timeout 后返回后端未映射的错误码，模拟错误码未知的硬件超时
+    """
+
+    def _getMessages(self, handle, can_ids, message_types, extended, transmitted, timestamps, data, data_length,
+                     items, timeout):
+        if timeout > 0:
+            time.sleep(timeout / 1000.0)
+        items[0] = 0
+        return _UNMAPPED_ERROR
+
+
+def test_dll_backend_maps_timeout_codes():
+    backend = DLLBackend(library=object())
+    assert backend.error_classes[DLL_ERROR_TIMEOUT] is ITICANTimeoutError
+    assert backend.error_classes[DLL_ERROR_NO_MESSAGE] is ITICANTimeoutError
+
+
+def test_recv_batch_returns_partial_count_on_mapped_timeout(backend, channels):
+    _, receiver = channels
+    backend.inject_error('getMessages', ERROR_TIMEOUT)
+    assert CANChannel(receiver).recv_batch(CANMessageBatch(8), 4, 10) == 0
+
+
+@pytest.mark.parametrize('backend', [_SlowFailingBackend(channel_count=2)])
+def test_recv_batch_raises_unmapped_code_even_after_full_wait(channels):
+    _, receiver = channels
+    with pytest.raises(ITICANError) as info:
+        CANChannel(receiver).recv_batch(CANMessageBatch(8), 4, 20)
+    assert not isinstance(info.value, ITICANTimeoutError)
+    with pytest.raises(ITICANError):
+        CANChannel(receiver).recv_batch(CANMessageBatch(8), 4, 0)
+
+
+def test_recv_applies_acceptance_filter(channels):
+    sender, receiver = channels
+    receiver.set_filter(AcceptanceFilter().add_ids([0x200]))
+    sender.set_message(CANFrame(0x100, MessageType.Classic_CAN, 0, b'\x01'))
+    sender.set_message(CANFrame(0x200, MessageType.Classic_CAN, 0, b'\x02'))
+    frame = CANChannel(receiver).recv(timeout=0)
+    assert (frame.id_, frame.data_) == (0x200, b'\x02')
+    assert receiver.filter.frames_rejected == 1
+
+
+def test_send_messages_goes_through_pacer(channels):
+    sender, _ = channels
+    pacer = sender.set_pacing(0.5)
+    frames = [CANFrame(0x100 + i, MessageType.Classic_CAN, 0, bytes(8)) for i in range(20)]
+    assert CANChannel(sender).send_messages(frames) == 20
+    assert pacer.frames_paced == 20
@@ -0,0 +1,78 @@
+import pytest
+
+from iticanwrapper import CANFrame, CANMessageBatch, MessageType
+from iticanwrapper.cycle_monitor import CycleEventType, CycleMonitor
+
+
+def _batch(frames):
+    batch = CANMessageBatch(len(frames))
+    for index, (can_id, timestamp) in enumerate(frames):
+        batch.append(can_id, MessageType.Classic_CAN, 0, bytes(8))
+        batch.timestamp_array[index] = timestamp
+    return batch
+
+
+def _batches():
+    # 0x100 每批含重复时间戳（无效间隔），0x200 含抖动和一次丢帧
+    batches = []
+    timestamp = other = 0
+    for _ in range(3):
+        frames = []
+        for i in range(12):
+            timestamp += 10000 + (i % 3) * 700
+            frames.append((0x100, timestamp))
+            if i % 4 == 1:
+                frames.append((0x100, timestamp))
+            other += 10000 + 300 * (i % 2) + 10000 * (i == 7)
+            frames.append((0x200, other))
+        batches.append(_batch(frames))
+    return batches
+
+
+def test_numpy_batches_match_frame_by_frame_statistics():
+    pytest.importorskip('numpy')
+    results = []
+    for use_numpy in (False, True):
+        monitor = CycleMonitor(alpha=0.25, use_numpy=use_numpy)
+        monitor.expect(0x100, 10)
+        monitor.expect(0x200, 10)
+        for batch in _batches():
+            monitor.add_batch(batch)
+        results.append(monitor)
+    scalar, vectorized = results
+    for can_id in (0x100, 0x200):
+        expected = scalar.statistics(can_id)
+        actual = vectorized.statistics(can_id)
+        assert actual.count == expected.count
+        assert actual.intervals == expected.intervals
+        assert actual.missed == expected.missed
+        assert actual.min_interval == expected.min_interval
+        assert actual.max_interval == expected.max_interval
+        assert actual.ewma == pytest.approx(expected.ewma)
+        assert actual.ewma_sq == pytest.approx(expected.ewma_sq)
+    assert scalar.statistics(0x100).intervals < scalar.statistics(0x100).count
+    assert scalar.statistics(0x200).missed == 3
+
+
+def test_timeout_wheel_reports_silent_id_and_resume():
+    monitor = CycleMonitor()
+    monitor.expect(0x100, 10)
+    monitor.expect(0x200, 10)
+    events = []
+    monitor.add_listener(events.append)
+    for timestamp in range(0, 20001, 10000):
+        monitor.add_frame(CANFrame(0x100, MessageType.Classic_CAN, 0, bytes(8), timestamp=timestamp))
+    # 0x200 持续到达，截止时间不断推后，到期时重新放回时间轮
+    for timestamp in range(0, 60001, 10000):
+        monitor.add_frame(CANFrame(0x200, MessageType.Classic_CAN, 0, bytes(8), timestamp=timestamp))
+    monitor.poll(70000)
+    assert [(event.kind, event.can_id, event.timestamp) for event in events] == \
+        [(CycleEventType.TIMEOUT, 0x100, 50000)]
+    assert monitor.statistics(0x100).timed_out
+    monitor.poll(200000)
+    assert len(events) == 2
+    assert events[1].kind == CycleEventType.TIMEOUT and events[1].can_id == 0x200
+    monitor.add_frame(CANFrame(0x100, MessageType.Classic_CAN, 0, bytes(8), timestamp=210000))
+    assert (events[2].kind, events[2].can_id, events[2].value) == (CycleEventType.RESUMED, 0x100, 190.0)
+    assert monitor.statistics(0x100).timeouts == 1
+    assert not monitor.statistics(0x100).timed_out
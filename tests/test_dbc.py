@@ -0,0 +1,57 @@
+import pytest
+
+from iticanwrapper import CANMessageBatch, MessageType
+from iticanwrapper.dbc import Database
+
+_DBC = '''
+BO_ 256 Standard: 8 ECU
+ SG_ Speed : 0|16@1+ (1,0) [0|0] "" Vector__XXX
+
+BO_ 2147483904 Extended: 8 ECU
+ SG_ Torque : 0|8@1- (1,0) [0|0] "" Vector__XXX
+VAL_ 2147483904 Torque 1 "one" ;
+
+BO_ 512 Wide: 8 ECU
+ SG_ Signed63 : 0|63@1- (1,0) [0|0] "" Vector__XXX
+
+BO_ 513 Full: 8 ECU
+ SG_ Signed64 : 0|64@1- (1,0) [0|0] "" Vector__XXX
+'''
+
+
+def test_standard_and_extended_messages_with_same_id_are_kept_apart():
+    database = Database.from_string(_DBC)
+    assert database.get_message(0x100, extended=False).name == 'Standard'
+    assert database.get_message(0x100, extended=True).name == 'Extended'
+    assert database.get_message(0x100).name == 'Standard'
+    assert database.get_message(0x200, extended=True) is None
+    assert database.get_message_by_name('Extended').signals[0].choices == {1: 'one'}
+    data = bytes([0xFF, 0x01, 0, 0, 0, 0, 0, 0])
+    assert database.decode(0x100, data) == {'Speed': 0x1FF}
+    assert database.decode(0x100, data, extended=True) == {'Torque': -1}
+
+
+def test_decode_batch_separates_standard_and_extended_frames():
+    pytest.importorskip('numpy')
+    database = Database.from_string(_DBC)
+    batch = CANMessageBatch(4)
+    batch.append(0x100, MessageType.Classic_CAN, 0, bytes([0xFF, 0x01, 0, 0, 0, 0, 0, 0]))
+    batch.append(0x100, MessageType.Classic_CAN, 1, bytes([0xFE, 0, 0, 0, 0, 0, 0, 0]))
+    batch.append(0x100, MessageType.Classic_CAN, 0, bytes([0x02, 0, 0, 0, 0, 0, 0, 0]))
+    result = database.decode_batch(batch)
+    assert set(result) == {0x100, 0x100 | 0x80000000}
+    assert result[0x100].message.name == 'Standard'
+    assert result[0x100]['Speed'].tolist() == [0x1FF, 2]
+    assert result[0x100 | 0x80000000]['Torque'].tolist() == [-2]
+
+
+@pytest.mark.parametrize('name, signal, length', [('Wide', 'Signed63', 63), ('Full', 'Signed64', 64)])
+def test_decode_matrix_sign_extends_wide_signals(name, signal, length):
+    np = pytest.importorskip('numpy')
+    message = Database.from_string(_DBC).get_message_by_name(name)
+    definition = next(item for item in message.signals if item.name == signal)
+    values = [-(1 << (length - 1)), -1, 0, (1 << (length - 1)) - 1]
+    payloads = [(value & ((1 << length) - 1)).to_bytes(8, 'little') for value in values]
+    matrix = np.frombuffer(b''.join(payloads), dtype=np.uint8).reshape(len(values), 8)
+    assert definition.decode_matrix(matrix, scale=False).tolist() == values
+    assert [definition.decode_raw(payload) for payload in payloads] == values
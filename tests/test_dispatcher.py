@@ -0,0 +1,131 @@
+import threading
+import time
+
+from iticanwrapper import CANFrame, MessageType
+from iticanwrapper.dispatcher import FrameDispatcher
+
+
+def _send(sender, can_id, payload=b'', extended=0):
+    sender.set_message(CANFrame(can_id, MessageType.Classic_CAN, extended, payload))
+
+
+def _wait(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return predicate()
+
+
+def test_exact_and_mask_subscriptions_route_by_id_and_frame_format(channels):
+    sender, receiver = channels
+    dispatcher = FrameDispatcher()
+    standard, extended, masked = [], [], []
+    dispatcher.subscribe(0x123, standard.append)
+    dispatcher.subscribe(0x123, extended.append, extended=1)
+    dispatcher.subscribe(0x120, masked.append, mask=0x7F0)
+    dispatcher.attach(receiver)
+    try:
+        _send(sender, 0x123)
+        _send(sender, 0x123, extended=1)
+        _send(sender, 0x12F)
+        _send(sender, 0x130)
+        assert _wait(lambda: dispatcher.frames_dispatched + dispatcher.frames_unrouted == 4)
+    finally:
+        dispatcher.stop()
+    assert [(frame.id_, frame.extended_) for frame in standard] == [(0x123, 0)]
+    assert [(frame.id_, frame.extended_) for frame in extended] == [(0x123, 1)]
+    assert [frame.id_ for frame in masked] == [0x123, 0x12F]
+    assert dispatcher.frames_dispatched == 3
+    assert dispatcher.frames_unrouted == 1
+
+
+def test_subscribe_and_unsubscribe_invalidate_cached_routes(channels):
+    sender, receiver = channels
+    dispatcher = FrameDispatcher()
+    dispatcher.attach(receiver)
+    try:
+        _send(sender, 0x200)
+        assert _wait(lambda: dispatcher.frames_unrouted == 1)
+        received = []
+        subscription = dispatcher.subscribe(0x200, received.append)
+        _send(sender, 0x200)
+        assert _wait(lambda: len(received) == 1)
+        masked = dispatcher.subscribe(0x200, received.append, mask=0x700)
+        _send(sender, 0x200)
+        assert _wait(lambda: len(received) == 3)
+        subscription.cancel()
+        dispatcher.unsubscribe(masked)
+        _send(sender, 0x200)
+        assert _wait(lambda: dispatcher.frames_unrouted == 2)
+    finally:
+        dispatcher.stop()
+    assert len(received) == 3
+    assert dispatcher.frames_dispatched == 2
+
+
+def test_queue_subscription_drops_oldest_frames(channels):
+    sender, receiver = channels
+    dispatcher = FrameDispatcher()
+    subscription = dispatcher.subscribe(0x300, queue_size=2)
+    dispatcher.attach(receiver)
+    try:
+        for i in range(5):
+            _send(sender, 0x300, bytes([i]))
+        assert _wait(lambda: subscription.delivered == 5)
+    finally:
+        dispatcher.stop()
+    assert subscription.dropped == 3
+    assert [subscription.get(timeout=1).data_[0], subscription.get_nowait().data_[0]] == [3, 4]
+
+
+def test_worker_threads_keep_order_per_subscription(channels):
+    sender, receiver = channels
+    dispatcher = FrameDispatcher(workers=2)
+    first, second = [], []
+    threads = set()
+
+    def record(target):
+        def callback(frame):
+            threads.add(threading.current_thread().name)
+            target.append(frame.data_[0])
+        return callback
+
+    dispatcher.subscribe(0x400, record(first))
+    dispatcher.subscribe(0x400, record(second))
+    dispatcher.attach(receiver)
+    try:
+        for i in range(100):
+            _send(sender, 0x400, bytes([i]))
+        assert _wait(lambda: dispatcher.frames_dispatched == 100)
+        assert dispatcher.join(timeout=2)
+    finally:
+        dispatcher.stop()
+    assert first == list(range(100))
+    assert second == list(range(100))
+    assert threads == {'ITICANDispatcher-0', 'ITICANDispatcher-1'}
+
+
+def test_stop_returns_when_worker_queue_is_full():
+    dispatcher = FrameDispatcher(workers=1, worker_queue_size=1)
+    release = threading.Event()
+    started = threading.Event()
+    received = []
+
+    def callback(frame):
+        started.set()
+        release.wait(5)
+        received.append(frame.data_[0])
+
+    subscription = dispatcher.subscribe(0x500, callback)
+    for i in range(3):
+        dispatcher.dispatch(CANFrame(0x500, MessageType.Classic_CAN, 0, bytes([i])))
+        if i == 0:
+            assert started.wait(1)
+    assert subscription.dropped == 1
+    begin = time.monotonic()
+    dispatcher.stop(timeout=0.2)
+    assert time.monotonic() - begin < 1
+    release.set()
+    dispatcher._workers[0].join(1)
+    assert not dispatcher._workers[0].is_alive()
+    assert received == [0]
@@ -0,0 +1,19 @@
+import pytest
+
+from iticanwrapper.bin import importDLL
+
+
+def test_set_library_path_before_loading(monkeypatch):
+    monkeypatch.setattr(importDLL, '_library', None)
+    monkeypatch.setattr(importDLL, 'library_path', importDLL.bin_path)
+    importDLL.set_library_path('/opt/itican/libitican.so')
+    assert importDLL.library_path == '/opt/itican/libitican.so'
+
+
+def test_set_library_path_after_loading_raises(monkeypatch):
+    monkeypatch.setattr(importDLL, '_library', object())
+    monkeypatch.setattr(importDLL, 'library_path', importDLL.bin_path)
+    importDLL.set_library_path(importDLL.bin_path)
+    with pytest.raises(RuntimeError):
+        importDLL.set_library_path('/opt/itican/libitican.so')
+    assert importDLL.library_path == importDLL.bin_path
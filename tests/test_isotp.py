@@ -0,0 +1,71 @@
+import time
+
+from iticanwrapper import CANFrame, CANMessageBatch, MessageType
+from iticanwrapper.isotp import N_ERROR, N_OK, N_RX_TIMEOUT, N_TIMEOUT_CR, ISOTPTransport
+from iticanwrapper.virtual_bus import ERROR_NOT_OPEN
+
+
+def test_send_returns_on_hard_error_without_waiting(backend, channels):
+    sender, _ = channels
+    with ISOTPTransport(sender) as transport:
+        link = transport.open_link(0x7E0, 0x7E8)
+        backend.inject_error('setMessages', ERROR_NOT_OPEN, count=-1)
+        started = time.monotonic()
+        assert link.send(b'\x01\x02', timeout=2000) == N_ERROR
+        assert time.monotonic() - started < 0.5
+        assert link.last_send_error == ERROR_NOT_OPEN
+
+
+def test_stalled_reception_times_out(channels):
+    sender, receiver = channels
+    with ISOTPTransport(receiver) as transport:
+        link = transport.open_link(0x7E8, 0x7E0, timeout_cr=50)
+        # 只有首帧，之后没有连续帧
+        sender.set_message(CANFrame(0x7E0, MessageType.Classic_CAN, 0, b'\x10\x20\x01\x02\x03\x04\x05\x06'))
+        output = []
+        started = time.monotonic()
+        assert link.recv(output, timeout=2000) == N_TIMEOUT_CR
+        assert time.monotonic() - started < 1.0
+        assert link.last_error == N_TIMEOUT_CR
+        assert output == []
+
+
+def test_transfer_round_trip(channels):
+    sender, receiver = channels
+    with ISOTPTransport(sender) as tx_transport, ISOTPTransport(receiver) as rx_transport:
+        tx_link = tx_transport.open_link(0x7E0, 0x7E8)
+        rx_link = rx_transport.open_link(0x7E8, 0x7E0)
+        payload = bytes(range(200))
+        assert tx_link.send(payload) == N_OK
+        output = []
+        assert rx_link.recv(output, timeout=2000) == N_OK
+        assert output == [payload]
+
+
+def test_idle_link_timeout_is_not_an_n_cr_timeout(channels):
+    _, receiver = channels
+    with ISOTPTransport(receiver) as transport:
+        link = transport.open_link(0x7E8, 0x7E0)
+        output = []
+        assert link.recv(output, timeout=50) == N_RX_TIMEOUT
+        assert link.last_error == N_OK
+        assert output == []
+
+
+def test_consecutive_frame_after_expiry_is_not_delivered(channels):
+    _, receiver = channels
+    with ISOTPTransport(receiver) as transport:
+        link = transport.open_link(0x7E8, 0x7E0, timeout_cr=20)
+        output = []
+        link._on_frame(memoryview(b'\x10\x20\x01\x02\x03\x04\x05\x06'), 0)
+        time.sleep(0.05)
+        # 其他 id 的帧到达时，接收线程放弃超时的接收
+        batch = CANMessageBatch(1)
+        batch.append(0x123, MessageType.Classic_CAN, 0, b'\x00')
+        transport._on_batch(batch)
+        assert link._rx_buffer is None
+        assert link.last_error == N_TIMEOUT_CR
+        # 超时之后到达的连续帧不再交付
+        link._on_frame(memoryview(b'\x21\x07\x08\x09\x0a\x0b\x0c\x0d'), 10000)
+        assert link.recv(output, timeout=50) == N_RX_TIMEOUT
+        assert output == []
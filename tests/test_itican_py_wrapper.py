@@ -0,0 +1,30 @@
+import pytest
+
+from iticanwrapper import CANMessage, MessageType
+
+
+@pytest.mark.parametrize('payload', [(1, 2, 3), [1, 2, 3], b'\x01\x02\x03', bytearray(b'\x01\x02\x03'),
+                                     memoryview(b'\x01\x02\x03'), range(1, 4)])
+def test_set_message_accepts_any_byte_sequence(channels, payload):
+    sender, receiver = channels
+    assert sender.set_message(CANMessage(0x123, MessageType.Classic_CAN, 0, payload)) == 0
+    received = []
+    receiver.get_messages(received, 10, 0)
+    assert [list(message.data_) for message in received] == [[1, 2, 3]]
+
+
+def test_can_message_keeps_instance_dict():
+    message = CANMessage(0x123, MessageType.Classic_CAN, 0, [1])
+    message.channel_name = 'VCAN-0'
+    assert vars(message)['channel_name'] == 'VCAN-0'
+
+
+def test_get_fd_baud_rate_reads_data_phase_rate(channels):
+    sender, _ = channels
+    assert sender.set_baud_rate(500000) == 0
+    assert sender.set_fd_baud_rate(2000000) == 0
+    output = []
+    assert sender.get_baud_rate(output) == 0
+    assert output == [500000]
+    assert sender.get_fd_baud_rate(output) == 0
+    assert output == [2000000]
@@ -0,0 +1,57 @@
+import pytest
+
+from iticanwrapper import CANFrame, CANMessageBatch, MessageType
+from iticanwrapper.metrics import LatencyHistogram, to_prometheus
+from iticanwrapper.virtual_bus import ERROR_NOT_OPEN, ERROR_TIMEOUT, WARNING_RX_OVERFLOW, VirtualBusBackend
+
+
+def _send(sender, count):
+    for i in range(count):
+        assert sender.set_message(CANFrame(0x100 + i, MessageType.Classic_CAN, 0, bytes(4))) == 0
+
+
+@pytest.mark.parametrize('backend', [VirtualBusBackend(channel_count=2, rx_queue_depth=2)])
+def test_overflow_warning_still_counts_received_frame(channels):
+    sender, receiver = channels
+    metrics = receiver.enable_metrics('rx')
+    _send(sender, 3)
+    output = []
+    assert receiver.get_message(output) == WARNING_RX_OVERFLOW
+    assert receiver.get_message(output) == 0
+    assert metrics.rx_frames == 2
+    assert metrics.rx_bytes == 8
+    snapshot = metrics.snapshot()
+    assert snapshot['warnings'] == {'getMessage': {WARNING_RX_OVERFLOW: 1}}
+    assert snapshot['errors'] == {}
+    assert 'itican_warnings_total{channel="rx",function="getMessage",code="1"} 1' in to_prometheus([metrics])
+
+
+def test_transmit_errors_and_batches(backend, channels):
+    sender, receiver = channels
+    tx_metrics = sender.enable_metrics('tx')
+    rx_metrics = receiver.enable_metrics('rx')
+    _send(sender, 2)
+    backend.inject_error('setMessage', ERROR_NOT_OPEN)
+    assert sender.set_message(CANFrame(0x1, MessageType.Classic_CAN, 0, bytes(4))) == ERROR_NOT_OPEN
+    assert tx_metrics.tx_frames == 2
+    assert tx_metrics.tx_bytes == 8
+    assert tx_metrics.snapshot()['errors'] == {'setMessage': {ERROR_NOT_OPEN: 1}}
+    assert receiver.get_messages_batch(CANMessageBatch(8), 8) in (0, ERROR_TIMEOUT)
+    assert rx_metrics.rx_frames == 2
+    tx_metrics.reset()
+    assert tx_metrics.snapshot()['errors'] == {}
+    backend.inject_error('setMessage', ERROR_NOT_OPEN)
+    sender.set_message(CANFrame(0x1, MessageType.Classic_CAN, 0, bytes(4)))
+    assert tx_metrics.snapshot()['errors'] == {'setMessage': {ERROR_NOT_OPEN: 1}}
+    sender.disable_metrics()
+    assert not tx_metrics.enabled
+
+
+def test_latency_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for value in range(1, 1001):
+        histogram.record(value)
+    assert histogram.count == 1000
+    assert histogram.min == 1 and histogram.max == 1000
+    assert abs(histogram.percentile(50) - 500) <= 500 / 16
+    assert histogram.percentile(100) == 1000
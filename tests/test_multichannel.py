@@ -0,0 +1,32 @@
+import time
+
+from iticanwrapper import CANFrame, ITICANChannel, MessageType
+from iticanwrapper.itican_py_wrapper import OpenMode, OpenType
+from iticanwrapper.multichannel import MultiChannelManager
+
+
+def test_overflowing_batch_is_trimmed_to_capacity(backend):
+    output = []
+    ITICANChannel.get_channel(output, 'VCAN-0', backend)
+    sender = output[0]
+    sender.open_channel(OpenType.FD_CAN, OpenMode.Normal)
+    manager = MultiChannelManager(['VCAN-1'], backend=backend, batch_size=32, capacity=5)
+    assert manager.open() == 0
+    try:
+        for i in range(12):
+            sender.set_message(CANFrame(i, MessageType.Classic_CAN, 0, b'\x00'))
+        manager.start()
+        deadline = time.monotonic() + 2
+        while manager.statistics()['VCAN-1']['frames_received'] < 12 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        manager.stop()
+        statistics = manager.statistics()['VCAN-1']
+        assert statistics['frames_received'] == 12
+        assert statistics['pending'] == 5
+        assert statistics['dropped'] == 7
+        frames = []
+        manager.get_frames(frames)
+        assert [tagged.frame.id_ for tagged in frames] == [7, 8, 9, 10, 11]
+    finally:
+        manager.close()
+        sender.close_channel()
@@ -0,0 +1,61 @@
+import time
+
+from iticanwrapper import CANFrame, MessageType
+from iticanwrapper.scheduler import PeriodicScheduler
+
+
+class _RecordingChannel:
+    """
+    模拟通道：记录每次 set_messages_batch 发送的 id
+    """
+
+    def __init__(self):
+        self.batches = []
+
+    def set_messages_batch(self, batch, items_output, timeout=0):
+        self.batches.append(list(batch.id_array[:batch.count]))
+        items_output.clear()
+        items_output.append(batch.count)
+        return 0
+
+
+def _failing_callback(message):
+    raise ValueError("broken signal source")
+
+
+def test_failing_callback_skips_only_its_own_message():
+    channel = _RecordingChannel()
+    scheduler = PeriodicScheduler(channel, batch_window=5, spin_time=0)
+    scheduler.add(CANFrame(0x100, MessageType.Classic_CAN, 0, b'\x01'), 10)
+    scheduler.add(CANFrame(0x200, MessageType.Classic_CAN, 0, b'\x02'), 10, update_callback=_failing_callback)
+    scheduler.start()
+    try:
+        deadline = time.monotonic() + 2
+        while len(channel.batches) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        scheduler.stop()
+    assert len(channel.batches) >= 3
+    assert all(batch == [0x100] for batch in channel.batches)
+    assert scheduler.callback_errors >= 3
+    assert isinstance(scheduler.last_callback_error, ValueError)
+    assert scheduler.send_errors == 0
+    statistics = scheduler.statistics()
+    assert statistics[0x100].count == len(channel.batches)
+    assert statistics[0x200].count == 0
+
+
+def test_update_callback_replaces_message():
+    channel = _RecordingChannel()
+    scheduler = PeriodicScheduler(channel, spin_time=0)
+    replacement = CANFrame(0x300, MessageType.Classic_CAN, 0, b'\x03')
+    scheduler.add(CANFrame(0x300, MessageType.Classic_CAN, 0, b'\x00'), 5, update_callback=lambda message: replacement)
+    scheduler.start()
+    try:
+        deadline = time.monotonic() + 2
+        while not channel.batches and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        scheduler.stop()
+    assert channel.batches[0] == [0x300]
+    assert scheduler._jobs[0x300].message is replacement
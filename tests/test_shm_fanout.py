@@ -0,0 +1,96 @@
+import pytest
+
+from iticanwrapper import CANMessageBatch, MessageType
+from iticanwrapper.shm_fanout import RECORD_SIZE, SharedFrameRing
+
+
+@pytest.fixture(params=[False, True], ids=['struct', 'numpy'])
+def ring(request):
+    if request.param:
+        pytest.importorskip('numpy')
+    ring = SharedFrameRing(capacity=8, max_consumers=2)
+    if not request.param:
+        # 不使用 numpy 视图，走逐条 pack/unpack 的路径
+        ring._array = False
+    yield ring
+    ring.close()
+
+
+def _batch(first, count):
+    batch = CANMessageBatch(count)
+    for i in range(first, first + count):
+        batch.append(0x100 + i, MessageType.FD_CAN, i % 2, bytes([i]) * (i % 9))
+        batch.timestamp_array[i - first] = 1000 * i
+    return batch
+
+
+def _check(batch, first, count):
+    assert batch.count == count
+    for index, frame in enumerate(batch.to_frames()):
+        i = first + index
+        assert (frame.id_, frame.extended_, frame.timestamp_, frame.data_) == \
+            (0x100 + i, i % 2, 1000 * i, bytes([i]) * (i % 9))
+
+
+def test_write_and_read_wrap_around_the_end_of_the_ring(ring):
+    consumer = ring.consumer(0)
+    assert ring.write_batch(_batch(0, 5)) == 5
+    batch = CANMessageBatch(16)
+    assert consumer.read_batch(batch) == 5
+    _check(batch, 0, 5)
+    other = ring.consumer(1)
+    # 序号 5~10 占用槽 5, 6, 7, 0, 1, 2
+    ring.write_batch(_batch(5, 6))
+    span = consumer.read_records()
+    assert [len(segment) for segment in span.segments] == [3 * RECORD_SIZE, 3 * RECORD_SIZE]
+    assert span.valid()
+    assert other.read_batch(batch) == 6
+    _check(batch, 5, 6)
+    assert consumer.overruns == other.overruns == 0
+    assert ring.consumer_lags() == {0: 0, 1: 0}
+
+
+def test_lagging_consumer_detects_overrun_and_skips_to_oldest_record(ring):
+    consumer = ring.consumer(0)
+    # 超过容量的批次分段写入，只保留最后 capacity 条
+    ring.write_batch(_batch(0, 20))
+    assert ring.published == 20
+    assert consumer.lag == 20
+    assert ring.consumer_lags() == {0: 20}
+    batch = CANMessageBatch(16)
+    assert consumer.read_batch(batch) == 8
+    _check(batch, 12, 8)
+    assert (consumer.overruns, consumer.frames_lost, consumer.frames_read) == (1, 12, 8)
+    assert ring.consumer(1, from_start=True).cursor == 12
+
+
+def test_record_span_is_invalid_once_overwritten(ring):
+    consumer = ring.consumer(0)
+    ring.write_batch(_batch(0, 4))
+    span = consumer.read_records(max_items=2)
+    assert (span.start, len(span)) == (0, 2)
+    assert span.valid()
+    ring.write_batch(_batch(4, 4))
+    assert span.valid()
+    ring.write_batch(_batch(8, 1))
+    assert not span.valid()
+    assert consumer.read_records().valid()
+
+
+def test_close_notifies_consumers_and_unlinks(ring):
+    attached = SharedFrameRing(ring.name, create=False)
+    try:
+        consumer = attached.consumer(1)
+        assert ring.consumer_lags() == {1: 0}
+        ring.write_batch(_batch(0, 3))
+        assert not attached.closed
+        ring.close()
+        ring.close()
+        assert attached.closed
+        assert [frame.id_ for frame in consumer.frames()] == [0x100, 0x101, 0x102]
+        consumer.close()
+        assert attached.consumer_lags() == {}
+    finally:
+        attached.close()
+    with pytest.raises(FileNotFoundError):
+        SharedFrameRing(ring.name, create=False)
@@ -0,0 +1,108 @@
+import threading
+from concurrent.futures import CancelledError
+
+import pytest
+
+from iticanwrapper import CANFrame, MessageType
+from iticanwrapper.tx_queue import TransmitQueue
+
+
+class _StallingChannel:
+    """
+    模拟通道：第一次 set_messages_batch 阻塞到 release 被设置；sent_limit 限制每次发送的个数
+    """
+
+    def __init__(self, sent_limit=None):
+        self._dll = None
+        self.sent_ids = []
+        self.calls = 0
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.sent_limit = sent_limit
+
+    def set_messages_batch(self, batch, items_output, timeout=0):
+        self.calls += 1
+        self.entered.set()
+        self.release.wait(5)
+        count = batch.count if self.sent_limit is None else min(batch.count, self.sent_limit)
+        self.sent_ids.extend(batch.id_array[:count])
+        items_output.clear()
+        items_output.append(count)
+        return 0 if count == batch.count else -1
+
+
+def _frame(can_id):
+    return CANFrame(can_id, MessageType.Classic_CAN, 0, b'\x01')
+
+
+def _start(channel, **kwargs):
+    tx = TransmitQueue(channel, **kwargs)
+    tx.start()
+    return tx
+
+
+def test_cancelled_future_is_not_sent():
+    channel = _StallingChannel()
+    tx = _start(channel)
+    try:
+        first = tx.put(_frame(0x100))
+        assert channel.entered.wait(5)
+        futures = tx.put_many([_frame(0x101), _frame(0x102), _frame(0x103)])
+        assert futures[1].cancel()
+        channel.release.set()
+        assert tx.flush(5)
+        assert tx.running
+        assert channel.sent_ids == [0x100, 0x101, 0x103]
+        assert tx.frames_sent == 3
+        assert first.result(1) is None
+        assert futures[0].result(1) is None and futures[2].result(1) is None
+        with pytest.raises(CancelledError):
+            futures[1].result(0)
+        # 发送线程仍然可用
+        assert tx.put(_frame(0x104)).result(5) is None
+    finally:
+        channel.release.set()
+        tx.stop(timeout=1)
+
+
+def test_future_taken_for_sending_cannot_be_cancelled():
+    channel = _StallingChannel()
+    tx = _start(channel)
+    try:
+        future = tx.put(_frame(0x100))
+        assert channel.entered.wait(5)
+        assert not future.cancel()
+        channel.release.set()
+        assert future.result(5) is None
+    finally:
+        channel.release.set()
+        tx.stop(timeout=1)
+
+
+def test_externally_resolved_future_does_not_stop_sender():
+    channel = _StallingChannel()
+    tx = _start(channel)
+    try:
+        future = tx.put(_frame(0x100))
+        assert channel.entered.wait(5)
+        future.set_result('done elsewhere')
+        channel.release.set()
+        assert tx.flush(5)
+        assert tx.running
+        assert tx.frames_sent == 1
+        assert tx.put(_frame(0x101)).result(5) is None
+    finally:
+        channel.release.set()
+        tx.stop(timeout=1)
+
+
+def test_stop_fails_futures_waiting_for_retry():
+    channel = _StallingChannel(sent_limit=0)
+    channel.release.set()
+    tx = _start(channel, retry_interval=1, retry_timeout=-1)
+    futures = tx.put_many([_frame(0x100), _frame(0x101)])
+    assert channel.entered.wait(5)
+    tx.stop(drain=False, timeout=1)
+    for future in futures:
+        with pytest.raises((RuntimeError, CancelledError)):
+            future.result(1)
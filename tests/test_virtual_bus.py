@@ -0,0 +1,15 @@
+from iticanwrapper.itican_py_wrapper import TxMode
+from iticanwrapper.virtual_bus import ERROR_NONE, ERROR_NOT_SUPPORTED, ERROR_TIMEOUT
+
+
+def test_injected_codes_override_unsupported_functions(backend, channels):
+    sender, _ = channels
+    assert sender.set_tx_timing(0x123, 10) == ERROR_NOT_SUPPORTED
+    backend.inject_error('setTxTiming', ERROR_NONE)
+    assert sender.set_tx_timing(0x123, 10) == ERROR_NONE
+    assert sender.set_tx_timing(0x123, 10) == ERROR_NOT_SUPPORTED
+    backend.inject_error('setTxMode', ERROR_NONE)
+    assert sender.set_tx_mode(TxMode.QUEUE_SEND) == ERROR_NONE
+    backend.inject_error('setCustomBaudRate', ERROR_TIMEOUT)
+    assert backend.setCustomBaudRate(sender._chn_pointer, None) == ERROR_TIMEOUT
+    assert backend.setCustomBaudRate(sender._chn_pointer, None) == ERROR_NOT_SUPPORTED